@@ -1,11 +1,20 @@
 """API simplificada usada nos testes."""
 
-from fastapi import FastAPI, HTTPException
+import os
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, JSONResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, List
+from typing import Any, Optional, Dict, List
 
-from llm_bench_local.core.benchmark import Benchmark
-from llm_bench_local.persistence.crud import BenchmarkRepository
+from llm_bench_local.core.jobs import get_job_queue
+from llm_bench_local.core.metrics import OPENMETRICS_CONTENT_TYPE, TEXT_CONTENT_TYPE, scrape
+from llm_bench_local.core.model import preload_models
+from llm_bench_local.core.profiler import profile_path
+from llm_bench_local.core.scheduler import shutdown_schedulers
+from llm_bench_local.core.sweep import get_sweep
+from llm_bench_local.llm.engines import list_engines
+from llm_bench_local.persistence.crud import BenchmarkRepository, stop_writers
+from llm_bench_local.persistence.database import close_pools
 from llm_bench_local.config.settings import settings
 from llm_bench_local.api.routers import datasets
 
@@ -21,6 +30,25 @@ app.include_router(datasets.router, prefix="/api/v1")
 if rag is not None:
     app.include_router(rag.router, prefix="/api/v1")
 
+@app.on_event("startup")
+async def preload_configured_models():
+    """Carrega no pool os modelos listados em ``PRELOAD_MODELS``."""
+    if settings.PRELOAD_MODELS:
+        preload_models(settings.PRELOAD_MODELS, use_gpu=settings.USE_GPU)
+
+@app.on_event("startup")
+async def start_job_workers():
+    """Inicia os workers e retoma os jobs pendentes da fila persistente."""
+    get_job_queue().start()
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    """Encerra os workers da fila, as threads de continuous batching e as conexões."""
+    get_job_queue().stop(timeout=5.0)
+    shutdown_schedulers()
+    stop_writers()
+    close_pools()
+
 class RunRequest(BaseModel):
     model_id: str
     prompt: str
@@ -29,25 +57,92 @@ class RunRequest(BaseModel):
     temperature: float = 0.7
     top_p: float = 0.9
     use_gpu: bool = True
+    prompts: Optional[List[str]] = None
+    max_batch_size: Optional[int] = None
+    max_batch_tokens: Optional[int] = None
+    continuous_batching: bool = False
+    profile: bool = False
+    trace_memory: bool = False
+    engines: Optional[List[str]] = None
+    engine_options: Optional[Dict[str, Dict]] = None
+    warmup_runs: int = 0
+    trials: int = 1
+    target_precision: Optional[float] = None
+    precision_metric: str = "latency_s"
+    max_trials: Optional[int] = None
+    max_duration_s: Optional[float] = None
+
+class SweepRequest(BaseModel):
+    model_id: str
+    prompt: str
+    space: Dict[str, Any]
+    strategy: str = "grid"
+    samples: Optional[int] = None
+    seed: int = 0
+    task: str = "text-generation"
+    use_gpu: bool = True
+    options: Optional[Dict[str, Any]] = None
 
 @app.get("/api/v1/health")
 async def health_check():
     return {"status": "ok", "version": "1.0.0"}
 
-@app.post("/api/v1/benchmarks/run")
+@app.post("/api/v1/benchmarks/run", status_code=202)
 async def run_benchmark(req: RunRequest):
-    bench = Benchmark(
-        model_id=req.model_id,
-        prompt=req.prompt,
-        task=req.task,
-        max_tokens=req.max_tokens,
-        temperature=req.temperature,
-        top_p=req.top_p,
-        use_gpu=req.use_gpu,
-    )
-    result = bench.execute()
-    repo.update_benchmark_status(bench.job_id, "COMPLETED", result)
-    return {"job_id": bench.job_id, **result}
+    try:
+        job_id = get_job_queue().submit(
+            model_id=req.model_id,
+            prompt=req.prompt,
+            task=req.task,
+            max_tokens=req.max_tokens,
+            temperature=req.temperature,
+            top_p=req.top_p,
+            use_gpu=req.use_gpu,
+            prompts=req.prompts,
+            max_batch_size=req.max_batch_size,
+            max_batch_tokens=req.max_batch_tokens,
+            continuous_batching=req.continuous_batching,
+            profile=req.profile,
+            trace_memory=req.trace_memory,
+            engines=req.engines,
+            engine_options=req.engine_options,
+            warmup_runs=req.warmup_runs,
+            trials=req.trials,
+            target_precision=req.target_precision,
+            precision_metric=req.precision_metric,
+            max_trials=req.max_trials,
+            max_duration_s=req.max_duration_s,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    # A execução acontece nos workers; o progresso é consultado via GET
+    return {"job_id": job_id, "status": "PENDING"}
+
+@app.post("/api/v1/sweeps", status_code=202)
+async def run_sweep(req: SweepRequest):
+    """Enfileira uma varredura de parâmetros (células como benchmarks filhos)."""
+    try:
+        sweep_id = get_job_queue().submit_sweep(**req.model_dump())
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"job_id": sweep_id, "status": "PENDING"}
+
+@app.get("/api/v1/sweeps/{sweep_id}")
+async def get_sweep_status(
+    sweep_id: str,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
+    try:
+        sweep = get_sweep(repo, sweep_id, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if sweep is None:
+        raise HTTPException(status_code=404, detail="Varredura não encontrada")
+    if sweep["next_cursor"]:
+        response.headers["X-Next-Cursor"] = sweep["next_cursor"]
+    return sweep
 
 @app.get("/api/v1/benchmarks/{job_id}")
 async def get_benchmark(job_id: str):
@@ -56,17 +151,66 @@ async def get_benchmark(job_id: str):
         raise HTTPException(status_code=404, detail="Benchmark não encontrado")
     return bench
 
+@app.get("/api/v1/benchmarks/{job_id}/trace")
+async def get_benchmark_trace(job_id: str):
+    """Trace da execução no formato Chrome trace-event (Perfetto)."""
+    trace = repo.get_trace(job_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace não encontrado")
+    return JSONResponse(
+        trace,
+        headers={"Content-Disposition": f'attachment; filename="{job_id}.trace.json"'}
+    )
+
+@app.get("/api/v1/benchmarks/{job_id}/profile")
+async def get_benchmark_profile(job_id: str):
+    """Perfil da execução em collapsed stacks (flamegraph.pl, speedscope)."""
+    path = profile_path(job_id)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    return FileResponse(path, media_type="text/plain", filename=f"{job_id}.folded")
+
 @app.get("/api/v1/benchmarks")
-async def list_benchmarks():
-    return repo.list_benchmarks()
+async def list_benchmarks(
+    response: Response,
+    limit: int = Query(10, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    model_id: Optional[str] = None,
+    summary: bool = False
+):
+    try:
+        benchmarks = repo.list_benchmarks(
+            limit=limit, status=status, model_id=model_id, cursor=cursor, summary=summary
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    next_cursor = repo.next_cursor(benchmarks, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return benchmarks
 
 @app.get("/api/v1/models")
 async def get_models() -> List[str]:
     return settings.get_available_models()
 
+@app.get("/api/v1/engines")
+async def get_engines() -> List[Dict]:
+    """Motores de inferência registrados, com capacidades e opções."""
+    return list_engines()
+
 @app.get("/api/v1/hardware/metrics/{job_id}")
 async def get_hw_metrics(job_id: str):
     metrics = repo.get_hardware_metrics(job_id)
     if metrics is None:
         raise HTTPException(status_code=404, detail="Métricas não encontradas")
     return metrics
+
+@app.get("/api/v1/metrics")
+def get_metrics(request: Request):
+    """Exposição das métricas para o Prometheus (OpenMetrics com exemplares)."""
+    openmetrics = "application/openmetrics-text" in request.headers.get("accept", "")
+    return Response(
+        scrape(repo, openmetrics),
+        media_type=OPENMETRICS_CONTENT_TYPE if openmetrics else TEXT_CONTENT_TYPE
+    )
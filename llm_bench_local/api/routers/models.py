@@ -4,7 +4,6 @@ Router para endpoints de modelos.
 
 from typing import List
 from fastapi import APIRouter, HTTPException
-from transformers import AutoModelForCausalLM, AutoTokenizer
 import os
 
 from llm_bench_local.config.settings import settings
@@ -66,10 +65,12 @@ async def get_model_info(model_id: str):
         
         # Tenta carregar informações do Hugging Face
         try:
-            config = AutoModelForCausalLM.from_pretrained(
+            from transformers import AutoConfig
+
+            config = AutoConfig.from_pretrained(
                 model_id,
                 trust_remote_code=True
-            ).config
+            )
             
             return {
                 "id": model_id,
@@ -1,8 +1,14 @@
-from typing import Dict, List, Optional
-from fastapi import APIRouter, HTTPException
+import os
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, JSONResponse
 from pydantic import BaseModel
 
-from llm_bench_local.core.benchmark import Benchmark
+from llm_bench_local.core.jobs import get_job_queue
+from llm_bench_local.core.metrics import OPENMETRICS_CONTENT_TYPE, TEXT_CONTENT_TYPE, scrape
+from llm_bench_local.core.profiler import profile_path
+from llm_bench_local.core.sweep import get_sweep
+from llm_bench_local.llm.engines import list_engines
 from llm_bench_local.config.settings import settings
 from llm_bench_local.persistence.crud import BenchmarkRepository
 
@@ -17,15 +23,35 @@ class BenchmarkRequest(BaseModel):
     temperature: float = 0.7
     top_p: float = 0.9
     use_gpu: bool = True
+    prompts: Optional[List[str]] = None
+    max_batch_size: Optional[int] = None
+    max_batch_tokens: Optional[int] = None
+    continuous_batching: bool = False
+    profile: bool = False
+    trace_memory: bool = False
+    engines: Optional[List[str]] = None
+    engine_options: Optional[Dict[str, Dict]] = None
+    warmup_runs: int = 0
+    trials: int = 1
+    target_precision: Optional[float] = None
+    precision_metric: str = "latency_s"
+    max_trials: Optional[int] = None
+    max_duration_s: Optional[float] = None
 
-class BenchmarkResponse(BaseModel):
+class SweepRequest(BaseModel):
+    model_id: str
+    prompt: str
+    space: Dict[str, Any]
+    strategy: str = "grid"
+    samples: Optional[int] = None
+    seed: int = 0
+    task: str = "text-generation"
+    use_gpu: bool = True
+    options: Optional[Dict[str, Any]] = None
+
+class JobResponse(BaseModel):
     job_id: str
-    model: str
-    task: str
-    duration: float
-    tokens_generated: int
-    output: str
-    hardware_metrics: Dict
+    status: str
 
 @router.get("/health")
 async def health_check():
@@ -35,28 +61,74 @@ async def health_check():
         "version": "1.0.0"
     }
 
-@router.post("/benchmarks/run", response_model=BenchmarkResponse)
+@router.post("/benchmarks/run", response_model=JobResponse, status_code=202)
 async def run_benchmark(request: BenchmarkRequest):
-    """Executa um novo benchmark."""
+    """Enfileira um novo benchmark e retorna o job_id imediatamente."""
     try:
-        benchmark = Benchmark(
+        job_id = get_job_queue().submit(
             model_id=request.model_id,
             prompt=request.prompt,
             task=request.task,
             max_tokens=request.max_tokens,
             temperature=request.temperature,
             top_p=request.top_p,
-            use_gpu=request.use_gpu
-        )
-        
-        results = benchmark.execute()
-        return BenchmarkResponse(
-            job_id=benchmark.job_id,
-            **results
+            use_gpu=request.use_gpu,
+            prompts=request.prompts,
+            max_batch_size=request.max_batch_size,
+            max_batch_tokens=request.max_batch_tokens,
+            continuous_batching=request.continuous_batching,
+            profile=request.profile,
+            trace_memory=request.trace_memory,
+            engines=request.engines,
+            engine_options=request.engine_options,
+            warmup_runs=request.warmup_runs,
+            trials=request.trials,
+            target_precision=request.target_precision,
+            precision_metric=request.precision_metric,
+            max_trials=request.max_trials,
+            max_duration_s=request.max_duration_s
         )
+        return JobResponse(job_id=job_id, status="PENDING")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/sweeps", response_model=JobResponse, status_code=202)
+async def run_sweep(request: SweepRequest):
+    """Enfileira uma varredura de parâmetros.
+
+    As células rodam em sequência em um único worker, com o modelo
+    carregado uma vez, e ficam registradas como benchmarks filhos.
+    """
+    try:
+        sweep_id = get_job_queue().submit_sweep(**request.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JobResponse(job_id=sweep_id, status="PENDING")
+
+@router.get("/sweeps/{sweep_id}")
+async def get_sweep_status(
+    sweep_id: str,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
+    """Retorna o progresso de uma varredura e uma página dos benchmarks filhos.
+
+    A página seguinte de filhos é obtida com o cursor de ``X-Next-Cursor``.
+    """
+    repository.flush()
+    try:
+        sweep = get_sweep(repository, sweep_id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if sweep is None:
+        raise HTTPException(status_code=404, detail="Varredura não encontrada")
+    if sweep["next_cursor"]:
+        response.headers["X-Next-Cursor"] = sweep["next_cursor"]
+    return sweep
+
 @router.get("/benchmarks/{job_id}")
 async def get_benchmark(job_id: str):
     """Retorna os resultados de um benchmark específico."""
@@ -65,20 +137,75 @@ async def get_benchmark(job_id: str):
         raise HTTPException(status_code=404, detail="Benchmark não encontrado")
     return benchmark
 
+@router.get("/benchmarks/{job_id}/trace")
+async def get_benchmark_trace(job_id: str):
+    """Retorna o trace da execução no formato Chrome trace-event.
+
+    O arquivo pode ser aberto no Perfetto (ui.perfetto.dev) ou em
+    chrome://tracing para ver a duração de cada fase do benchmark.
+    """
+    trace = repository.get_trace(job_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace não encontrado")
+    return JSONResponse(
+        trace,
+        headers={"Content-Disposition": f'attachment; filename="{job_id}.trace.json"'}
+    )
+
+@router.get("/benchmarks/{job_id}/profile")
+async def get_benchmark_profile(job_id: str):
+    """Retorna o perfil de um job executado com ``profile=true``.
+
+    O arquivo está no formato collapsed stack, aceito por flamegraph.pl,
+    speedscope e Perfetto.
+    """
+    path = profile_path(job_id)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    return FileResponse(path, media_type="text/plain", filename=f"{job_id}.folded")
+
 @router.get("/benchmarks")
 async def list_benchmarks(
-    limit: int = 10,
+    response: Response,
+    limit: int = Query(10, ge=1, le=1000),
     offset: int = 0,
-    status: Optional[str] = None
+    status: Optional[str] = None,
+    model_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    summary: bool = False
 ):
-    """Lista benchmarks com paginação e filtro opcional por status."""
-    return repository.list_benchmarks(limit, offset, status)
+    """Lista benchmarks com paginação e filtros opcionais.
+    
+    Para paginar tabelas grandes, use o cursor retornado no cabeçalho
+    ``X-Next-Cursor`` em vez de ``offset``; ``summary=true`` retorna apenas
+    os campos de resumo, sem os resultados completos.
+    """
+    try:
+        benchmarks = repository.list_benchmarks(
+            limit, offset, status, model_id=model_id, cursor=cursor, summary=summary
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    next_cursor = repository.next_cursor(benchmarks, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return benchmarks
 
 @router.get("/models")
 async def get_models():
     """Retorna a lista de modelos disponíveis."""
     return settings.get_available_models()
 
+@router.get("/engines")
+async def get_engines():
+    """Retorna os motores de inferência registrados.
+
+    Cada motor informa se está instalado, suas capacidades (streaming,
+    lotes, reuso de KV cache, quantizações), as opções de carga e os
+    parâmetros de geração aceitos em ``engine_options``.
+    """
+    return list_engines()
+
 @router.get("/hardware/metrics/{job_id}")
 async def get_hardware_metrics(job_id: str):
     """Retorna as métricas de hardware de um benchmark."""
@@ -88,4 +215,13 @@ async def get_hardware_metrics(job_id: str):
             status_code=404,
             detail="Métricas de hardware não encontradas"
         )
-    return metrics 
\ No newline at end of file
+    return metrics 
+
+@router.get("/metrics")
+def get_metrics(request: Request):
+    """Exposição das métricas para o Prometheus (OpenMetrics com exemplares)."""
+    openmetrics = "application/openmetrics-text" in request.headers.get("accept", "")
+    return Response(
+        scrape(repository, openmetrics),
+        media_type=OPENMETRICS_CONTENT_TYPE if openmetrics else TEXT_CONTENT_TYPE
+    )
@@ -2,7 +2,7 @@
 Configurações da aplicação usando Pydantic Settings.
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
 import json
@@ -18,16 +18,32 @@ class Settings(BaseSettings):
     API_WORKERS: int = 1
     API_RELOAD: bool = True
 
+    # Jobs
+    JOB_WORKERS: int = 1
+    JOB_WORKER_MODE: str = "thread"  # thread ou process
+    JOB_POLL_INTERVAL: float = 0.5
+
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
+    # Diretório de dados (banco, datasets e cache); padrão: ``data/`` do projeto.
+    # O catálogo de modelos (``data/models/config.json``) continua no projeto
+    DATA_DIR: Optional[str] = None
+
     # Database
     DATABASE_URL: str = "sqlite:///./data/db/benchmarks.db"
+    DB_BUSY_TIMEOUT_MS: int = 5000
+    DB_SYNCHRONOUS: str = "NORMAL"  # OFF, NORMAL, FULL ou EXTRA
+    DB_CACHED_STATEMENTS: int = 256
+    DB_WRITE_BEHIND: bool = True
+    DB_WRITE_FLUSH_MS: int = 200
+    DB_WRITE_BATCH_ROWS: int = 500
 
     # Models
     MODEL_CACHE_DIR: str = "./data/models"
     DEFAULT_MODEL: str = "mistralai/Mistral-7B-Instruct-v0.1"
+    PRELOAD_MODELS: List[str] = []
 
     # Hardware
     USE_GPU: bool = True
@@ -38,6 +54,34 @@ class Settings(BaseSettings):
     DEFAULT_MAX_TOKENS: int = 100
     DEFAULT_TEMPERATURE: float = 0.7
     DEFAULT_TOP_P: float = 0.95
+    MAX_BATCH_SIZE: int = 8
+    MAX_BATCH_TOKENS: int = 8192
+
+    # Monitoramento de hardware
+    MONITOR_INTERVAL: float = 1.0
+    MONITOR_BUFFER_SIZE: int = 16384
+    MONITOR_SPILL: bool = False
+
+    # Locais de alocação reportados por fase (benchmarks com ``trace_memory=True``)
+    MEMORY_TOP_ALLOCATIONS: int = 10
+
+    # Profiler por amostragem (benchmarks com ``profile=True``)
+    PROFILE_INTERVAL_MS: float = 5.0
+
+    # Intervalo de confiança das tentativas (``trials > 1``): Student abaixo
+    # de ``BOOTSTRAP_MIN_SAMPLES`` tentativas, bootstrap a partir daí
+    BOOTSTRAP_RESAMPLES: int = 1000
+    BOOTSTRAP_CONFIDENCE: float = 0.95
+    BOOTSTRAP_MIN_SAMPLES: int = 30
+
+    # Tentativas adaptativas (``target_precision``): mínimo e limites padrão
+    ADAPTIVE_MIN_TRIALS: int = 3
+    ADAPTIVE_MAX_TRIALS: int = 50
+    ADAPTIVE_MAX_DURATION_S: float = 600.0
+
+    # Métricas do Prometheus (diretório compartilhado pelos workers da API)
+    METRICS_DIR: Optional[str] = None
+    METRICS_PERSIST_INTERVAL_S: float = 1.0
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -49,8 +93,10 @@ class Settings(BaseSettings):
     def __init__(self, **data):
         super().__init__(**data)
         object.__setattr__(self, "base_dir", Path(__file__).parent.parent.parent)
-        object.__setattr__(self, "data_dir", self.base_dir / "data")
-        object.__setattr__(self, "models_dir", self.data_dir / "models")
+        object.__setattr__(
+            self, "data_dir", Path(self.DATA_DIR) if self.DATA_DIR else self.base_dir / "data"
+        )
+        object.__setattr__(self, "models_dir", self.base_dir / "data" / "models")
         object.__setattr__(self, "db_dir", self.data_dir / "db")
         object.__setattr__(self, "datasets_dir", self.data_dir / "datasets")
 
@@ -63,7 +109,7 @@ class Settings(BaseSettings):
         # Configurações de hardware
         self.default_hardware_options = {
             "use_gpu": True,
-            "monitor_interval": 1.0,  # segundos
+            "monitor_interval": self.MONITOR_INTERVAL,  # segundos
             "max_memory_usage": 0.9,  # 90% da memória disponível
             "max_gpu_memory_usage": 0.9,  # 90% da VRAM disponível
         }
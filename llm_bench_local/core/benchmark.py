@@ -4,83 +4,307 @@ from typing import Dict, Optional, List
 from datetime import datetime
 
 from llm_bench_local.config.settings import settings
-from llm_bench_local.hardware.monitor import HardwareMonitor
+from llm_bench_local.hardware.memory import MemoryTracker
+from llm_bench_local.hardware.monitor import HardwareMetrics, HardwareMonitor
 from llm_bench_local.persistence.crud import BenchmarkRepository
+from llm_bench_local.core.metrics import record_job
 from llm_bench_local.core.model import ModelRunner
+from llm_bench_local.core.profiler import SamplingProfiler, profile_path
+from llm_bench_local.core.scheduler import get_scheduler
+from llm_bench_local.core.stats import relative_ci_width, summarize
+from llm_bench_local.core.timing import TokenTimer, throughput
+from llm_bench_local.core.tracing import Trace, span, start_trace
+from llm_bench_local.llm.engines import get_engine
+from llm_bench_local.llm.runner import LLMRunner
+from llm_bench_local.schemas.benchmark import BenchmarkConfig, HardwareOptions
+
+# Métricas resumidas entre tentativas: nome no resumo -> chave do resultado
+TRIAL_METRICS = {
+    "latency_s": "duration",
+    "time_to_first_token_s": "time_to_first_token_s",
+    "tokens_per_second": "tokens_per_second",
+}
 
 class Benchmark:
     def __init__(self, model_id: str, prompt: str, task: str = "text-generation",
                  max_tokens: Optional[int] = None, temperature: float = 0.7,
-                 top_p: float = 0.9, use_gpu: bool = True):
-        """Inicializa um novo benchmark."""
-        self.job_id = str(uuid.uuid4())
+                 top_p: float = 0.9, use_gpu: bool = True,
+                 prompts: Optional[List[str]] = None,
+                 max_batch_size: Optional[int] = None,
+                 max_batch_tokens: Optional[int] = None,
+                 continuous_batching: bool = False,
+                 profile: bool = False,
+                 trace_memory: bool = False,
+                 engines: Optional[List[str]] = None,
+                 engine_options: Optional[Dict[str, Dict]] = None,
+                 warmup_runs: int = 0,
+                 trials: int = 1,
+                 target_precision: Optional[float] = None,
+                 precision_metric: str = "latency_s",
+                 max_trials: Optional[int] = None,
+                 max_duration_s: Optional[float] = None,
+                 parent_id: Optional[str] = None,
+                 job_id: Optional[str] = None):
+        """Inicializa um novo benchmark.
+
+        O pico de memória (RSS) de cada fase é sempre medido. Com mais de
+        uma execução, os resultados trazem a distribuição de cada métrica
+        em ``results["trials"]``.
+
+        Args:
+            model_id: ID do modelo configurado
+            prompt: Prompt de entrada
+            task: Tarefa do benchmark
+            max_tokens: Tokens gerados (padrão: configuração do modelo)
+            temperature: Temperatura para sampling
+            top_p: Top-p para sampling
+            use_gpu: Se deve usar GPU
+            prompts: Executa uma geração em lote e reporta a vazão agregada
+                e por sequência
+            max_batch_size: Sequências por lote da geração em lote
+            max_batch_tokens: Orçamento de tokens por lote da geração em lote
+            continuous_batching: Envia o prompt ao escalonador compartilhado
+                do modelo, disputando o lote com as demais requisições
+            profile: Amostra a execução com um profiler de pilhas e salva o
+                perfil em ``profile_path(job_id)``
+            trace_memory: Acrescenta o heap Python e os locais de alocação
+                via tracemalloc
+            engines: Executa o mesmo prompt em cada motor de inferência
+                listado (``llm_bench_local.llm.engines``)
+            engine_options: Opções por motor; a chave ``model_id`` troca o
+                modelo por outro modelo configurado (ex: o GGUF equivalente)
+            warmup_runs: Execuções descartadas antes das medidas
+            trials: Execuções medidas, com o modelo já carregado
+            target_precision: Torna o número de execuções adaptativo: elas
+                continuam até a largura relativa do intervalo de confiança
+                de ``precision_metric`` ficar abaixo deste alvo
+            precision_metric: Métrica usada por ``target_precision``
+            max_trials: Limite de execuções do modo adaptativo
+            max_duration_s: Limite de tempo do modo adaptativo
+            parent_id: Registra o benchmark como célula de uma varredura
+            job_id: Benchmark já registrado no banco (fila de jobs)
+
+        Raises:
+            ValueError: Se os motores ou as opções de motor forem inválidos
+        """
+        self.job_id = job_id or str(uuid.uuid4())
+        self.parent_id = parent_id
+        self._persisted = job_id is not None
+        self._started: Optional[float] = None
         self.model_id = model_id
         self.prompt = prompt
+        self.prompts = prompts
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.continuous_batching = continuous_batching
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.engines = engines
+        self.engine_options = engine_options or {}
+        if trials < 1 or warmup_runs < 0:
+            raise ValueError("trials deve ser >= 1 e warmup_runs >= 0")
+        if precision_metric not in TRIAL_METRICS:
+            choices = ", ".join(TRIAL_METRICS)
+            raise ValueError(f"Métrica inválida: {precision_metric} (use {choices})")
+        if target_precision is not None and target_precision <= 0:
+            raise ValueError("target_precision deve ser maior que zero")
+        self.warmup_runs = warmup_runs
+        self.trials = trials
+        self.target_precision = target_precision
+        self.precision_metric = precision_metric
+        self.max_trials = max_trials or settings.ADAPTIVE_MAX_TRIALS
+        self.max_duration_s = max_duration_s or settings.ADAPTIVE_MAX_DURATION_S
+        self._model_loaded = False
         self.task = task
         self.max_tokens = max_tokens
         self.temperature = temperature
         self.top_p = top_p
         self.use_gpu = use_gpu
         
+        # Configurações de hardware
+        self.hardware_options = settings.default_hardware_options.copy()
+        self.hardware_options["use_gpu"] = use_gpu
+        
         # Inicializa componentes
         self.model_runner = ModelRunner(model_id)
-        self.hardware_monitor = HardwareMonitor()
-        self.repository = BenchmarkRepository(settings.db_path)
+        self.memory_tracker = MemoryTracker(
+            trace_python=trace_memory, top_n=settings.MEMORY_TOP_ALLOCATIONS
+        )
+        self.hardware_monitor = HardwareMonitor(
+            interval=self.hardware_options["monitor_interval"],
+            on_sample=self._save_sample,
+            spill_path=(
+                str(settings.cache_dir / "metrics" / f"{self.job_id}.f64")
+                if settings.MONITOR_SPILL else None
+            )
+        )
+        self.repository = BenchmarkRepository(
+            settings.db_path, write_behind=settings.DB_WRITE_BEHIND
+        )
         
         # Configurações do modelo
         self.model_config = settings.get_model_config(model_id)
         if not self.model_config:
             raise ValueError(f"Modelo {model_id} não encontrado na configuração")
-        
-        # Configurações de hardware
-        self.hardware_options = settings.default_hardware_options.copy()
-        self.hardware_options["use_gpu"] = use_gpu
+        self._validate_engine_options()
+
+    def _validate_engine_options(self) -> None:
+        """Valida motores e opções no envio, antes de o job entrar na fila.
+
+        Raises:
+            ValueError: Se um motor, uma opção ou o modelo alternativo não
+                existir, ou se um valor for inválido
+        """
+        unknown = set(self.engine_options) - set(self.engines or [])
+        if unknown:
+            names = ", ".join(sorted(unknown))
+            raise ValueError(f"engine_options para motores não selecionados: {names}")
+        for name in self.engines or []:
+            engine = get_engine(name)
+            options = dict(self.engine_options.get(name, {}))
+            self._engine_model_path(options)
+            engine.resolve_options(options)
+
+    def _engine_model_path(self, options: Dict) -> str:
+        """Remove ``model_id`` de ``options`` e retorna o caminho do modelo.
+
+        ``model_id`` nomeia outro modelo configurado (ex: o GGUF equivalente
+        para o llama.cpp); caminhos e repositórios arbitrários não são aceitos.
+
+        Raises:
+            ValueError: Se o modelo não estiver na configuração
+        """
+        alias = options.pop("model_id", None)
+        if alias is None:
+            return self.model_config["model_id"]
+        config = settings.get_model_config(alias) if isinstance(alias, str) else None
+        if not config:
+            raise ValueError(f"Modelo {alias} não encontrado na configuração")
+        return config["model_id"]
+
+    @classmethod
+    def from_record(cls, record: Dict) -> "Benchmark":
+        """Reconstrói um benchmark a partir do registro salvo pela fila de jobs."""
+        config = record["config"]
+        return cls(
+            model_id=record["model_id"],
+            prompt=config.get("prompt", ""),
+            task=record["task"],
+            max_tokens=config.get("max_tokens"),
+            temperature=config.get("temperature", 0.7),
+            top_p=config.get("top_p", 0.9),
+            use_gpu=record["hardware_options"].get("use_gpu", True),
+            prompts=config.get("prompts"),
+            max_batch_size=config.get("max_batch_size"),
+            max_batch_tokens=config.get("max_batch_tokens"),
+            continuous_batching=config.get("continuous_batching", False),
+            profile=config.get("profile", False),
+            trace_memory=config.get("trace_memory", False),
+            engines=config.get("engines"),
+            engine_options=config.get("engine_options"),
+            warmup_runs=config.get("warmup_runs", 0),
+            trials=config.get("trials", 1),
+            target_precision=config.get("target_precision"),
+            precision_metric=config.get("precision_metric", "latency_s"),
+            max_trials=config.get("max_trials"),
+            max_duration_s=config.get("max_duration_s"),
+            job_id=record["job_id"]
+        )
+
+    def _config(self) -> Dict:
+        """Parâmetros persistidos com o job, suficientes para reexecutá-lo."""
+        return {
+            "prompt": self.prompt,
+            "prompts": self.prompts,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "batch_size": len(self.prompts) if self.prompts else 1,
+            "max_batch_size": self.max_batch_size,
+            "max_batch_tokens": self.max_batch_tokens,
+            "continuous_batching": self.continuous_batching,
+            "profile": self.profile,
+            "trace_memory": self.trace_memory,
+            "engines": self.engines,
+            "engine_options": self.engine_options,
+            "warmup_runs": self.warmup_runs,
+            "trials": self.trials,
+            "target_precision": self.target_precision,
+            "precision_metric": self.precision_metric,
+            "max_trials": self.max_trials,
+            "max_duration_s": self.max_duration_s
+        }
+
+    def _save_sample(self, sample: HardwareMetrics) -> None:
+        """Persiste uma amostra do monitor na série temporal do job."""
+        self.repository.save_hardware_metrics(self.job_id, sample.to_dict())
+
+    def submit(self) -> str:
+        """Registra o benchmark como PENDING sem executá-lo."""
+        self.repository.create_benchmark(
+            self.job_id,
+            self.model_id,
+            self.task,
+            self._config(),
+            self.hardware_options,
+            parent_id=self.parent_id
+        )
+        # O job precisa estar visível para os workers antes de retornar
+        self.repository.flush()
+        self._persisted = True
+        return self.job_id
 
     def execute(self) -> Dict:
-        """Executa o benchmark e retorna os resultados."""
+        """Executa o benchmark e retorna os resultados.
+
+        A execução é registrada em um trace: a duração de cada fase é
+        salva em ``results["phases"]`` e o trace completo fica disponível
+        em ``repository.get_trace`` no formato Chrome trace-event.
+        """
+        with start_trace(self.job_id) as trace:
+            try:
+                return self._execute(trace)
+            finally:
+                # O trace e as escritas em segundo plano (amostras, status)
+                # são confirmados antes de retornar
+                self.repository.save_trace(self.job_id, trace.to_chrome())
+                self.repository.flush()
+
+    def _execute(self, trace: Trace) -> Dict:
+        profiler = None
         try:
             # Salva o benchmark no banco de dados
-            self.repository.create_benchmark(
-                self.job_id,
-                self.model_id,
-                self.task,
-                {
-                    "max_tokens": self.max_tokens,
-                    "temperature": self.temperature,
-                    "top_p": self.top_p
-                },
-                self.hardware_options
-            )
+            if not self._persisted:
+                self.submit()
+            # Início da execução no relógio do servidor: com ``created_at``
+            # dá a espera na fila
+            started_at = datetime.utcnow().isoformat()
+            self._started = time.perf_counter()
             
-            # Inicia o monitoramento de hardware
-            self.hardware_monitor.start_monitoring()
+            if self.profile:
+                profiler = SamplingProfiler(settings.PROFILE_INTERVAL_MS / 1000)
+                # Com continuous batching a geração roda na thread do escalonador
+                profiler.start(all_threads=self.continuous_batching)
+            self.memory_tracker.start()
             
-            # Executa o modelo
-            start_time = time.time()
-            output = self.model_runner.generate(
-                self.prompt,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                top_p=self.top_p,
-                use_gpu=self.use_gpu
-            )
-            end_time = time.time()
+            # Inicia o monitoramento de hardware
+            with span("monitor.start", "hardware"):
+                self.hardware_monitor.start_monitoring()
             
-            # Para o monitoramento e obtém métricas
-            hardware_metrics = self.hardware_monitor.stop_monitoring()
+            # Executa o modelo (aquecimento + tentativas)
+            with span("run", mode=self._mode()):
+                results = self._run_trials()
             
-            # Calcula resultados
-            duration = end_time - start_time
-            tokens_generated = len(output.split())
+            results["memory"] = self.memory_tracker.finish()
             
-            results = {
-                "model": self.model_id,
-                "task": self.task,
-                "duration": duration,
-                "tokens_generated": tokens_generated,
-                "output": output,
-                "hardware_metrics": hardware_metrics
-            }
+            # Para o monitoramento e obtém métricas
+            with span("monitor.stop", "hardware"):
+                results["hardware_metrics"] = self.hardware_monitor.stop_monitoring()
+            if profiler is not None:
+                results["profile"] = self._save_profile(profiler)
+            results["persistence"] = self.repository.writer_stats()
+            results["phases"] = trace.phase_durations()
+            results["started_at"] = started_at
             
             # Atualiza o benchmark no banco de dados
             self.repository.update_benchmark_status(
@@ -88,22 +312,354 @@ class Benchmark:
                 "COMPLETED",
                 results
             )
+            record_job(self.model_id, self.task, self.job_id, "COMPLETED", results)
             
             return results
             
         except Exception as e:
-            # Em caso de erro, atualiza o status do benchmark
+            # Garante que a thread de amostragem não continue rodando
+            self.hardware_monitor.stop_monitoring()
+            self.memory_tracker.finish()
+            
+            # Em caso de erro, atualiza o status do benchmark; o perfil
+            # parcial também é salvo, já que é justamente o que se quer ver
+            failure = {"error": str(e)}
+            if profiler is not None:
+                failure["profile"] = self._save_profile(profiler)
             self.repository.update_benchmark_status(
                 self.job_id,
                 "FAILED",
-                {"error": str(e)}
+                failure
             )
+            record_job(self.model_id, self.task, self.job_id, "FAILED")
             raise
 
+    def _save_profile(self, profiler: SamplingProfiler) -> Dict:
+        """Encerra o profiler, grava as pilhas e retorna o resumo da captura."""
+        profiler.stop()
+        path = profile_path(self.job_id)
+        profiler.write(path)
+        return {"path": path, **profiler.stats()}
+
+    def _mode(self) -> str:
+        """Modo de execução registrado no trace."""
+        if self.engines:
+            return "engines"
+        if self.prompts:
+            return "batch"
+        return "continuous" if self.continuous_batching else "single"
+
+    def _run_once(self) -> Dict:
+        """Uma execução no modo configurado (lote, motores ou prompt único)."""
+        if self.engines:
+            return self._run_engines()
+        if self.prompts:
+            return self._run_batch()
+        if self.continuous_batching:
+            return self._run_scheduled()
+        return self._run_single()
+
+    def _run_trials(self) -> Dict:
+        """Executa o aquecimento e as tentativas e resume as métricas.
+
+        Os campos de nível superior vêm da tentativa de duração mediana; os
+        vetores de cada métrica por tentativa ficam em ``trials["raw"]``.
+        """
+        if self.trials == 1 and not self.warmup_runs and self.target_precision is None:
+            return self._run_once()
+
+        started = time.perf_counter()
+        for index in range(self.warmup_runs):
+            with span("warmup", index=index):
+                self._run_once()
+        runs = []
+        adaptive = None
+        if self.target_precision is None:
+            for index in range(self.trials):
+                with span("trial", index=index):
+                    runs.append(self._run_once())
+        else:
+            adaptive = self._run_adaptive(runs, started)
+
+        raw = {
+            name: [run.get(key) for run in runs]
+            for name, key in TRIAL_METRICS.items()
+        }
+        order = sorted(range(len(runs)), key=lambda i: runs[i]["duration"])
+        representative = order[(len(order) - 1) // 2]
+        results = dict(runs[representative])
+        results["trials"] = {
+            "count": len(runs),
+            "warmup_runs": self.warmup_runs,
+            "representative_trial": representative,
+            "summary": {
+                name: summarize(
+                    values,
+                    confidence=settings.BOOTSTRAP_CONFIDENCE,
+                    resamples=settings.BOOTSTRAP_RESAMPLES,
+                    min_bootstrap_samples=settings.BOOTSTRAP_MIN_SAMPLES
+                )
+                for name, values in raw.items()
+            },
+            "raw": raw,
+        }
+        if adaptive is not None:
+            results["trials"]["adaptive"] = adaptive
+        return results
+
+    def _run_adaptive(self, runs: List[Dict], started: float) -> Dict:
+        """Acrescenta tentativas a ``runs`` até atingir a precisão alvo.
+
+        A precisão é a largura relativa do intervalo de confiança da média,
+        ``(ci_high - ci_low) / média``, com o intervalo de Student enquanto
+        houver poucas tentativas (ver ``summarize``). O mínimo de tentativas
+        é ``trials`` (ao menos ``ADAPTIVE_MIN_TRIALS``). Uma tentativa só é
+        iniciada se a duração média das anteriores ainda couber em
+        ``max_duration_s``.
+
+        Returns:
+            Precisão alcançada e o motivo da parada
+        """
+        key = TRIAL_METRICS[self.precision_metric]
+        min_trials = min(
+            max(self.trials, settings.ADAPTIVE_MIN_TRIALS), self.max_trials
+        )
+        width = None
+        trial_s = 0.0
+        while True:
+            trial_start = time.perf_counter()
+            with span("trial", index=len(runs)):
+                runs.append(self._run_once())
+            trial_s += time.perf_counter() - trial_start
+            elapsed = time.perf_counter() - started
+
+            if len(runs) >= min_trials:
+                width = relative_ci_width(summarize(
+                    [run.get(key) for run in runs],
+                    confidence=settings.BOOTSTRAP_CONFIDENCE,
+                    resamples=settings.BOOTSTRAP_RESAMPLES,
+                    min_bootstrap_samples=settings.BOOTSTRAP_MIN_SAMPLES
+                ))
+                if width is not None and width <= self.target_precision:
+                    reason = "precision"
+                    break
+            if len(runs) >= self.max_trials:
+                reason = "max_trials"
+                break
+            # Não inicia uma tentativa que provavelmente estouraria o orçamento
+            if elapsed + trial_s / len(runs) > self.max_duration_s:
+                reason = "time_budget"
+                break
+
+        return {
+            "metric": self.precision_metric,
+            "target_relative_ci_width": self.target_precision,
+            "achieved_relative_ci_width": width,
+            "converged": reason == "precision",
+            "stop_reason": reason,
+            "max_trials": self.max_trials,
+            "max_duration_s": self.max_duration_s,
+            "elapsed_s": time.perf_counter() - started,
+        }
+
+    def _load_model(self) -> None:
+        """Carrega o modelo uma vez; as tentativas seguintes o reutilizam."""
+        if self._model_loaded:
+            return
+        self.memory_tracker.enter("model.load")
+        self.model_runner.load(use_gpu=self.use_gpu)
+        self._model_loaded = True
+
+    def _run_single(self) -> Dict:
+        """Executa um prompt em streaming, registrando o tempo de cada token."""
+        # Carrega o modelo antes de medir, para que ``duration`` não inclua a carga
+        self._load_model()
+        # O primeiro token marca o fim do prefill e o início do decode; dentro
+        # do laço cronometrado só o instante é anotado (ver ``MemoryTracker.mark``)
+        timer = TokenTimer(on_first_token=lambda: self.memory_tracker.mark("decode"))
+        self.memory_tracker.enter("prefill")
+        offset = self._generation_offset()
+        start_time = time.time()
+        generation = self.model_runner.complete(
+            self.prompt,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            top_p=self.top_p,
+            use_gpu=self.use_gpu,
+            timer=timer
+        )
+        end_time = time.time()
+        
+        # Calcula resultados a partir das contagens exatas de tokens
+        duration = end_time - start_time
+        timing = timer.summary()
+        
+        return {
+            "model": self.model_id,
+            "task": self.task,
+            "duration": duration,
+            "prompt_tokens": generation.prompt_tokens,
+            "completion_tokens": generation.completion_tokens,
+            "tokens_generated": generation.completion_tokens,
+            "output": generation.text,
+            "generation_offset_s": offset,
+            **timing,
+            **throughput(
+                generation.prompt_tokens,
+                generation.completion_tokens,
+                duration,
+                timing["time_to_first_token_s"]
+            )
+        }
+
+    def _run_batch(self) -> Dict:
+        """Executa os prompts em lote e calcula a vazão agregada e por sequência."""
+        self._load_model()
+        self.memory_tracker.enter("generate")
+        start_time = time.time()
+        generations = self.model_runner.generate_batch(
+            self.prompts,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            top_p=self.top_p,
+            use_gpu=self.use_gpu,
+            max_batch_size=self.max_batch_size,
+            max_batch_tokens=self.max_batch_tokens
+        )
+        duration = time.time() - start_time
+        
+        prompt_tokens = sum(g.prompt_tokens for g in generations)
+        completion_tokens = sum(g.completion_tokens for g in generations)
+        
+        return {
+            "model": self.model_id,
+            "task": self.task,
+            "duration": duration,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "tokens_generated": completion_tokens,
+            "outputs": [g.text for g in generations],
+            "tokens_per_second": completion_tokens / duration if duration > 0 else None,
+            "batch": {
+                "size": len(generations),
+                "aggregate_tokens_per_second": (
+                    completion_tokens / duration if duration > 0 else None
+                ),
+                "sequences": [
+                    {
+                        "prompt_tokens": g.prompt_tokens,
+                        "completion_tokens": g.completion_tokens,
+                        "duration": g.duration,
+                        "tokens_per_second": g.tokens_per_second,
+                    }
+                    for g in generations
+                ],
+            },
+        }
+
+    def _run_scheduled(self) -> Dict:
+        """Executa o prompt pelo escalonador de continuous batching."""
+        self.memory_tracker.enter("generate")
+        scheduler = get_scheduler(self.model_id, use_gpu=self.use_gpu)
+        offset = self._generation_offset()
+        result = scheduler.submit(
+            self.prompt,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            top_p=self.top_p
+        ).result()
+        
+        return {
+            "model": self.model_id,
+            "task": self.task,
+            "duration": result.latency_s,
+            "queue_wait_s": result.queue_wait_s,
+            "service_time_s": result.service_time_s,
+            "latency_s": result.latency_s,
+            "mean_batch_size": result.mean_batch_size,
+            "prompt_tokens": result.prompt_tokens,
+            "completion_tokens": result.completion_tokens,
+            "tokens_generated": result.completion_tokens,
+            "output": result.text,
+            "generation_offset_s": offset,
+            **result.timing,
+            **throughput(
+                result.prompt_tokens,
+                result.completion_tokens,
+                result.service_time_s,
+                result.timing["time_to_first_token_s"]
+            )
+        }
+
+    def _run_engines(self) -> Dict:
+        """Executa o prompt em cada motor, na ordem de ``engines``.
+
+        A falha de um motor é registrada no seu resultado sem interromper os
+        demais.
+        """
+        config = BenchmarkConfig(
+            prompt=self.prompt,
+            max_new_tokens=self.max_tokens or self.model_config.get("max_tokens", 1024),
+            temperature=self.temperature,
+            top_p=self.top_p
+        )
+        hardware = HardwareOptions(use_gpu=self.use_gpu)
+        per_engine: Dict[str, Dict] = {}
+        start_time = time.time()
+        for name in self.engines:
+            options = dict(self.engine_options.get(name, {}))
+            model_path = self._engine_model_path(options)
+            with span(f"engine.{name}", "engine", model_id=model_path):
+                try:
+                    runner = LLMRunner(
+                        model_path, hardware, engine=name, engine_options=options
+                    )
+                    self.memory_tracker.enter(f"{name}.load")
+                    load_start = time.time()
+                    runner.load_model()
+                    load_s = time.time() - load_start
+                    self.memory_tracker.enter(f"{name}.generate")
+                    offset = self._generation_offset()
+                    result = runner.generate(config)
+                    result["load_s"] = load_s
+                    result["generation_offset_s"] = offset
+                    result["model_path"] = model_path
+                except Exception as e:
+                    result = {"error": str(e), "model_path": model_path}
+            per_engine[name] = result
+        duration = time.time() - start_time
+
+        completed = {
+            name: result for name, result in per_engine.items()
+            if result.get("tokens_per_second") is not None
+        }
+        return {
+            "model": self.model_id,
+            "task": self.task,
+            "duration": duration,
+            "engines": per_engine,
+            "fastest_engine": (
+                max(completed, key=lambda name: completed[name]["tokens_per_second"])
+                if completed else None
+            ),
+        }
+
+    def _generation_offset(self) -> Optional[float]:
+        """Segundos desde o início da execução do job (None fora de ``execute``).
+
+        Somado ao TTFT da geração, dá o primeiro token no relógio do job,
+        sem o trabalho posterior à geração.
+        """
+        if self._started is None:
+            return None
+        return time.perf_counter() - self._started
+
     def get_status(self) -> Dict:
         """Retorna o status atual do benchmark."""
+        self.repository.flush()
         return self.repository.get_benchmark(self.job_id)
 
     def get_hardware_metrics(self) -> List[Dict]:
         """Retorna as métricas de hardware do benchmark."""
+        self.repository.flush()
         return self.repository.get_hardware_metrics(self.job_id) 
\ No newline at end of file
@@ -0,0 +1,275 @@
+"""
+Fila persistente de jobs de benchmark e pool de workers.
+
+A fila é a própria tabela ``benchmarks``: a API registra o job como
+``PENDING`` e retorna imediatamente; os workers reivindicam atomicamente o
+job pendente mais antigo, executam ``Benchmark.execute`` fora do event loop
+e atualizam o status. Jobs que estavam ``RUNNING`` em um processo que não
+existe mais são devolvidos à fila quando o serviço reinicia.
+
+Jobs de ``continuous_batching`` não ocupam o worker: ele os reivindica e os
+entrega a uma thread própria, que aguarda o escalonador compartilhado do
+modelo, e volta à fila. Assim requisições concorrentes entram no mesmo lote
+mesmo com um único worker. Até ``MAX_BATCH_SIZE`` desses jobs rodam ao
+mesmo tempo. O modo ``process`` os rejeita, pois cada processo teria o seu
+próprio escalonador e os lotes seriam divididos.
+"""
+
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import psutil
+
+from llm_bench_local.config.settings import settings
+from llm_bench_local.core.benchmark import Benchmark
+from llm_bench_local.core.sweep import SWEEP_TASK, Sweep
+from llm_bench_local.persistence.crud import BenchmarkRepository
+
+logger = logging.getLogger(__name__)
+
+WORKER_MODES = ("thread", "process")
+
+
+def current_worker_id(name: str) -> str:
+    """Identificador do worker: host, PID, início do processo e nome."""
+    started = int(psutil.Process(os.getpid()).create_time())
+    return f"{socket.gethostname()}:{os.getpid()}:{started}:{name}"
+
+
+def worker_is_alive(worker_id: str) -> bool:
+    """Verifica se o processo dono de um job RUNNING ainda existe.
+
+    Workers de outro host são considerados vivos, pois não há como
+    verificá-los localmente. O horário de início do processo evita que um
+    PID reutilizado (ex: PID 1 em contêineres) seja confundido com o antigo.
+    """
+    try:
+        host, pid, started, _ = worker_id.split(":", 3)
+    except ValueError:
+        return False
+    if host != socket.gethostname():
+        return True
+    try:
+        return int(psutil.Process(int(pid)).create_time()) == int(started)
+    except (psutil.Error, ValueError):
+        return False
+
+
+def run_job(repository: BenchmarkRepository, record: Dict) -> None:
+    """Executa um job reivindicado, registrando falhas no banco."""
+    try:
+        if record["task"] == SWEEP_TASK:
+            job = Sweep.from_record(record)
+        else:
+            job = Benchmark.from_record(record)
+        job.repository = repository
+        job.execute()
+    except Exception as exc:
+        # Benchmark.execute já marca FAILED; erros na construção não passam por lá
+        repository.flush()
+        job = repository.get_benchmark(record["job_id"])
+        if job is not None and job["status"] == "RUNNING":
+            repository.update_benchmark_status(
+                record["job_id"], "FAILED", {"error": str(exc)}
+            )
+            repository.flush()
+        logger.exception("Falha ao executar o job %s", record["job_id"])
+
+
+def is_continuous_batching(record: Dict) -> bool:
+    """Indica se o job é atendido pelo escalonador de continuous batching."""
+    return bool((record.get("config") or {}).get("continuous_batching"))
+
+
+def _run_detached(repository: BenchmarkRepository, record: Dict, slots: Any) -> None:
+    try:
+        run_job(repository, record)
+    finally:
+        slots.release()
+
+
+def worker_loop(
+    db_path: str,
+    name: str,
+    stop_event: Any,
+    wake_event: Optional[Any] = None,
+    poll_interval: float = 0.5,
+    batch_slots: Optional[Any] = None
+) -> None:
+    """Laço de um worker: reivindica e executa jobs até ``stop_event``.
+
+    Com ``batch_slots`` (semáforo), jobs de continuous batching rodam em
+    threads próprias, sem ocupar o worker, limitados pelo semáforo.
+    """
+    repository = BenchmarkRepository(db_path, write_behind=settings.DB_WRITE_BEHIND)
+    worker_id = current_worker_id(name)
+    detached: List[threading.Thread] = []
+    while not stop_event.is_set():
+        record = repository.claim_next_benchmark(worker_id)
+        if record is None:
+            if wake_event is not None:
+                wake_event.wait(poll_interval)
+                wake_event.clear()
+            else:
+                stop_event.wait(poll_interval)
+            continue
+        if batch_slots is not None and is_continuous_batching(record):
+            batch_slots.acquire()
+            thread = threading.Thread(
+                target=_run_detached,
+                args=(repository, record, batch_slots),
+                name=f"batched-job-{record['job_id']}",
+                daemon=True,
+            )
+            thread.start()
+            detached = [job for job in detached if job.is_alive()] + [thread]
+            continue
+        run_job(repository, record)
+    for thread in detached:
+        thread.join()
+    repository.flush()
+
+
+class JobQueue:
+    """Fila de benchmarks persistida no SQLite com pool de workers."""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        workers: Optional[int] = None,
+        mode: Optional[str] = None,
+        poll_interval: Optional[float] = None
+    ):
+        """Inicializa a fila.
+
+        Args:
+            db_path: Caminho do banco (padrão: ``settings.db_path``)
+            workers: Número de workers (padrão: ``JOB_WORKERS``)
+            mode: ``thread`` ou ``process`` (padrão: ``JOB_WORKER_MODE``)
+            poll_interval: Intervalo de consulta à fila em segundos
+        """
+        self.db_path = db_path or settings.db_path
+        self.workers = workers or settings.JOB_WORKERS
+        self.mode = mode or settings.JOB_WORKER_MODE
+        if self.mode not in WORKER_MODES:
+            raise ValueError(f"Modo de worker inválido: {self.mode}")
+        self.poll_interval = poll_interval or settings.JOB_POLL_INTERVAL
+        self.repository = BenchmarkRepository(self.db_path)
+        self._handles: List[Any] = []
+        self._lock = threading.Lock()
+        self._stop_event: Any = None
+        self._wake_event: Any = None
+        # Compartilhado pelos workers: jobs de continuous batching simultâneos
+        self._batch_slots = threading.BoundedSemaphore(settings.MAX_BATCH_SIZE)
+
+    @property
+    def running(self) -> bool:
+        return any(handle.is_alive() for handle in self._handles)
+
+    def start(self) -> None:
+        """Recupera jobs órfãos e inicia os workers (idempotente)."""
+        with self._lock:
+            if self.running:
+                return
+            requeued = self.repository.requeue_orphaned_benchmarks(worker_is_alive)
+            if requeued:
+                logger.info("%d jobs devolvidos à fila após reinício", requeued)
+
+            if self.mode == "process":
+                ctx = multiprocessing.get_context("spawn")
+                self._stop_event = ctx.Event()
+                self._wake_event = None
+                factory: Callable[..., Any] = ctx.Process
+            else:
+                self._stop_event = threading.Event()
+                self._wake_event = threading.Event()
+                factory = threading.Thread
+
+            self._handles = []
+            for index in range(self.workers):
+                handle = factory(
+                    target=worker_loop,
+                    args=(
+                        self.db_path,
+                        f"{self.mode}-{index}",
+                        self._stop_event,
+                        self._wake_event,
+                        self.poll_interval,
+                        self._batch_slots if self.mode == "thread" else None,
+                    ),
+                    name=f"benchmark-worker-{index}",
+                    daemon=True,
+                )
+                handle.start()
+                self._handles.append(handle)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Sinaliza os workers para parar após o job atual."""
+        with self._lock:
+            if self._stop_event is not None:
+                self._stop_event.set()
+            if self._wake_event is not None:
+                self._wake_event.set()
+            for handle in self._handles:
+                handle.join(timeout)
+            self._handles = []
+
+    def submit(self, **params: Any) -> str:
+        """Registra um benchmark como PENDING e acorda os workers.
+
+        Args:
+            **params: Argumentos de ``Benchmark`` (model_id, prompt, ...)
+
+        Returns:
+            ID do job criado
+
+        Raises:
+            ValueError: Se os parâmetros forem inválidos ou se
+                ``continuous_batching`` for pedido no modo ``process``
+        """
+        if params.get("continuous_batching") and self.mode == "process":
+            raise ValueError(
+                "continuous_batching requer JOB_WORKER_MODE=thread: no modo process "
+                "cada worker teria o seu próprio escalonador"
+            )
+        return self._enqueue(Benchmark(**params))
+
+    def submit_sweep(self, **params: Any) -> str:
+        """Registra uma varredura de parâmetros como PENDING.
+
+        Args:
+            **params: Argumentos de ``Sweep`` (model_id, prompt, space, ...)
+
+        Returns:
+            ID da varredura (job pai)
+        """
+        return self._enqueue(Sweep(**params))
+
+    def _enqueue(self, job: Any) -> str:
+        job.repository = self.repository
+        job_id = job.submit()
+        self.start()
+        if self._wake_event is not None:
+            self._wake_event.set()
+        return job_id
+
+    def depth(self) -> int:
+        """Número de jobs aguardando execução."""
+        return self.repository.count_by_status("PENDING")
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Retorna a fila de jobs do processo, criando-a se necessário."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+        return _job_queue
@@ -0,0 +1,38 @@
+"""
+Import preguiçoso de módulos pesados.
+
+Backends de ML (torch, transformers...) levam segundos para importar. Com
+``lazy_import`` o módulo só é carregado no primeiro acesso a um atributo,
+e pontos de entrada que não usam o backend (``/health``, listagens, CLI)
+não pagam esse custo.
+"""
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Retorna o módulo ``name`` sem executá-lo até o primeiro uso.
+
+    Args:
+        name: Nome do módulo
+
+    Returns:
+        O módulo já importado ou um módulo preguiçoso
+
+    Raises:
+        ModuleNotFoundError: Se o módulo não estiver instalado
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
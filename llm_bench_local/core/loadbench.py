@@ -0,0 +1,371 @@
+"""
+Benchmark de carga de modelos: cold start vs. warm start.
+
+A carga do ``ModelRunner`` é preguiçosa e acaba somada à primeira geração.
+Aqui a carga é medida isoladamente, cada execução em um subprocesso novo
+(sem pool, sem imports em cache), para os formatos de pesos suportados:
+
+- ``safetensors``: transformers com pesos safetensors (mmap)
+- ``bin``: transformers com pesos PyTorch (pickle)
+- ``gguf``: llama.cpp (``use_mmap``/``use_mlock``)
+- ``ggml``: ctransformers
+
+No cold start os arquivos de pesos são removidos do page cache antes da
+execução (``posix_fadvise(DONTNEED)``, sem exigir root); no warm start os
+pesos já estão em cache da execução anterior. O kernel pode ignorar o
+conselho (páginas mapeadas por outro processo, tmpfs), então a fração dos
+pesos ainda residente é conferida depois, com ``mincore`` ou ``fincore``. Para cada execução são
+reportados o tempo de import do backend, de carga e até o primeiro token
+utilizável, e o pico de RSS durante a carga.
+
+Uso:
+    python -m llm_bench_local.core.loadbench MODELO [--format gguf] [--runs 3]
+"""
+
+import argparse
+import ctypes
+import glob
+import json
+import mmap
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+from llm_bench_local.hardware.memory import GB, read_status, reset_peak_rss
+
+WEIGHT_FORMATS = ("safetensors", "bin", "gguf", "ggml")
+
+_RESULT_PREFIX = "LOADBENCH_RESULT "
+
+# Fração residente máxima para considerar os pesos fora do page cache
+MAX_RESIDENT_FRACTION = 0.05
+
+
+def detect_format(model_path: str) -> str:
+    """Detecta o formato dos pesos pelo caminho do modelo.
+
+    Segue a convenção do ``LLMRunner``: arquivos ``.gguf`` usam llama.cpp e
+    arquivos ``.bin`` avulsos usam ctransformers.
+
+    Raises:
+        ValueError: Se o formato não for reconhecido
+    """
+    if model_path.endswith(".gguf"):
+        return "gguf"
+    if os.path.isfile(model_path) and model_path.endswith(".bin"):
+        return "ggml"
+    if os.path.isdir(model_path):
+        if glob.glob(os.path.join(model_path, "*.safetensors")):
+            return "safetensors"
+        if glob.glob(os.path.join(model_path, "pytorch_model*.bin")):
+            return "bin"
+    raise ValueError(f"Formato de pesos não reconhecido: {model_path}")
+
+
+def weight_files(model_path: str, weight_format: str) -> List[str]:
+    """Arquivos de pesos lidos na carga do modelo."""
+    if os.path.isfile(model_path):
+        return [model_path]
+    pattern = "*.safetensors" if weight_format == "safetensors" else "pytorch_model*.bin"
+    return sorted(glob.glob(os.path.join(model_path, pattern)))
+
+
+def _mincore_resident_bytes(fd: int, size: int) -> Optional[int]:
+    """Bytes residentes de um arquivo via ``mmap`` + ``mincore`` (Linux/BSD)."""
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.mmap.restype = ctypes.c_void_p
+        libc.mmap.argtypes = [
+            ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_long
+        ]
+        libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        libc.mincore.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_void_p]
+    except (OSError, AttributeError):
+        return None
+    # O mapeamento não lê as páginas: só consulta as que já estão em cache
+    address = libc.mmap(None, size, mmap.PROT_READ, mmap.MAP_SHARED, fd, 0)
+    if address in (None, ctypes.c_void_p(-1).value):
+        return None
+    try:
+        pages = (size + mmap.PAGESIZE - 1) // mmap.PAGESIZE
+        vector = (ctypes.c_ubyte * pages)()
+        if libc.mincore(address, size, vector) != 0:
+            return None
+        # Só o bit menos significativo indica residência
+        resident = sum(value & 1 for value in vector)
+        return resident * mmap.PAGESIZE
+    finally:
+        libc.munmap(address, size)
+
+
+def _fincore_resident_bytes(path: str) -> Optional[int]:
+    """Bytes residentes de um arquivo via ``fincore`` (util-linux)."""
+    if shutil.which("fincore") is None:
+        return None
+    proc = subprocess.run(
+        ["fincore", "--bytes", "--noheadings", "--output", "RES", path],
+        capture_output=True,
+        text=True
+    )
+    try:
+        return int(proc.stdout.split()[0]) if proc.returncode == 0 else None
+    except (IndexError, ValueError):
+        return None
+
+
+def resident_fraction(paths: List[str]) -> Optional[float]:
+    """Fração dos bytes dos arquivos presente no page cache.
+
+    Returns:
+        Fração entre 0 e 1, ou None se a residência não puder ser consultada
+    """
+    resident = total = 0
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            size = os.fstat(fd).st_size
+            if size == 0:
+                continue
+            count = _mincore_resident_bytes(fd, size)
+        finally:
+            os.close(fd)
+        if count is None:
+            count = _fincore_resident_bytes(path)
+        if count is None:
+            return None
+        resident += min(count, size)
+        total += size
+    return resident / total if total else None
+
+
+def evict_page_cache(paths: List[str]) -> Dict[str, Optional[float]]:
+    """Remove arquivos do page cache do kernel e confere o resultado.
+
+    Returns:
+        Dict com o número de arquivos aconselhados (``advised``) e a fração
+        dos bytes ainda residente depois do conselho (``resident_fraction``,
+        None se não puder ser consultada)
+    """
+    advised = 0
+    if hasattr(os, "posix_fadvise"):
+        for path in paths:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                # Páginas sujas não são descartadas pelo DONTNEED
+                os.fdatasync(fd)
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+                advised += 1
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+    return {"advised": advised, "resident_fraction": resident_fraction(paths)}
+
+
+def measure_load(
+    model_path: str,
+    weight_format: str,
+    use_gpu: bool = False,
+    use_mmap: bool = True,
+    use_mlock: bool = False,
+    prompt: str = "Hello"
+) -> Dict[str, Optional[float]]:
+    """Mede a carga no processo atual (chamado pelo subprocesso de medição).
+
+    Returns:
+        Dict com tempos de import, carga e primeiro token e picos de RSS
+    """
+    start = time.perf_counter()
+    from llm_bench_local.core.pool import ModelPool
+    from llm_bench_local.llm.runner import LLMRunner
+    from llm_bench_local.schemas.benchmark import BenchmarkConfig, HardwareOptions
+    import_s = time.perf_counter() - start
+
+    # Exclui dos picos a memória dos imports
+    peak_is_load = reset_peak_rss()
+    runner = LLMRunner(
+        model_path,
+        HardwareOptions(use_gpu=use_gpu, use_mmap=use_mmap, use_mlock=use_mlock),
+        pool=ModelPool(),
+        weight_format=weight_format if weight_format in ("safetensors", "bin") else None
+    )
+    load_start = time.perf_counter()
+    runner.load_model()
+    load_s = time.perf_counter() - load_start
+    load_status = read_status()
+
+    generation = runner.generate(BenchmarkConfig(prompt=prompt, max_new_tokens=1))
+    first_token_s = time.perf_counter() - load_start
+    status = read_status()
+
+    def gb(value: Optional[int]) -> Optional[float]:
+        return value / GB if value is not None else None
+
+    return {
+        "import_s": import_s,
+        "load_s": load_s,
+        "first_token_generation_s": generation.get("time_to_first_token_s"),
+        "time_to_first_token_s": first_token_s,
+        "rss_peak_load_gb": gb(load_status.get("VmHWM")),
+        "rss_peak_gb": gb(status.get("VmHWM")),
+        "rss_after_load_gb": gb(load_status.get("VmRSS")),
+        "rss_peak_excludes_imports": peak_is_load,
+    }
+
+
+def measure_in_subprocess(
+    model_path: str,
+    weight_format: str,
+    use_gpu: bool = False,
+    use_mmap: bool = True,
+    use_mlock: bool = False,
+    timeout: Optional[float] = None
+) -> Dict[str, Optional[float]]:
+    """Executa ``measure_load`` em um interpretador novo.
+
+    ``process_wall_s`` inclui o início do interpretador e os imports, ou
+    seja, o tempo de um scale-from-zero até o primeiro token.
+
+    Raises:
+        RuntimeError: Se o subprocesso falhar
+    """
+    command = [
+        sys.executable, "-m", "llm_bench_local.core.loadbench", model_path,
+        "--child", "--format", weight_format,
+    ]
+    if use_gpu:
+        command.append("--gpu")
+    if not use_mmap:
+        command.append("--no-mmap")
+    if use_mlock:
+        command.append("--mlock")
+
+    start = time.perf_counter()
+    proc = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    wall = time.perf_counter() - start
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(_RESULT_PREFIX):
+            result = json.loads(line[len(_RESULT_PREFIX):])
+            result["process_wall_s"] = wall
+            return result
+    raise RuntimeError(
+        f"Falha ao medir a carga de {model_path}: {proc.stderr.strip()[-2000:]}"
+    )
+
+
+def _summarize(runs: List[Dict]) -> Dict[str, Optional[float]]:
+    """Mediana de cada métrica numérica entre as execuções."""
+    summary: Dict[str, Optional[float]] = {}
+    for key in runs[0] if runs else ():
+        values = [
+            run[key] for run in runs
+            if isinstance(run.get(key), (int, float)) and not isinstance(run.get(key), bool)
+        ]
+        if values:
+            summary[f"{key}_median"] = statistics.median(values)
+    return summary
+
+
+def run_load_benchmark(
+    model_path: str,
+    weight_format: Optional[str] = None,
+    runs: int = 3,
+    use_gpu: bool = False,
+    use_mmap: bool = True,
+    use_mlock: bool = False,
+    timeout: Optional[float] = None
+) -> Dict:
+    """Mede cold start e warm start da carga de um modelo.
+
+    Cada rodada faz uma execução cold (pesos removidos do page cache) seguida
+    de uma warm (pesos em cache), ambas em subprocessos novos.
+
+    Args:
+        model_path: Caminho do modelo (arquivo GGUF/GGML ou diretório transformers)
+        weight_format: Um de ``WEIGHT_FORMATS`` (padrão: detectado pelo caminho)
+        runs: Número de rodadas
+        use_gpu: Carrega o modelo na GPU
+        use_mmap: Mapeia os pesos em memória (GGUF/GGML)
+        use_mlock: Fixa os pesos na RAM (GGUF/GGML)
+        timeout: Tempo máximo de cada execução em segundos
+
+    Returns:
+        Dict com as execuções e as medianas de cada modo
+    """
+    weight_format = weight_format or detect_format(model_path)
+    if weight_format not in WEIGHT_FORMATS:
+        raise ValueError(f"Formato inválido: {weight_format}")
+    files = weight_files(model_path, weight_format)
+    options = dict(use_gpu=use_gpu, use_mmap=use_mmap, use_mlock=use_mlock, timeout=timeout)
+
+    results: Dict[str, List[Dict]] = {"cold": [], "warm": []}
+    residency: List[Optional[float]] = []
+    for _ in range(runs):
+        eviction = evict_page_cache(files)
+        residency.append(eviction["resident_fraction"])
+        cold = measure_in_subprocess(model_path, weight_format, **options)
+        cold["page_cache_resident_fraction"] = eviction["resident_fraction"]
+        results["cold"].append(cold)
+        results["warm"].append(measure_in_subprocess(model_path, weight_format, **options))
+
+    # Pior rodada; None se a residência não pôde ser consultada em alguma
+    worst = None if not residency or None in residency else max(residency)
+
+    return {
+        "model": model_path,
+        "format": weight_format,
+        "weights_gb": sum(os.path.getsize(path) for path in files) / GB,
+        "use_mmap": use_mmap,
+        "use_mlock": use_mlock,
+        # Com os pesos ainda em cache, as execuções "cold" são na verdade warm
+        "page_cache_resident_fraction": worst,
+        "page_cache_evicted": worst is not None and worst <= MAX_RESIDENT_FRACTION,
+        "cold": {"runs": results["cold"], **_summarize(results["cold"])},
+        "warm": {"runs": results["warm"], **_summarize(results["warm"])},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Benchmark de carga de modelos (cold/warm start)")
+    parser.add_argument("model", help="Arquivo GGUF/GGML ou diretório do modelo transformers")
+    parser.add_argument("--format", choices=WEIGHT_FORMATS, help="Formato dos pesos")
+    parser.add_argument("--runs", type=int, default=3, help="Rodadas cold + warm")
+    parser.add_argument("--gpu", action="store_true", help="Carrega o modelo na GPU")
+    parser.add_argument("--no-mmap", action="store_true", help="Lê os pesos sem mmap")
+    parser.add_argument("--mlock", action="store_true", help="Fixa os pesos na RAM")
+    parser.add_argument("--timeout", type=float, help="Tempo máximo por execução (s)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        result = measure_load(
+            args.model, args.format, args.gpu, not args.no_mmap, args.mlock
+        )
+        print(_RESULT_PREFIX + json.dumps(result), flush=True)
+        return
+
+    result = run_load_benchmark(
+        args.model,
+        args.format,
+        runs=args.runs,
+        use_gpu=args.gpu,
+        use_mmap=not args.no_mmap,
+        use_mlock=args.mlock,
+        timeout=args.timeout
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+"""
+Métricas dos benchmarks no formato OpenMetrics/Prometheus.
+
+Cada processo (worker do uvicorn ou da fila de jobs) acumula histogramas,
+contadores e gauges em memória e os grava em um arquivo próprio em
+``METRICS_DIR``, no máximo a cada ``METRICS_PERSIST_INTERVAL_S`` (e na saída
+do processo). Na coleta, os arquivos de todos os processos são somados,
+de modo que qualquer worker que receba o scrape responde com os totais
+corretos. O arquivo de um processo que já terminou é adotado por um
+processo vivo: seus contadores e histogramas passam para o estado deste,
+para não regredirem, os gauges são descartados e o arquivo é removido.
+"""
+
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import psutil
+
+from llm_bench_local.config.settings import settings
+from llm_bench_local.core.pool import model_pool
+from llm_bench_local.hardware.monitor import HardwareMonitor
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+TEXT_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+TTFT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TOKENS_PER_SECOND_BUCKETS = (1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 200.0, 500.0, 1000.0)
+
+HISTOGRAMS: Dict[str, Tuple[str, Sequence[float]]] = {
+    "llm_bench_latency_seconds": (
+        "Duração ponta a ponta da geração", LATENCY_BUCKETS
+    ),
+    "llm_bench_time_to_first_token_seconds": (
+        "Tempo até o primeiro token", TTFT_BUCKETS
+    ),
+    "llm_bench_tokens_per_second": (
+        "Vazão de geração em tokens por segundo", TOKENS_PER_SECOND_BUCKETS
+    ),
+}
+
+COUNTERS: Dict[str, str] = {
+    "llm_bench_jobs": "Benchmarks finalizados por status",
+}
+
+GAUGES: Dict[str, str] = {
+    "llm_bench_queue_depth": "Benchmarks aguardando execução",
+    "llm_bench_jobs_running": "Benchmarks em execução",
+    "llm_bench_models_loaded": "Modelos carregados nos pools dos processos",
+    "llm_bench_cpu_usage_percent": "Uso de CPU do sistema",
+    "llm_bench_ram_usage_gb": "Memória RAM usada no sistema",
+    "llm_bench_gpu_usage_percent": "Uso da GPU",
+    "llm_bench_vram_usage_gb": "Memória da GPU usada",
+    "llm_bench_process_rss_gb": "Memória residente da árvore de processos da API",
+    "llm_bench_cgroup_memory_gb": "Working set do cgroup (contêiner)",
+}
+
+
+def _labels_key(labels: Optional[Dict[str, str]]) -> str:
+    return json.dumps(sorted((labels or {}).items()))
+
+
+def _merge(target: Dict[str, Any], state: Dict[str, Any]) -> None:
+    """Soma os histogramas e contadores de ``state`` em ``target``."""
+    for name, series in state.get("histograms", {}).items():
+        merged = target["histograms"].setdefault(name, {})
+        for key, data in series.items():
+            current = merged.get(key)
+            if current is None:
+                merged[key] = json.loads(json.dumps(data))
+                continue
+            current["buckets"] = [a + b for a, b in zip(current["buckets"], data["buckets"])]
+            current["sum"] += data["sum"]
+            current["count"] += data["count"]
+            for index, exemplar in data["exemplars"].items():
+                # Mantém o exemplar mais recente de cada bucket
+                if index not in current["exemplars"] or exemplar[2] > current["exemplars"][index][2]:
+                    current["exemplars"][index] = exemplar
+
+    for name, series in state.get("counters", {}).items():
+        merged = target["counters"].setdefault(name, {})
+        for key, value in series.items():
+            merged[key] = merged.get(key, 0.0) + value
+
+
+class MetricsStore:
+    """Métricas do processo, persistidas em arquivo para agregação entre processos."""
+
+    def __init__(self, directory: Optional[str] = None, persist_interval_s: Optional[float] = None):
+        """Inicializa o armazenamento.
+
+        Args:
+            directory: Diretório compartilhado pelos processos (padrão: ``METRICS_DIR``)
+            persist_interval_s: Atraso máximo da gravação após uma atualização
+                (padrão: ``METRICS_PERSIST_INTERVAL_S``; 0 grava a cada atualização)
+        """
+        self.directory = Path(directory or settings.METRICS_DIR or settings.cache_dir / "prometheus")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.pid = os.getpid()
+        self.path = self.directory / f"metrics_{self.pid}.json"
+        self.persist_interval_s = (
+            settings.METRICS_PERSIST_INTERVAL_S if persist_interval_s is None else persist_interval_s
+        )
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self._state: Dict[str, Any] = {"pid": self.pid, "histograms": {}, "counters": {}, "gauges": {}}
+        if self.path.exists():
+            # PID reutilizado: continua a partir dos valores gravados
+            try:
+                self._state.update(json.loads(self.path.read_text()))
+                self._state["pid"] = self.pid
+            except (OSError, ValueError):
+                pass
+        self.adopt_dead()
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        labels: Optional[Dict[str, str]] = None,
+        exemplar: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Registra uma observação em um histograma de ``HISTOGRAMS``.
+
+        Args:
+            name: Nome do histograma
+            value: Valor observado
+            labels: Labels da série (ex: model_id, task)
+            exemplar: Labels do exemplar associado ao bucket (ex: job_id)
+        """
+        buckets = HISTOGRAMS[name][1]
+        with self._lock:
+            series = self._state["histograms"].setdefault(name, {}).setdefault(
+                _labels_key(labels),
+                {"buckets": [0] * (len(buckets) + 1), "sum": 0.0, "count": 0, "exemplars": {}}
+            )
+            index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+            series["buckets"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+            if exemplar:
+                series["exemplars"][str(index)] = [exemplar, value, time.time()]
+            self._persist()
+
+    def inc(self, name: str, labels: Optional[Dict[str, str]] = None, amount: float = 1.0) -> None:
+        """Incrementa um contador de ``COUNTERS``."""
+        with self._lock:
+            series = self._state["counters"].setdefault(name, {})
+            key = _labels_key(labels)
+            series[key] = series.get(key, 0.0) + amount
+            self._persist()
+
+    def set_gauge(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        """Define o valor de um gauge deste processo."""
+        with self._lock:
+            self._state["gauges"].setdefault(name, {})[_labels_key(labels)] = value
+            self._persist()
+
+    def _persist(self) -> None:
+        """Agenda a gravação do estado (requer o lock).
+
+        As atualizações de um intervalo são gravadas juntas por um timer.
+        """
+        self._dirty = True
+        if self.persist_interval_s <= 0:
+            self._write()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.persist_interval_s, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _write(self) -> None:
+        """Grava o estado de forma atômica (requer o lock)."""
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._state))
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+    def flush(self) -> None:
+        """Grava as atualizações pendentes."""
+        with self._lock:
+            self._timer = None
+            if self._dirty:
+                self._write()
+
+    def adopt_dead(self) -> int:
+        """Incorpora e remove os arquivos de processos que já terminaram.
+
+        O arquivo é renomeado antes da leitura; como o rename é atômico, só
+        um processo vivo adota cada arquivo.
+
+        Returns:
+            Número de arquivos adotados
+        """
+        adopted = 0
+        for path in sorted(self.directory.glob("metrics_*.json")):
+            if path == self.path:
+                continue
+            try:
+                pid = int(path.stem.split("_", 1)[1])
+            except ValueError:
+                continue
+            if psutil.pid_exists(pid):
+                continue
+            claimed = path.with_name(f"adopting_{pid}_{self.pid}.json")
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue  # Adotado por outro processo
+            try:
+                state = json.loads(claimed.read_text())
+            except (OSError, ValueError):
+                state = {}
+            with self._lock:
+                _merge(self._state, state)
+                self._write()
+            claimed.unlink(missing_ok=True)
+            adopted += 1
+        return adopted
+
+    def collect(self) -> Dict[str, Any]:
+        """Soma o estado de todos os processos que gravaram em ``directory``."""
+        self.adopt_dead()
+        merged: Dict[str, Any] = {"histograms": {}, "counters": {}, "gauges": {}}
+        with self._lock:
+            # O próprio estado vem da memória (o arquivo pode estar atrasado)
+            states = [json.loads(json.dumps(self._state))]
+        for path in sorted(self.directory.glob("metrics_*.json")):
+            if path == self.path:
+                continue
+            try:
+                states.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+
+        for state in states:
+            _merge(merged, state)
+            if state.get("pid") != self.pid and not psutil.pid_exists(state.get("pid", -1)):
+                continue
+            for name, series in state.get("gauges", {}).items():
+                target = merged["gauges"].setdefault(name, {})
+                for key, value in series.items():
+                    target[key] = target.get(key, 0.0) + value
+        return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: List[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def render(state: Dict[str, Any], openmetrics: bool = True) -> str:
+    """Formata o estado agregado no formato de exposição do Prometheus.
+
+    Args:
+        state: Resultado de ``MetricsStore.collect`` (com gauges atualizados)
+        openmetrics: Usa OpenMetrics (com exemplares) em vez do formato texto 0.0.4
+
+    Returns:
+        Texto de exposição
+    """
+    lines: List[str] = []
+
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for key, data in sorted(state["histograms"].get(name, {}).items()):
+            labels = [tuple(pair) for pair in json.loads(key)]
+            cumulative = 0
+            for index, bound in enumerate(list(buckets) + [math.inf]):
+                cumulative += data["buckets"][index]
+                line = f"{name}_bucket{_format_labels(labels + [('le', _format_value(bound))])} {cumulative}"
+                exemplar = data["exemplars"].get(str(index))
+                if openmetrics and exemplar:
+                    exemplar_labels, value, timestamp = exemplar
+                    line += f" # {_format_labels(sorted(exemplar_labels.items()))} {_format_value(value)} {timestamp:.3f}"
+                lines.append(line)
+            lines.append(f"{name}_count{_format_labels(labels)} {data['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(data['sum'])}")
+
+    for name, help_text in COUNTERS.items():
+        family = name if openmetrics else f"{name}_total"
+        lines.append(f"# HELP {family} {help_text}")
+        lines.append(f"# TYPE {family} counter")
+        for key, value in sorted(state["counters"].get(name, {}).items()):
+            labels = [tuple(pair) for pair in json.loads(key)]
+            lines.append(f"{name}_total{_format_labels(labels)} {_format_value(value)}")
+
+    for name, help_text in GAUGES.items():
+        series = state["gauges"].get(name, {})
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for key, value in sorted(series.items()):
+            labels = [tuple(pair) for pair in json.loads(key)]
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    if openmetrics:
+        lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+_store: Optional[MetricsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_metrics_store() -> MetricsStore:
+    """Retorna o armazenamento de métricas do processo atual."""
+    global _store
+    with _store_lock:
+        if _store is None or _store.pid != os.getpid():
+            _store = MetricsStore()
+            atexit.register(_store.flush)
+        return _store
+
+
+def record_job(model_id: str, task: str, job_id: str, status: str, results: Optional[Dict] = None) -> None:
+    """Registra um benchmark finalizado nos contadores e histogramas.
+
+    Args:
+        model_id: Modelo avaliado
+        task: Tarefa do benchmark
+        job_id: ID do job (usado como exemplar)
+        status: Status final (COMPLETED ou FAILED)
+        results: Resultados do benchmark, se concluído
+    """
+    store = get_metrics_store()
+    labels = {"model_id": model_id, "task": task}
+    store.inc("llm_bench_jobs", {**labels, "status": status})
+    store.set_gauge("llm_bench_models_loaded", model_pool.stats()["models_loaded"])
+    if not results:
+        return
+
+    exemplar = {"job_id": job_id}
+    for name, key in (
+        ("llm_bench_latency_seconds", "duration"),
+        ("llm_bench_time_to_first_token_seconds", "time_to_first_token_s"),
+        ("llm_bench_tokens_per_second", "tokens_per_second"),
+    ):
+        value = results.get(key)
+        if value is not None:
+            store.observe(name, value, labels, exemplar)
+
+
+_monitor: Optional[HardwareMonitor] = None
+
+
+def scrape(repository: Any, openmetrics: bool = True) -> str:
+    """Gera a exposição completa para um scrape do Prometheus.
+
+    Soma as métricas de todos os processos e acrescenta as leituras feitas no
+    momento do scrape: profundidade da fila (do banco, comum a todos os
+    workers) e a leitura atual do ``HardwareMonitor``.
+
+    Args:
+        repository: ``BenchmarkRepository`` usado para contar os jobs
+        openmetrics: Usa o formato OpenMetrics (com exemplares)
+
+    Returns:
+        Texto de exposição
+    """
+    global _monitor
+    store = get_metrics_store()
+    store.set_gauge("llm_bench_models_loaded", model_pool.stats()["models_loaded"])
+    state = store.collect()
+
+    gauges = state["gauges"]
+    no_labels = _labels_key(None)
+    gauges["llm_bench_queue_depth"] = {no_labels: repository.count_by_status("PENDING")}
+    gauges["llm_bench_jobs_running"] = {no_labels: repository.count_by_status("RUNNING")}
+
+    if _monitor is None:
+        _monitor = HardwareMonitor()
+    reading = _monitor.get_current_metrics()
+    for field in (
+        "cpu_usage_percent", "ram_usage_gb", "gpu_usage_percent",
+        "vram_usage_gb", "process_rss_gb", "cgroup_memory_gb",
+    ):
+        value = getattr(reading, field)
+        if value is not None:
+            gauges[f"llm_bench_{field}"] = {no_labels: value}
+
+    return render(state, openmetrics)
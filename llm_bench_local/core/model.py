@@ -1,42 +1,203 @@
-from typing import Optional, Dict, Any
-import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
+import copy
+import logging
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List
 import importlib
 
 from llm_bench_local.config.settings import settings
+from llm_bench_local.core.lazy import lazy_import
+from llm_bench_local.core.pool import ModelPool, model_pool
+from llm_bench_local.core.timing import TokenTimer, TokenTimingStreamer
+from llm_bench_local.core.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Importados no primeiro uso, para não pesar no início da API e da CLI
+torch = lazy_import("torch")
+transformers = lazy_import("transformers")
+
+# Cópias com left padding dos tokenizers do pool, criadas uma vez por modelo
+# carregado e descartadas junto com o tokenizer original
+_padding_tokenizers: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_padding_tokenizers_lock = threading.Lock()
+
+
+@dataclass
+class GenerationResult:
+    """Texto gerado e contagem exata de tokens informada pelo motor."""
+    text: str
+    prompt_tokens: int
+    completion_tokens: int
+    duration: Optional[float] = None
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Vazão de geração da sequência, quando a duração é conhecida."""
+        if not self.duration:
+            return None
+        return self.completion_tokens / self.duration
+
+
+@dataclass
+class SequenceState:
+    """Estado de uma sequência decodificada passo a passo (KV cache próprio)."""
+    prompt_tokens: int
+    past_key_values: Any
+    cache_length: int
+    next_token: int
+    temperature: float = 0.7
+    top_p: float = 0.9
+
+
+def _sequence_length(ids: Any) -> int:
+    """Retorna o número de tokens de uma sequência (tensor ou lista)."""
+    try:
+        shape = getattr(ids, "shape", None)
+        if shape is not None:
+            return int(shape[-1])
+        if len(ids) and isinstance(ids[0], (list, tuple)):
+            return len(ids[0])
+        return len(ids)
+    except TypeError:
+        return 0
+
+
+def _to_list(ids: Any) -> List[int]:
+    """Converte um tensor ou sequência de ids em lista de inteiros."""
+    tolist = getattr(ids, "tolist", None)
+    return list(tolist() if callable(tolist) else ids)
+
+
+def _trim_completion(ids: List[int], eos_token_id: Optional[int]) -> List[int]:
+    """Corta a sequência gerada após o primeiro EOS (o restante é padding)."""
+    if eos_token_id is None or eos_token_id not in ids:
+        return ids
+    return ids[:ids.index(eos_token_id) + 1]
+
+
+def plan_batches(
+    prompt_lengths: List[int],
+    max_new_tokens: int,
+    max_batch_size: int,
+    max_batch_tokens: Optional[int] = None
+) -> List[List[int]]:
+    """Agrupa prompts em lotes respeitando tamanho máximo e orçamento de tokens.
+
+    O custo de um lote é ``len(lote) * (maior_prompt + max_new_tokens)``, já
+    que com left padding todas as sequências ocupam o comprimento da maior.
+    Um prompt que sozinho excede o orçamento forma um lote próprio.
+
+    Args:
+        prompt_lengths: Número de tokens de cada prompt
+        max_new_tokens: Tokens gerados por sequência
+        max_batch_size: Número máximo de sequências por lote
+        max_batch_tokens: Orçamento de tokens por lote (None = sem limite)
+
+    Returns:
+        Lista de lotes, cada um com os índices dos prompts
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    longest = 0
+    for index, length in enumerate(prompt_lengths):
+        candidate_longest = max(longest, length)
+        cost = (len(current) + 1) * (candidate_longest + max_new_tokens)
+        if current and (
+            len(current) >= max_batch_size
+            or (max_batch_tokens is not None and cost > max_batch_tokens)
+        ):
+            batches.append(current)
+            current, candidate_longest = [], length
+        current.append(index)
+        longest = candidate_longest
+    if current:
+        batches.append(current)
+    return batches
+
 
 class ModelRunner:
-    def __init__(self, model_id: str):
+    def __init__(self, model_id: str, pool: Optional[ModelPool] = None):
         """Inicializa o executor do modelo."""
         self.model_id = model_id
+        self.pool = pool or model_pool
         self.model_config = settings.get_model_config(model_id)
         if not self.model_config:
             raise ValueError(f"Modelo {model_id} não encontrado na configuração")
         
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        # Resolvido no primeiro uso: consultar a GPU importa o torch, e o
+        # runner é criado já no envio do job, dentro do event loop da API
+        self._device: Optional[str] = None
         self.model = None
         self.tokenizer = None
 
+    @property
+    def device(self) -> str:
+        """Dispositivo do modelo (``cuda`` se disponível, senão ``cpu``)."""
+        if self._device is None:
+            self._device = "cuda" if torch.cuda.is_available() else "cpu"
+        return self._device
+
+    @device.setter
+    def device(self, value: str) -> None:
+        self._device = value
+
     def _load_model(self):
-        """Carrega o modelo e o tokenizer."""
+        """Obtém o modelo e o tokenizer do pool, carregando-os se necessário."""
         if self.model is None:
             real_torch = importlib.import_module("torch")
             dtype = real_torch.float16 if self.device == "cuda" else real_torch.float32
-            self.model = AutoModelForCausalLM.from_pretrained(
-                self.model_config["model_id"],
-                torch_dtype=dtype,
-                device_map="auto" if self.device == "cuda" else None
-            )
-            self.model.eval()
-            
-            self.tokenizer = AutoTokenizer.from_pretrained(
-                self.model_config["model_id"]
-            )
+            key = (self.model_config["model_id"], self.device, str(dtype))
+            with span("model.load", "model", model_id=self.model_id, device=self.device):
+                self.model, self.tokenizer = self.pool.get_or_load(
+                    key, lambda: self._load_weights(dtype)
+                )
+
+    def _load_weights(self, dtype):
+        """Carrega os pesos do modelo e o tokenizer."""
+        model = transformers.AutoModelForCausalLM.from_pretrained(
+            self.model_config["model_id"],
+            torch_dtype=dtype,
+            device_map="auto" if self.device == "cuda" else None
+        )
+        model.eval()
+
+        tokenizer = transformers.AutoTokenizer.from_pretrained(
+            self.model_config["model_id"]
+        )
+        return model, tokenizer
+
+    def load(self, use_gpu: bool = True) -> None:
+        """Carrega o modelo antecipadamente no pool."""
+        if not use_gpu:
+            self.device = "cpu"
+        self._load_model()
 
     def generate(self, prompt: str, max_tokens: Optional[int] = None,
                 temperature: float = 0.7, top_p: float = 0.9,
-                use_gpu: bool = True) -> str:
+                use_gpu: bool = True, timer: Optional[TokenTimer] = None) -> str:
         """Gera texto usando o modelo."""
+        return self.complete(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            use_gpu=use_gpu,
+            timer=timer
+        ).text
+
+    def complete(self, prompt: str, max_tokens: Optional[int] = None,
+                 temperature: float = 0.7, top_p: float = 0.9,
+                 use_gpu: bool = True,
+                 timer: Optional[TokenTimer] = None) -> GenerationResult:
+        """Gera texto e retorna a contagem de tokens do prompt e da resposta.
+
+        As contagens vêm dos ids produzidos pelo próprio modelo e apenas os
+        tokens novos são decodificados. Quando ``timer`` é informado, a
+        geração é feita em streaming e o instante de cada token é registrado.
+        """
         if not use_gpu and self.device == "cuda":
             self.device = "cpu"
             self.model = None  # Força recarregar o modelo na CPU
@@ -46,14 +207,23 @@ class ModelRunner:
         # Configura parâmetros de geração
         max_tokens = max_tokens or self.model_config.get("max_tokens", 1024)
         
+        if timer is not None:
+            timer.start()
+
         # Tokeniza o prompt
-        encoded = self.tokenizer(prompt, return_tensors="pt")
-        if hasattr(encoded, "to"):
-            encoded = encoded.to(self.device)
-        inputs = encoded if isinstance(encoded, dict) else {"input_ids": encoded}
+        with span("tokenize", "model"):
+            encoded = self.tokenizer(prompt, return_tensors="pt")
+            if hasattr(encoded, "to"):
+                encoded = encoded.to(self.device)
+            inputs = encoded if isinstance(encoded, dict) else {"input_ids": encoded}
+            prompt_tokens = _sequence_length(inputs["input_ids"])
         
+        generate_kwargs = {}
+        if timer is not None:
+            generate_kwargs["streamer"] = TokenTimingStreamer(timer)
+
         # Gera o texto
-        with torch.no_grad():
+        with span("generate", "model", max_new_tokens=max_tokens), torch.no_grad():
             outputs = self.model.generate(
                 **inputs,
                 max_new_tokens=max_tokens,
@@ -61,11 +231,218 @@ class ModelRunner:
                 top_p=top_p,
                 do_sample=True,
                 pad_token_id=self.tokenizer.eos_token_id,
+                **generate_kwargs,
             )
+        if timer is not None:
+            timer.stop()
         
-        # Decodifica e retorna o texto gerado
-        generated_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-        return generated_text
+        # Decodifica apenas os tokens novos (a saída inclui o prompt)
+        with span("decode", "model"):
+            new_tokens = outputs[0][prompt_tokens:]
+            generated_text = self.tokenizer.decode(new_tokens, skip_special_tokens=True)
+        return GenerationResult(
+            text=generated_text,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=_sequence_length(new_tokens)
+        )
+
+    def generate_batch(self, prompts: List[str], max_tokens: Optional[int] = None,
+                       temperature: float = 0.7, top_p: float = 0.9,
+                       use_gpu: bool = True,
+                       max_batch_size: Optional[int] = None,
+                       max_batch_tokens: Optional[int] = None
+                       ) -> List[GenerationResult]:
+        """Gera texto para vários prompts em lotes com left padding.
+
+        Cada lote é processado por uma única chamada a ``model.generate``,
+        ou seja, um forward pass por passo de decodificação para todas as
+        sequências do lote.
+
+        Args:
+            prompts: Prompts de entrada
+            max_tokens: Tokens gerados por sequência
+            temperature: Temperatura para sampling
+            top_p: Top-p para sampling
+            use_gpu: Se deve usar GPU
+            max_batch_size: Sequências por lote (padrão: ``MAX_BATCH_SIZE``)
+            max_batch_tokens: Orçamento de tokens por lote (padrão: ``MAX_BATCH_TOKENS``)
+
+        Returns:
+            Um ``GenerationResult`` por prompt, na ordem de entrada
+        """
+        if not use_gpu and self.device == "cuda":
+            self.device = "cpu"
+            self.model = None  # Força recarregar o modelo na CPU
+
+        self._load_model()
+
+        max_tokens = max_tokens or self.model_config.get("max_tokens", 1024)
+        max_batch_size = max_batch_size or settings.MAX_BATCH_SIZE
+        max_batch_tokens = max_batch_tokens or settings.MAX_BATCH_TOKENS
+
+        tokenizer = self._padding_tokenizer()
+        eos_token_id = tokenizer.eos_token_id
+
+        with span("tokenize", "model", prompts=len(prompts)):
+            lengths = [len(ids) for ids in tokenizer(prompts)["input_ids"]]
+        results: List[Optional[GenerationResult]] = [None] * len(prompts)
+
+        for batch in plan_batches(lengths, max_tokens, max_batch_size, max_batch_tokens):
+            with span("tokenize", "model", batch_size=len(batch)):
+                encoded = tokenizer(
+                    [prompts[i] for i in batch], return_tensors="pt", padding=True
+                )
+                if hasattr(encoded, "to"):
+                    encoded = encoded.to(self.device)
+                padded_length = _sequence_length(encoded["input_ids"])
+
+            start_time = time.perf_counter()
+            with span("generate", "model", batch_size=len(batch)), torch.no_grad():
+                outputs = self.model.generate(
+                    **encoded,
+                    max_new_tokens=max_tokens,
+                    temperature=temperature,
+                    top_p=top_p,
+                    do_sample=True,
+                    pad_token_id=tokenizer.pad_token_id,
+                )
+            duration = time.perf_counter() - start_time
+
+            with span("decode", "model", batch_size=len(batch)):
+                for row, index in enumerate(batch):
+                    new_tokens = _trim_completion(
+                        _to_list(outputs[row])[padded_length:], eos_token_id
+                    )
+                    results[index] = GenerationResult(
+                        text=tokenizer.decode(new_tokens, skip_special_tokens=True),
+                        prompt_tokens=int(sum(_to_list(encoded["attention_mask"][row]))),
+                        completion_tokens=len(new_tokens),
+                        duration=duration
+                    )
+
+        return results
+
+    def _padding_tokenizer(self):
+        """Cópia do tokenizer com padding à esquerda para a geração em lote.
+
+        Modelos decoder-only precisam de left padding para gerar em lote. O
+        tokenizer vem do pool e é compartilhado com outros jobs; alterar
+        ``padding_side`` ou ``pad_token`` nele mudaria as demais gerações.
+        A cópia é feita uma vez por tokenizer do pool e reutilizada.
+        """
+        with _padding_tokenizers_lock:
+            tokenizer = _padding_tokenizers.get(self.tokenizer)
+            if tokenizer is None:
+                tokenizer = copy.deepcopy(self.tokenizer)
+                tokenizer.padding_side = "left"
+                if getattr(tokenizer, "pad_token", None) is None:
+                    tokenizer.pad_token = tokenizer.eos_token
+                _padding_tokenizers[self.tokenizer] = tokenizer
+        return tokenizer
+
+    @property
+    def eos_token_id(self) -> Optional[int]:
+        """ID do token de fim de sequência do tokenizer carregado."""
+        self._load_model()
+        return self.tokenizer.eos_token_id
+
+    def decode_tokens(self, token_ids: List[int]) -> str:
+        """Decodifica ids gerados em texto."""
+        return self.tokenizer.decode(token_ids, skip_special_tokens=True)
+
+    def prefill(self, prompt: str, temperature: float = 0.7,
+                top_p: float = 0.9) -> SequenceState:
+        """Processa o prompt e amostra o primeiro token de uma nova sequência.
+
+        Usado pelo escalonador de continuous batching: cada sequência guarda
+        o próprio KV cache e entra no lote em execução no passo seguinte.
+        """
+        self._load_model()
+        encoded = self.tokenizer(prompt, return_tensors="pt")
+        if hasattr(encoded, "to"):
+            encoded = encoded.to(self.device)
+        input_ids = encoded["input_ids"]
+
+        with torch.no_grad():
+            out = self.model(input_ids=input_ids, use_cache=True)
+
+        prompt_tokens = _sequence_length(input_ids)
+        return SequenceState(
+            prompt_tokens=prompt_tokens,
+            past_key_values=out.past_key_values,
+            cache_length=prompt_tokens,
+            next_token=self._sample(out.logits[0, -1], temperature, top_p),
+            temperature=temperature,
+            top_p=top_p
+        )
+
+    def decode_step(self, states: List[SequenceState]) -> List[int]:
+        """Executa um passo de decodificação para todas as sequências ativas.
+
+        Os KV caches (formato legado em tupla) têm comprimentos diferentes;
+        eles são alinhados com padding à esquerda, processados em um único
+        forward pass e separados novamente por sequência.
+
+        Returns:
+            Próximo token de cada sequência, na ordem de ``states``
+        """
+        lengths = [s.cache_length for s in states]
+        max_length = max(lengths)
+
+        batched_past = []
+        for layer in range(len(states[0].past_key_values)):
+            keys, values = [], []
+            for state in states:
+                key, value = state.past_key_values[layer]
+                pad = max_length - key.shape[2]
+                if pad:
+                    key = torch.nn.functional.pad(key, (0, 0, pad, 0))
+                    value = torch.nn.functional.pad(value, (0, 0, pad, 0))
+                keys.append(key)
+                values.append(value)
+            batched_past.append((torch.cat(keys), torch.cat(values)))
+
+        input_ids = torch.tensor([[s.next_token] for s in states], device=self.device)
+        attention_mask = torch.tensor(
+            [[0] * (max_length - n) + [1] * (n + 1) for n in lengths],
+            device=self.device
+        )
+        position_ids = torch.tensor([[n] for n in lengths], device=self.device)
+
+        with torch.no_grad():
+            out = self.model(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                position_ids=position_ids,
+                past_key_values=tuple(batched_past),
+                use_cache=True
+            )
+
+        tokens = []
+        for i, state in enumerate(states):
+            start = max_length - lengths[i]
+            state.past_key_values = tuple(
+                (key[i:i + 1, :, start:], value[i:i + 1, :, start:])
+                for key, value in out.past_key_values
+            )
+            state.cache_length += 1
+            state.next_token = self._sample(
+                out.logits[i, -1], state.temperature, state.top_p
+            )
+            tokens.append(state.next_token)
+        return tokens
+
+    def _sample(self, logits, temperature: float, top_p: float) -> int:
+        """Amostra um token com temperatura e nucleus sampling (top-p)."""
+        if temperature <= 0:
+            return int(torch.argmax(logits))
+        probs = torch.softmax(logits.float() / temperature, dim=-1)
+        if top_p < 1.0:
+            sorted_probs, sorted_ids = torch.sort(probs, descending=True)
+            cumulative = torch.cumsum(sorted_probs, dim=-1)
+            sorted_probs[cumulative - sorted_probs > top_p] = 0
+            probs = torch.zeros_like(probs).scatter(0, sorted_ids, sorted_probs)
+        return int(torch.multinomial(probs / probs.sum(), 1))
 
     def get_model_info(self) -> Dict[str, Any]:
         """Retorna informações sobre o modelo."""
@@ -75,4 +452,24 @@ class ModelRunner:
             "device": self.device,
             "max_tokens": self.model_config.get("max_tokens", 1024),
             "parameters": self.model_config.get("parameters", "unknown")
-        } 
\ No newline at end of file
+        } 
+
+
+def preload_models(model_ids: List[str], use_gpu: bool = True) -> List[str]:
+    """Carrega no pool os modelos configurados para pré-carregamento.
+
+    Args:
+        model_ids: IDs dos modelos (chaves de ``data/models/config.json``)
+        use_gpu: Se deve carregar na GPU quando disponível
+
+    Returns:
+        Lista dos modelos carregados com sucesso
+    """
+    loaded = []
+    for model_id in model_ids:
+        try:
+            ModelRunner(model_id).load(use_gpu=use_gpu)
+            loaded.append(model_id)
+        except Exception:
+            logger.exception("Falha ao pré-carregar o modelo %s", model_id)
+    return loaded
@@ -0,0 +1,261 @@
+"""
+Pool de modelos compartilhado pelo processo.
+
+Mantém os pesos carregados entre execuções de benchmark, evitando que cada
+requisição pague novamente o custo de ``from_pretrained``. As entradas são
+indexadas por ``(model_id, device, dtype)`` e removidas em ordem LRU quando o
+orçamento de memória definido em ``settings.default_hardware_options`` é
+excedido.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psutil
+
+from llm_bench_local.config.settings import settings
+
+try:
+    import pynvml
+    PYNVML_AVAILABLE = True
+except ImportError:
+    PYNVML_AVAILABLE = False
+
+PoolKey = Tuple[str, str, str]
+
+
+@dataclass
+class PoolEntry:
+    """Modelo carregado mantido no pool."""
+    key: PoolKey
+    value: Any
+    size_bytes: int
+    loaded_at: float
+    last_used: float
+
+
+def estimate_size(value: Any) -> int:
+    """Estima a memória ocupada por um objeto carregado no pool.
+
+    Args:
+        value: Modelo, tokenizer ou tupla com ambos
+
+    Returns:
+        Tamanho estimado em bytes (0 quando não é possível estimar)
+    """
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_size(item) for item in value)
+
+    footprint = getattr(value, "get_memory_footprint", None)
+    if callable(footprint):
+        try:
+            return int(footprint())
+        except Exception:
+            pass
+
+    parameters = getattr(value, "parameters", None)
+    if callable(parameters):
+        try:
+            return int(sum(p.numel() * p.element_size() for p in parameters()))
+        except Exception:
+            pass
+
+    return 0
+
+
+def _device_kind(device: str) -> str:
+    """Agrupa dispositivos pelo orçamento de memória que consomem."""
+    return "gpu" if device.startswith("cuda") else "cpu"
+
+
+class ModelPool:
+    """Cache LRU thread-safe de modelos carregados."""
+
+    def __init__(
+        self,
+        max_cpu_bytes: Optional[int] = None,
+        max_gpu_bytes: Optional[int] = None
+    ):
+        """Inicializa o pool.
+
+        Args:
+            max_cpu_bytes: Orçamento de RAM; por padrão usa ``max_memory_usage``
+            max_gpu_bytes: Orçamento de VRAM; por padrão usa ``max_gpu_memory_usage``
+        """
+        self._entries: "OrderedDict[PoolKey, PoolEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._loading: Dict[PoolKey, threading.Lock] = {}
+        self._budgets: Dict[str, Optional[int]] = {}
+        if max_cpu_bytes is not None:
+            self._budgets["cpu"] = max_cpu_bytes
+        if max_gpu_bytes is not None:
+            self._budgets["gpu"] = max_gpu_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _budget(self, kind: str) -> Optional[int]:
+        """Retorna o orçamento de memória (em bytes) para o tipo de dispositivo."""
+        if kind not in self._budgets:
+            options = settings.default_hardware_options
+            if kind == "cpu":
+                total = psutil.virtual_memory().total
+                self._budgets[kind] = int(total * options["max_memory_usage"])
+            else:
+                total = _total_gpu_memory()
+                self._budgets[kind] = (
+                    int(total * options["max_gpu_memory_usage"]) if total else None
+                )
+        return self._budgets[kind]
+
+    def get_or_load(
+        self,
+        key: PoolKey,
+        loader: Callable[[], Any],
+        size_fn: Callable[[Any], int] = estimate_size
+    ) -> Any:
+        """Retorna o modelo do pool, carregando-o apenas uma vez.
+
+        Threads que pedem a mesma chave simultaneamente aguardam o primeiro
+        carregamento em vez de carregar os pesos em paralelo.
+
+        Args:
+            key: Tupla ``(model_id, device, dtype)``
+            loader: Função que carrega e retorna o modelo
+            size_fn: Função que estima o tamanho do valor carregado
+
+        Returns:
+            Valor retornado por ``loader`` (possivelmente em cache)
+        """
+        with self._lock:
+            cached = self._touch(key)
+            if cached is not None:
+                return cached.value
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                cached = self._touch(key)
+                if cached is not None:
+                    return cached.value
+                self.misses += 1
+
+            try:
+                value = loader()
+                now = time.time()
+                entry = PoolEntry(
+                    key=key,
+                    value=value,
+                    size_bytes=size_fn(value),
+                    loaded_at=now,
+                    last_used=now
+                )
+                with self._lock:
+                    self._entries[key] = entry
+                    self._evict(_device_kind(key[1]), keep=key)
+            finally:
+                # Só depois da entrada no pool: quem chegar antes aguarda o lock
+                with self._lock:
+                    self._loading.pop(key, None)
+            return value
+
+    def _touch(self, key: PoolKey) -> Optional[PoolEntry]:
+        """Marca a entrada como usada recentemente (requer o lock)."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            entry.last_used = time.time()
+            self.hits += 1
+        return entry
+
+    def _evict(self, kind: str, keep: Optional[PoolKey] = None) -> None:
+        """Remove entradas LRU até respeitar o orçamento (requer o lock)."""
+        budget = self._budget(kind)
+        if budget is None:
+            return
+
+        def used() -> int:
+            return sum(
+                e.size_bytes for e in self._entries.values()
+                if _device_kind(e.key[1]) == kind
+            )
+
+        for key in list(self._entries.keys()):
+            if used() <= budget:
+                break
+            if key == keep or _device_kind(key[1]) != kind:
+                continue
+            self._release(self._entries.pop(key))
+            self.evictions += 1
+
+    def _release(self, entry: PoolEntry) -> None:
+        """Libera os recursos de uma entrada removida."""
+        entry.value = None
+        if _device_kind(entry.key[1]) == "gpu":
+            try:
+                import torch
+                torch.cuda.empty_cache()
+            except Exception:
+                pass
+
+    def contains(self, key: PoolKey) -> bool:
+        """Indica se a chave já está carregada."""
+        with self._lock:
+            return key in self._entries
+
+    def evict(self, key: PoolKey) -> bool:
+        """Remove explicitamente uma entrada do pool."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            self._release(entry)
+            return True
+
+    def clear(self) -> None:
+        """Remove todos os modelos do pool."""
+        with self._lock:
+            for entry in self._entries.values():
+                self._release(entry)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas de uso do pool."""
+        with self._lock:
+            entries: List[Dict[str, Any]] = [
+                {
+                    "model_id": e.key[0],
+                    "device": e.key[1],
+                    "dtype": e.key[2],
+                    "size_bytes": e.size_bytes,
+                    "loaded_at": e.loaded_at,
+                    "last_used": e.last_used,
+                }
+                for e in self._entries.values()
+            ]
+            return {
+                "models_loaded": len(entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": entries,
+            }
+
+
+def _total_gpu_memory() -> Optional[int]:
+    """Retorna a VRAM total da GPU 0 em bytes, se disponível."""
+    if not PYNVML_AVAILABLE:
+        return None
+    try:
+        pynvml.nvmlInit()
+        handle = pynvml.nvmlDeviceGetHandleByIndex(0)
+        return int(pynvml.nvmlDeviceGetMemoryInfo(handle).total)
+    except pynvml.NVMLError:
+        return None
+
+
+# Instância global do pool
+model_pool = ModelPool()
@@ -0,0 +1,169 @@
+"""
+Profiler por amostragem de pilhas para jobs de benchmark.
+
+Uma thread auxiliar lê periodicamente a pilha da thread que executa o
+benchmark via ``sys._current_frames`` — diferente de um profiler por sinal,
+funciona com o benchmark rodando fora da thread principal (workers da
+fila). As pilhas são agregadas no formato "collapsed stack" (uma linha
+``frame;frame;frame contagem``), aceito por flamegraph.pl, speedscope e
+Perfetto. O custo da própria amostragem (CPU da thread do profiler) é
+medido e reportado junto do perfil.
+
+Jobs de continuous batching geram tokens na thread do escalonador, não na
+do job; para eles o profiler amostra todas as threads, e cada pilha
+começa por um frame ``thread:<nome>``.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from llm_bench_local.config.settings import settings
+
+
+def profile_path(job_id: str) -> str:
+    """Caminho do perfil (collapsed stacks) de um job."""
+    return str(settings.cache_dir / "profiles" / f"{job_id}.folded")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Amostra a pilha de uma thread em intervalos fixos."""
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 128):
+        """Inicializa o profiler.
+
+        Args:
+            interval: Intervalo entre amostras em segundos
+            max_depth: Número máximo de frames por pilha (a partir do topo)
+        """
+        if interval <= 0:
+            raise ValueError("O intervalo de amostragem deve ser positivo")
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._target: Optional[int] = None
+        self._all_threads = False
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._started: Optional[float] = None
+        self._stopped: Optional[float] = None
+        self._sampler_cpu_s = 0.0
+        self._ticks = 0
+        self._cost_total = 0.0
+        self._cost_max = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, thread_id: Optional[int] = None, all_threads: bool = False) -> None:
+        """Inicia a amostragem.
+
+        Args:
+            thread_id: Thread amostrada (padrão: thread atual)
+            all_threads: Amostra todas as threads, exceto a do profiler;
+                ignora ``thread_id``
+        """
+        if self.running:
+            return
+        self._all_threads = all_threads
+        self._target = thread_id or threading.get_ident()
+        self._stop.clear()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._sample_loop, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Interrompe a amostragem e aguarda a thread do profiler."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._stopped = time.perf_counter()
+
+    def _sample_loop(self) -> None:
+        cpu_start = time.thread_time()
+        next_tick = time.perf_counter()
+        while not self._stop.is_set():
+            begin = time.perf_counter()
+            self._sample()
+            cost = time.perf_counter() - begin
+            self._ticks += 1
+            self._cost_total += cost
+            self._cost_max = max(self._cost_max, cost)
+
+            # Prazos absolutos; ticks perdidos são descartados
+            next_tick += self.interval
+            now = time.perf_counter()
+            if next_tick < now:
+                next_tick = now + self.interval
+            self._stop.wait(next_tick - now)
+        self._sampler_cpu_s = time.thread_time() - cpu_start
+
+    def _sample(self) -> None:
+        frames = sys._current_frames()
+        if not self._all_threads:
+            frame = frames.get(self._target)
+            if frame is not None:
+                self._record(frame)
+            return
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in frames.items():
+            if ident != own:
+                self._record(frame, f"thread:{names.get(ident, ident)}")
+
+    def _record(self, frame, root: Optional[str] = None) -> None:
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            stack.append(_frame_label(frame))
+            frame = frame.f_back
+        if root is not None:
+            stack.append(root)
+        stack.reverse()
+        self.stacks[";".join(stack)] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """Retorna o perfil no formato collapsed stack (mais frequentes primeiro)."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def write(self, path: str) -> None:
+        """Grava o perfil em formato collapsed stack."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Resumo da captura e do custo do próprio profiler.
+
+        ``overhead_percent`` é o tempo de CPU gasto pela thread do profiler
+        em relação à duração da captura.
+        """
+        end = self._stopped if self._stopped is not None else time.perf_counter()
+        duration = end - self._started if self._started is not None else 0.0
+        ticks = self._ticks
+        return {
+            "samples": self.samples,
+            "interval_s": self.interval,
+            "duration_s": duration,
+            "unique_stacks": len(self.stacks),
+            "sampler_cpu_s": self._sampler_cpu_s,
+            "overhead_percent": (
+                100.0 * self._sampler_cpu_s / duration if duration > 0 else None
+            ),
+            "mean_sample_us": 1e6 * self._cost_total / ticks if ticks else None,
+            "max_sample_us": 1e6 * self._cost_max if ticks else None,
+        }
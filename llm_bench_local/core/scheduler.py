@@ -0,0 +1,259 @@
+"""
+Escalonador de continuous batching para requisições concorrentes.
+
+Requisições para o mesmo modelo entram no lote em execução a cada passo de
+decodificação e saem assim que terminam, liberando a vaga para a próxima
+requisição da fila. É o comportamento das pilhas de serving que queremos
+medir, em vez de executar cada requisição isoladamente com lote de tamanho 1.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from llm_bench_local.config.settings import settings
+from llm_bench_local.core.model import ModelRunner
+from llm_bench_local.core.timing import TokenTimer
+
+
+@dataclass
+class ScheduledResult:
+    """Resultado de uma requisição processada pelo escalonador."""
+    text: str
+    prompt_tokens: int
+    completion_tokens: int
+    queue_wait_s: float
+    service_time_s: float
+    latency_s: float
+    mean_batch_size: float
+    timing: Dict[str, Any]
+
+
+@dataclass
+class _Request:
+    prompt: str
+    max_tokens: int
+    temperature: float
+    top_p: float
+    future: Future
+    timer: TokenTimer
+    submitted_at: float
+    admitted_at: Optional[float] = None
+    state: Any = None
+    token_ids: List[int] = field(default_factory=list)
+    batch_sizes: List[int] = field(default_factory=list)
+
+
+class ContinuousBatchScheduler:
+    """Agrupa requisições em um lote contínuo com granularidade de token.
+
+    O motor precisa implementar ``prefill(prompt, temperature, top_p)``,
+    ``decode_step(states)``, ``decode_tokens(ids)`` e ``eos_token_id``
+    (ver ``ModelRunner``).
+    """
+
+    def __init__(self, engine: Any, max_batch_size: Optional[int] = None,
+                 default_max_tokens: int = 1024):
+        """Inicializa o escalonador.
+
+        Args:
+            engine: Motor com prefill/decode passo a passo
+            max_batch_size: Sequências simultâneas no lote (padrão: ``MAX_BATCH_SIZE``)
+            default_max_tokens: Limite de tokens quando a requisição não informa
+        """
+        self.engine = engine
+        self.max_batch_size = max_batch_size or settings.MAX_BATCH_SIZE
+        self.default_max_tokens = default_max_tokens
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._active: List[_Request] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def queue_depth(self) -> int:
+        """Requisições aguardando uma vaga no lote."""
+        return self._queue.qsize()
+
+    @property
+    def active_sequences(self) -> int:
+        """Sequências atualmente no lote."""
+        return len(self._active)
+
+    def start(self) -> None:
+        """Inicia a thread de decodificação, se ainda não estiver rodando."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._loop, name="continuous-batching", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Para a thread de decodificação."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, prompt: str, max_tokens: Optional[int] = None,
+               temperature: float = 0.7, top_p: float = 0.9) -> "Future[ScheduledResult]":
+        """Enfileira uma requisição e retorna um ``Future`` com o resultado."""
+        self.start()
+        timer = TokenTimer()
+        timer.start()
+        request = _Request(
+            prompt=prompt,
+            max_tokens=max_tokens or self.default_max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            future=Future(),
+            timer=timer,
+            submitted_at=timer.start_time
+        )
+        self._queue.put(request)
+        return request.future
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self._admit()
+            if not self._active:
+                continue
+            try:
+                tokens = self.engine.decode_step([r.state for r in self._active])
+            except Exception as exc:
+                for request in self._active:
+                    request.future.set_exception(exc)
+                self._active = []
+                continue
+
+            batch_size = len(self._active)
+            for request, token in zip(self._active, tokens):
+                request.batch_sizes.append(batch_size)
+                self._append_token(request, token)
+            self._retire()
+
+        self._cancel_pending()
+
+    def _cancel_pending(self) -> None:
+        """Falha as requisições ainda abertas quando o escalonador é parado."""
+        error = RuntimeError("Escalonador encerrado")
+        for request in self._active:
+            request.future.set_exception(error)
+        self._active = []
+        while True:
+            try:
+                self._queue.get_nowait().future.set_exception(error)
+            except queue.Empty:
+                break
+
+    def _admit(self) -> None:
+        """Preenche as vagas livres do lote com requisições da fila."""
+        while len(self._active) < self.max_batch_size:
+            try:
+                if self._active:
+                    request = self._queue.get_nowait()
+                else:
+                    request = self._queue.get(timeout=0.05)
+            except queue.Empty:
+                return
+
+            request.admitted_at = time.perf_counter()
+            try:
+                request.state = self.engine.prefill(
+                    request.prompt, request.temperature, request.top_p
+                )
+            except Exception as exc:
+                request.future.set_exception(exc)
+                continue
+
+            self._append_token(request, request.state.next_token)
+            self._active.append(request)
+            self._retire()
+
+    def _append_token(self, request: _Request, token: int) -> None:
+        request.token_ids.append(token)
+        request.timer.record()
+
+    def _finished(self, request: _Request) -> bool:
+        return (
+            len(request.token_ids) >= request.max_tokens
+            or request.token_ids[-1] == self.engine.eos_token_id
+        )
+
+    def _retire(self) -> None:
+        """Remove as sequências concluídas, liberando as vagas."""
+        still_active = []
+        for request in self._active:
+            if self._finished(request):
+                self._complete(request)
+            else:
+                still_active.append(request)
+        self._active = still_active
+
+    def _complete(self, request: _Request) -> None:
+        request.timer.stop()
+        finished_at = request.timer.end_time
+        sizes = request.batch_sizes or [1]
+        request.future.set_result(ScheduledResult(
+            text=self.engine.decode_tokens(request.token_ids),
+            prompt_tokens=request.state.prompt_tokens,
+            completion_tokens=len(request.token_ids),
+            queue_wait_s=request.admitted_at - request.submitted_at,
+            service_time_s=finished_at - request.admitted_at,
+            latency_s=finished_at - request.submitted_at,
+            mean_batch_size=sum(sizes) / len(sizes),
+            timing=request.timer.summary()
+        ))
+
+
+_schedulers: Dict[Tuple[str, bool], ContinuousBatchScheduler] = {}
+_schedulers_lock = threading.Lock()
+# Um lock por chave durante a carga, como no ``ModelPool``: a carga de um
+# modelo não bloqueia o acesso aos escalonadores dos demais
+_loading: Dict[Tuple[str, bool], threading.Lock] = {}
+
+
+def get_scheduler(model_id: str, use_gpu: bool = True) -> ContinuousBatchScheduler:
+    """Retorna o escalonador compartilhado do modelo, criando-o se necessário.
+
+    Threads que pedem o mesmo modelo simultaneamente aguardam a primeira
+    carga; a carga ocorre fora do lock global.
+    """
+    key = (model_id, use_gpu)
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is not None:
+            return scheduler
+        key_lock = _loading.setdefault(key, threading.Lock())
+
+    with key_lock:
+        with _schedulers_lock:
+            scheduler = _schedulers.get(key)
+            if scheduler is not None:
+                return scheduler
+        try:
+            runner = ModelRunner(model_id)
+            runner.load(use_gpu=use_gpu)
+            scheduler = ContinuousBatchScheduler(
+                runner,
+                default_max_tokens=runner.model_config.get("max_tokens", 1024)
+            )
+            with _schedulers_lock:
+                _schedulers[key] = scheduler
+        finally:
+            with _schedulers_lock:
+                _loading.pop(key, None)
+        return scheduler
+
+
+def shutdown_schedulers() -> None:
+    """Para todos os escalonadores criados pelo processo."""
+    with _schedulers_lock:
+        for scheduler in _schedulers.values():
+            scheduler.stop(timeout=1.0)
+        _schedulers.clear()
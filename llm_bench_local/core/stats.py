@@ -0,0 +1,206 @@
+"""
+Resumo estatístico de medições repetidas (tentativas de um benchmark).
+
+Uma única execução em uma máquina compartilhada é ruído; com várias
+tentativas reportamos a distribuição (média, mediana, percentis, desvio
+padrão, coeficiente de variação) e um intervalo de confiança da média. Com
+poucas amostras o intervalo é o de Student (t): o bootstrap por percentis
+subestima muito a incerteza com 3 a 10 amostras. A partir de
+``min_bootstrap_samples`` usamos o bootstrap, que não assume normalidade.
+"""
+
+import math
+import random
+import statistics
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from llm_bench_local.core.timing import percentile
+
+
+def bootstrap_ci(
+    values: Sequence[float],
+    statistic: Callable[[Sequence[float]], float] = statistics.mean,
+    confidence: float = 0.95,
+    resamples: int = 1000,
+    seed: Optional[int] = 0
+) -> Tuple[Optional[float], Optional[float]]:
+    """Intervalo de confiança por bootstrap (método dos percentis).
+
+    Args:
+        values: Amostras
+        statistic: Estatística estimada (padrão: média)
+        confidence: Nível de confiança (ex: 0.95)
+        resamples: Número de reamostragens
+        seed: Semente do gerador, para resultados reproduzíveis
+
+    Returns:
+        Tupla (limite inferior, limite superior); ``(None, None)`` sem amostras
+    """
+    if not values:
+        return None, None
+    if len(values) == 1:
+        return values[0], values[0]
+    rng = random.Random(seed)
+    n = len(values)
+    estimates = [
+        statistic([values[rng.randrange(n)] for _ in range(n)])
+        for _ in range(resamples)
+    ]
+    alpha = (1 - confidence) / 2
+    return percentile(estimates, 100 * alpha), percentile(estimates, 100 * (1 - alpha))
+
+
+def _betacf(a: float, b: float, x: float) -> float:
+    """Fração contínua da função beta incompleta (método de Lentz)."""
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        for numerator in (
+            m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+            -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1)),
+        ):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            h *= d * c
+        if abs(d * c - 1.0) < 1e-12:
+            break
+    return h
+
+
+def _t_cdf(t: float, df: float) -> float:
+    """Função de distribuição acumulada da t de Student."""
+    x = df / (df + t * t)
+    a, b = df / 2, 0.5
+    front = math.exp(
+        math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+        + a * math.log(x) + b * math.log1p(-x)
+    )
+    # Beta incompleta regularizada I_x(a, b), pela simetria que converge
+    if x < (a + 1) / (a + b + 2):
+        tail = front * _betacf(a, b, x) / a
+    else:
+        tail = 1.0 - front * _betacf(b, a, 1.0 - x) / b
+    return 1.0 - tail / 2 if t >= 0 else tail / 2
+
+
+def t_quantile(probability: float, df: float) -> float:
+    """Quantil da t de Student com ``df`` graus de liberdade (por bisseção)."""
+    if probability == 0.5:
+        return 0.0
+    if probability < 0.5:
+        return -t_quantile(1.0 - probability, df)
+    low, high = 0.0, 1.0
+    while _t_cdf(high, df) < probability:
+        high *= 2
+    for _ in range(100):
+        middle = (low + high) / 2
+        if _t_cdf(middle, df) < probability:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def t_interval(values: Sequence[float], confidence: float = 0.95) -> Tuple[Optional[float], Optional[float]]:
+    """Intervalo de confiança de Student para a média.
+
+    Returns:
+        Tupla (limite inferior, limite superior); ``(None, None)`` sem amostras
+    """
+    if not values:
+        return None, None
+    if len(values) == 1:
+        return values[0], values[0]
+    mean = statistics.fmean(values)
+    half = (
+        t_quantile((1 + confidence) / 2, len(values) - 1)
+        * statistics.stdev(values) / math.sqrt(len(values))
+    )
+    return mean - half, mean + half
+
+
+def summarize(
+    values: Sequence[Optional[float]],
+    confidence: float = 0.95,
+    resamples: int = 1000,
+    seed: Optional[int] = 0,
+    min_bootstrap_samples: int = 30
+) -> Dict[str, Optional[float]]:
+    """Resume uma série de medições.
+
+    Valores ``None`` (métrica indisponível em uma tentativa) são ignorados.
+
+    Args:
+        values: Medições
+        confidence: Nível de confiança do intervalo
+        resamples: Reamostragens do bootstrap
+        seed: Semente do bootstrap
+        min_bootstrap_samples: Abaixo deste número de amostras o intervalo
+            é o de Student (``ci_method = "t"``)
+
+    Returns:
+        Dict com n, média, mediana, p90/p95/p99, mínimo, máximo, desvio
+        padrão amostral, coeficiente de variação e o intervalo de confiança
+        da média
+    """
+    samples = [float(v) for v in values if v is not None]
+    result: Dict[str, Optional[float]] = {
+        "n": len(samples),
+        "mean": None,
+        "median": None,
+        "p90": None,
+        "p95": None,
+        "p99": None,
+        "min": None,
+        "max": None,
+        "stddev": None,
+        "cv": None,
+        "ci_low": None,
+        "ci_high": None,
+        "ci_method": None,
+        "confidence": confidence,
+    }
+    if not samples:
+        return result
+
+    mean = statistics.fmean(samples)
+    stddev = statistics.stdev(samples) if len(samples) > 1 else 0.0
+    if len(samples) < min_bootstrap_samples:
+        ci_method = "t"
+        ci_low, ci_high = t_interval(samples, confidence)
+    else:
+        ci_method = "bootstrap"
+        ci_low, ci_high = bootstrap_ci(samples, statistics.fmean, confidence, resamples, seed)
+    result.update({
+        "mean": mean,
+        "median": statistics.median(samples),
+        "p90": percentile(samples, 90),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "min": min(samples),
+        "max": max(samples),
+        "stddev": stddev,
+        "cv": stddev / mean if mean else None,
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+        "ci_method": ci_method,
+    })
+    return result
+
+
+def relative_ci_width(summary: Dict[str, Optional[float]]) -> Optional[float]:
+    """Largura do intervalo de confiança relativa à média.
+
+    Args:
+        summary: Resultado de ``summarize``
+
+    Returns:
+        ``(ci_high - ci_low) / |média|`` ou None se indefinida
+    """
+    if summary["ci_low"] is None or not summary["mean"]:
+        return None
+    return (summary["ci_high"] - summary["ci_low"]) / abs(summary["mean"])
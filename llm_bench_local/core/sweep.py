@@ -0,0 +1,394 @@
+"""
+Varreduras de parâmetros de geração para um modelo.
+
+Uma varredura é um job da fila (``task = "sweep"``) cujas células são
+benchmarks filhos na tabela ``benchmarks`` (coluna ``parent_id``). Todas as
+células rodam no mesmo worker, com o modelo carregado uma única vez.
+
+O progresso é salvo no job pai antes e depois de cada célula. Se o processo
+cair, o job pai volta à fila como qualquer outro job órfão e a varredura é
+retomada a partir da primeira célula não concluída; uma célula em execução
+na queda cujo benchmark filho chegou a concluir é adotada, não reexecutada.
+
+Estratégias de amostragem do espaço de parâmetros:
+
+- ``grid``: produto cartesiano de listas de valores
+- ``random``: ``samples`` pontos sorteados
+- ``lhs``: ``samples`` pontos por hipercubo latino (cada parâmetro tem seu
+  intervalo dividido em ``samples`` faixas, cada uma usada uma vez)
+
+Em ``random`` e ``lhs`` cada parâmetro é uma lista de valores discretos ou
+um intervalo ``{"min": ..., "max": ...}`` (inteiro se ambos forem inteiros).
+"""
+
+import inspect
+import itertools
+import random
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from llm_bench_local.config.settings import settings
+from llm_bench_local.core.benchmark import Benchmark
+from llm_bench_local.core.model import ModelRunner
+from llm_bench_local.persistence.crud import BenchmarkRepository
+
+SWEEP_TASK = "sweep"
+SWEEP_STRATEGIES = ("grid", "random", "lhs")
+SWEEP_PARAMETERS = ("max_tokens", "temperature", "top_p", "batch_size", "cpu_threads")
+
+# Argumentos de ``Benchmark`` que podem ser fixados para todas as células
+CELL_OPTIONS = set(inspect.signature(Benchmark.__init__).parameters) - {
+    "self", "model_id", "prompt", "task", "use_gpu", "prompts", "parent_id", "job_id",
+}
+
+# Métricas de cada célula copiadas para o resumo da varredura
+CELL_METRICS = ("duration", "time_to_first_token_s", "tokens_per_second")
+
+
+def expand_grid(space: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Produto cartesiano dos valores de cada parâmetro, em ordem estável."""
+    names = sorted(space)
+    for name in names:
+        if not isinstance(space[name], list) or not space[name]:
+            raise ValueError(f"O parâmetro {name} precisa de uma lista de valores na grade")
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def _value_at(spec: Any, position: float) -> Any:
+    """Valor do parâmetro na posição ``position`` em [0, 1)."""
+    if isinstance(spec, list):
+        if not spec:
+            raise ValueError("Lista de valores vazia")
+        return spec[min(int(position * len(spec)), len(spec) - 1)]
+    if isinstance(spec, dict) and "min" in spec and "max" in spec:
+        low, high = spec["min"], spec["max"]
+        if isinstance(low, int) and isinstance(high, int):
+            return min(low + int(position * (high - low + 1)), high)
+        return low + position * (high - low)
+    raise ValueError(f"Especificação de parâmetro inválida: {spec!r}")
+
+
+def sample_random(space: Dict[str, Any], samples: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Sorteia ``samples`` pontos independentes do espaço."""
+    rng = random.Random(seed)
+    names = sorted(space)
+    return [{name: _value_at(space[name], rng.random()) for name in names} for _ in range(samples)]
+
+
+def sample_lhs(space: Dict[str, Any], samples: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Amostra ``samples`` pontos por hipercubo latino."""
+    rng = random.Random(seed)
+    names = sorted(space)
+    columns = {}
+    for name in names:
+        strata = list(range(samples))
+        rng.shuffle(strata)
+        columns[name] = [
+            _value_at(space[name], (stratum + rng.random()) / samples) for stratum in strata
+        ]
+    return [{name: columns[name][i] for name in names} for i in range(samples)]
+
+
+def plan_cells(
+    space: Dict[str, Any],
+    strategy: str = "grid",
+    samples: Optional[int] = None,
+    seed: int = 0
+) -> List[Dict[str, Any]]:
+    """Gera as células de uma varredura.
+
+    Raises:
+        ValueError: Se a estratégia, os parâmetros ou ``samples`` forem inválidos
+    """
+    unknown = set(space) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(
+            f"Parâmetros não suportados: {', '.join(sorted(unknown))}"
+            f" (use {', '.join(SWEEP_PARAMETERS)})"
+        )
+    if not space:
+        raise ValueError("O espaço de parâmetros está vazio")
+    if strategy == "grid":
+        return expand_grid(space)
+    if strategy not in SWEEP_STRATEGIES:
+        raise ValueError(f"Estratégia inválida: {strategy} (use {', '.join(SWEEP_STRATEGIES)})")
+    if not samples or samples < 1:
+        raise ValueError(f"A estratégia {strategy} exige samples >= 1")
+    sampler = sample_random if strategy == "random" else sample_lhs
+    return sampler(space, samples, seed)
+
+
+@contextmanager
+def cpu_threads(threads: Optional[int]) -> Iterator[None]:
+    """Limita as threads de CPU do torch durante uma célula."""
+    if not threads:
+        yield
+        return
+    import torch
+
+    previous = torch.get_num_threads()
+    torch.set_num_threads(int(threads))
+    try:
+        yield
+    finally:
+        torch.set_num_threads(previous)
+
+
+class Sweep:
+    """Varredura de parâmetros de um modelo, registrada como job pai."""
+
+    def __init__(
+        self,
+        model_id: str,
+        prompt: str,
+        space: Dict[str, Any],
+        strategy: str = "grid",
+        samples: Optional[int] = None,
+        seed: int = 0,
+        task: str = "text-generation",
+        use_gpu: bool = True,
+        options: Optional[Dict[str, Any]] = None,
+        job_id: Optional[str] = None
+    ):
+        """Inicializa a varredura.
+
+        Args:
+            model_id: Modelo configurado
+            prompt: Prompt de todas as células
+            space: Valores ou intervalos de cada parâmetro (``SWEEP_PARAMETERS``)
+            strategy: ``grid``, ``random`` ou ``lhs``
+            samples: Número de células em ``random`` e ``lhs``
+            seed: Semente da amostragem
+            task: Tarefa registrada nas células
+            use_gpu: Executa na GPU
+            options: Demais argumentos de ``Benchmark`` comuns a todas as
+                células (ex: ``trials``, ``warmup_runs``)
+            job_id: ID de uma varredura já registrada (fila de jobs)
+
+        Raises:
+            ValueError: Se o modelo ou o espaço de parâmetros forem inválidos
+        """
+        self.job_id = job_id or str(uuid.uuid4())
+        self._persisted = job_id is not None
+        self.model_id = model_id
+        self.prompt = prompt
+        self.space = space
+        self.strategy = strategy
+        self.samples = samples
+        self.seed = seed
+        self.task = task
+        self.use_gpu = use_gpu
+        self.options = options or {}
+        invalid = set(self.options) - CELL_OPTIONS
+        if invalid:
+            raise ValueError(f"Opções não suportadas nas células: {', '.join(sorted(invalid))}")
+        if not settings.get_model_config(model_id):
+            raise ValueError(f"Modelo {model_id} não encontrado na configuração")
+        self.cells = plan_cells(space, strategy, samples, seed)
+        self.repository = BenchmarkRepository(
+            settings.db_path, write_behind=settings.DB_WRITE_BEHIND
+        )
+
+    @classmethod
+    def from_record(cls, record: Dict) -> "Sweep":
+        """Reconstrói a varredura a partir do job pai salvo na fila."""
+        config = record["config"]
+        return cls(
+            model_id=record["model_id"],
+            prompt=config["prompt"],
+            space=config["space"],
+            strategy=config.get("strategy", "grid"),
+            samples=config.get("samples"),
+            seed=config.get("seed", 0),
+            task=config.get("task", "text-generation"),
+            use_gpu=record["hardware_options"].get("use_gpu", True),
+            options=config.get("options"),
+            job_id=record["job_id"]
+        )
+
+    def _config(self) -> Dict:
+        return {
+            "prompt": self.prompt,
+            "space": self.space,
+            "strategy": self.strategy,
+            "samples": self.samples,
+            "seed": self.seed,
+            "task": self.task,
+            "options": self.options,
+            "cells": self.cells,
+        }
+
+    def submit(self) -> str:
+        """Registra a varredura como PENDING sem executá-la."""
+        self.repository.create_benchmark(
+            self.job_id, self.model_id, SWEEP_TASK, self._config(), {"use_gpu": self.use_gpu}
+        )
+        self.repository.flush()
+        self._persisted = True
+        return self.job_id
+
+    def _cell_benchmark(self, cell: Dict[str, Any]) -> Benchmark:
+        """Benchmark filho com os parâmetros da célula."""
+        params = dict(self.options)
+        params.update({
+            name: value for name, value in cell.items()
+            if name in ("max_tokens", "temperature", "top_p")
+        })
+        batch_size = int(cell.get("batch_size") or 1)
+        if batch_size > 1:
+            params["prompts"] = [self.prompt] * batch_size
+        benchmark = Benchmark(
+            self.model_id,
+            self.prompt,
+            task=self.task,
+            use_gpu=self.use_gpu,
+            parent_id=self.job_id,
+            **params
+        )
+        benchmark.repository = self.repository
+        if cell.get("cpu_threads"):
+            benchmark.hardware_options["cpu_threads"] = cell["cpu_threads"]
+        return benchmark
+
+    def _cell_entry(self, index: int, job_id: str, results: Dict) -> Dict:
+        """Entrada de uma célula concluída no resumo da varredura."""
+        entry = {"index": index, "job_id": job_id, "params": self.cells[index]}
+        entry["status"] = "COMPLETED"
+        entry.update({name: results.get(name) for name in CELL_METRICS})
+        return entry
+
+    def _resume(self) -> Dict[int, Dict]:
+        """Células concluídas em execuções anteriores, por índice.
+
+        Células que estavam em execução na queda (``RUNNING`` no resumo) são
+        adotadas se o benchmark filho concluiu. Filhos ainda PENDING ou
+        RUNNING são marcados FAILED e suas células reexecutadas.
+        """
+        self.repository.flush()
+        record = self.repository.get_benchmark(self.job_id)
+        results = (record or {}).get("results") or {}
+        cells: Dict[int, Dict] = {}
+        in_flight: Dict[str, int] = {}
+        for cell in results.get("cells", []):
+            if cell["status"] == "COMPLETED":
+                cells[cell["index"]] = cell
+            elif cell["status"] == "RUNNING":
+                in_flight[cell["job_id"]] = cell["index"]
+
+        for child in iter_children(self.repository, self.job_id):
+            job_id = child["job_id"]
+            if job_id in in_flight and child["status"] == "COMPLETED":
+                index = in_flight[job_id]
+                cells[index] = self._cell_entry(index, job_id, child["results"] or {})
+            elif child["status"] in ("PENDING", "RUNNING"):
+                self.repository.update_benchmark_status(
+                    job_id, "FAILED", {"error": "Interrompido; célula reexecutada"}
+                )
+        return cells
+
+    def execute(self) -> Dict:
+        """Executa as células pendentes e retorna o resumo da varredura.
+
+        Returns:
+            Dict com o resultado de cada célula, contagens e a célula de
+            maior vazão
+        """
+        if not self._persisted:
+            self.submit()
+        cells = self._resume()
+        self.repository.update_benchmark_status(
+            self.job_id, "RUNNING", self._summary(cells)
+        )
+
+        # Um único ModelRunner para todas as células: o modelo carrega uma vez
+        runner = ModelRunner(self.model_id)
+        for index, params in enumerate(self.cells):
+            if index in cells:
+                continue
+            benchmark = self._cell_benchmark(params)
+            benchmark.model_runner = runner
+            entry = {"index": index, "job_id": benchmark.job_id, "params": params}
+            # Registra o filho da célula antes de executá-lo, para a retomada
+            cells[index] = {**entry, "status": "RUNNING"}
+            self.repository.update_benchmark_status(
+                self.job_id, "RUNNING", self._summary(cells)
+            )
+            try:
+                with cpu_threads(params.get("cpu_threads")):
+                    results = benchmark.execute()
+                entry = self._cell_entry(index, benchmark.job_id, results)
+            except Exception as exc:
+                # A célula já foi marcada FAILED; a varredura segue
+                entry.update({"status": "FAILED", "error": str(exc)})
+            cells[index] = entry
+            self.repository.update_benchmark_status(
+                self.job_id, "RUNNING", self._summary(cells)
+            )
+
+        summary = self._summary(cells)
+        self.repository.update_benchmark_status(self.job_id, "COMPLETED", summary)
+        self.repository.flush()
+        return summary
+
+    def _summary(self, cells: Dict[int, Dict]) -> Dict:
+        ordered = [cells[index] for index in sorted(cells)]
+        completed = [cell for cell in ordered if cell["status"] == "COMPLETED"]
+        ranked = [cell for cell in completed if cell.get("tokens_per_second") is not None]
+        return {
+            "model": self.model_id,
+            "total": len(self.cells),
+            "completed": len(completed),
+            "failed": sum(cell["status"] == "FAILED" for cell in ordered),
+            "cells": ordered,
+            "best": max(ranked, key=lambda cell: cell["tokens_per_second"]) if ranked else None,
+        }
+
+    def get_status(self) -> Dict:
+        """Job pai com as células registradas."""
+        self.repository.flush()
+        return get_sweep(self.repository, self.job_id)
+
+
+def iter_children(
+    repository: BenchmarkRepository, sweep_id: str, page_size: int = 100
+) -> Iterator[Dict]:
+    """Percorre todos os benchmarks filhos de uma varredura, página a página."""
+    cursor = None
+    while True:
+        page = repository.list_benchmarks(limit=page_size, parent_id=sweep_id, cursor=cursor)
+        yield from page
+        cursor = repository.next_cursor(page, page_size)
+        if cursor is None:
+            return
+
+
+def get_sweep(
+    repository: BenchmarkRepository,
+    sweep_id: str,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> Optional[Dict]:
+    """Retorna o job pai de uma varredura com uma página dos benchmarks filhos.
+
+    Args:
+        repository: Repositório dos benchmarks
+        sweep_id: ID do job pai
+        limit: Número máximo de filhos retornados
+        cursor: Posição retornada por ``next_cursor`` (paginação keyset)
+
+    Returns:
+        Job pai com ``children`` e ``next_cursor`` (None na última página),
+        ou None se a varredura não existir
+
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    record = repository.get_benchmark(sweep_id)
+    if record is None or record["task"] != SWEEP_TASK:
+        return None
+    record["children"] = repository.list_benchmarks(
+        limit=limit, parent_id=sweep_id, cursor=cursor, summary=True
+    )
+    record["next_cursor"] = repository.next_cursor(record["children"], limit)
+    return record
@@ -0,0 +1,163 @@
+"""
+Medição de tempo por token durante a geração em streaming.
+"""
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Calcula o percentil ``q`` (0-100) com interpolação linear.
+
+    Args:
+        values: Amostras
+        q: Percentil desejado
+
+    Returns:
+        Valor do percentil ou None se não houver amostras
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * q / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    weight = rank - lower
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * weight
+
+
+class TokenTimer:
+    """Registra o instante de cada token emitido durante a geração."""
+
+    def __init__(self, clock=time.perf_counter,
+                 on_first_token: Optional[Callable[[], None]] = None):
+        """Inicializa o timer.
+
+        Args:
+            clock: Relógio monotônico
+            on_first_token: Chamado após o primeiro token (fim do prefill)
+        """
+        self._clock = clock
+        self.on_first_token = on_first_token
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        self.timestamps: List[float] = []
+
+    def start(self) -> None:
+        """Marca o início da requisição (antes da tokenização/prefill)."""
+        self.start_time = self._clock()
+        self.end_time = None
+        self.timestamps = []
+
+    def record(self, count: int = 1) -> None:
+        """Registra ``count`` tokens emitidos neste instante."""
+        if self.start_time is None:
+            self.start()
+        now = self._clock()
+        first = not self.timestamps
+        self.timestamps.extend([now] * count)
+        if first and self.on_first_token is not None:
+            self.on_first_token()
+
+    def stop(self) -> None:
+        """Marca o fim da geração."""
+        self.end_time = self._clock()
+
+    @property
+    def token_count(self) -> int:
+        return len(self.timestamps)
+
+    def inter_token_latencies(self) -> List[float]:
+        """Retorna os intervalos entre tokens consecutivos (em segundos)."""
+        return [b - a for a, b in zip(self.timestamps, self.timestamps[1:])]
+
+    def summary(self) -> Dict[str, Any]:
+        """Retorna TTFT, distribuição da latência entre tokens e vazão de decode."""
+        result: Dict[str, Any] = {
+            "time_to_first_token_s": None,
+            "inter_token_latency_mean_s": None,
+            "inter_token_latency_p50_s": None,
+            "inter_token_latency_p95_s": None,
+            "inter_token_latency_p99_s": None,
+            "decode_tokens_per_second": None,
+            "token_timestamps_s": [],
+        }
+        if self.start_time is None or not self.timestamps:
+            return result
+
+        first, last = self.timestamps[0], self.timestamps[-1]
+        latencies = self.inter_token_latencies()
+        result["time_to_first_token_s"] = first - self.start_time
+        result["token_timestamps_s"] = [t - self.start_time for t in self.timestamps]
+        if latencies:
+            result.update({
+                "inter_token_latency_mean_s": sum(latencies) / len(latencies),
+                "inter_token_latency_p50_s": percentile(latencies, 50),
+                "inter_token_latency_p95_s": percentile(latencies, 95),
+                "inter_token_latency_p99_s": percentile(latencies, 99),
+            })
+            if last > first:
+                result["decode_tokens_per_second"] = len(latencies) / (last - first)
+        return result
+
+
+def throughput(
+    prompt_tokens: int,
+    completion_tokens: int,
+    duration: float,
+    time_to_first_token: Optional[float] = None
+) -> Dict[str, Optional[float]]:
+    """Calcula a vazão de prefill e a vazão total a partir das contagens exatas.
+
+    Args:
+        prompt_tokens: Tokens do prompt processados no prefill
+        completion_tokens: Tokens gerados
+        duration: Duração total da geração em segundos
+        time_to_first_token: TTFT em segundos, se medido
+
+    Returns:
+        Dict com ``prefill_tokens_per_second`` e ``tokens_per_second``
+    """
+    return {
+        "prefill_tokens_per_second": (
+            prompt_tokens / time_to_first_token if time_to_first_token else None
+        ),
+        "tokens_per_second": completion_tokens / duration if duration > 0 else None,
+    }
+
+
+class TokenTimingStreamer:
+    """Streamer compatível com ``model.generate(streamer=...)`` do transformers.
+
+    O transformers chama ``put`` primeiro com os ids do prompt e depois uma
+    vez por passo de decodificação; apenas os passos de decodificação são
+    registrados no ``TokenTimer``.
+    """
+
+    def __init__(self, timer: TokenTimer):
+        self.timer = timer
+        self._prompt_seen = False
+
+    def put(self, value: Any) -> None:
+        """Recebe os tokens emitidos em um passo de geração."""
+        if not self._prompt_seen:
+            self._prompt_seen = True
+            return
+        self.timer.record(_count_tokens(value))
+
+    def end(self) -> None:
+        """Sinaliza o fim da geração."""
+        self.timer.stop()
+
+
+def _count_tokens(value: Any) -> int:
+    """Conta os tokens de um tensor/lista emitido pelo streamer."""
+    numel = getattr(value, "numel", None)
+    if callable(numel):
+        return int(numel())
+    try:
+        return len(value)
+    except TypeError:
+        return 1
@@ -0,0 +1,168 @@
+"""
+Spans por fase de um benchmark, exportáveis no formato Chrome trace-event.
+
+O trace ativo é propagado por ``contextvars``: ``start_trace`` o define para
+o job em execução e ``span`` registra cada fase aninhada (carga do modelo,
+tokenização, geração, banco de dados...). Sem trace ativo, ``span`` não
+registra nada e custa apenas a leitura da variável de contexto. O JSON
+gerado por ``Trace.to_chrome`` pode ser aberto no Perfetto ou em
+chrome://tracing.
+"""
+
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+@dataclass
+class Span:
+    """Intervalo de tempo de uma fase."""
+    name: str
+    category: str
+    start: float
+    end: Optional[float] = None
+    thread_id: int = 0
+    thread_name: str = ""
+    depth: int = 0
+    args: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> Optional[float]:
+        return self.end - self.start if self.end is not None else None
+
+
+class Trace:
+    """Coleção de spans de uma execução."""
+
+    def __init__(self, trace_id: str, clock: Callable[[], float] = time.perf_counter):
+        self.trace_id = trace_id
+        self.spans: List[Span] = []
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.origin = clock()
+        self.origin_wall = time.time()
+
+    def begin(self, name: str, category: str, depth: int, args: Dict[str, Any]) -> Span:
+        thread = threading.current_thread()
+        span = Span(
+            name=name,
+            category=category,
+            start=self._clock(),
+            thread_id=thread.ident or 0,
+            thread_name=thread.name,
+            depth=depth,
+            args=args
+        )
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def end(self, span: Span) -> None:
+        span.end = self._clock()
+
+    def phase_durations(self) -> Dict[str, float]:
+        """Soma a duração dos spans concluídos por nome (em segundos)."""
+        phases: Dict[str, float] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            if span.duration is not None:
+                phases[span.name] = phases.get(span.name, 0.0) + span.duration
+        return phases
+
+    def to_chrome(self) -> Dict[str, Any]:
+        """Exporta os spans como eventos completos (``ph: X``) do Chrome trace."""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        events: List[Dict[str, Any]] = [{
+            "name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+            "args": {"name": f"benchmark {self.trace_id}"},
+        }]
+        threads = {}
+        for span in spans:
+            threads.setdefault(span.thread_id, span.thread_name)
+            end = span.end if span.end is not None else self._clock()
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round((span.start - self.origin) * 1e6, 3),
+                "dur": round((end - span.start) * 1e6, 3),
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": span.args,
+            })
+        for tid, name in threads.items():
+            events.append({
+                "name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                "args": {"name": name},
+            })
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"trace_id": self.trace_id, "start_time": self.origin_wall},
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_depth: ContextVar[int] = ContextVar("current_span_depth", default=0)
+
+
+def current_trace() -> Optional[Trace]:
+    """Retorna o trace ativo no contexto atual, se houver."""
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(trace_id: str) -> Iterator[Trace]:
+    """Ativa um novo trace para o bloco (ex: a execução de um job)."""
+    trace = Trace(trace_id)
+    token = _current_trace.set(trace)
+    depth_token = _current_depth.set(0)
+    try:
+        yield trace
+    finally:
+        _current_depth.reset(depth_token)
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str, category: str = "benchmark", **args: Any) -> Iterator[Optional[Span]]:
+    """Registra a duração do bloco como um span do trace ativo.
+
+    Args:
+        name: Nome da fase (ex: ``model.load``)
+        category: Categoria exibida no visualizador
+        **args: Atributos adicionais do span
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    depth = _current_depth.get()
+    current = trace.begin(name, category, depth, args)
+    token = _current_depth.set(depth + 1)
+    try:
+        yield current
+    finally:
+        _current_depth.reset(token)
+        trace.end(current)
+
+
+def traced(name: str, category: str = "benchmark") -> Callable:
+    """Decorator que registra cada chamada da função como um span."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _current_trace.get() is None:
+                return func(*args, **kwargs)
+            with span(name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
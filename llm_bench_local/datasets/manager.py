@@ -6,8 +6,6 @@ import json
 from pathlib import Path
 from typing import Dict, List
 
-from datasets import load_dataset
-
 from llm_bench_local.config.settings import settings
 
 
@@ -45,4 +43,7 @@ class DatasetManager:
         if name not in config:
             raise ValueError(f"Dataset {name} não encontrado")
         hf_id = config[name]["hf_id"]
+        # Importado sob demanda: a biblioteca datasets é pesada (pyarrow, pandas)
+        from datasets import load_dataset
+
         return load_dataset(hf_id)
@@ -0,0 +1,179 @@
+"""
+Buffer circular colunar para amostras de hardware.
+
+Cada métrica é uma coluna ``array('d')`` (8 bytes por valor) com capacidade
+fixa; ao encher, as amostras mais antigas são sobrescritas. Valores ausentes
+(ex: GPU indisponível) são armazenados como NaN. No modo de spill, todas as
+amostras também são gravadas em um arquivo binário (linhas de ``float64``),
+preservando a série completa de execuções longas sem crescer a memória.
+"""
+
+import math
+import os
+from array import array
+from typing import BinaryIO, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from llm_bench_local.core.timing import percentile
+
+FIELDS = (
+    "timestamp",
+    "cpu_usage_percent",
+    "ram_usage_gb",
+    "gpu_usage_percent",
+    "vram_usage_gb",
+    "process_rss_gb",
+    "process_cpu_percent",
+    "process_threads_count",
+    "cgroup_memory_gb",
+)
+
+MISSING = float("nan")
+
+
+class SampleBuffer:
+    """Buffer circular de capacidade fixa com uma coluna por métrica."""
+
+    def __init__(
+        self,
+        capacity: int,
+        fields: Sequence[str] = FIELDS,
+        spill_path: Optional[str] = None
+    ):
+        """Inicializa o buffer.
+
+        Args:
+            capacity: Número máximo de amostras mantidas em memória
+            fields: Nomes das colunas; a primeira deve ser o timestamp
+            spill_path: Arquivo onde todas as amostras são gravadas (opcional)
+        """
+        if capacity <= 0:
+            raise ValueError("A capacidade do buffer deve ser positiva")
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self.spill_path = spill_path
+        self.total = 0
+        self._columns: Dict[str, array] = {name: array("d") for name in self.fields}
+        self._head = 0
+        self._spill: Optional[BinaryIO] = None
+        if spill_path:
+            os.makedirs(os.path.dirname(spill_path) or ".", exist_ok=True)
+            self._spill = open(spill_path, "wb")
+
+    def __len__(self) -> int:
+        return len(self._columns[self.fields[0]])
+
+    def append(self, *values: Optional[float]) -> None:
+        """Adiciona uma amostra (um valor por coluna, na ordem de ``fields``)."""
+        if len(values) != len(self.fields):
+            raise ValueError(f"Esperados {len(self.fields)} valores, recebidos {len(values)}")
+        row = [MISSING if value is None else float(value) for value in values]
+
+        if len(self) < self.capacity:
+            for name, value in zip(self.fields, row):
+                self._columns[name].append(value)
+        else:
+            for name, value in zip(self.fields, row):
+                self._columns[name][self._head] = value
+            self._head = (self._head + 1) % self.capacity
+        self.total += 1
+
+        if self._spill is not None:
+            array("d", row).tofile(self._spill)
+
+    def column(self, name: str) -> array:
+        """Retorna a coluna da janela em memória em ordem cronológica."""
+        values = self._columns[name]
+        return values[self._head:] + values[:self._head]
+
+    def window(self) -> Dict[str, array]:
+        """Retorna todas as colunas da janela em memória."""
+        return {name: self.column(name) for name in self.fields}
+
+    def history(self) -> Dict[str, array]:
+        """Retorna a série completa: o arquivo de spill, se houver, ou a janela."""
+        if self._spill is None:
+            return self.window()
+
+        self._spill.flush()
+        width = len(self.fields)
+        data = array("d")
+        with open(self.spill_path, "rb") as f:
+            data.frombytes(f.read())
+        return {name: data[i::width] for i, name in enumerate(self.fields)}
+
+    def rows(self) -> List[Dict[str, Optional[float]]]:
+        """Retorna a janela como lista de dicts (NaN convertido em None)."""
+        columns = self.window()
+        return [
+            {
+                name: None if math.isnan(columns[name][i]) else columns[name][i]
+                for name in self.fields
+            }
+            for i in range(len(self))
+        ]
+
+    def summarize(self, name: str) -> Dict[str, Optional[float]]:
+        """Agrega uma coluna sobre a série completa (ver ``summarize``)."""
+        history = self.history()
+        return summarize(history[name], history[self.fields[0]])
+
+    def close(self) -> None:
+        """Fecha o arquivo de spill, se aberto."""
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+
+def summarize(values: Sequence[float], timestamps: Sequence[float]) -> Dict[str, Optional[float]]:
+    """Calcula média, pico, p95, desvio padrão e média ponderada no tempo.
+
+    A média ponderada no tempo considera cada amostra válida até a próxima
+    (sample-and-hold), o que corrige a distorção de intervalos irregulares.
+    Valores NaN são ignorados.
+
+    Args:
+        values: Valores da métrica
+        timestamps: Instantes das amostras (segundos, mesma ordem)
+
+    Returns:
+        Dict com ``mean``, ``peak``, ``p95``, ``stddev`` e ``time_weighted_mean``
+        (vazio se não houver valores válidos)
+    """
+    if NUMPY_AVAILABLE:
+        v = np.asarray(values, dtype=np.float64)
+        t = np.asarray(timestamps, dtype=np.float64)
+        mask = ~np.isnan(v)
+        if not mask.any():
+            return {}
+        v, t = v[mask], t[mask]
+        mean = float(v.mean())
+        dt = np.diff(t)
+        span = float(dt.sum())
+        return {
+            "mean": mean,
+            "peak": float(v.max()),
+            "p95": float(np.percentile(v, 95)),
+            "stddev": float(v.std()),
+            "time_weighted_mean": float((v[:-1] * dt).sum() / span) if span > 0 else mean,
+        }
+
+    pairs = [(ts, value) for ts, value in zip(timestamps, values) if not math.isnan(value)]
+    if not pairs:
+        return {}
+    valid = [value for _, value in pairs]
+    mean = math.fsum(valid) / len(valid)
+    weighted = math.fsum(v0 * (t1 - t0) for (t0, v0), (t1, _) in zip(pairs, pairs[1:]))
+    span = pairs[-1][0] - pairs[0][0]
+    return {
+        "mean": mean,
+        "peak": max(valid),
+        "p95": percentile(valid, 95),
+        "stddev": math.sqrt(math.fsum((value - mean) ** 2 for value in valid) / len(valid)),
+        "time_weighted_mean": weighted / span if span > 0 else mean,
+    }
@@ -0,0 +1,176 @@
+"""
+Leitura de limites e uso de recursos do cgroup (v1 e v2).
+
+Dentro de um contêiner, ``psutil.virtual_memory()`` enxerga a memória do
+host; o limite efetivo do benchmark é o do cgroup. Este módulo resolve o
+cgroup do processo atual e lê limite, uso e pico de memória e a cota de CPU.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+PROC_SELF_CGROUP = "/proc/self/cgroup"
+
+# No v1, "sem limite" é representado por um valor próximo de 2^63
+_V1_UNLIMITED = 1 << 60
+
+
+@dataclass
+class CgroupStats:
+    """Limites e uso de recursos do cgroup do processo."""
+    version: int
+    memory_limit_bytes: Optional[int] = None
+    memory_usage_bytes: Optional[int] = None
+    memory_working_set_bytes: Optional[int] = None
+    memory_peak_bytes: Optional[int] = None
+    cpu_limit_cores: Optional[float] = None
+    cpu_usage_s: Optional[float] = None
+
+    @property
+    def memory_headroom_bytes(self) -> Optional[int]:
+        """Memória ainda disponível até o limite (pelo working set)."""
+        if self.memory_limit_bytes is None or self.memory_working_set_bytes is None:
+            return None
+        return self.memory_limit_bytes - self.memory_working_set_bytes
+
+
+def _read(path: Optional[str]) -> Optional[str]:
+    if path is None:
+        return None
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _read_int(path: Optional[str]) -> Optional[int]:
+    value = _read(path)
+    if value is None or value == "max":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _read_stat(path: Optional[str]) -> Dict[str, int]:
+    """Lê arquivos no formato ``chave valor`` (memory.stat, cpu.stat)."""
+    content = _read(path)
+    stats: Dict[str, int] = {}
+    for line in (content or "").splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[1].lstrip("-").isdigit():
+            stats[parts[0]] = int(parts[1])
+    return stats
+
+
+class CgroupReader:
+    """Resolve o cgroup do processo uma vez e lê seus contadores sob demanda."""
+
+    def __init__(self, root: str = CGROUP_ROOT, proc_cgroup: str = PROC_SELF_CGROUP):
+        """Inicializa o leitor.
+
+        Args:
+            root: Ponto de montagem do cgroupfs
+            proc_cgroup: Arquivo com a associação de cgroups do processo
+        """
+        self.root = root
+        self.version: Optional[int] = None
+        self._dirs: Dict[str, str] = {}
+
+        memberships = self._parse_memberships(_read(proc_cgroup) or "")
+        if os.path.exists(os.path.join(root, "cgroup.controllers")):
+            self.version = 2
+            directory = self._resolve(root, memberships.get("", "/"))
+            self._dirs = {"memory": directory, "cpu": directory}
+        elif os.path.isdir(os.path.join(root, "memory")):
+            self.version = 1
+            for controller, mount in (("memory", "memory"), ("cpu", "cpu"), ("cpuacct", "cpuacct")):
+                base = os.path.join(root, mount)
+                if os.path.isdir(base):
+                    self._dirs[controller] = self._resolve(base, memberships.get(controller, "/"))
+
+    @staticmethod
+    def _parse_memberships(content: str) -> Dict[str, str]:
+        """Mapeia controlador -> caminho a partir de /proc/self/cgroup."""
+        memberships: Dict[str, str] = {}
+        for line in content.splitlines():
+            parts = line.split(":", 2)
+            if len(parts) != 3:
+                continue
+            _, controllers, path = parts
+            for controller in controllers.split(","):
+                memberships[controller] = path
+        return memberships
+
+    @staticmethod
+    def _resolve(base: str, path: str) -> str:
+        """Usa o caminho do cgroup se visível; em contêineres, a raiz montada."""
+        candidate = os.path.join(base, path.lstrip("/"))
+        return candidate if os.path.isdir(candidate) else base
+
+    @property
+    def available(self) -> bool:
+        return self.version is not None
+
+    def _path(self, controller: str, name: str) -> Optional[str]:
+        directory = self._dirs.get(controller)
+        return os.path.join(directory, name) if directory else None
+
+    def memory_limit_bytes(self) -> Optional[int]:
+        """Limite de memória do cgroup ou None se ilimitado."""
+        if self.version == 2:
+            return _read_int(self._path("memory", "memory.max"))
+        limit = _read_int(self._path("memory", "memory.limit_in_bytes"))
+        return limit if limit is not None and limit < _V1_UNLIMITED else None
+
+    def memory_usage_bytes(self) -> Optional[int]:
+        """Uso de memória do cgroup (inclui page cache)."""
+        if self.version == 2:
+            return _read_int(self._path("memory", "memory.current"))
+        return _read_int(self._path("memory", "memory.usage_in_bytes"))
+
+    def memory_working_set_bytes(self) -> Optional[int]:
+        """Uso sem o page cache inativo, o mesmo critério do OOM killer/kubelet."""
+        usage = self.memory_usage_bytes()
+        if usage is None:
+            return None
+        stat = _read_stat(self._path("memory", "memory.stat"))
+        inactive = stat.get("inactive_file" if self.version == 2 else "total_inactive_file", 0)
+        return max(usage - inactive, 0)
+
+    def read(self) -> Optional[CgroupStats]:
+        """Lê limites e uso atuais; None fora de um cgroup legível."""
+        if not self.available:
+            return None
+
+        if self.version == 2:
+            peak = _read_int(self._path("memory", "memory.peak"))
+            cpu_limit = None
+            cpu_max = (_read(self._path("cpu", "cpu.max")) or "").split()
+            if len(cpu_max) == 2 and cpu_max[0] != "max":
+                cpu_limit = int(cpu_max[0]) / int(cpu_max[1])
+            usage_usec = _read_stat(self._path("cpu", "cpu.stat")).get("usage_usec")
+            cpu_usage = usage_usec / 1e6 if usage_usec is not None else None
+        else:
+            peak = _read_int(self._path("memory", "memory.max_usage_in_bytes"))
+            cpu_limit = None
+            quota = _read_int(self._path("cpu", "cpu.cfs_quota_us"))
+            period = _read_int(self._path("cpu", "cpu.cfs_period_us"))
+            if quota is not None and quota > 0 and period:
+                cpu_limit = quota / period
+            usage_ns = _read_int(self._path("cpuacct", "cpuacct.usage"))
+            cpu_usage = usage_ns / 1e9 if usage_ns is not None else None
+
+        return CgroupStats(
+            version=self.version,
+            memory_limit_bytes=self.memory_limit_bytes(),
+            memory_usage_bytes=self.memory_usage_bytes(),
+            memory_working_set_bytes=self.memory_working_set_bytes(),
+            memory_peak_bytes=peak,
+            cpu_limit_cores=cpu_limit,
+            cpu_usage_s=cpu_usage
+        )
@@ -0,0 +1,239 @@
+"""
+Pico de memória por fase do benchmark.
+
+O monitor de hardware amostra a memória em intervalos e perde picos curtos
+entre amostras (ex: a cópia temporária dos pesos durante a carga). Aqui o
+pico é lido do próprio kernel: ``VmHWM`` em /proc/self/status é o maior RSS
+já atingido pelo processo, e escrever ``5`` em /proc/self/clear_refs zera
+esse contador, o que permite medir o pico de cada fase isoladamente. Com
+``trace_python`` o tracemalloc também registra o pico do heap Python e os
+locais que mais alocaram em cada fase.
+
+O RSS é do processo inteiro: com vários jobs simultâneos no mesmo processo,
+os picos de uma fase incluem a memória dos outros jobs.
+
+Fronteiras dentro de um trecho cronometrado (ex: prefill → decode, no
+primeiro token) usam ``mark``, que só anota o instante e acorda uma thread
+auxiliar; a leitura do status, o reset do ``VmHWM`` e os snapshots do
+tracemalloc são feitos nela, fora da thread de geração. O fechamento da fase
+anterior inclui o intervalo (normalmente sub-milissegundo) até a thread
+auxiliar processar a fronteira.
+"""
+
+import re
+import threading
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+
+PROC_SELF_STATUS = "/proc/self/status"
+PROC_SELF_CLEAR_REFS = "/proc/self/clear_refs"
+
+_STATUS_FIELD = re.compile(r"^(VmHWM|VmRSS):\s+(\d+)\s+kB", re.MULTILINE)
+
+MB = 1024 ** 2
+GB = 1024 ** 3
+
+
+def read_status(path: str = PROC_SELF_STATUS) -> Dict[str, int]:
+    """Lê ``VmHWM`` e ``VmRSS`` (em bytes) do status do processo.
+
+    Returns:
+        Dict com as chaves encontradas (vazio fora do Linux)
+    """
+    try:
+        with open(path, "r") as f:
+            content = f.read()
+    except OSError:
+        return {}
+    return {name: int(kb) * 1024 for name, kb in _STATUS_FIELD.findall(content)}
+
+
+def reset_peak_rss(path: str = PROC_SELF_CLEAR_REFS) -> bool:
+    """Zera o ``VmHWM`` do processo (Linux >= 4.0).
+
+    Returns:
+        True se o contador foi zerado
+    """
+    try:
+        with open(path, "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class MemoryTracker:
+    """Mede o pico de memória de fases sequenciais de uma execução."""
+
+    def __init__(
+        self,
+        trace_python: bool = False,
+        top_n: int = 10,
+        status_path: str = PROC_SELF_STATUS,
+        clear_refs_path: str = PROC_SELF_CLEAR_REFS
+    ):
+        """Inicializa o rastreador.
+
+        Args:
+            trace_python: Usa o tracemalloc para o heap Python e os locais de
+                alocação (deixa as alocações Python sensivelmente mais lentas)
+            top_n: Número de locais de alocação reportados por fase
+            status_path: Arquivo de status do processo
+            clear_refs_path: Arquivo usado para zerar o ``VmHWM``
+        """
+        self.trace_python = trace_python
+        self.top_n = top_n
+        self.status_path = status_path
+        self.clear_refs_path = clear_refs_path
+        self.phases: Dict[str, Dict] = {}
+        self._current: Optional[str] = None
+        self._started_at = 0.0
+        self._rss_start: Optional[int] = None
+        self._hwm_reset = False
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._owns_tracemalloc = False
+        # Fronteira anotada por ``mark`` e ainda não processada: (fase, instante)
+        self._pending: Optional[Tuple[str, float]] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closing = False
+        self._worker: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Inicia o tracemalloc, se solicitado e ainda não ativo."""
+        if self.trace_python and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+
+    def enter(self, phase: str) -> None:
+        """Encerra a fase atual (se houver) e inicia ``phase``."""
+        self._ensure_worker()
+        with self._lock:
+            self._settle()
+            self._close()
+            self._begin(phase)
+
+    def mark(self, phase: str) -> None:
+        """Fronteira leve: encerra a fase atual e inicia ``phase``.
+
+        Só anota o instante, para ser chamada dentro de trechos cronometrados;
+        o reset do ``VmHWM`` e os snapshots do tracemalloc da nova fase são
+        feitos pela thread auxiliar.
+        """
+        if self._current is None:
+            self.enter(phase)
+            return
+        self._pending = (phase, time.perf_counter())
+        self._wake.set()
+
+    def finish(self) -> Dict[str, Dict]:
+        """Encerra a fase atual e o tracemalloc iniciado por este rastreador.
+
+        Returns:
+            Métricas de memória por fase, na ordem de execução
+        """
+        self._stop_worker()
+        with self._lock:
+            self._settle()
+            self._close()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+        return self.phases
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._closing = False
+        self._wake.clear()
+        self._worker = threading.Thread(
+            target=self._settle_loop, name="memory-tracker", daemon=True
+        )
+        self._worker.start()
+
+    def _stop_worker(self) -> None:
+        if self._worker is None:
+            return
+        self._closing = True
+        self._wake.set()
+        self._worker.join()
+        self._worker = None
+
+    def _settle_loop(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._closing:
+                return
+            with self._lock:
+                self._settle()
+
+    def _settle(self) -> None:
+        """Processa a fronteira anotada por ``mark``, se houver."""
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        phase, marked_at = pending
+        status = read_status(self.status_path)
+        self._close(ended=marked_at, status=status)
+        self._begin(phase, started_at=marked_at, rss_start=status.get("VmRSS"))
+
+    def _begin(
+        self,
+        phase: str,
+        started_at: Optional[float] = None,
+        rss_start: Optional[int] = None
+    ) -> None:
+        self._current = phase
+        self._hwm_reset = reset_peak_rss(self.clear_refs_path)
+        if rss_start is None:
+            rss_start = read_status(self.status_path).get("VmRSS")
+        self._rss_start = rss_start
+        if tracemalloc.is_tracing():
+            self._snapshot = tracemalloc.take_snapshot() if self.top_n else None
+            tracemalloc.reset_peak()
+        self._started_at = time.perf_counter() if started_at is None else started_at
+
+    def _close(self, ended: Optional[float] = None, status: Optional[Dict[str, int]] = None) -> None:
+        if self._current is None:
+            return
+        if ended is None:
+            ended = time.perf_counter()
+        if status is None:
+            status = read_status(self.status_path)
+        hwm = status.get("VmHWM")
+        rss = status.get("VmRSS")
+        result = {
+            "duration_s": ended - self._started_at,
+            # Sem o reset, o VmHWM é o pico desde o início do processo
+            "rss_peak_gb": hwm / GB if hwm is not None else None,
+            "rss_peak_is_phase": self._hwm_reset,
+            "rss_start_gb": self._rss_start / GB if self._rss_start is not None else None,
+            "rss_end_gb": rss / GB if rss is not None else None,
+        }
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            result["python_peak_mb"] = peak / MB
+            result["python_current_mb"] = current / MB
+            result["top_allocations"] = self._top_allocations()
+        self.phases[self._current] = result
+        self._current = None
+        self._snapshot = None
+
+    def _top_allocations(self) -> List[Dict]:
+        """Locais com maior crescimento de memória alocada durante a fase."""
+        if self._snapshot is None:
+            return []
+        exclude = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        before = self._snapshot.filter_traces(exclude)
+        after = tracemalloc.take_snapshot().filter_traces(exclude)
+        stats = [s for s in after.compare_to(before, "lineno") if s.size_diff > 0]
+        return [
+            {
+                "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_mb": stat.size_diff / MB,
+                "count": stat.count_diff,
+            }
+            for stat in stats[:self.top_n]
+        ]
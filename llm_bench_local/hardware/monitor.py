@@ -2,33 +2,91 @@
 Módulo para monitoramento de hardware.
 """
 
+import logging
 import psutil
+import threading
 import time
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+from collections import deque
+from typing import Callable, Dict, List, Optional
+from dataclasses import asdict, dataclass
 from datetime import datetime
 
+from llm_bench_local.config.settings import settings
+from llm_bench_local.core.timing import percentile
+from llm_bench_local.hardware.buffer import FIELDS, SampleBuffer, summarize
+from llm_bench_local.hardware.cgroup import CgroupReader
+from llm_bench_local.hardware.process import ProcessMetrics, ProcessTreeSampler, diff
+
 try:
     import pynvml
     PYNVML_AVAILABLE = True
 except ImportError:
     PYNVML_AVAILABLE = False
 
+logger = logging.getLogger(__name__)
+
 @dataclass
 class HardwareMetrics:
-    timestamp: datetime
+    timestamp: float  # segundos desde a época (time.time())
     cpu_usage_percent: float
     ram_usage_gb: float
     gpu_usage_percent: Optional[float] = None
     vram_usage_gb: Optional[float] = None
+    process_rss_gb: Optional[float] = None
+    process_cpu_percent: Optional[float] = None
+    process_threads_count: Optional[int] = None
+    cgroup_memory_gb: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        """Converte a amostra no formato aceito por ``save_hardware_metrics``."""
+        return {
+            "timestamp": datetime.utcfromtimestamp(self.timestamp).isoformat(),
+            "cpu_usage_percent": self.cpu_usage_percent,
+            "ram_usage_gb": self.ram_usage_gb,
+            "gpu_usage_percent": self.gpu_usage_percent,
+            "vram_usage_gb": self.vram_usage_gb,
+        }
 
 class HardwareMonitor:
-    """Monitor de hardware para coletar métricas durante o benchmark."""
+    """Monitor de hardware para coletar métricas durante o benchmark.
+    
+    Enquanto o monitoramento está ativo, uma thread em segundo plano coleta
+    amostras a cada ``interval`` segundos, guarda-as em um ``SampleBuffer``
+    de capacidade fixa e as entrega a ``on_sample``. Além dos totais do
+    sistema, cada amostra traz os recursos da árvore de processos do
+    benchmark e o uso de memória do cgroup (contêiner).
+    """
     
-    def __init__(self):
-        self.metrics: List[HardwareMetrics] = []
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        on_sample: Optional[Callable[[HardwareMetrics], None]] = None,
+        buffer_size: Optional[int] = None,
+        spill_path: Optional[str] = None
+    ):
+        """Inicializa o monitor.
+        
+        Args:
+            interval: Intervalo entre amostras em segundos (padrão: ``monitor_interval``)
+            on_sample: Função chamada com cada amostra (ex: persistência)
+            buffer_size: Amostras mantidas em memória (padrão: ``MONITOR_BUFFER_SIZE``)
+            spill_path: Arquivo para gravar a série completa (execuções longas)
+        """
+        self.interval = interval or settings.default_hardware_options["monitor_interval"]
+        self.on_sample = on_sample
+        self.buffer_size = buffer_size or settings.MONITOR_BUFFER_SIZE
+        self.spill_path = spill_path
+        self.buffer = SampleBuffer(self.buffer_size)
+        self.process_sampler = ProcessTreeSampler()
+        self.cgroup = CgroupReader()
+        self._process_start: Optional[ProcessMetrics] = None
         self._monitoring = False
         self._start_time: Optional[float] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._jitter: deque = deque(maxlen=self.buffer_size)
+        self._sampler_cpu_time = 0.0
         
         # Inicializa NVML se disponível
         if PYNVML_AVAILABLE:
@@ -47,55 +105,135 @@ class HardwareMonitor:
         
         self._monitoring = True
         self._start_time = time.time()
-        self.metrics.clear()
+        self.buffer.close()
+        self.buffer = SampleBuffer(self.buffer_size, spill_path=self.spill_path)
+        self._jitter.clear()
+        self._sampler_cpu_time = 0.0
+        
+        # A primeira leitura de cpu_percent só define a linha de base
+        psutil.cpu_percent(interval=None)
+        self._process_start = self.process_sampler.sample(detailed=True)
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._sample_loop, name="hardware-monitor", daemon=True
+        )
+        self._thread.start()
+
+    def _sample_loop(self) -> None:
+        """Coleta amostras em instantes fixos (t0 + k * interval).
+        
+        Agendar pelo prazo absoluto em vez de dormir ``interval`` após cada
+        amostra evita que o tempo de coleta se acumule como deriva; ticks
+        perdidos (ex: sink lento) são pulados em vez de disparados em rajada.
+        """
+        cpu_start = time.thread_time()
+        interval = self.interval
+        next_tick = time.perf_counter()
+        while not self._stop_event.is_set():
+            self._jitter.append(time.perf_counter() - next_tick)
+            self.update()
+            
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay < 0:
+                next_tick += (int(-delay // interval) + 1) * interval
+                delay = next_tick - time.perf_counter()
+            self._stop_event.wait(delay)
+        self._sampler_cpu_time = time.thread_time() - cpu_start
 
     def stop_monitoring(self) -> Dict:
         """Para o monitoramento e retorna as métricas agregadas."""
         if not self._monitoring:
             return {}
         
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5.0)
+            self._thread = None
         self._monitoring = False
         
-        if not self.metrics:
+        if not self.buffer.total:
+            self.buffer.close()
             return {}
         
-        # Calcula médias e picos
-        cpu_usage = [m.cpu_usage_percent for m in self.metrics]
-        ram_usage = [m.ram_usage_gb for m in self.metrics]
-        gpu_usage = [m.gpu_usage_percent for m in self.metrics if m.gpu_usage_percent is not None]
-        vram_usage = [m.vram_usage_gb for m in self.metrics if m.vram_usage_gb is not None]
-        
-        result = {
-            "cpu_usage_mean_percent": sum(cpu_usage) / len(cpu_usage),
-            "cpu_usage_peak_percent": max(cpu_usage),
-            "ram_usage_mean_gb": sum(ram_usage) / len(ram_usage),
-            "ram_usage_peak_gb": max(ram_usage),
-        }
+        process_end = self.process_sampler.sample(detailed=True)
+        
+        # Agrega cada métrica: média, pico, p95, desvio padrão e média no tempo
+        result: Dict = {}
+        history = self.buffer.history()
+        for field in FIELDS[1:]:
+            name, unit = field.rsplit("_", 1)
+            stats = summarize(history[field], history["timestamp"])
+            for stat, value in stats.items():
+                result[f"{name}_{stat}_{unit}"] = value
+        self.buffer.close()
         
-        if gpu_usage:
-            result.update({
-                "gpu_usage_mean_percent": sum(gpu_usage) / len(gpu_usage),
-                "gpu_usage_peak_percent": max(gpu_usage),
-            })
+        result["process"] = diff(self._process_start, process_end)
+        result.update(self._memory_headroom(result))
         
-        if vram_usage:
-            result.update({
-                "vram_usage_mean_gb": sum(vram_usage) / len(vram_usage),
-                "vram_usage_peak_gb": max(vram_usage),
-            })
+        wall_time = time.time() - self._start_time
+        result.update({
+            "samples": self.buffer.total,
+            "sample_interval_s": self.interval,
+            "sampler_jitter_p50_ms": percentile(self._jitter, 50) * 1000 if self._jitter else None,
+            "sampler_jitter_p95_ms": percentile(self._jitter, 95) * 1000 if self._jitter else None,
+            "sampler_cpu_percent": (
+                100.0 * self._sampler_cpu_time / wall_time if wall_time > 0 else None
+            ),
+        })
         
         return result
 
+    def _memory_headroom(self, result: Dict) -> Dict:
+        """Compara o pico de memória com o limite do contêiner ou do host."""
+        gb = 1024 ** 3
+        cgroup = self.cgroup.read()
+        if cgroup is not None and cgroup.memory_limit_bytes is not None:
+            limit = cgroup.memory_limit_bytes / gb
+            source = "cgroup"
+            peak = result.get("cgroup_memory_peak_gb")
+        else:
+            limit = psutil.virtual_memory().total / gb
+            source = "host"
+            peak = result.get("ram_usage_peak_gb")
+        
+        cgroup_info = None
+        if cgroup is not None:
+            cgroup_info = asdict(cgroup)
+            cgroup_info["memory_headroom_bytes"] = cgroup.memory_headroom_bytes
+        
+        return {
+            "memory_limit_gb": limit,
+            "memory_limit_source": source,
+            "memory_headroom_gb": limit - peak if peak is not None else None,
+            "cgroup": cgroup_info,
+        }
+
+    @property
+    def metrics(self) -> List[HardwareMetrics]:
+        """Amostras da janela em memória, da mais antiga para a mais recente."""
+        with self._lock:
+            rows = self.buffer.rows()
+        return [HardwareMetrics(**row) for row in rows]
+
     def get_current_metrics(self) -> HardwareMetrics:
         """Coleta métricas atuais do hardware."""
         cpu_usage = psutil.cpu_percent()
         ram = psutil.virtual_memory()
         ram_usage_gb = ram.used / (1024 ** 3)
         
+        process = self.process_sampler.sample()
+        working_set = self.cgroup.memory_working_set_bytes() if self.cgroup.available else None
+        
         metrics = HardwareMetrics(
-            timestamp=datetime.now(),
+            timestamp=time.time(),
             cpu_usage_percent=cpu_usage,
-            ram_usage_gb=ram_usage_gb
+            ram_usage_gb=ram_usage_gb,
+            process_rss_gb=process.rss_bytes / (1024 ** 3),
+            process_cpu_percent=process.cpu_percent,
+            process_threads_count=process.num_threads,
+            cgroup_memory_gb=working_set / (1024 ** 3) if working_set is not None else None
         )
         
         if self._gpu_available:
@@ -112,12 +250,19 @@ class HardwareMonitor:
         return metrics
 
     def update(self) -> None:
-        """Atualiza as métricas se o monitoramento estiver ativo."""
+        """Coleta uma amostra e a entrega ao ``on_sample``, se configurado."""
         if not self._monitoring:
             return
         
         metrics = self.get_current_metrics()
-        self.metrics.append(metrics)
+        with self._lock:
+            self.buffer.append(*(getattr(metrics, field) for field in FIELDS))
+        
+        if self.on_sample is not None:
+            try:
+                self.on_sample(metrics)
+            except Exception:
+                logger.exception("Falha ao processar amostra de hardware")
 
     def get_static_info(self) -> Dict:
         """Retorna informações estáticas sobre o hardware."""
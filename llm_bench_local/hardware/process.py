@@ -0,0 +1,172 @@
+"""
+Métricas de recursos da árvore de processos do benchmark.
+
+Em vez dos totais do sistema (que incluem outros contêineres e processos),
+soma memória, tempo de CPU, threads, trocas de contexto e I/O do processo
+do benchmark e de todos os seus filhos.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import psutil
+
+
+@dataclass
+class ProcessMetrics:
+    """Recursos consumidos pela árvore de processos em um instante."""
+    timestamp: float
+    process_count: int
+    rss_bytes: int
+    cpu_time_s: float
+    num_threads: int
+    cpu_percent: Optional[float] = None
+    uss_bytes: Optional[int] = None
+    ctx_switches_voluntary: Optional[int] = None
+    ctx_switches_involuntary: Optional[int] = None
+    io_read_bytes: Optional[int] = None
+    io_write_bytes: Optional[int] = None
+
+
+class ProcessTreeSampler:
+    """Amostra os recursos de um processo e de seus descendentes."""
+
+    def __init__(self, pid: Optional[int] = None, children_refresh_s: float = 1.0):
+        """Inicializa o amostrador.
+
+        Args:
+            pid: Processo raiz (padrão: processo atual)
+            children_refresh_s: Intervalo mínimo entre buscas por filhos, que
+                exigem varrer /proc e são caras em amostragem de alta frequência
+        """
+        self.root = psutil.Process(pid)
+        self.children_refresh_s = children_refresh_s
+        self._procs: Dict[int, psutil.Process] = {self.root.pid: self.root}
+        self._last_refresh: Optional[float] = None
+        self._last_cpu: Optional[float] = None
+        self._last_time: Optional[float] = None
+
+    def processes(self) -> List[psutil.Process]:
+        """Retorna a raiz e os descendentes, reutilizando os objetos conhecidos."""
+        now = time.monotonic()
+        if self._last_refresh is None or now - self._last_refresh >= self.children_refresh_s:
+            try:
+                children = self.root.children(recursive=True)
+            except psutil.Error:
+                children = []
+            procs = {self.root.pid: self.root}
+            for child in children:
+                procs[child.pid] = self._procs.get(child.pid, child)
+            self._procs = procs
+            self._last_refresh = now
+        return list(self._procs.values())
+
+    def sample(self, detailed: bool = False) -> ProcessMetrics:
+        """Soma os recursos da árvore de processos.
+
+        Args:
+            detailed: Inclui USS, trocas de contexto e I/O (leituras mais caras)
+
+        Returns:
+            Métricas agregadas da árvore
+        """
+        now = time.perf_counter()
+        rss = threads = count = 0
+        cpu_time = 0.0
+        uss = voluntary = involuntary = read_bytes = write_bytes = None
+        if detailed:
+            uss = voluntary = involuntary = 0
+
+        for proc in self.processes():
+            try:
+                with proc.oneshot():
+                    rss += proc.memory_info().rss
+                    cpu = proc.cpu_times()
+                    cpu_time += cpu.user + cpu.system
+                    if proc.pid == self.root.pid:
+                        # Filhos que já terminaram e foram coletados pelo wait()
+                        cpu_time += cpu.children_user + cpu.children_system
+                    threads += proc.num_threads()
+                    if detailed:
+                        uss += self._uss(proc)
+                        switches = proc.num_ctx_switches()
+                        voluntary += switches.voluntary
+                        involuntary += switches.involuntary
+                        io = self._io(proc)
+                        if io is not None:
+                            read_bytes = (read_bytes or 0) + io.read_bytes
+                            write_bytes = (write_bytes or 0) + io.write_bytes
+                count += 1
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                self._procs.pop(proc.pid, None)
+            except psutil.AccessDenied:
+                continue
+
+        cpu_percent = None
+        if self._last_time is not None and now > self._last_time:
+            delta = max(cpu_time - self._last_cpu, 0.0)
+            cpu_percent = 100.0 * delta / (now - self._last_time)
+        self._last_cpu, self._last_time = cpu_time, now
+
+        return ProcessMetrics(
+            timestamp=time.time(),
+            process_count=count,
+            rss_bytes=rss,
+            cpu_time_s=cpu_time,
+            num_threads=threads,
+            cpu_percent=cpu_percent,
+            uss_bytes=uss,
+            ctx_switches_voluntary=voluntary,
+            ctx_switches_involuntary=involuntary,
+            io_read_bytes=read_bytes,
+            io_write_bytes=write_bytes
+        )
+
+    @staticmethod
+    def _uss(proc: psutil.Process) -> int:
+        try:
+            return proc.memory_full_info().uss
+        except (psutil.AccessDenied, AttributeError):
+            return 0
+
+    @staticmethod
+    def _io(proc: psutil.Process):
+        io_counters = getattr(proc, "io_counters", None)
+        if io_counters is None:
+            return None
+        try:
+            return io_counters()
+        except psutil.AccessDenied:
+            return None
+
+
+def diff(start: ProcessMetrics, end: ProcessMetrics) -> Dict[str, Optional[float]]:
+    """Resume o consumo da árvore entre duas amostras detalhadas.
+
+    Args:
+        start: Amostra no início do monitoramento
+        end: Amostra no fim do monitoramento
+
+    Returns:
+        Dict com estado final (memória, threads) e contadores acumulados no período
+    """
+    def delta(name: str) -> Optional[float]:
+        a, b = getattr(start, name), getattr(end, name)
+        return b - a if a is not None and b is not None else None
+
+    gb = 1024 ** 3
+    mb = 1024 ** 2
+    io_read = delta("io_read_bytes")
+    io_write = delta("io_write_bytes")
+    return {
+        "process_count": end.process_count,
+        "rss_gb": end.rss_bytes / gb,
+        "uss_gb": end.uss_bytes / gb if end.uss_bytes is not None else None,
+        "num_threads": end.num_threads,
+        "cpu_time_s": delta("cpu_time_s"),
+        "ctx_switches_voluntary": delta("ctx_switches_voluntary"),
+        "ctx_switches_involuntary": delta("ctx_switches_involuntary"),
+        "io_read_mb": io_read / mb if io_read is not None else None,
+        "io_write_mb": io_write / mb if io_write is not None else None,
+    }
@@ -0,0 +1,546 @@
+"""
+Registro de motores de inferência usados pelo ``LLMRunner``.
+
+Cada motor declara suas capacidades (streaming, lotes, reuso de KV cache,
+quantizações suportadas), as opções de carga e os parâmetros ajustáveis de
+geração, com seus valores padrão. O backend só é importado quando o motor
+carrega um modelo; ``available`` apenas verifica se o pacote está instalado.
+
+Novos motores são adicionados com ``register_engine``.
+"""
+
+import importlib.util
+import json
+import os
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from llm_bench_local.core.timing import TokenTimer, TokenTimingStreamer
+from llm_bench_local.schemas.benchmark import BenchmarkConfig, HardwareOptions
+
+DEFAULT_STOP = ["</s>", "Human:", "Assistant:"]
+
+
+@dataclass
+class EngineCapabilities:
+    """O que um motor suporta."""
+    streaming: bool
+    batching: bool
+    kv_reuse: bool
+    quantization: List[str] = field(default_factory=list)
+
+
+class Engine:
+    """Motor de inferência.
+
+    Subclasses definem ``name``, ``modules`` (pacotes necessários),
+    ``capabilities``, ``load_options`` e ``knobs`` e implementam ``load`` e
+    ``generate``.
+    """
+
+    name: str = ""
+    description: str = ""
+    modules: Tuple[str, ...] = ()
+    capabilities = EngineCapabilities(streaming=False, batching=False, kv_reuse=False)
+    # Opções aplicadas na carga do modelo (mudam a instância carregada)
+    load_options: Dict[str, Any] = {}
+    # Parâmetros de geração ajustáveis por execução
+    knobs: Dict[str, Any] = {}
+    # Tipo das opções cujo padrão é None (as demais seguem o tipo do padrão)
+    option_types: Dict[str, type] = {}
+
+    def available(self) -> bool:
+        """Indica se os pacotes do motor estão instalados (sem importá-los)."""
+        return all(importlib.util.find_spec(module) is not None for module in self.modules)
+
+    def matches(self, model_id: str) -> bool:
+        """Indica se o motor é o padrão para o modelo (pelo caminho/ID)."""
+        return False
+
+    def resolve_options(self, overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Combina os valores padrão com ``overrides``.
+
+        Raises:
+            ValueError: Se alguma opção não for suportada pelo motor ou
+                tiver um valor inválido
+        """
+        options = {**self.load_options, **self.knobs}
+        unknown = set(overrides or {}) - set(options)
+        if unknown:
+            raise ValueError(
+                f"Opções não suportadas pelo motor {self.name}: {', '.join(sorted(unknown))}"
+                f" (disponíveis: {', '.join(sorted(options))})"
+            )
+        for name, value in (overrides or {}).items():
+            self._check_option(name, value, options[name])
+        options.update(overrides or {})
+        return options
+
+    def _check_option(self, name: str, value: Any, default: Any) -> None:
+        """Valida o tipo de uma opção pelo valor padrão (ou ``option_types``).
+
+        Raises:
+            ValueError: Se o valor não for do tipo esperado
+        """
+        expected = self.option_types.get(name, type(default))
+        if value is None and default is None:
+            return
+        if expected is float:
+            valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+        elif expected is int:
+            valid = isinstance(value, int) and not isinstance(value, bool)
+        elif expected is list:
+            valid = isinstance(value, list) and all(isinstance(item, str) for item in value)
+        elif expected is type(None):
+            valid = False
+        else:
+            valid = isinstance(value, expected)
+        if not valid:
+            raise ValueError(
+                f"Valor inválido para a opção {name} do motor {self.name}: {value!r}"
+                f" (esperado: {expected.__name__})"
+            )
+
+    def pool_tag(self, hardware: HardwareOptions, options: Dict[str, Any]) -> str:
+        """Identifica a variante carregada no pool (motor + opções de carga)."""
+        load = {name: options[name] for name in self.load_options}
+        return f"{self.name}:{json.dumps(load, sort_keys=True, default=str)}"
+
+    def load(self, model_id: str, hardware: HardwareOptions, options: Dict[str, Any]) -> Tuple[Any, Any]:
+        """Carrega o modelo e retorna ``(modelo, tokenizer)``."""
+        raise NotImplementedError
+
+    def generate(
+        self,
+        model: Any,
+        tokenizer: Any,
+        config: BenchmarkConfig,
+        hardware: HardwareOptions,
+        options: Dict[str, Any],
+        timer: TokenTimer
+    ) -> Tuple[str, int, int]:
+        """Gera em streaming, registrando cada token em ``timer``.
+
+        Returns:
+            Tupla (texto, tokens do prompt, tokens gerados)
+        """
+        raise NotImplementedError
+
+    def describe(self) -> Dict[str, Any]:
+        """Descrição do motor para a API."""
+        return {
+            "name": self.name,
+            "description": self.description,
+            "available": self.available(),
+            "capabilities": asdict(self.capabilities),
+            "load_options": dict(self.load_options),
+            "knobs": dict(self.knobs),
+        }
+
+
+class TransformersEngine(Engine):
+    name = "transformers"
+    description = "Hugging Face transformers (PyTorch)"
+    modules = ("transformers", "torch")
+    capabilities = EngineCapabilities(
+        streaming=True, batching=True, kv_reuse=True, quantization=["8bit", "4bit"]
+    )
+    load_options = {
+        "use_safetensors": None,
+        "load_in_8bit": False,
+        "load_in_4bit": False,
+    }
+    knobs = {"do_sample": True, "repetition_penalty": 1.0}
+    option_types = {"use_safetensors": bool}
+
+    def matches(self, model_id: str) -> bool:
+        return True
+
+    def pool_tag(self, hardware: HardwareOptions, options: Dict[str, Any]) -> str:
+        dtype = "float16" if hardware.use_gpu else "float32"
+        return f"{dtype}-{super().pool_tag(hardware, options)}"
+
+    def _from_pretrained_kwargs(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        kwargs = {}
+        if options["use_safetensors"] is not None:
+            kwargs["use_safetensors"] = options["use_safetensors"]
+        if options["load_in_8bit"] or options["load_in_4bit"]:
+            from transformers import BitsAndBytesConfig
+
+            kwargs["quantization_config"] = BitsAndBytesConfig(
+                load_in_8bit=options["load_in_8bit"], load_in_4bit=options["load_in_4bit"]
+            )
+        return kwargs
+
+    def load(self, model_id: str, hardware: HardwareOptions, options: Dict[str, Any]) -> Tuple[Any, Any]:
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(model_id)
+        model = AutoModelForCausalLM.from_pretrained(
+            model_id,
+            device_map='auto' if hardware.use_gpu else 'cpu',
+            torch_dtype=torch.float16 if hardware.use_gpu else torch.float32,
+            **self._from_pretrained_kwargs(options)
+        )
+        return model, tokenizer
+
+    def generate(self, model, tokenizer, config, hardware, options, timer):
+        inputs = tokenizer(config.prompt, return_tensors="pt")
+        if hardware.use_gpu:
+            inputs = inputs.to('cuda')
+        prompt_tokens = inputs["input_ids"].shape[-1]
+
+        outputs = model.generate(
+            **inputs,
+            max_new_tokens=config.max_new_tokens,
+            temperature=config.temperature,
+            top_p=config.top_p,
+            do_sample=options["do_sample"],
+            repetition_penalty=options["repetition_penalty"],
+            streamer=TokenTimingStreamer(timer)
+        )
+
+        # Decodifica apenas os tokens novos (a saída inclui o prompt)
+        new_tokens = outputs[0][prompt_tokens:]
+        output = tokenizer.decode(new_tokens, skip_special_tokens=True)
+        return output, int(prompt_tokens), int(new_tokens.shape[-1])
+
+
+class TorchCompileEngine(TransformersEngine):
+    name = "torch.compile"
+    description = "transformers na CPU com o forward compilado por torch.compile"
+    capabilities = EngineCapabilities(streaming=True, batching=True, kv_reuse=True)
+    load_options = {
+        "use_safetensors": None,
+        "backend": "inductor",
+        "compile_mode": "default",
+        "dynamic": True,
+        # Uma geração curta na carga, para que a compilação não caia no TTFT
+        "warmup": True,
+    }
+
+    def matches(self, model_id: str) -> bool:
+        return False
+
+    def pool_tag(self, hardware: HardwareOptions, options: Dict[str, Any]) -> str:
+        return Engine.pool_tag(self, hardware, options)
+
+    def _from_pretrained_kwargs(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        if options["use_safetensors"] is not None:
+            return {"use_safetensors": options["use_safetensors"]}
+        return {}
+
+    def load(self, model_id: str, hardware: HardwareOptions, options: Dict[str, Any]) -> Tuple[Any, Any]:
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(model_id)
+        model = AutoModelForCausalLM.from_pretrained(
+            model_id, device_map='cpu', torch_dtype=torch.float32,
+            **self._from_pretrained_kwargs(options)
+        )
+        model.eval()
+        model.forward = torch.compile(
+            model.forward,
+            backend=options["backend"],
+            mode=options["compile_mode"],
+            dynamic=options["dynamic"]
+        )
+        if options["warmup"]:
+            with torch.no_grad():
+                model.generate(**tokenizer("warmup", return_tensors="pt"), max_new_tokens=2)
+        return model, tokenizer
+
+    def generate(self, model, tokenizer, config, hardware, options, timer):
+        # Sempre na CPU, independente de ``use_gpu``
+        return super().generate(
+            model, tokenizer, config, hardware.model_copy(update={"use_gpu": False}),
+            options, timer
+        )
+
+
+class OnnxRuntimeEngine(TransformersEngine):
+    name = "onnxruntime"
+    description = "ONNX Runtime via optimum (ORTModelForCausalLM)"
+    modules = ("onnxruntime", "optimum", "transformers")
+    capabilities = EngineCapabilities(
+        streaming=True, batching=True, kv_reuse=True, quantization=["int8"]
+    )
+    load_options = {
+        "provider": None,
+        # Exporta um checkpoint PyTorch para ONNX na carga
+        "export": False,
+        "use_io_binding": None,
+    }
+    option_types = {"provider": str, "use_io_binding": bool}
+
+    def matches(self, model_id: str) -> bool:
+        if model_id.endswith(".onnx"):
+            return True
+        return os.path.isdir(model_id) and any(
+            name.endswith(".onnx") for name in os.listdir(model_id)
+        )
+
+    def pool_tag(self, hardware: HardwareOptions, options: Dict[str, Any]) -> str:
+        return Engine.pool_tag(self, hardware, options)
+
+    def load(self, model_id: str, hardware: HardwareOptions, options: Dict[str, Any]) -> Tuple[Any, Any]:
+        from optimum.onnxruntime import ORTModelForCausalLM
+        from transformers import AutoTokenizer
+
+        if model_id.endswith(".onnx"):
+            model_id = os.path.dirname(model_id) or "."
+        provider = options["provider"] or (
+            "CUDAExecutionProvider" if hardware.use_gpu else "CPUExecutionProvider"
+        )
+        kwargs = {"provider": provider, "export": options["export"], "use_cache": True}
+        if options["use_io_binding"] is not None:
+            kwargs["use_io_binding"] = options["use_io_binding"]
+        model = ORTModelForCausalLM.from_pretrained(model_id, **kwargs)
+        return model, AutoTokenizer.from_pretrained(model_id)
+
+
+class LlamaCppEngine(Engine):
+    name = "llama.cpp"
+    description = "llama.cpp (llama-cpp-python) com modelos GGUF"
+    modules = ("llama_cpp",)
+    capabilities = EngineCapabilities(
+        streaming=True,
+        batching=False,
+        kv_reuse=True,
+        quantization=["Q2_K", "Q3_K", "Q4_0", "Q4_K_M", "Q5_K_M", "Q6_K", "Q8_0"],
+    )
+    load_options = {
+        "n_ctx": 2048,
+        "n_batch": 512,
+        # None usa ``HardwareOptions`` (GPU, mmap, mlock, threads)
+        "n_gpu_layers": None,
+        "use_mmap": None,
+        "use_mlock": None,
+        "n_threads": None,
+    }
+    knobs = {"top_k": 40, "repeat_penalty": 1.1, "stop": DEFAULT_STOP}
+    option_types = {"n_gpu_layers": int, "use_mmap": bool, "use_mlock": bool, "n_threads": int}
+
+    def matches(self, model_id: str) -> bool:
+        return model_id.endswith(".gguf")
+
+    def load(self, model_id: str, hardware: HardwareOptions, options: Dict[str, Any]) -> Tuple[Any, Any]:
+        from llama_cpp import Llama
+
+        model = Llama(
+            model_path=model_id,
+            n_ctx=options["n_ctx"],
+            n_batch=options["n_batch"],
+            n_threads=_first(options["n_threads"], hardware.cpu_threads),
+            n_gpu_layers=_first(options["n_gpu_layers"], -1 if hardware.use_gpu else 0),
+            use_mmap=_first(options["use_mmap"], hardware.use_mmap),
+            use_mlock=_first(options["use_mlock"], hardware.use_mlock)
+        )
+        return model, None
+
+    def generate(self, model, tokenizer, config, hardware, options, timer):
+        prompt_tokens = len(model.tokenize(config.prompt.encode("utf-8")))
+        pieces = []
+        for chunk in model(
+            config.prompt,
+            max_tokens=config.max_new_tokens,
+            temperature=config.temperature,
+            top_p=config.top_p,
+            top_k=options["top_k"],
+            repeat_penalty=options["repeat_penalty"],
+            stop=options["stop"],
+            stream=True
+        ):
+            timer.record()
+            pieces.append(chunk['choices'][0]['text'])
+        output = "".join(pieces)
+        # Um chunk pode juntar vários tokens (UTF-8 incompleto, stop strings)
+        completion_tokens = len(model.tokenize(output.encode("utf-8"), add_bos=False))
+        return output, prompt_tokens, completion_tokens
+
+
+class CTransformersEngine(Engine):
+    name = "ctransformers"
+    description = "ctransformers com modelos GGML"
+    modules = ("ctransformers",)
+    capabilities = EngineCapabilities(
+        streaming=True, batching=False, kv_reuse=False, quantization=["q4_0", "q4_1", "q5_0", "q5_1", "q8_0"]
+    )
+    load_options = {
+        "model_type": None,
+        "context_length": 2048,
+        "gpu_layers": None,
+        "threads": None,
+        "use_mmap": None,
+        "use_mlock": None,
+    }
+    knobs = {"top_k": 40, "repetition_penalty": 1.1, "stop": DEFAULT_STOP}
+    option_types = {
+        "model_type": str, "gpu_layers": int, "threads": int, "use_mmap": bool, "use_mlock": bool
+    }
+
+    def matches(self, model_id: str) -> bool:
+        return model_id.endswith(".bin")
+
+    def load(self, model_id: str, hardware: HardwareOptions, options: Dict[str, Any]) -> Tuple[Any, Any]:
+        from ctransformers import AutoModelForCausalLM as CTModelForCausalLM
+
+        kwargs = {}
+        if options["model_type"]:
+            kwargs["model_type"] = options["model_type"]
+        model = CTModelForCausalLM.from_pretrained(
+            model_id,
+            context_length=options["context_length"],
+            gpu_layers=_first(options["gpu_layers"], -1 if hardware.use_gpu else 0),
+            threads=_first(options["threads"], hardware.cpu_threads),
+            mmap=_first(options["use_mmap"], hardware.use_mmap),
+            mlock=_first(options["use_mlock"], hardware.use_mlock),
+            **kwargs
+        )
+        return model, None
+
+    def generate(self, model, tokenizer, config, hardware, options, timer):
+        prompt_tokens = len(model.tokenize(config.prompt))
+        pieces = []
+        for piece in model(
+            config.prompt,
+            max_new_tokens=config.max_new_tokens,
+            temperature=config.temperature,
+            top_p=config.top_p,
+            top_k=options["top_k"],
+            repetition_penalty=options["repetition_penalty"],
+            stop=options["stop"],
+            stream=True
+        ):
+            timer.record()
+            pieces.append(piece)
+        output = "".join(pieces)
+        # Um pedaço do stream pode juntar vários tokens (UTF-8 incompleto)
+        completion_tokens = len(model.tokenize(output, add_bos_token=False))
+        return output, prompt_tokens, completion_tokens
+
+
+class SimulatedModel:
+    """Modelo sintético: apenas ocupa a memória configurada."""
+
+    def __init__(self, memory_mb: float):
+        size = int(memory_mb * 1024 * 1024)
+        self.weights = bytearray(size)
+        # Toca cada página para que a memória conte no RSS
+        if size:
+            self.weights[::4096] = b"\x01" * len(range(0, size, 4096))
+
+
+class SimulatedEngine(Engine):
+    """Motor sintético e determinístico, sem pesos nem backend de ML.
+
+    Emite tokens nas taxas de prefill e decode configuradas, com jitter
+    gaussiano reproduzível (``seed``). Serve para medir o custo do próprio
+    harness (API, banco, monitor, serialização) e para testes de carga em
+    máquinas sem modelos.
+    """
+
+    name = "simulated"
+    description = "Motor sintético com taxas de prefill/decode configuráveis"
+    capabilities = EngineCapabilities(streaming=True, batching=False, kv_reuse=False)
+    load_options = {"memory_mb": 0.0, "load_s": 0.0}
+    knobs = {
+        "prefill_tokens_per_s": 2000.0,
+        "decode_tokens_per_s": 50.0,
+        # Desvio padrão relativo do tempo de cada token (0.1 = 10%)
+        "jitter": 0.0,
+        "seed": 0,
+    }
+
+    def matches(self, model_id: str) -> bool:
+        return model_id.startswith("simulated")
+
+    def _check_option(self, name: str, value: Any, default: Any) -> None:
+        super()._check_option(name, value, default)
+        if name.endswith("_per_s") and value <= 0:
+            raise ValueError(f"{name} deve ser maior que zero")
+        if name in ("memory_mb", "load_s", "jitter") and value < 0:
+            raise ValueError(f"{name} não pode ser negativo")
+
+    def load(self, model_id: str, hardware: HardwareOptions, options: Dict[str, Any]) -> Tuple[Any, Any]:
+        time.sleep(options["load_s"])
+        return SimulatedModel(options["memory_mb"]), None
+
+    def generate(self, model, tokenizer, config, hardware, options, timer):
+        rng = random.Random(options["seed"])
+
+        def pause(seconds: float) -> None:
+            if options["jitter"]:
+                seconds *= max(0.0, rng.gauss(1.0, options["jitter"]))
+            time.sleep(seconds)
+
+        # Um token por palavra do prompt
+        prompt_tokens = max(1, len(config.prompt.split()))
+        pause(prompt_tokens / options["prefill_tokens_per_s"])
+        pieces = []
+        for index in range(config.max_new_tokens):
+            if index:
+                pause(1.0 / options["decode_tokens_per_s"])
+            timer.record()
+            pieces.append(f"tok{index}")
+        return " ".join(pieces), prompt_tokens, len(pieces)
+
+
+def _first(value: Any, default: Any) -> Any:
+    return default if value is None else value
+
+
+ENGINES: Dict[str, Engine] = {}
+
+# Ordem de detecção: formatos específicos antes do transformers (padrão)
+_DETECTION_ORDER: List[str] = []
+
+
+def register_engine(engine: Engine) -> Engine:
+    """Registra um motor (substitui um existente com o mesmo nome)."""
+    if engine.name not in ENGINES:
+        _DETECTION_ORDER.insert(max(len(_DETECTION_ORDER) - 1, 0), engine.name)
+    ENGINES[engine.name] = engine
+    return engine
+
+
+for _engine in (
+    TransformersEngine(),
+    LlamaCppEngine(),
+    CTransformersEngine(),
+    OnnxRuntimeEngine(),
+    TorchCompileEngine(),
+    SimulatedEngine(),
+):
+    register_engine(_engine)
+
+
+def get_engine(name: str) -> Engine:
+    """Retorna o motor registrado com ``name``.
+
+    Raises:
+        ValueError: Se o motor não existir
+    """
+    engine = ENGINES.get(name)
+    if engine is None:
+        raise ValueError(
+            f"Motor desconhecido: {name} (disponíveis: {', '.join(sorted(ENGINES))})"
+        )
+    return engine
+
+
+def detect_engine(model_id: str) -> Engine:
+    """Escolhe o motor padrão para o modelo pelo caminho/ID."""
+    for name in _DETECTION_ORDER:
+        if ENGINES[name].matches(model_id):
+            return ENGINES[name]
+    return ENGINES["transformers"]
+
+
+def list_engines() -> List[Dict[str, Any]]:
+    """Descreve todos os motores registrados."""
+    return [engine.describe() for engine in ENGINES.values()]
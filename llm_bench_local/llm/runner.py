@@ -2,77 +2,97 @@
 Módulo para execução de modelos LLM.
 """
 
+import os
 import time
-from typing import Dict, Optional, Union
-from transformers import AutoModelForCausalLM, AutoTokenizer
-import torch
-from llama_cpp import Llama
-from ctransformers import AutoModelForCausalLM as CTModelForCausalLM
+from typing import Any, Dict, Optional, Union
 
+from llm_bench_local.core.pool import ModelPool, estimate_size, model_pool
+from llm_bench_local.core.timing import TokenTimer, throughput
+from llm_bench_local.core.tracing import span
+from llm_bench_local.llm.engines import detect_engine, get_engine
 from llm_bench_local.schemas.benchmark import BenchmarkConfig, HardwareOptions
 
 
 class LLMRunner:
-    """Executor de modelos LLM para benchmarks."""
+    """Executor de modelos LLM para benchmarks.
+
+    O backend é um motor do registro em ``llm_bench_local.llm.engines``,
+    escolhido explicitamente ou detectado pelo caminho do modelo.
+    """
     
     def __init__(
         self,
         model_id: str,
-        hardware_options: Optional[HardwareOptions] = None
+        hardware_options: Optional[HardwareOptions] = None,
+        pool: Optional[ModelPool] = None,
+        weight_format: Optional[str] = None,
+        engine: Optional[str] = None,
+        engine_options: Optional[Dict[str, Any]] = None
     ):
         """Inicializa o executor de LLM.
         
         Args:
             model_id: ID do modelo a ser carregado
             hardware_options: Opções de hardware para execução
+            pool: Pool de modelos compartilhado (padrão: pool global)
+            weight_format: ``safetensors`` ou ``bin`` para escolher os pesos
+                de um modelo transformers (padrão: o que o transformers preferir)
+            engine: Nome do motor (padrão: detectado pelo ``model_id``)
+            engine_options: Opções de carga e parâmetros de geração do motor
+
+        Raises:
+            ValueError: Se o motor ou alguma opção não existir
         """
         self.model_id = model_id
         self.hardware_options = hardware_options or HardwareOptions()
+        self.pool = pool or model_pool
+        self.weight_format = weight_format
+        self.engine = get_engine(engine) if engine else detect_engine(model_id)
+        overrides = dict(engine_options or {})
+        if weight_format and "use_safetensors" in self.engine.load_options:
+            overrides.setdefault("use_safetensors", weight_format == 'safetensors')
+        self.options = self.engine.resolve_options(overrides)
         self.model = None
         self.tokenizer = None
-        self.model_type = self._detect_model_type()
-    
-    def _detect_model_type(self) -> str:
-        """Detecta o tipo do modelo baseado no ID.
-        
-        Returns:
-            Tipo do modelo ('transformers', 'llama.cpp', 'ctransformers')
-        """
-        if self.model_id.endswith('.gguf'):
-            return 'llama.cpp'
-        elif self.model_id.endswith('.bin'):
-            return 'ctransformers'
-        else:
-            return 'transformers'
+        self.model_type = self.engine.name
     
+    def _pool_key(self):
+        """Chave do modelo no pool: (model_id, device, variante do motor)."""
+        device = 'cuda' if self.hardware_options.use_gpu else 'cpu'
+        return (self.model_id, device, self.engine.pool_tag(self.hardware_options, self.options))
+
+    def _size_of(self, value) -> int:
+        """Estima o tamanho do modelo carregado para o orçamento do pool."""
+        size = estimate_size(value)
+        if not size and os.path.isfile(self.model_id):
+            size = os.path.getsize(self.model_id)
+        return size
+
     def load_model(self):
-        """Carrega o modelo e tokenizer."""
-        if self.model_type == 'transformers':
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_id)
-            self.model = AutoModelForCausalLM.from_pretrained(
-                self.model_id,
-                device_map='auto' if self.hardware_options.use_gpu else 'cpu',
-                torch_dtype=torch.float16 if self.hardware_options.use_gpu else torch.float32
-            )
-        elif self.model_type == 'llama.cpp':
-            self.model = Llama(
-                model_path=self.model_id,
-                n_ctx=2048,
-                n_threads=self.hardware_options.cpu_threads,
-                n_gpu_layers=-1 if self.hardware_options.use_gpu else 0
-            )
-        elif self.model_type == 'ctransformers':
-            self.model = CTModelForCausalLM.from_pretrained(
-                self.model_id,
-                gpu_layers=-1 if self.hardware_options.use_gpu else 0,
-                threads=self.hardware_options.cpu_threads
+        """Carrega o modelo e tokenizer, reutilizando o pool de modelos."""
+        with span("model.load", "model", model_id=self.model_id, backend=self.model_type):
+            self.model, self.tokenizer = self.pool.get_or_load(
+                self._pool_key(), self._load_weights, size_fn=self._size_of
             )
+
+    def _load_weights(self):
+        """Carrega os pesos pelo motor.
+
+        O backend só é importado aqui, na primeira carga de um modelo dele.
+
+        Returns:
+            Tupla (modelo, tokenizer); o tokenizer é None fora do transformers
+        """
+        return self.engine.load(self.model_id, self.hardware_options, self.options)
     
     def generate(
         self,
         config: BenchmarkConfig
     ) -> Dict[str, Union[str, float]]:
-        """Executa a geração de texto.
+        """Executa a geração de texto em streaming.
+        
+        Cada backend emite os tokens incrementalmente, o que permite medir
+        o tempo até o primeiro token e a latência entre tokens.
         
         Args:
             config: Configuração do benchmark
@@ -80,55 +100,45 @@ class LLMRunner:
         Returns:
             Dict com resultado e métricas
         """
+        with span("generate", "model", backend=self.model_type,
+                  max_new_tokens=config.max_new_tokens):
+            return self._generate(config)
+
+    def _generate(self, config: BenchmarkConfig) -> Dict[str, Union[str, float]]:
+        """Executa a geração no motor (ver ``generate``)."""
+        timer = TokenTimer()
         start_time = time.time()
+        timer.start()
         
-        if self.model_type == 'transformers':
-            inputs = self.tokenizer(config.prompt, return_tensors="pt")
-            if self.hardware_options.use_gpu:
-                inputs = inputs.to('cuda')
-            
-            outputs = self.model.generate(
-                **inputs,
-                max_new_tokens=config.max_new_tokens,
-                temperature=config.temperature,
-                top_p=config.top_p,
-                do_sample=True
-            )
-            
-            output = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            
-        elif self.model_type == 'llama.cpp':
-            output = self.model(
-                config.prompt,
-                max_tokens=config.max_new_tokens,
-                temperature=config.temperature,
-                top_p=config.top_p,
-                stop=["</s>", "Human:", "Assistant:"]
-            )['choices'][0]['text']
-            
-        elif self.model_type == 'ctransformers':
-            output = self.model(
-                config.prompt,
-                max_new_tokens=config.max_new_tokens,
-                temperature=config.temperature,
-                top_p=config.top_p,
-                stop=["</s>", "Human:", "Assistant:"]
-            )
+        output, prompt_tokens, completion_tokens = self.engine.generate(
+            self.model, self.tokenizer, config, self.hardware_options, self.options, timer
+        )
         
+        timer.stop()
         duration = time.time() - start_time
+        timing = timer.summary()
         
         return {
             "output": output,
+            "engine": self.engine.name,
             "duration": duration,
-            "tokens_generated": len(output.split())  # Aproximação
+            "prompt_tokens": int(prompt_tokens),
+            "completion_tokens": int(completion_tokens),
+            "tokens_generated": int(completion_tokens),
+            **timing,
+            **throughput(
+                prompt_tokens,
+                completion_tokens,
+                duration,
+                timing["time_to_first_token_s"]
+            )
         }
     
     def __del__(self):
-        """Limpa recursos ao destruir o objeto."""
-        if self.model_type == 'transformers':
-            del self.model
-            del self.tokenizer
-            if self.hardware_options.use_gpu:
-                torch.cuda.empty_cache()
-        else:
-            del self.model 
\ No newline at end of file
+        """Libera as referências ao modelo.
+
+        Os pesos continuam no pool compartilhado; a liberação de memória
+        acontece quando o pool remove a entrada.
+        """
+        self.model = None
+        self.tokenizer = None 
\ No newline at end of file
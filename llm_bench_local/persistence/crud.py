@@ -2,20 +2,304 @@
 
 from __future__ import annotations
 
+import atexit
+import base64
+import binascii
 import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
 from datetime import datetime
-from typing import List, Optional, Dict
+from typing import Any, Callable, List, Optional, Dict, Tuple
 
+from llm_bench_local.config.settings import settings
+from llm_bench_local.core.timing import percentile
+from llm_bench_local.core.tracing import traced
 from llm_bench_local.persistence.database import DatabaseConnection
 
+logger = logging.getLogger(__name__)
+
+# Métricas extraídas de ``results`` pelo próprio SQLite nas listagens resumidas
+SUMMARY_METRICS = (
+    "duration",
+    "tokens_per_second",
+    "time_to_first_token_s",
+    "completion_tokens",
+    "error",
+)
+
+# Tarefas registradas na tabela mas executadas fora da fila de jobs (ex: a
+# busca de capacidade, conduzida pelo próprio script); os workers as ignoram
+EXTERNAL_TASKS = ("capacity",)
+_EXTERNAL_PLACEHOLDERS = ", ".join("?" * len(EXTERNAL_TASKS))
+
+INDEXES = {
+    "idx_benchmarks_status_created": "benchmarks(status, created_at, job_id)",
+    "idx_benchmarks_model_created": "benchmarks(model_id, created_at, job_id)",
+    "idx_benchmarks_created": "benchmarks(created_at, job_id)",
+    "idx_hardware_metrics_job_timestamp": "hardware_metrics(job_id, timestamp)",
+    "idx_benchmarks_parent": "benchmarks(parent_id, created_at, job_id)",
+}
+
+
+def encode_cursor(created_at: str, job_id: str) -> str:
+    """Codifica a posição de um benchmark na ordenação da listagem."""
+    raw = json.dumps([created_at, job_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decodifica um cursor gerado por ``encode_cursor``.
+
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    try:
+        created_at, job_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError, TypeError) as exc:
+        raise ValueError(f"Cursor inválido: {cursor}") from exc
+    return str(created_at), str(job_id)
+
+
+class _Barrier:
+    """Marcador na fila de escrita; liberado após o commit das escritas anteriores."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class WriteBehindWriter:
+    """Thread que grava em segundo plano, agrupando escritas em lotes.
+
+    As escritas são enfileiradas sem tocar o disco e confirmadas a cada
+    ``flush_interval_ms`` ou ``max_batch_rows`` linhas, com ``executemany``
+    em uma única transação. Comandos iguais consecutivos formam um grupo; a
+    ordem entre comandos diferentes é preservada. Se o lote falhar, as
+    escritas são refeitas uma a uma, e apenas as inválidas se perdem.
+    """
+
+    def __init__(
+        self,
+        db: DatabaseConnection,
+        flush_interval_ms: Optional[int] = None,
+        max_batch_rows: Optional[int] = None
+    ):
+        """Inicializa o writer.
+
+        Args:
+            db: Conexão usada pela thread de escrita
+            flush_interval_ms: Atraso máximo de um commit (padrão: ``DB_WRITE_FLUSH_MS``)
+            max_batch_rows: Linhas por commit (padrão: ``DB_WRITE_BATCH_ROWS``)
+        """
+        self.db = db
+        self.flush_interval = (flush_interval_ms or settings.DB_WRITE_FLUSH_MS) / 1000
+        self.max_batch_rows = max_batch_rows or settings.DB_WRITE_BATCH_ROWS
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._commit_latencies: deque = deque(maxlen=1024)
+        self.batches = 0
+        self.rows_written = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop, name="write-behind", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, query: str, params: List) -> None:
+        """Enfileira uma escrita; retorna sem esperar pelo disco."""
+        self._start()
+        self._queue.put((query, params))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda o commit de todas as escritas enfileiradas até agora.
+
+        Returns:
+            False se o tempo limite expirar antes do commit ou se alguma
+            escrita falhar nesse intervalo (ver ``errors`` e ``last_error``)
+        """
+        if self._thread is None:
+            return True
+        errors = self.errors
+        barrier = _Barrier()
+        self._queue.put(barrier)
+        if not barrier.done.wait(timeout):
+            return False
+        return self.errors == errors
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Grava as escritas pendentes e encerra a thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            # Ainda gravando: mantém a referência para um novo ``stop``/``flush``
+            logger.warning("Writer não terminou em %s s; escritas pendentes", timeout)
+            return
+        self._thread = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Escritas (e marcadores) aguardando commit."""
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        """Profundidade da fila e latência dos commits em lote."""
+        latencies = list(self._commit_latencies)
+        return {
+            "queue_depth": self.queue_depth,
+            "batches": self.batches,
+            "rows_written": self.rows_written,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "commit_latency_mean_ms": (
+                sum(latencies) / len(latencies) * 1000 if latencies else None
+            ),
+            "commit_latency_p95_ms": (
+                percentile(latencies, 95) * 1000 if latencies else None
+            ),
+        }
+
+    def _loop(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[Tuple[str, List]] = []
+            barriers: List[_Barrier] = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    stopping = True
+                elif isinstance(item, _Barrier):
+                    barriers.append(item)
+                else:
+                    batch.append(item)
+                if len(batch) >= self.max_batch_rows:
+                    break
+                try:
+                    if stopping or barriers:
+                        # Flush/parada: grava o que já está na fila sem esperar o prazo
+                        item = self._queue.get_nowait()
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._commit(batch)
+            for barrier in barriers:
+                barrier.done.set()
+
+    def _commit(self, batch: List[Tuple[str, List]]) -> None:
+        """Grava o lote em uma transação, agrupando comandos consecutivos iguais."""
+        groups: List[Tuple[str, List[List]]] = []
+        for query, params in batch:
+            if groups and groups[-1][0] == query:
+                groups[-1][1].append(params)
+            else:
+                groups.append((query, [params]))
+
+        started = time.perf_counter()
+        try:
+            with self.db.transaction() as conn:
+                for query, rows in groups:
+                    conn.executemany(query, rows)
+        except Exception:
+            logger.warning("Falha ao gravar lote de %d escritas; refazendo uma a uma", len(batch))
+            self._commit_each(batch)
+            return
+        self._commit_latencies.append(time.perf_counter() - started)
+        self.batches += 1
+        self.rows_written += len(batch)
+
+    def _commit_each(self, batch: List[Tuple[str, List]]) -> None:
+        """Grava cada escrita em sua própria transação, descartando as que falham."""
+        for query, params in batch:
+            try:
+                with self.db.transaction() as conn:
+                    conn.execute(query, params)
+            except Exception as exc:
+                self.errors += 1
+                self.last_error = str(exc)
+                logger.exception("Escrita descartada: %s", query.split("(")[0].strip())
+                continue
+            self.rows_written += 1
+        self.batches += 1
+
+
+_writers: Dict[str, WriteBehindWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(db_path: str) -> WriteBehindWriter:
+    """Retorna o writer compartilhado do arquivo de banco, criando-o se necessário."""
+    key = os.path.abspath(db_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = WriteBehindWriter(DatabaseConnection(db_path))
+            _writers[key] = writer
+        return writer
+
+
+@atexit.register
+def stop_writers(timeout: Optional[float] = 10.0) -> None:
+    """Grava as escritas pendentes de todos os writers do processo."""
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.stop(timeout)
+
 
 class BenchmarkRepository:
     """Operacoes CRUD para benchmarks."""
 
-    def __init__(self, db_path: str, ensure_tables: bool = True):
+    def __init__(self, db_path: str, ensure_tables: bool = True, write_behind: bool = False):
+        """Inicializa o repositório.
+
+        Args:
+            db_path: Caminho do banco SQLite
+            ensure_tables: Cria tabelas e índices ausentes
+            write_behind: Grava status e métricas pelo ``WriteBehindWriter``
+                compartilhado, fora da thread que chama (ver ``flush``)
+        """
         self.db = DatabaseConnection(db_path)
         if ensure_tables:
             self._ensure_tables()
+        self.writer = get_writer(db_path) if write_behind else None
+
+    def _write(self, query: str, params: List) -> None:
+        """Executa uma escrita diretamente ou pelo writer em segundo plano."""
+        if self.writer is not None:
+            self.writer.submit(query, params)
+        else:
+            self.db.execute_query(query, params)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda o commit das escritas feitas em segundo plano.
+
+        Returns:
+            False se o tempo limite expirar ou se alguma escrita falhar
+        """
+        if self.writer is None:
+            return True
+        return self.writer.flush(timeout)
+
+    def writer_stats(self) -> Optional[Dict[str, Any]]:
+        """Estatísticas do writer em segundo plano, se habilitado."""
+        return self.writer.stats() if self.writer is not None else None
 
     def _ensure_tables(self) -> None:
         self.db.execute_query(
@@ -29,10 +313,13 @@ class BenchmarkRepository:
                 hardware_options TEXT NOT NULL,
                 results TEXT,
                 created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL
+                updated_at TEXT NOT NULL,
+                worker_id TEXT,
+                parent_id TEXT
             )
             """
         )
+        self._ensure_columns("benchmarks", {"worker_id": "TEXT", "parent_id": "TEXT"})
         self.db.execute_query(
             """
             CREATE TABLE IF NOT EXISTS hardware_metrics (
@@ -46,7 +333,30 @@ class BenchmarkRepository:
             )
             """
         )
+        self.db.execute_query(
+            """
+            CREATE TABLE IF NOT EXISTS traces (
+                job_id TEXT PRIMARY KEY,
+                trace TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        for name, definition in INDEXES.items():
+            self.db.execute_query(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+
+    def _ensure_columns(self, table: str, columns: Dict[str, str]) -> None:
+        """Adiciona colunas novas a tabelas criadas por versões anteriores."""
+        existing = {
+            row["name"] for row in self.db.execute_query(f"PRAGMA table_info({table})")
+        }
+        for name, column_type in columns.items():
+            if name not in existing:
+                self.db.execute_query(
+                    f"ALTER TABLE {table} ADD COLUMN {name} {column_type}"
+                )
 
+    @traced("db.create_benchmark", "db")
     def create_benchmark(
         self,
         job_id: str,
@@ -54,14 +364,20 @@ class BenchmarkRepository:
         task: str,
         config: Dict,
         hardware_options: Dict,
+        parent_id: Optional[str] = None,
     ) -> None:
+        """Registra um benchmark como PENDING.
+
+        Benchmarks com ``parent_id`` (células de uma varredura) são
+        executados pelo job pai e nunca são reivindicados pelos workers.
+        """
         now = datetime.utcnow().isoformat()
-        self.db.execute_query(
+        self._write(
             """
             INSERT INTO benchmarks (
                 job_id, model_id, task, status, config, hardware_options,
-                created_at, updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                created_at, updated_at, parent_id
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             [
                 job_id,
@@ -72,13 +388,15 @@ class BenchmarkRepository:
                 json.dumps(hardware_options),
                 now,
                 now,
+                parent_id,
             ],
         )
 
+    @traced("db.update_status", "db")
     def update_benchmark_status(
         self, job_id: str, status: str, results: Optional[Dict] = None
     ) -> None:
-        self.db.execute_query(
+        self._write(
             """
             UPDATE benchmarks
             SET status = ?, results = ?
@@ -87,13 +405,83 @@ class BenchmarkRepository:
             [status, json.dumps(results) if results is not None else None, job_id],
         )
 
+    def claim_next_benchmark(self, worker_id: str) -> Optional[Dict]:
+        """Marca atomicamente o benchmark pendente mais antigo como RUNNING.
+
+        Tarefas de ``EXTERNAL_TASKS`` nunca são reivindicadas.
+
+        Returns:
+            O benchmark reivindicado ou None se a fila estiver vazia
+        """
+        rows = self.db.execute_query(
+            f"""
+            UPDATE benchmarks
+            SET status = 'RUNNING', worker_id = ?, updated_at = ?
+            WHERE job_id = (
+                SELECT job_id FROM benchmarks
+                WHERE status = 'PENDING' AND parent_id IS NULL
+                  AND task NOT IN ({_EXTERNAL_PLACEHOLDERS})
+                ORDER BY created_at, job_id
+                LIMIT 1
+            )
+            RETURNING *
+            """,
+            [worker_id, datetime.utcnow().isoformat(), *EXTERNAL_TASKS],
+        )
+        if not rows:
+            return None
+        return self._row_to_dict(rows[0])
+
+    def requeue_orphaned_benchmarks(self, is_alive: Callable[[str], bool]) -> int:
+        """Devolve à fila os benchmarks RUNNING cujo worker não existe mais.
+
+        Células de varredura ficam de fora (o job pai as retoma), assim
+        como as tarefas de ``EXTERNAL_TASKS``.
+
+        Args:
+            is_alive: Indica se o worker identificado ainda está em execução
+
+        Returns:
+            Número de benchmarks devolvidos à fila
+        """
+        rows = self.db.execute_query(
+            "SELECT job_id, worker_id FROM benchmarks "
+            "WHERE status = 'RUNNING' AND parent_id IS NULL "
+            f"AND task NOT IN ({_EXTERNAL_PLACEHOLDERS})",
+            list(EXTERNAL_TASKS)
+        )
+        orphaned = [
+            [row["job_id"]] for row in rows
+            if not (row["worker_id"] and is_alive(row["worker_id"]))
+        ]
+        if orphaned:
+            self.db.execute_many(
+                """
+                UPDATE benchmarks
+                SET status = 'PENDING', worker_id = NULL
+                WHERE job_id = ? AND status = 'RUNNING'
+                """,
+                orphaned,
+            )
+        return len(orphaned)
+
+    def count_by_status(self, status: str) -> int:
+        """Conta os benchmarks em um determinado status."""
+        rows = self.db.execute_query(
+            "SELECT COUNT(*) AS total FROM benchmarks WHERE status = ?", [status]
+        )
+        return rows[0]["total"] if rows else 0
+
+    @traced("db.get_benchmark", "db")
     def get_benchmark(self, job_id: str) -> Optional[Dict]:
         rows = self.db.execute_query(
             "SELECT * FROM benchmarks WHERE job_id = ?", [job_id]
         )
         if not rows:
             return None
-        row = rows[0]
+        return self._row_to_dict(rows[0])
+
+    def _row_to_dict(self, row: Dict) -> Dict:
         return {
             "job_id": row["job_id"],
             "model_id": row["model_id"],
@@ -104,40 +492,94 @@ class BenchmarkRepository:
             "results": json.loads(row["results"]) if row["results"] else None,
             "created_at": row["created_at"],
             "updated_at": row["updated_at"],
+            "parent_id": row["parent_id"] if "parent_id" in row.keys() else None,
         }
 
+    def _row_to_summary(self, row: Dict) -> Dict:
+        return {
+            "job_id": row["job_id"],
+            "model_id": row["model_id"],
+            "task": row["task"],
+            "status": row["status"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "metrics": {name: row[name] for name in SUMMARY_METRICS},
+        }
+
+    @traced("db.list_benchmarks", "db")
     def list_benchmarks(
-        self, limit: int = 10, offset: int = 0, status: Optional[str] = None
+        self,
+        limit: int = 10,
+        offset: int = 0,
+        status: Optional[str] = None,
+        model_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        summary: bool = False,
+        parent_id: Optional[str] = None,
     ) -> List[Dict]:
-        query = "SELECT * FROM benchmarks"
+        """Lista benchmarks do mais recente para o mais antigo.
+
+        Args:
+            limit: Número máximo de benchmarks
+            offset: Deslocamento (ignorado quando ``cursor`` é informado)
+            status: Filtra por status
+            model_id: Filtra por modelo
+            cursor: Posição retornada por ``next_cursor`` (paginação keyset)
+            summary: Retorna apenas campos de resumo, sem decodificar os JSONs
+            parent_id: Filtra pelas células de uma varredura
+
+        Returns:
+            Lista de benchmarks
+
+        Raises:
+            ValueError: Se o cursor for inválido
+        """
+        if summary:
+            metrics = ", ".join(
+                f"json_extract(results, '$.{name}') AS {name}" for name in SUMMARY_METRICS
+            )
+            columns = f"job_id, model_id, task, status, created_at, updated_at, {metrics}"
+        else:
+            columns = "*"
+
+        conditions: List[str] = []
         params: List = []
         if status:
-            query += " WHERE status = ?"
+            conditions.append("status = ?")
             params.append(status)
-        query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
+        if model_id:
+            conditions.append("model_id = ?")
+            params.append(model_id)
+        if parent_id:
+            conditions.append("parent_id = ?")
+            params.append(parent_id)
+        if cursor:
+            conditions.append("(created_at, job_id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+
+        query = f"SELECT {columns} FROM benchmarks"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at DESC, job_id DESC LIMIT ?"
+        params.append(limit)
+        if offset and not cursor:
+            query += " OFFSET ?"
+            params.append(offset)
+
         rows = self.db.execute_query(query, params)
-        results = []
-        for row in rows:
-            results.append(
-                {
-                    "job_id": row["job_id"],
-                    "model_id": row["model_id"],
-                    "task": row["task"],
-                    "status": row["status"],
-                    "config": json.loads(row["config"]),
-                    "hardware_options": json.loads(row["hardware_options"]),
-                    "results": json.loads(row["results"]) if row["results"] else None,
-                    "created_at": row["created_at"],
-                    "updated_at": row["updated_at"],
-                }
-            )
-        if status:
-            results = [r for r in results if r["status"] == status]
-        return results
+        convert = self._row_to_summary if summary else self._row_to_dict
+        return [convert(row) for row in rows]
+
+    @staticmethod
+    def next_cursor(benchmarks: List[Dict], limit: int) -> Optional[str]:
+        """Cursor da página seguinte, ou None se esta for a última."""
+        if len(benchmarks) < limit or not benchmarks:
+            return None
+        last = benchmarks[-1]
+        return encode_cursor(last["created_at"], last["job_id"])
 
     def save_hardware_metrics(self, job_id: str, metrics: Dict[str, float]) -> None:
-        self.db.execute_query(
+        self._write(
             """
             INSERT INTO hardware_metrics (
                 job_id, cpu_usage_percent, ram_usage_gb,
@@ -150,7 +592,7 @@ class BenchmarkRepository:
                 metrics.get("ram_usage_gb"),
                 metrics.get("gpu_usage_percent"),
                 metrics.get("vram_usage_gb"),
-                datetime.utcnow().isoformat(),
+                metrics.get("timestamp") or datetime.utcnow().isoformat(),
             ],
         )
 
@@ -160,3 +602,17 @@ class BenchmarkRepository:
             [job_id],
         )
         return [dict(row) for row in rows]
+
+    def save_trace(self, job_id: str, trace: Dict[str, Any]) -> None:
+        """Salva o trace (formato Chrome trace-event) de uma execução."""
+        self._write(
+            "INSERT OR REPLACE INTO traces (job_id, trace, created_at) VALUES (?, ?, ?)",
+            [job_id, json.dumps(trace), datetime.utcnow().isoformat()],
+        )
+
+    def get_trace(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna o trace de uma execução, se houver."""
+        rows = self.db.execute_query(
+            "SELECT trace FROM traces WHERE job_id = ?", [job_id]
+        )
+        return json.loads(rows[0]["trace"]) if rows else None
@@ -2,8 +2,10 @@
 Módulo para persistência de dados usando SQLAlchemy.
 """
 
+import os
+import threading
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import Iterable, Iterator, List, Optional, Dict, Any
 from sqlalchemy import create_engine, Column, String, Float, JSON, DateTime, Integer, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
@@ -32,6 +34,7 @@ class BenchmarkRecord(Base):
     results = Column(JSON, nullable=True)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    worker_id = Column(String, nullable=True)
 
 
 class HardwareMetricsRecord(Base):
@@ -48,14 +51,144 @@ class HardwareMetricsRecord(Base):
     timestamp = Column(DateTime, nullable=False, default=datetime.utcnow)
 
 
+class ConnectionPool:
+    """Conexões SQLite persistentes, uma por thread, para um arquivo de banco.
+    
+    Abrir uma conexão por comando custa a abertura do arquivo, a leitura do
+    schema e a perda do cache de statements preparados. Cada thread reutiliza
+    a própria conexão, configurada com WAL (leitores não bloqueiam o escritor),
+    ``synchronous`` ajustável e ``busy_timeout`` para aguardar o lock de escrita
+    em vez de falhar com ``database is locked``.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        busy_timeout_ms: Optional[int] = None,
+        synchronous: Optional[str] = None,
+        cached_statements: Optional[int] = None
+    ):
+        """Inicializa o pool.
+        
+        Args:
+            db_path: Caminho do arquivo SQLite
+            busy_timeout_ms: Espera máxima pelo lock (padrão: ``DB_BUSY_TIMEOUT_MS``)
+            synchronous: Modo ``PRAGMA synchronous`` (padrão: ``DB_SYNCHRONOUS``)
+            cached_statements: Statements preparados mantidos por conexão
+        """
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms or settings.DB_BUSY_TIMEOUT_MS
+        self.synchronous = synchronous or settings.DB_SYNCHRONOUS
+        self.cached_statements = cached_statements or settings.DB_CACHED_STATEMENTS
+        self._connections: Dict[int, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+    def connect(self) -> sqlite3.Connection:
+        """Abre uma nova conexão configurada (também usada pelo SQLAlchemy)."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            cached_statements=self.cached_statements,
+            check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Retorna a conexão da thread atual, abrindo-a na primeira chamada."""
+        ident = threading.get_ident()
+        with self._lock:
+            if os.getpid() != self._pid:
+                # Conexões herdadas via fork não podem ser usadas no filho
+                self._connections = {}
+                self._pid = os.getpid()
+            conn = self._connections.get(ident)
+            if conn is not None:
+                return conn
+            self._prune()
+
+        conn = self.connect()
+        # Transações são explícitas (ver ``transaction``); fora delas, autocommit
+        conn.isolation_level = None
+        conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._connections[ident] = conn
+        return conn
+
+    def _prune(self) -> None:
+        """Fecha conexões de threads que já terminaram (requer o lock)."""
+        alive = {thread.ident for thread in threading.enumerate()}
+        for ident in [i for i in self._connections if i not in alive]:
+            self._connections.pop(ident).close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Executa o bloco em uma transação de escrita.
+        
+        Usa ``BEGIN IMMEDIATE``: o lock de escrita é obtido no início, quando o
+        ``busy_timeout`` ainda pode aguardá-lo, evitando o erro imediato de
+        ``database is locked`` ao promover uma transação de leitura. Transações
+        aninhadas na mesma thread são incorporadas à externa.
+        """
+        conn = self.connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def close_all(self) -> None:
+        """Fecha todas as conexões abertas pelo pool."""
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections = {}
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """Retorna o pool compartilhado do arquivo de banco, criando-o se necessário."""
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path)
+            _pools[key] = pool
+        return pool
+
+
+def close_pools() -> None:
+    """Fecha as conexões de todos os pools do processo."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_all()
+        _pools.clear()
+
+
 class Database:
-    def __init__(self):
+    def __init__(self, db_path: Optional[str] = None):
         """Inicializa a conexão com o banco de dados."""
-        self.db_path = settings.DB_PATH
+        self.db_path = db_path or settings.db_path
         self._ensure_db_exists()
         
-        # Cria o engine do SQLAlchemy
-        self.engine = create_engine(f'sqlite:///{self.db_path}')
+        # Cria o engine do SQLAlchemy com conexões configuradas pelo mesmo pool
+        # do BenchmarkRepository (WAL, busy_timeout, synchronous)
+        self.engine = create_engine(
+            f'sqlite:///{self.db_path}',
+            creator=get_pool(self.db_path).connect
+        )
         
         # Cria as tabelas
         Base.metadata.create_all(self.engine)
@@ -85,31 +218,6 @@ class Database:
         finally:
             session.close()
 
-
-class DatabaseConnection:
-    """Wrapper simples de conexao SQLite usada nos testes."""
-
-    def __init__(self, db_path: str):
-        self.db_path = db_path
-        self._ensure_db_exists()
-
-    def _ensure_db_exists(self) -> None:
-        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
-
-    def execute_query(self, query: str, params: Optional[List] = None):
-        params = params or []
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
-        cur.execute(query, params)
-        if query.lstrip().upper().startswith("SELECT"):
-            rows = cur.fetchall()
-            conn.close()
-            return [dict(row) for row in rows]
-        conn.commit()
-        conn.close()
-
-
     def save_benchmark(self, result: BenchmarkResult):
         """Salva um resultado de benchmark.
         
@@ -201,4 +309,33 @@ class DatabaseConnection:
                 for record in records
             ]
         finally:
-            session.close() 
\ No newline at end of file
+            session.close()
+
+
+class DatabaseConnection:
+    """Acesso ao SQLite pelo pool de conexões compartilhado do arquivo."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.pool = get_pool(db_path)
+
+    def execute_query(self, query: str, params: Optional[List] = None) -> Optional[List[sqlite3.Row]]:
+        """Executa um comando e retorna as linhas produzidas, se houver.
+        
+        SELECT, PRAGMA e UPDATE ... RETURNING retornam uma lista de
+        ``sqlite3.Row`` (acesso por nome de coluna); os demais, None. Fora de
+        ``transaction`` cada comando é confirmado individualmente.
+        """
+        cur = self.pool.connection().execute(query, params or [])
+        if cur.description is not None:
+            return cur.fetchall()
+        return None
+
+    def execute_many(self, query: str, rows: Iterable[List]) -> None:
+        """Executa o mesmo comando para várias linhas em uma única transação."""
+        with self.pool.transaction() as conn:
+            conn.executemany(query, rows)
+
+    def transaction(self):
+        """Agrupa vários comandos em uma transação (ver ``ConnectionPool``)."""
+        return self.pool.transaction()
@@ -12,7 +12,7 @@ from llm_bench_local.persistence.database import Base, Database
 
 def migrate_database():
     """Migra o banco de dados antigo para o novo formato."""
-    db_path = settings.DB_PATH
+    db_path = settings.db_path
     backup_path = f"{db_path}.backup"
     
     # Faz backup do banco atual
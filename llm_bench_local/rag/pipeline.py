@@ -4,22 +4,25 @@ from __future__ import annotations
 
 from typing import List
 
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-from sentence_transformers import SentenceTransformer
-import faiss
-import numpy as np
-
+from llm_bench_local.core.tracing import span
 from llm_bench_local.datasets import DatasetManager
 
 
 class SimpleRAGPipeline:
-    """Pipeline básico de Retrieval-Augmented Generation."""
+    """Pipeline básico de Retrieval-Augmented Generation.
+
+    Os backends (transformers, sentence-transformers, faiss) são importados
+    apenas quando o pipeline é criado.
+    """
 
     def __init__(
         self,
         model_id: str,
         embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
     ) -> None:
+        from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+        from sentence_transformers import SentenceTransformer
+
         self.tokenizer = AutoTokenizer.from_pretrained(model_id)
         self.model = AutoModelForSeq2SeqLM.from_pretrained(model_id)
         self.embedder = SentenceTransformer(embedding_model)
@@ -28,6 +31,9 @@ class SimpleRAGPipeline:
 
     def build_index(self, dataset_name: str, field: str = "text") -> None:
         """Carrega um dataset e constrói um índice FAISS simples."""
+        import faiss
+        import numpy as np
+
         manager = DatasetManager()
         ds = manager.load(dataset_name)
         texts = ds["train"][field]
@@ -40,10 +46,17 @@ class SimpleRAGPipeline:
         """Executa a geração baseada em recuperação."""
         if self.index is None:
             raise RuntimeError("Índice não construído")
-        q_emb = self.embedder.encode([question])
-        dists, idx = self.index.search(np.array(q_emb).astype("float32"), top_k)
-        context = "\n".join(self.documents[i] for i in idx[0])
+        import numpy as np
+
+        with span("rag.embed", "rag"):
+            q_emb = self.embedder.encode([question])
+        with span("rag.retrieve", "rag", top_k=top_k):
+            dists, idx = self.index.search(np.array(q_emb).astype("float32"), top_k)
+            context = "\n".join(self.documents[i] for i in idx[0])
         prompt = f"{context}\n\nQuestion: {question}\nAnswer:"
-        inputs = self.tokenizer(prompt, return_tensors="pt")
-        outputs = self.model.generate(**inputs, max_new_tokens=max_new_tokens)
-        return self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+        with span("tokenize", "model"):
+            inputs = self.tokenizer(prompt, return_tensors="pt")
+        with span("generate", "model", max_new_tokens=max_new_tokens):
+            outputs = self.model.generate(**inputs, max_new_tokens=max_new_tokens)
+        with span("decode", "model"):
+            return self.tokenizer.decode(outputs[0], skip_special_tokens=True)
@@ -11,6 +11,8 @@ class HardwareOptions(BaseModel):
     use_gpu: bool = Field(default=True, description="Se deve usar GPU")
     gpu_device_ids: List[int] = Field(default=[0], description="IDs das GPUs a serem usadas")
     cpu_threads: int = Field(default=4, description="Número de threads CPU")
+    use_mmap: bool = Field(default=True, description="Mapeia os pesos em memória (GGUF/GGML)")
+    use_mlock: bool = Field(default=False, description="Fixa os pesos na RAM, sem swap (GGUF/GGML)")
 
 
 class BenchmarkConfig(BaseModel):
@@ -0,0 +1,299 @@
+"""
+Busca da maior taxa de requisições sustentável dentro de um SLO.
+
+A API é submetida a chegadas de Poisson (loop aberto, ``loadgen``) em
+taxas crescentes. Em cada taxa há um período de acomodação (``settle``),
+cujas requisições são descartadas, seguido da janela de medição. Uma taxa
+passa se os percentis de TTFT e de latência fim a fim ficam dentro das
+metas e a taxa de erro não excede o limite.
+
+A busca dobra a taxa até a primeira falha (fase ``step``) e então bissecta
+o intervalo entre a última taxa aprovada e a primeira reprovada (fase
+``bisect``). Se a taxa inicial já falha, ela é reduzida à metade até uma
+taxa passar (fase ``halve``) antes da bissecção. A curva de saturação
+(cada taxa medida) é salva na tabela ``benchmarks`` com
+``task = "capacity"``.
+
+Uso:
+    python -m llm_bench_local.scripts.capacity trace.jsonl --e2e 2.0 --ttft 0.5 \\
+        [--percentile 95] [--local --engine simulated]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from llm_bench_local.config.settings import settings
+from llm_bench_local.core.timing import percentile
+from llm_bench_local.persistence.crud import BenchmarkRepository
+from llm_bench_local.scripts.loadgen import (
+    LoadGenerator,
+    RequestResult,
+    TraceRequest,
+    load_trace,
+    make_client,
+    summarize_results,
+)
+
+# Registrada em ``EXTERNAL_TASKS``: a fila de jobs não reivindica o registro
+CAPACITY_TASK = "capacity"
+
+
+@dataclass
+class SLO:
+    """Metas de latência (segundos) no percentil ``percentile``."""
+    ttft_s: Optional[float] = None
+    e2e_s: Optional[float] = None
+    percentile: float = 95.0
+    max_error_rate: float = 0.01
+
+
+def evaluate_slo(results: List[RequestResult], duration: float, slo: SLO) -> Dict[str, Any]:
+    """Resume a janela de medição de uma taxa e verifica o SLO.
+
+    Returns:
+        Resumo do ``loadgen`` com os percentis do SLO, ``passed`` e as
+        metas violadas em ``violations``
+    """
+    summary = summarize_results(results, duration)
+    ok = [result for result in results if result.status == "ok"]
+    e2e = percentile([result.latency_s for result in ok], slo.percentile)
+    ttft = percentile([result.ttft_s for result in ok if result.ttft_s is not None], slo.percentile)
+    violations = []
+    if not ok:
+        violations.append("no_completed_requests")
+    if slo.e2e_s is not None and (e2e is None or e2e > slo.e2e_s):
+        violations.append("e2e")
+    if slo.ttft_s is not None and (ttft is None or ttft > slo.ttft_s):
+        violations.append("ttft")
+    if summary["error_rate"] is not None and summary["error_rate"] > slo.max_error_rate:
+        violations.append("error_rate")
+    summary.update({
+        "e2e_slo_percentile_s": e2e,
+        "ttft_slo_percentile_s": ttft,
+        "passed": not violations,
+        "violations": violations,
+    })
+    return summary
+
+
+async def measure_rate(
+    generator: LoadGenerator,
+    trace: List[TraceRequest],
+    rate: float,
+    slo: SLO,
+    settle_s: float = 10.0,
+    measure_s: float = 30.0,
+    seed: int = 0,
+    max_in_flight: int = 1000
+) -> Dict[str, Any]:
+    """Aplica ``rate`` req/s por ``settle_s + measure_s`` e avalia a medição.
+
+    As chegadas são contínuas entre a acomodação e a medição, para que a
+    fila já esteja em regime quando a janela começa. As vazões usam a
+    duração real da janela, do fim da acomodação à última conclusão: com a
+    API saturada ela passa de ``measure_s``.
+    """
+    total = max(1, math.ceil(round(rate * (settle_s + measure_s), 6)))
+    start = time.perf_counter()
+    results = await generator.open_loop(
+        trace, rate, total, arrival="poisson", seed=seed, max_in_flight=max_in_flight
+    )
+    cutoff = start + settle_s
+    elapsed = time.perf_counter() - cutoff
+    window = [result for result in results if result.sent_at >= cutoff]
+    summary = evaluate_slo(window, elapsed, slo)
+    summary["rate"] = rate
+    summary["settle_requests"] = len(results) - len(window)
+    return summary
+
+
+async def find_capacity(
+    generator: LoadGenerator,
+    trace: List[TraceRequest],
+    slo: SLO,
+    start_rate: float = 1.0,
+    max_rate: float = 1000.0,
+    min_rate: float = 0.01,
+    growth: float = 2.0,
+    bisect_steps: int = 5,
+    tolerance: float = 0.05,
+    settle_s: float = 10.0,
+    measure_s: float = 30.0,
+    seed: int = 0,
+    on_point: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+) -> Dict[str, Any]:
+    """Busca a maior taxa que atende o SLO.
+
+    Args:
+        generator: Gerador de carga apontado para a API
+        trace: Requisições enviadas (em ciclo)
+        slo: Metas de TTFT, latência fim a fim e erros
+        start_rate: Primeira taxa (req/s)
+        max_rate: Taxa máxima testada
+        min_rate: Taxa mínima testada na fase ``halve``
+        growth: Multiplicador da taxa na fase ``step``
+        bisect_steps: Máximo de medições na fase ``bisect``
+        tolerance: Encerra a bissecção quando o intervalo relativo fica abaixo deste valor
+        settle_s: Acomodação em cada taxa (s)
+        measure_s: Janela de medição em cada taxa (s)
+        seed: Semente das chegadas
+        on_point: Chamado com a curva parcial após cada taxa medida
+
+    Returns:
+        Dict com ``max_sustainable_rate`` (None se nenhuma taxa até
+        ``min_rate`` passar) e a curva de saturação
+    """
+    curve: List[Dict[str, Any]] = []
+
+    async def probe(rate: float, phase: str) -> bool:
+        point = await measure_rate(
+            generator, trace, rate, slo, settle_s, measure_s, seed + len(curve)
+        )
+        point["phase"] = phase
+        curve.append(point)
+        if on_point is not None:
+            on_point(curve)
+        return point["passed"]
+
+    best: Optional[float] = None
+    failed: Optional[float] = None
+    rate = start_rate
+    while rate <= max_rate:
+        if not await probe(rate, "step"):
+            failed = rate
+            break
+        best = rate
+        rate *= growth
+
+    if best is None and failed is not None:
+        # A taxa inicial já viola o SLO: reduz à metade até uma taxa passar
+        rate = failed / 2
+        while rate >= min_rate:
+            if await probe(rate, "halve"):
+                best = rate
+                break
+            failed = rate
+            rate /= 2
+
+    if best is not None and failed is not None:
+        low, high = best, failed
+        for _ in range(bisect_steps):
+            if (high - low) / low <= tolerance:
+                break
+            middle = (low + high) / 2
+            if await probe(middle, "bisect"):
+                low = middle
+            else:
+                high = middle
+        best = low
+
+    return {
+        "max_sustainable_rate": best,
+        # Sem falha até ``max_rate``: a capacidade real pode ser maior
+        "saturated": failed is not None,
+        "slo": asdict(slo),
+        "curve": sorted(curve, key=lambda point: point["rate"]),
+    }
+
+
+async def run_capacity_search(
+    generator: LoadGenerator,
+    trace: List[TraceRequest],
+    slo: SLO,
+    repository: Optional[BenchmarkRepository] = None,
+    **search: Any
+) -> Dict[str, Any]:
+    """Executa ``find_capacity`` registrando a curva de saturação no banco.
+
+    O registro (``task = "capacity"``) fica RUNNING durante a busca, com a
+    curva parcial, e COMPLETED (ou FAILED) ao final.
+
+    Args:
+        generator: Gerador de carga apontado para a API
+        trace: Requisições enviadas (em ciclo)
+        slo: Metas de TTFT, latência fim a fim e erros
+        repository: Repositório (padrão: banco configurado em ``settings``)
+        **search: Parâmetros de ``find_capacity``
+
+    Returns:
+        Resultado da busca com o ``job_id`` do registro
+    """
+    repository = repository or BenchmarkRepository(settings.db_path)
+    job_id = str(uuid.uuid4())
+    config = {
+        "slo": asdict(slo),
+        "engine": generator.engine,
+        "max_tokens": generator.max_tokens,
+        "requests_in_trace": len(trace),
+        **search,
+    }
+    repository.create_benchmark(job_id, generator.model_id, CAPACITY_TASK, config, {"use_gpu": False})
+    repository.update_benchmark_status(job_id, "RUNNING")
+
+    def save_progress(curve: List[Dict[str, Any]]) -> None:
+        repository.update_benchmark_status(job_id, "RUNNING", {"curve": curve})
+
+    try:
+        result = await find_capacity(generator, trace, slo, on_point=save_progress, **search)
+    except Exception as exc:
+        repository.update_benchmark_status(job_id, "FAILED", {"error": str(exc)})
+        repository.flush()
+        raise
+    repository.update_benchmark_status(job_id, "COMPLETED", result)
+    repository.flush()
+    return {"job_id": job_id, **result}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Busca a maior taxa sustentável dentro do SLO")
+    parser.add_argument("trace", help="Arquivo JSONL com as requisições")
+    parser.add_argument("--ttft", type=float, help="Meta de TTFT no percentil (s)")
+    parser.add_argument("--e2e", type=float, help="Meta de latência fim a fim no percentil (s)")
+    parser.add_argument("--percentile", type=float, default=95.0, help="Percentil das metas")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Taxa de erro máxima")
+    parser.add_argument("--start-rate", type=float, default=1.0, help="Primeira taxa (req/s)")
+    parser.add_argument("--max-rate", type=float, default=1000.0, help="Taxa máxima (req/s)")
+    parser.add_argument("--min-rate", type=float, default=0.01, help="Taxa mínima (req/s)")
+    parser.add_argument("--growth", type=float, default=2.0, help="Multiplicador da fase step")
+    parser.add_argument("--bisect-steps", type=int, default=5, help="Medições da bissecção")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="Precisão relativa da bissecção")
+    parser.add_argument("--settle", type=float, default=10.0, help="Acomodação por taxa (s)")
+    parser.add_argument("--measure", type=float, default=30.0, help="Medição por taxa (s)")
+    parser.add_argument("--seed", type=int, default=0, help="Semente das chegadas")
+    parser.add_argument("--model", default="gpt2", help="Modelo quando o trace não informa")
+    parser.add_argument("--max-tokens", type=int, help="Tokens gerados quando o trace não informa")
+    parser.add_argument("--engine", help="Motor de inferência (ex: simulated)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Tempo máximo por requisição (s)")
+    parser.add_argument("--api-url", default="http://localhost:8000", help="URL da API")
+    parser.add_argument("--local", action="store_true", help="Usa a API no próprio processo")
+    args = parser.parse_args(argv)
+    if args.ttft is None and args.e2e is None:
+        parser.error("informe ao menos uma meta: --ttft ou --e2e")
+
+    slo = SLO(args.ttft, args.e2e, args.percentile, args.max_error_rate)
+
+    async def _main() -> Dict[str, Any]:
+        async with make_client(args.api_url, args.local) as client:
+            generator = LoadGenerator(
+                client, args.model, args.max_tokens, args.engine, timeout=args.timeout
+            )
+            return await run_capacity_search(
+                generator, load_trace(args.trace), slo,
+                start_rate=args.start_rate, max_rate=args.max_rate,
+                min_rate=args.min_rate, growth=args.growth,
+                bisect_steps=args.bisect_steps, tolerance=args.tolerance,
+                settle_s=args.settle, measure_s=args.measure, seed=args.seed
+            )
+
+    print(json.dumps(asyncio.run(_main()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Verifica o tempo de import dos pontos de entrada (API e CLI).
+
+Cada alvo é importado em um interpretador novo com ``python -X importtime``;
+o tempo total é a soma do tempo próprio de cada módulo reportado. O script
+falha (código de saída 1) quando um alvo excede o orçamento ou importa um
+backend de ML pesado, que deve ser carregado apenas quando usado.
+
+Uso:
+    python -m llm_bench_local.scripts.check_import_time [--runs 3] [--scale 1.0]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Orçamento de import em milissegundos por alvo (módulo ou caminho de script)
+IMPORT_BUDGETS_MS = {
+    "llm_bench_local.api.main": 2500.0,
+    "scripts/run_benchmark_cli.py": 1000.0,
+}
+
+# Módulos que não podem ser importados no início de nenhum ponto de entrada
+HEAVY_MODULES = (
+    "torch",
+    "transformers",
+    "llama_cpp",
+    "ctransformers",
+    "faiss",
+    "sentence_transformers",
+    "datasets",
+)
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Extrai as linhas do ``-X importtime`` (tempos em microssegundos)."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({
+                "module": name,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": (len(indent) - 1) // 2,
+            })
+    return entries
+
+
+def _import_statement(target: str) -> str:
+    if target.endswith(".py"):
+        # Executa o script sem o bloco ``if __name__ == "__main__"``
+        path = os.path.join(ROOT_DIR, target)
+        return f"import runpy; runpy.run_path({path!r}, run_name='importtime')"
+    return f"import {target}"
+
+
+def measure(target: str) -> Dict:
+    """Importa ``target`` em um interpretador novo e mede o tempo de import.
+
+    Returns:
+        Dict com o total em ms, os módulos mais lentos e os backends pesados
+        importados
+
+    Raises:
+        RuntimeError: Se o import falhar
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _import_statement(target)],
+        capture_output=True,
+        text=True,
+        cwd=ROOT_DIR,
+    )
+    entries = parse_importtime(proc.stderr)
+    if proc.returncode != 0:
+        errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"Falha ao importar {target}: {' '.join(errors[-3:])}")
+    modules = {entry["module"] for entry in entries}
+    # O próprio alvo e seus imports diretos
+    slowest = sorted(
+        (e for e in entries if e["depth"] <= 1 and e["module"] != target),
+        key=lambda e: e["cumulative_us"],
+        reverse=True
+    )
+    return {
+        "target": target,
+        "total_ms": sum(e["self_us"] for e in entries) / 1000,
+        "slowest": [
+            {"module": e["module"], "cumulative_ms": e["cumulative_us"] / 1000}
+            for e in slowest[:10]
+        ],
+        "heavy_modules": sorted(
+            name for name in HEAVY_MODULES if name in modules
+        ),
+    }
+
+
+def check(
+    budgets: Optional[Dict[str, float]] = None,
+    runs: int = 3,
+    scale: float = 1.0
+) -> List[Dict]:
+    """Mede cada alvo (melhor de ``runs``) e compara com o orçamento.
+
+    Args:
+        budgets: Orçamento em ms por alvo (padrão: ``IMPORT_BUDGETS_MS``)
+        runs: Repetições por alvo; o menor tempo é usado, reduzindo ruído
+        scale: Multiplicador dos orçamentos (ex: máquinas de CI mais lentas)
+
+    Returns:
+        Um resultado por alvo, com ``ok`` indicando se passou
+    """
+    results = []
+    for target, budget in (budgets or IMPORT_BUDGETS_MS).items():
+        try:
+            best = min((measure(target) for _ in range(runs)), key=lambda r: r["total_ms"])
+        except RuntimeError as exc:
+            results.append({"target": target, "ok": False, "error": str(exc)})
+            continue
+        best["budget_ms"] = budget * scale
+        best["ok"] = best["total_ms"] <= best["budget_ms"] and not best["heavy_modules"]
+        results.append(best)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Verifica o tempo de import da API e da CLI")
+    parser.add_argument("--runs", type=int, default=3, help="Repetições por alvo")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplicador dos orçamentos")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for result in check(runs=args.runs, scale=args.scale):
+        status = "OK" if result["ok"] else "FALHOU"
+        if "error" in result:
+            print(f"[{status}] {result['error']}")
+            failed = True
+            continue
+        print(f"[{status}] {result['target']}: {result['total_ms']:.0f} ms "
+              f"(orçamento {result['budget_ms']:.0f} ms)")
+        if result["heavy_modules"]:
+            print(f"    backends importados no início: {', '.join(result['heavy_modules'])}")
+        for entry in result["slowest"][:5]:
+            print(f"    {entry['cumulative_ms']:8.1f} ms  {entry['module']}")
+        failed = failed or not result["ok"]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
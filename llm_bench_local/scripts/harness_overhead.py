@@ -0,0 +1,271 @@
+"""
+Mede o custo do próprio harness com o motor simulado.
+
+O motor ``simulated`` gera tokens em taxas conhecidas, sem modelo. O tempo
+gasto além da geração é custo do harness. Cada camada é medida em separado:
+
+- ``engine``: ``LLMRunner.generate`` direto (referência, sem harness)
+- ``persistence``: criar, concluir e ler um job no SQLite, com os
+  resultados serializados em JSON
+- ``execute``: ``Benchmark.execute`` completo (monitor, memória, trace,
+  banco, métricas)
+- ``api``: ``POST /benchmarks/run`` até o job aparecer ``COMPLETED`` via
+  ``GET``, passando pela fila de jobs e pelos modelos pydantic
+
+O custo é reportado por job e por token gerado.
+
+Uso:
+    python -m llm_bench_local.scripts.harness_overhead [--jobs 20] [--tokens 32]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from llm_bench_local.core.timing import percentile
+
+ENGINE = "simulated"
+
+# Opções do motor simulado: geração rápida, para que o harness domine
+DEFAULT_ENGINE_OPTIONS = {
+    "prefill_tokens_per_s": 100000.0,
+    "decode_tokens_per_s": 2000.0,
+    "jitter": 0.0,
+}
+
+
+def _summarize(samples: List[Dict[str, float]], tokens: int) -> Dict[str, Optional[float]]:
+    """Medianas de um conjunto de execuções ``{"wall_s", "engine_s"}``."""
+    wall = statistics.median(s["wall_s"] for s in samples)
+    engine = statistics.median(s["engine_s"] for s in samples)
+    overheads = [s["wall_s"] - s["engine_s"] for s in samples]
+    overhead = statistics.median(overheads)
+    return {
+        "jobs": len(samples),
+        "wall_s_median": wall,
+        "engine_s_median": engine,
+        "overhead_s_median": overhead,
+        "overhead_s_p95": percentile(overheads, 95),
+        "overhead_ms_per_token": overhead * 1000 / tokens if tokens else None,
+        "overhead_percent": 100 * overhead / wall if wall > 0 else None,
+    }
+
+
+def _repeat(jobs: int, run: Callable[[], Dict[str, float]]) -> List[Dict[str, float]]:
+    # Uma execução de aquecimento (imports, criação de tabelas, threads)
+    run()
+    return [run() for _ in range(jobs)]
+
+
+def measure_engine(jobs: int, tokens: int, engine_options: Dict) -> Dict:
+    """Geração direta pelo ``LLMRunner``, sem nenhuma camada do harness."""
+    from llm_bench_local.core.pool import ModelPool
+    from llm_bench_local.llm.runner import LLMRunner
+    from llm_bench_local.schemas.benchmark import BenchmarkConfig, HardwareOptions
+
+    runner = LLMRunner(
+        ENGINE, HardwareOptions(use_gpu=False), pool=ModelPool(),
+        engine=ENGINE, engine_options=engine_options
+    )
+    runner.load_model()
+    config = BenchmarkConfig(prompt="Hello, world!", max_new_tokens=tokens)
+
+    def run() -> Dict[str, float]:
+        start = time.perf_counter()
+        result = runner.generate(config)
+        return {"wall_s": time.perf_counter() - start, "engine_s": result["duration"]}
+
+    return _summarize(_repeat(jobs, run), tokens)
+
+
+def measure_persistence(jobs: int, tokens: int, db_path: str) -> Dict:
+    """Ciclo de vida de um job no banco, sem geração (``engine_s`` = 0)."""
+    import uuid
+
+    from llm_bench_local.persistence.crud import BenchmarkRepository
+
+    repository = BenchmarkRepository(db_path)
+    results = {
+        "duration": 0.1,
+        "output": " ".join(f"tok{i}" for i in range(tokens)),
+        "inter_token_latencies_s": [0.001] * tokens,
+    }
+
+    def run() -> Dict[str, float]:
+        job_id = str(uuid.uuid4())
+        start = time.perf_counter()
+        repository.create_benchmark(job_id, "gpt2", "text-generation", {"prompt": "Hi"}, {})
+        repository.update_benchmark_status(job_id, "COMPLETED", results)
+        repository.flush()
+        repository.get_benchmark(job_id)
+        return {"wall_s": time.perf_counter() - start, "engine_s": 0.0}
+
+    return _summarize(_repeat(jobs, run), tokens)
+
+
+def measure_execute(jobs: int, tokens: int, model_id: str, engine_options: Dict, db_path: str) -> Dict:
+    """``Benchmark.execute`` completo com o motor simulado."""
+    from llm_bench_local.core.benchmark import Benchmark
+    from llm_bench_local.persistence.crud import BenchmarkRepository
+
+    repository = BenchmarkRepository(db_path)
+
+    def run() -> Dict[str, float]:
+        start = time.perf_counter()
+        benchmark = Benchmark(
+            model_id, "Hello, world!", max_tokens=tokens, use_gpu=False,
+            engines=[ENGINE], engine_options={ENGINE: engine_options}
+        )
+        benchmark.repository = repository
+        results = benchmark.execute()
+        return {
+            "wall_s": time.perf_counter() - start,
+            "engine_s": results["engines"][ENGINE]["duration"],
+        }
+
+    return _summarize(_repeat(jobs, run), tokens)
+
+
+def measure_api(
+    jobs: int,
+    tokens: int,
+    model_id: str,
+    engine_options: Dict,
+    db_path: str,
+    poll_s: float = 0.001
+) -> Dict:
+    """Envio pela API e consulta até a conclusão (inclui a fila de jobs).
+
+    Usa os workers da fila, como o servidor real, com o banco em
+    ``db_path``: o repositório da API e a fila de jobs do processo são
+    trocados durante a medição e restaurados ao final.
+    """
+    from fastapi.testclient import TestClient
+
+    from llm_bench_local.config.settings import settings
+    from llm_bench_local.core import jobs as job_queue
+
+    original_db_path = settings.db_path
+    # Antes do import da API, cujo repositório é criado na importação
+    settings.db_path = db_path
+    from llm_bench_local.api import main
+    from llm_bench_local.persistence.crud import BenchmarkRepository
+
+    original_repo, original_queue = main.repo, job_queue._job_queue
+    main.repo = BenchmarkRepository(db_path)
+    job_queue._job_queue = None
+    try:
+        return _measure_api(TestClient(main.app), jobs, tokens, model_id, engine_options, poll_s)
+    finally:
+        if job_queue._job_queue is not None:
+            job_queue._job_queue.stop(timeout=5.0)
+        main.repo, job_queue._job_queue = original_repo, original_queue
+        settings.db_path = original_db_path
+
+
+def _measure_api(
+    client,
+    jobs: int,
+    tokens: int,
+    model_id: str,
+    engine_options: Dict,
+    poll_s: float
+) -> Dict:
+    payload = {
+        "model_id": model_id,
+        "prompt": "Hello, world!",
+        "max_tokens": tokens,
+        "use_gpu": False,
+        "engines": [ENGINE],
+        "engine_options": {ENGINE: engine_options},
+    }
+
+    def run() -> Dict[str, float]:
+        start = time.perf_counter()
+        response = client.post("/api/v1/benchmarks/run", json=payload)
+        response.raise_for_status()
+        submit_s = time.perf_counter() - start
+        job_id = response.json()["job_id"]
+        while True:
+            job = client.get(f"/api/v1/benchmarks/{job_id}").json()
+            if job["status"] in ("COMPLETED", "FAILED"):
+                break
+            time.sleep(poll_s)
+        if job["status"] == "FAILED":
+            raise RuntimeError(f"Job {job_id} falhou: {job['results']}")
+        return {
+            "wall_s": time.perf_counter() - start,
+            "engine_s": job["results"]["engines"][ENGINE]["duration"],
+            "submit_s": submit_s,
+        }
+
+    samples = _repeat(jobs, run)
+    summary = _summarize(samples, tokens)
+    summary["submit_s_median"] = statistics.median(s["submit_s"] for s in samples)
+    return summary
+
+
+def run_suite(
+    jobs: int = 20,
+    tokens: int = 32,
+    model_id: str = "gpt2",
+    engine_options: Optional[Dict] = None,
+    layers: Optional[List[str]] = None
+) -> Dict[str, Dict]:
+    """Executa as medições de cada camada.
+
+    Args:
+        jobs: Jobs medidos por camada (após um de aquecimento)
+        tokens: Tokens gerados por job
+        model_id: Modelo configurado usado nos jobs (nenhum peso é carregado)
+        engine_options: Opções do motor simulado (padrão: ``DEFAULT_ENGINE_OPTIONS``)
+        layers: Camadas a medir (padrão: todas)
+
+    Returns:
+        Resumo por camada, com o custo por job e por token
+    """
+    engine_options = {**DEFAULT_ENGINE_OPTIONS, **(engine_options or {})}
+    layers = layers or ["engine", "persistence", "execute", "api"]
+    report: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "overhead.db")
+        if "engine" in layers:
+            report["engine"] = measure_engine(jobs, tokens, engine_options)
+        if "persistence" in layers:
+            report["persistence"] = measure_persistence(jobs, tokens, db_path)
+        if "execute" in layers:
+            report["execute"] = measure_execute(jobs, tokens, model_id, engine_options, db_path)
+        if "api" in layers:
+            report["api"] = measure_api(jobs, tokens, model_id, engine_options, db_path)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Mede o custo do harness com o motor simulado")
+    parser.add_argument("--jobs", type=int, default=20, help="Jobs por camada")
+    parser.add_argument("--tokens", type=int, default=32, help="Tokens gerados por job")
+    parser.add_argument("--model", default="gpt2", help="Modelo configurado usado nos jobs")
+    parser.add_argument("--decode-rate", type=float, help="Tokens/s do decode simulado")
+    parser.add_argument("--jitter", type=float, help="Jitter relativo por token")
+    parser.add_argument(
+        "--layers", nargs="+", choices=["engine", "persistence", "execute", "api"],
+        help="Camadas a medir"
+    )
+    args = parser.parse_args(argv)
+
+    engine_options = {}
+    if args.decode_rate:
+        engine_options["decode_tokens_per_s"] = args.decode_rate
+    if args.jitter is not None:
+        engine_options["jitter"] = args.jitter
+    report = run_suite(args.jobs, args.tokens, args.model, engine_options, args.layers)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+"""
+Gerador de carga assíncrono para a API de benchmarks.
+
+Lê um trace de requisições em JSONL e envia cada uma como um job
+(``POST /api/v1/benchmarks/run``), consultando o job até a conclusão. A
+latência de uma requisição vai do envio até o job ficar ``COMPLETED``. Com
+``--no-wait`` apenas o envio é medido. A espera na fila e o TTFT vêm dos
+instantes registrados pelo servidor: o TTFT percebido é o envio mais o
+tempo do registro do job até o primeiro token, sem o trabalho posterior à
+geração nem o atraso da consulta.
+
+Modos:
+
+- ``closed``: N usuários concorrentes; cada um envia a próxima requisição
+  assim que a anterior termina (mais ``--think-time``)
+- ``open``: chegadas independentes das respostas, a uma taxa constante ou
+  de Poisson (``--rate`` por segundo)
+- ``replay``: reproduz os ``timestamp`` do trace, acelerados por ``--speed``
+
+Cada linha do trace é um objeto JSON com ``prompt`` e, opcionalmente,
+``timestamp`` (segundos), ``max_tokens`` e ``model_id``. Linhas sem
+``prompt`` usam ``body`` ou ``title`` como texto, o que permite usar
+arquivos de requisições genéricos.
+
+Com ``--local`` a carga vai para a API no próprio processo (sem rede); com
+``--engine simulated`` nenhum peso de modelo é necessário.
+
+Uso:
+    python -m llm_bench_local.scripts.loadgen trace.jsonl --mode open --rate 5 --requests 100
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import statistics
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from llm_bench_local.core.timing import percentile
+
+MODES = ("closed", "open", "replay")
+ARRIVALS = ("poisson", "constant")
+
+
+@dataclass
+class TraceRequest:
+    """Uma requisição do trace."""
+    prompt: str
+    timestamp: Optional[float] = None
+    max_tokens: Optional[int] = None
+    model_id: Optional[str] = None
+
+
+@dataclass
+class RequestResult:
+    """Resultado de uma requisição enviada."""
+    sent_at: float
+    status: str
+    latency_s: Optional[float] = None
+    submit_s: Optional[float] = None
+    queue_wait_s: Optional[float] = None
+    ttft_s: Optional[float] = None
+    error: Optional[str] = None
+
+
+def _server_timing(job: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """Espera na fila e primeiro token do job, no relógio do servidor.
+
+    A espera vai do registro do job (``created_at``) ao início da execução
+    (``results["started_at"]``). O primeiro token soma a ela o início da
+    geração (``generation_offset_s``, do primeiro motor, se houver) e o
+    TTFT da geração. Campos ausentes resultam em None.
+    """
+    results = job.get("results") or {}
+    queue_wait = None
+    if job.get("created_at") and results.get("started_at"):
+        created = datetime.fromisoformat(job["created_at"])
+        started = datetime.fromisoformat(results["started_at"])
+        queue_wait = max(0.0, (started - created).total_seconds())
+    generation = results
+    if results.get("engines"):
+        generation = next(iter(results["engines"].values()))
+    offset = generation.get("generation_offset_s")
+    ttft = generation.get("time_to_first_token_s")
+    first_token = None
+    if queue_wait is not None and offset is not None and ttft is not None:
+        first_token = queue_wait + offset + ttft
+    return {"queue_wait": queue_wait, "first_token": first_token}
+
+
+def load_trace(path: str) -> List[TraceRequest]:
+    """Lê o trace de requisições (uma por linha, em JSON).
+
+    Raises:
+        ValueError: Se uma linha não tiver texto utilizável ou o trace estiver vazio
+    """
+    requests = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            prompt = entry.get("prompt") or entry.get("body") or entry.get("title")
+            if not prompt:
+                raise ValueError(f"Linha {number} do trace sem prompt")
+            requests.append(TraceRequest(
+                prompt=prompt,
+                timestamp=entry.get("timestamp"),
+                max_tokens=entry.get("max_tokens"),
+                model_id=entry.get("model_id"),
+            ))
+    if not requests:
+        raise ValueError(f"Trace vazio: {path}")
+    return requests
+
+
+class LoadGenerator:
+    """Envia requisições do trace à API e mede cada uma."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        model_id: str = "gpt2",
+        max_tokens: Optional[int] = None,
+        engine: Optional[str] = None,
+        wait: bool = True,
+        poll_interval: float = 0.05,
+        timeout: float = 300.0
+    ):
+        """Inicializa o gerador.
+
+        Args:
+            client: Cliente HTTP apontado para a API
+            model_id: Modelo usado quando o trace não informa
+            max_tokens: Tokens gerados quando o trace não informa
+            engine: Motor de inferência das requisições (ex: ``simulated``)
+            wait: Aguarda a conclusão de cada job
+            poll_interval: Intervalo de consulta do job (s)
+            timeout: Tempo máximo por requisição (s)
+        """
+        self.client = client
+        self.model_id = model_id
+        self.max_tokens = max_tokens
+        self.engine = engine
+        self.wait = wait
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    def _payload(self, request: TraceRequest) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "model_id": request.model_id or self.model_id,
+            "prompt": request.prompt,
+            "max_tokens": request.max_tokens or self.max_tokens,
+            "use_gpu": False,
+        }
+        if self.engine:
+            payload["engines"] = [self.engine]
+        return payload
+
+    async def send(self, request: TraceRequest) -> RequestResult:
+        """Envia uma requisição e aguarda o job, se configurado."""
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(self._send(request, start), self.timeout)
+        except asyncio.TimeoutError:
+            return RequestResult(start, "timeout", error=f"Sem resposta em {self.timeout}s")
+        except httpx.HTTPError as exc:
+            return RequestResult(start, "http_error", error=str(exc))
+        except (ValueError, KeyError, TypeError) as exc:
+            # Corpo que não é JSON ou sem os campos esperados (ex: API saturada)
+            return RequestResult(start, "bad_response", error=f"Resposta inválida: {exc!r}")
+
+    async def _send(self, request: TraceRequest, start: float) -> RequestResult:
+        response = await self.client.post("/api/v1/benchmarks/run", json=self._payload(request))
+        submit_s = time.perf_counter() - start
+        if response.status_code >= 400:
+            return RequestResult(
+                start, "http_error", submit_s=submit_s,
+                error=f"HTTP {response.status_code}: {response.text[:200]}"
+            )
+        if not self.wait:
+            return RequestResult(start, "ok", latency_s=submit_s, submit_s=submit_s)
+
+        job_id = response.json()["job_id"]
+        while True:
+            response = await self.client.get(f"/api/v1/benchmarks/{job_id}")
+            if response.status_code >= 400:
+                return RequestResult(
+                    start, "http_error", submit_s=submit_s,
+                    error=f"HTTP {response.status_code} ao consultar {job_id}: {response.text[:200]}"
+                )
+            job = response.json()
+            if job["status"] == "COMPLETED":
+                latency = time.perf_counter() - start
+                # TTFT percebido: o envio mais o primeiro token no servidor
+                timing = _server_timing(job)
+                first_token = timing["first_token"]
+                return RequestResult(
+                    start, "ok", latency_s=latency, submit_s=submit_s,
+                    queue_wait_s=timing["queue_wait"],
+                    ttft_s=submit_s + first_token if first_token is not None else None
+                )
+            if job["status"] == "FAILED":
+                return RequestResult(
+                    start, "failed", submit_s=submit_s,
+                    error=str((job.get("results") or {}).get("error"))
+                )
+            await asyncio.sleep(self.poll_interval)
+
+    async def closed_loop(
+        self,
+        trace: List[TraceRequest],
+        users: int,
+        total: int,
+        think_time: float = 0.0
+    ) -> List[RequestResult]:
+        """``users`` usuários concorrentes enviando ``total`` requisições."""
+        source = itertools.islice(itertools.cycle(trace), total)
+        results: List[RequestResult] = []
+
+        async def user() -> None:
+            # O iterador é compartilhado; o event loop não o acessa em paralelo
+            for request in source:
+                results.append(await self.send(request))
+                if think_time:
+                    await asyncio.sleep(think_time)
+
+        await asyncio.gather(*(user() for _ in range(users)))
+        return results
+
+    async def open_loop(
+        self,
+        trace: List[TraceRequest],
+        rate: float,
+        total: int,
+        arrival: str = "poisson",
+        seed: int = 0,
+        max_in_flight: int = 1000
+    ) -> List[RequestResult]:
+        """Chegadas a ``rate`` por segundo, independentes das respostas.
+
+        Chegadas com ``max_in_flight`` requisições pendentes são descartadas
+        (``dropped``) em vez de atrasadas, para não virar um loop fechado.
+        """
+        if arrival not in ARRIVALS:
+            raise ValueError(f"Processo de chegada inválido: {arrival}")
+        rng = random.Random(seed)
+        offsets = []
+        offset = 0.0
+        for _ in range(total):
+            offsets.append(offset)
+            offset += rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+        requests = list(itertools.islice(itertools.cycle(trace), total))
+        return await self._dispatch(list(zip(offsets, requests)), max_in_flight)
+
+    async def replay(
+        self,
+        trace: List[TraceRequest],
+        speed: float = 1.0,
+        total: Optional[int] = None,
+        max_in_flight: int = 1000
+    ) -> List[RequestResult]:
+        """Reproduz os ``timestamp`` do trace, divididos por ``speed``.
+
+        Raises:
+            ValueError: Se alguma requisição não tiver ``timestamp``
+        """
+        requests = trace[:total] if total else trace
+        if any(request.timestamp is None for request in requests):
+            raise ValueError("O modo replay exige timestamp em todas as requisições")
+        origin = min(request.timestamp for request in requests)
+        schedule = sorted(
+            (((request.timestamp - origin) / speed, request) for request in requests),
+            key=lambda item: item[0]
+        )
+        return await self._dispatch(schedule, max_in_flight)
+
+    async def _dispatch(self, schedule: List, max_in_flight: int) -> List[RequestResult]:
+        """Envia cada requisição no seu instante, sem esperar as anteriores."""
+        start = time.perf_counter()
+        tasks = []
+        dropped: List[RequestResult] = []
+        for offset, request in schedule:
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            in_flight = sum(1 for task in tasks if not task.done())
+            if in_flight >= max_in_flight:
+                dropped.append(RequestResult(
+                    time.perf_counter(), "dropped", error="max_in_flight atingido"
+                ))
+                continue
+            tasks.append(asyncio.ensure_future(self.send(request)))
+        return list(await asyncio.gather(*tasks)) + dropped
+
+
+def summarize_results(results: List[RequestResult], duration: float) -> Dict[str, Any]:
+    """Vazão alcançada, percentis de latência e taxa de erro.
+
+    Args:
+        results: Requisições enviadas
+        duration: Duração da execução (s)
+
+    Returns:
+        Dict com contagens, QPS oferecido e alcançado, latências e erros
+    """
+    ok = [result for result in results if result.status == "ok"]
+    latencies = [result.latency_s for result in ok]
+    ttfts = [result.ttft_s for result in ok if result.ttft_s is not None]
+    waits = [result.queue_wait_s for result in ok if result.queue_wait_s is not None]
+    submits = [result.submit_s for result in results if result.submit_s is not None]
+    errors: Dict[str, int] = {}
+    for result in results:
+        if result.status != "ok":
+            errors[result.status] = errors.get(result.status, 0) + 1
+    return {
+        "requests": len(results),
+        "completed": len(ok),
+        "errors": errors,
+        "error_rate": (len(results) - len(ok)) / len(results) if results else None,
+        "duration_s": duration,
+        "offered_qps": len(results) / duration if duration > 0 else None,
+        "achieved_qps": len(ok) / duration if duration > 0 else None,
+        "latency_s": {
+            "mean": statistics.fmean(latencies) if latencies else None,
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else None,
+        },
+        "ttft_s": {
+            "p50": percentile(ttfts, 50),
+            "p95": percentile(ttfts, 95),
+            "p99": percentile(ttfts, 99),
+        },
+        "queue_wait_s": {
+            "p50": percentile(waits, 50),
+            "p95": percentile(waits, 95),
+            "p99": percentile(waits, 99),
+        },
+        "submit_s_p50": percentile(submits, 50),
+        "submit_s_p99": percentile(submits, 99),
+    }
+
+
+def make_client(api_url: Optional[str] = None, local: bool = False) -> httpx.AsyncClient:
+    """Cliente para a API remota ou para a API no próprio processo."""
+    if local:
+        from llm_bench_local.api.main import app
+
+        return httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://loadgen.local"
+        )
+    return httpx.AsyncClient(base_url=api_url or "http://localhost:8000", timeout=None)
+
+
+async def run(
+    generator: LoadGenerator,
+    trace: List[TraceRequest],
+    mode: str = "closed",
+    total: Optional[int] = None,
+    users: int = 1,
+    rate: float = 1.0,
+    arrival: str = "poisson",
+    speed: float = 1.0,
+    think_time: float = 0.0,
+    seed: int = 0,
+    max_in_flight: int = 1000
+) -> Dict[str, Any]:
+    """Executa a carga no modo escolhido e retorna o resumo.
+
+    Raises:
+        ValueError: Se o modo for inválido
+    """
+    if mode not in MODES:
+        raise ValueError(f"Modo inválido: {mode} (use {', '.join(MODES)})")
+    total = total or len(trace)
+    start = time.perf_counter()
+    if mode == "closed":
+        results = await generator.closed_loop(trace, users, total, think_time)
+    elif mode == "open":
+        results = await generator.open_loop(trace, rate, total, arrival, seed, max_in_flight)
+    else:
+        results = await generator.replay(trace, speed, total, max_in_flight)
+    summary = summarize_results(results, time.perf_counter() - start)
+    summary["mode"] = mode
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Gerador de carga para a API de benchmarks")
+    parser.add_argument("trace", help="Arquivo JSONL com as requisições")
+    parser.add_argument("--mode", choices=MODES, default="closed", help="Modo de carga")
+    parser.add_argument("--requests", type=int, help="Total de requisições (padrão: o trace)")
+    parser.add_argument("--users", type=int, default=1, help="Usuários concorrentes (closed)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pausa entre requisições (closed)")
+    parser.add_argument("--rate", type=float, default=1.0, help="Chegadas por segundo (open)")
+    parser.add_argument("--arrival", choices=ARRIVALS, default="poisson", help="Processo de chegada (open)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Aceleração dos timestamps (replay)")
+    parser.add_argument("--seed", type=int, default=0, help="Semente das chegadas de Poisson")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Limite de requisições pendentes")
+    parser.add_argument("--model", default="gpt2", help="Modelo quando o trace não informa")
+    parser.add_argument("--max-tokens", type=int, help="Tokens gerados quando o trace não informa")
+    parser.add_argument("--engine", help="Motor de inferência (ex: simulated)")
+    parser.add_argument("--no-wait", action="store_true", help="Mede apenas o envio do job")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Tempo máximo por requisição (s)")
+    parser.add_argument("--api-url", default="http://localhost:8000", help="URL da API")
+    parser.add_argument("--local", action="store_true", help="Usa a API no próprio processo")
+    args = parser.parse_args(argv)
+
+    async def _main() -> Dict[str, Any]:
+        async with make_client(args.api_url, args.local) as client:
+            generator = LoadGenerator(
+                client, args.model, args.max_tokens, args.engine,
+                wait=not args.no_wait, timeout=args.timeout
+            )
+            return await run(
+                generator, load_trace(args.trace), args.mode, args.requests,
+                users=args.users, rate=args.rate, arrival=args.arrival, speed=args.speed,
+                think_time=args.think_time, seed=args.seed, max_in_flight=args.max_in_flight
+            )
+
+    print(json.dumps(asyncio.run(_main()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,10 @@ Script CLI para executar benchmarks.
 
 import argparse
 import json
+import os
 import sys
-from typing import Dict, Optional
+import time
+from typing import Any, Dict, Optional
 import requests
 
 from llm_bench_local.config.settings import settings
@@ -65,6 +67,86 @@ def run_benchmark(
         sys.exit(1)
 
 
+def load_space(value: str) -> Dict[str, Any]:
+    """Lê o espaço da varredura de um arquivo JSON ou de um JSON inline."""
+    if os.path.isfile(value):
+        with open(value) as f:
+            return json.load(f)
+    return json.loads(value)
+
+
+def run_sweep(
+    model_id: str,
+    prompt: str,
+    space: Dict[str, Any],
+    strategy: str = "grid",
+    samples: Optional[int] = None,
+    seed: int = 0,
+    use_gpu: bool = True,
+    api_url: str = "http://localhost:8000",
+    poll_interval: float = 2.0
+) -> Dict:
+    """Enfileira uma varredura via API e aguarda sua conclusão.
+    
+    Args:
+        model_id: ID do modelo a ser testado
+        prompt: Prompt de todas as células
+        space: Valores (ou intervalos) de cada parâmetro
+        strategy: ``grid``, ``random`` ou ``lhs``
+        samples: Número de células em ``random`` e ``lhs``
+        seed: Semente da amostragem
+        use_gpu: Se deve usar GPU
+        api_url: URL da API
+        poll_interval: Intervalo entre consultas do progresso (s)
+        
+    Returns:
+        Varredura concluída, com o resumo de cada célula
+    """
+    data = {
+        "model_id": model_id,
+        "prompt": prompt,
+        "space": space,
+        "strategy": strategy,
+        "samples": samples,
+        "seed": seed,
+        "use_gpu": use_gpu
+    }
+    try:
+        response = requests.post(f"{api_url}/api/v1/sweeps", json=data)
+        response.raise_for_status()
+        sweep_id = response.json()["job_id"]
+        while True:
+            response = requests.get(f"{api_url}/api/v1/sweeps/{sweep_id}")
+            response.raise_for_status()
+            sweep = response.json()
+            if sweep["status"] in ("COMPLETED", "FAILED"):
+                return sweep
+            progress = sweep.get("results") or {}
+            print(f"Varredura {sweep_id}: {progress.get('completed', 0)}/{len(sweep['config']['cells'])} células")
+            time.sleep(poll_interval)
+    except requests.exceptions.RequestException as e:
+        print(f"Erro ao executar a varredura: {e}")
+        sys.exit(1)
+
+
+def print_sweep(sweep: Dict) -> None:
+    """Imprime uma linha por célula da varredura."""
+    results = sweep.get("results") or {}
+    print(f"\nVarredura {sweep['job_id']} ({sweep['status']})")
+    print("=" * 50)
+    for cell in results.get("cells", []):
+        params = ", ".join(f"{k}={v}" for k, v in cell["params"].items())
+        if cell["status"] == "COMPLETED":
+            line = f"[{cell['index']}] {params}: {cell['duration']:.2f}s"
+            if cell.get("tokens_per_second") is not None:
+                line += f", {cell['tokens_per_second']:.1f} tokens/s"
+            print(line)
+        else:
+            print(f"[{cell['index']}] {params}: FALHOU ({cell.get('error')})")
+    if results.get("best"):
+        print(f"\nMelhor vazão: {results['best']['params']}")
+
+
 def main():
     """Função principal do script."""
     parser = argparse.ArgumentParser(
@@ -109,6 +191,28 @@ def main():
         action="store_true",
         help="Não usar GPU"
     )
+    parser.add_argument(
+        "--sweep",
+        help="Varredura: arquivo JSON ou JSON inline com os valores de cada parâmetro "
+             "(max_tokens, temperature, top_p, batch_size, cpu_threads)"
+    )
+    parser.add_argument(
+        "--strategy",
+        choices=["grid", "random", "lhs"],
+        default="grid",
+        help="Amostragem da varredura"
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        help="Número de células nas estratégias random e lhs"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Semente da amostragem"
+    )
     parser.add_argument(
         "--api-url",
         default="http://localhost:8000",
@@ -117,6 +221,20 @@ def main():
     
     args = parser.parse_args()
     
+    if args.sweep:
+        sweep = run_sweep(
+            model_id=args.model,
+            prompt=args.prompt,
+            space=load_space(args.sweep),
+            strategy=args.strategy,
+            samples=args.samples,
+            seed=args.seed,
+            use_gpu=not args.no_gpu,
+            api_url=args.api_url
+        )
+        print_sweep(sweep)
+        return
+    
     # Executa o benchmark
     result = run_benchmark(
         model_id=args.model,
@@ -1,18 +1,38 @@
 import pytest
 import os
 import sys
+import tempfile
 from pathlib import Path
 
 # Adiciona o diretório raiz do projeto ao PYTHONPATH
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--runslow", action="store_true", default=False,
+        help="Executa também os testes marcados como slow"
+    )
+
+def pytest_collection_modifyitems(config, items):
+    """Pula os testes ``slow`` (ex: orçamentos de tempo de relógio) sem ``--runslow``."""
+    if config.getoption("--runslow"):
+        return
+    skip_slow = pytest.mark.skip(reason="use --runslow para executar")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
 # Configura variáveis de ambiente para testes
 os.environ["API_HOST"] = "127.0.0.1"
 os.environ["API_PORT"] = "8000"
 os.environ["LOG_LEVEL"] = "DEBUG"
 os.environ["TESTING"] = "true"
 
+# Banco, datasets e cache dos testes (inclusive dos subprocessos) ficam
+# fora de ``data/``: os singletons da API são criados na importação
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="llm-bench-tests-")
+
 @pytest.fixture(scope="session")
 def test_data_dir():
     """Fixture para o diretório de dados de teste."""
@@ -37,4 +57,15 @@ def test_cache_dir(test_data_dir):
     """Fixture para o diretório de cache de teste."""
     cache_dir = test_data_dir / "cache"
     cache_dir.mkdir(exist_ok=True)
-    return cache_dir 
\ No newline at end of file
+    return cache_dir 
+
+
+@pytest.fixture(autouse=True)
+def isolated_metrics_dir(tmp_path, monkeypatch):
+    """Grava as métricas do Prometheus em um diretório temporário por teste."""
+    from llm_bench_local.config.settings import settings
+    from llm_bench_local.core import metrics
+
+    monkeypatch.setattr(settings, "METRICS_DIR", str(tmp_path / "prometheus"))
+    monkeypatch.setattr(metrics, "_store", None)
+    return tmp_path / "prometheus"
@@ -1,9 +1,36 @@
+import time
+
 import pytest
 from fastapi.testclient import TestClient
+from llm_bench_local.api import main
 from llm_bench_local.api.main import app
+from llm_bench_local.config.settings import settings
+from llm_bench_local.core import jobs
+from llm_bench_local.persistence.crud import BenchmarkRepository
 
 client = TestClient(app)
 
+@pytest.fixture(autouse=True)
+def isolated_db(tmp_path, monkeypatch):
+    """Executa os jobs da API em um banco temporário, fora de ``data/db``."""
+    db_path = str(tmp_path / "benchmarks.db")
+    monkeypatch.setattr(settings, "db_path", db_path)
+    monkeypatch.setattr(main, "repo", BenchmarkRepository(db_path))
+    monkeypatch.setattr(jobs, "_job_queue", None)
+    yield
+    if jobs._job_queue is not None:
+        jobs._job_queue.stop(timeout=5.0)
+
+def wait_for_job(job_id, timeout=10.0):
+    """Consulta o job até que ele saia da fila ou o tempo acabe."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/api/v1/benchmarks/{job_id}").json()
+        if job["status"] in ("COMPLETED", "FAILED"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} não terminou em {timeout}s")
+
 def test_health_check():
     """Testa o endpoint de health check."""
     response = client.get("/api/v1/health")
@@ -26,10 +53,15 @@ def test_run_benchmark():
     }
     
     response = client.post("/api/v1/benchmarks/run", json=data)
-    assert response.status_code == 200
+    assert response.status_code == 202
+    
+    submitted = response.json()
+    assert "job_id" in submitted
+    assert submitted["status"] == "PENDING"
     
-    result = response.json()
-    assert "job_id" in result
+    job = wait_for_job(submitted["job_id"])
+    assert job["status"] == "COMPLETED"
+    result = job["results"]
     assert result["model"] == "gpt2"
     assert result["task"] == "text-generation"
     assert "duration" in result
@@ -37,6 +69,52 @@ def test_run_benchmark():
     assert "output" in result
     assert "hardware_metrics" in result
 
+def test_get_benchmark_trace():
+    """Testa a exportação do trace da execução (Chrome trace-event)."""
+    response = client.post(
+        "/api/v1/benchmarks/run", json={"model_id": "gpt2", "prompt": "Trace me"}
+    )
+    job_id = response.json()["job_id"]
+    job = wait_for_job(job_id)
+    assert "run" in job["results"]["phases"]
+    
+    response = client.get(f"/api/v1/benchmarks/{job_id}/trace")
+    assert response.status_code == 200
+    assert "attachment" in response.headers["content-disposition"]
+    names = {event["name"] for event in response.json()["traceEvents"]}
+    assert {"run", "generate", "db.update_status"} <= names
+    
+    response = client.get("/api/v1/benchmarks/nao-existe/trace")
+    assert response.status_code == 404
+
+def test_get_benchmark_profile(tmp_path, monkeypatch):
+    """Testa o download do perfil de um job executado com ``profile``."""
+    monkeypatch.setattr(settings, "cache_dir", tmp_path / "cache")
+    response = client.post(
+        "/api/v1/benchmarks/run",
+        json={"model_id": "gpt2", "prompt": "Profile me", "profile": True},
+    )
+    job_id = response.json()["job_id"]
+    job = wait_for_job(job_id)
+    assert job["config"]["profile"] is True
+    assert "overhead_percent" in job["results"]["profile"]
+    
+    response = client.get(f"/api/v1/benchmarks/{job_id}/profile")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert (tmp_path / "cache" / "profiles" / f"{job_id}.folded").exists()
+    
+    response = client.get("/api/v1/benchmarks/nao-existe/profile")
+    assert response.status_code == 404
+
+def test_run_benchmark_unknown_model():
+    """Testa que modelos desconhecidos são rejeitados antes de enfileirar."""
+    response = client.post(
+        "/api/v1/benchmarks/run",
+        json={"model_id": "nao-existe", "prompt": "Hello"},
+    )
+    assert response.status_code == 400
+
 def test_get_benchmark():
     """Testa o endpoint de obtenção de benchmark."""
     # Primeiro executa um benchmark
@@ -65,6 +143,44 @@ def test_get_models():
     assert response.status_code == 200
     assert isinstance(response.json(), list)
 
+def test_get_engines():
+    """Testa a listagem dos motores de inferência."""
+    response = client.get("/api/v1/engines")
+    assert response.status_code == 200
+    names = [engine["name"] for engine in response.json()]
+    assert "transformers" in names and "llama.cpp" in names
+
+def test_run_benchmark_unknown_engine():
+    """Testa a rejeição de motores desconhecidos."""
+    response = client.post(
+        "/api/v1/benchmarks/run",
+        json={"model_id": "gpt2", "prompt": "Hi", "engines": ["vllm"]}
+    )
+    assert response.status_code == 400
+
+def test_run_benchmark_rejects_engine_options():
+    """Testa que opções de motor inseguras ou inválidas retornam 400 no envio."""
+    for options in (
+        {"transformers": {"trust_remote_code": True}},
+        {"transformers": {"model_id": "qualquer/repositorio"}},
+        {"transformers": {"do_sample": "sim"}},
+    ):
+        response = client.post(
+            "/api/v1/benchmarks/run",
+            json={"model_id": "gpt2", "prompt": "Hi", "engines": ["transformers"],
+                  "engine_options": options}
+        )
+        assert response.status_code == 400, options
+
+def test_sweep_validation():
+    """Testa a validação de varreduras e a consulta de IDs inexistentes."""
+    response = client.post(
+        "/api/v1/sweeps",
+        json={"model_id": "gpt2", "prompt": "Hi", "space": {"n_ctx": [512]}}
+    )
+    assert response.status_code == 400
+    assert client.get("/api/v1/sweeps/inexistente").status_code == 404
+
 def test_get_hardware_metrics():
     """Testa o endpoint de obtenção de métricas de hardware."""
     # Primeiro executa um benchmark
@@ -139,6 +255,9 @@ def test_rag_pipeline(monkeypatch):
     rag_stub.SimpleRAGPipeline = SimpleRAGPipeline
     sys.modules["llm_bench_local.rag"] = rag_stub
 
+    # O router já pode ter sido importado com o pipeline real (imports preguiçosos)
+    import llm_bench_local.api.routers.rag as rag_router
+    importlib.reload(rag_router)
     import llm_bench_local.api.main as main
     importlib.reload(main)
     local_client = TestClient(main.app)
@@ -157,3 +276,17 @@ def test_rag_pipeline(monkeypatch):
     )
     assert response.status_code == 200
     assert response.json()["output"] == "answer:hello"
+
+def test_metrics_endpoint():
+    """Testa a exposição de métricas para o Prometheus."""
+    response = client.get(
+        "/api/v1/metrics", headers={"Accept": "application/openmetrics-text; version=1.0.0"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/openmetrics-text")
+    assert "# TYPE llm_bench_latency_seconds histogram" in response.text
+    assert "llm_bench_queue_depth" in response.text
+    assert response.text.endswith("# EOF\n")
+    
+    response = client.get("/api/v1/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
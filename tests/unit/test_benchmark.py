@@ -1,9 +1,12 @@
+from datetime import datetime
+
 import pytest
 from unittest.mock import Mock, patch
 
+from llm_bench_local.config.settings import settings
 from llm_bench_local.core.benchmark import Benchmark
-from llm_bench_local.core.model import ModelRunner
-from llm_bench_local.hardware.monitor import HardwareMonitor
+from llm_bench_local.core.model import ModelRunner, GenerationResult
+from llm_bench_local.hardware.monitor import HardwareMetrics, HardwareMonitor
 from llm_bench_local.persistence.crud import BenchmarkRepository
 
 @pytest.fixture
@@ -11,7 +14,9 @@ def mock_model_runner():
     """Fixture para o ModelRunner mockado."""
     with patch("llm_bench_local.core.benchmark.ModelRunner") as mock:
         instance = mock.return_value
-        instance.generate.return_value = "Generated text"
+        instance.complete.return_value = GenerationResult(
+            text="Generated text", prompt_tokens=3, completion_tokens=2
+        )
         yield instance
 
 @pytest.fixture
@@ -71,17 +76,107 @@ def test_benchmark_execution(mock_model_runner, mock_hardware_monitor, mock_repo
     assert "tokens_generated" in results
     assert "output" in results
     assert "hardware_metrics" in results
+    assert "time_to_first_token_s" in results
+    assert "inter_token_latency_p95_s" in results
+    assert "decode_tokens_per_second" in results
+    assert results["prompt_tokens"] == 3
+    assert results["completion_tokens"] == 2
+    assert results["tokens_generated"] == 2
+    assert results["output"] == "Generated text"
+    # Instantes no relógio do servidor para a espera na fila e o TTFT
+    assert datetime.fromisoformat(results["started_at"])
+    assert results["generation_offset_s"] >= 0
     
     # Verifica se os métodos foram chamados
-    mock_model_runner.generate.assert_called_once()
+    mock_model_runner.complete.assert_called_once()
     mock_hardware_monitor.start_monitoring.assert_called_once()
     mock_hardware_monitor.stop_monitoring.assert_called_once()
     mock_repository.create_benchmark.assert_called_once()
     mock_repository.update_benchmark_status.assert_called_once()
 
+    # Sem tokens emitidos pelo mock não há fronteira de decode
+    assert set(results["memory"]) == {"model.load", "prefill"}
+    assert "rss_peak_gb" in results["memory"]["prefill"]
+
+    # As fases ficam nos resultados e o trace completo é salvo com o job
+    assert {"run", "monitor.start", "monitor.stop"} <= set(results["phases"])
+    assert results["phases"]["run"] >= 0
+    job_id, trace = mock_repository.save_trace.call_args[0]
+    assert job_id == benchmark.job_id
+    assert any(e["name"] == "run" and e["ph"] == "X" for e in trace["traceEvents"])
+
+def test_benchmark_batch_execution(mock_model_runner, mock_hardware_monitor, mock_repository):
+    """Testa a execução em lote com vazão agregada e por sequência."""
+    mock_model_runner.generate_batch.return_value = [
+        GenerationResult(text="a", prompt_tokens=2, completion_tokens=4, duration=2.0),
+        GenerationResult(text="b", prompt_tokens=3, completion_tokens=6, duration=2.0),
+    ]
+    benchmark = Benchmark(
+        model_id="gpt2",
+        prompt="Test prompt",
+        prompts=["p1", "p2"],
+        max_batch_size=2
+    )
+
+    results = benchmark.execute()
+
+    mock_model_runner.generate_batch.assert_called_once()
+    assert results["outputs"] == ["a", "b"]
+    assert results["prompt_tokens"] == 5
+    assert results["completion_tokens"] == 10
+    assert results["batch"]["size"] == 2
+    assert results["batch"]["aggregate_tokens_per_second"] is not None
+    assert [s["tokens_per_second"] for s in results["batch"]["sequences"]] == [2.0, 3.0]
+
+def test_benchmark_continuous_batching(mock_model_runner, mock_hardware_monitor, mock_repository):
+    """Testa a execução pelo escalonador de continuous batching."""
+    from llm_bench_local.core.scheduler import ScheduledResult
+
+    scheduled = ScheduledResult(
+        text="Generated text",
+        prompt_tokens=3,
+        completion_tokens=4,
+        queue_wait_s=0.5,
+        service_time_s=2.0,
+        latency_s=2.5,
+        mean_batch_size=3.0,
+        timing={"time_to_first_token_s": 0.7}
+    )
+    with patch("llm_bench_local.core.benchmark.get_scheduler") as get_scheduler:
+        get_scheduler.return_value.submit.return_value.result.return_value = scheduled
+        benchmark = Benchmark(
+            model_id="gpt2",
+            prompt="Test prompt",
+            continuous_batching=True
+        )
+        results = benchmark.execute()
+
+    get_scheduler.assert_called_once_with("gpt2", use_gpu=True)
+    mock_model_runner.complete.assert_not_called()
+    assert results["queue_wait_s"] == 0.5
+    assert results["latency_s"] == 2.5
+    assert results["duration"] == 2.5
+    assert results["tokens_per_second"] == 2.0
+    assert results["mean_batch_size"] == 3.0
+
+def test_benchmark_profile(mock_model_runner, mock_hardware_monitor, mock_repository, tmp_path):
+    """Testa a captura do perfil quando ``profile`` é habilitado."""
+    benchmark = Benchmark(model_id="gpt2", prompt="Test prompt", profile=True)
+    path = tmp_path / f"{benchmark.job_id}.folded"
+    
+    with patch("llm_bench_local.core.benchmark.profile_path", return_value=str(path)):
+        results = benchmark.execute()
+    
+    assert results["profile"]["path"] == str(path)
+    assert results["profile"]["samples"] == sum(
+        int(line.rsplit(" ", 1)[1]) for line in path.read_text().splitlines()
+    )
+    assert "overhead_percent" in results["profile"]
+    assert benchmark._config()["profile"] is True
+
 def test_benchmark_error_handling(mock_model_runner, mock_hardware_monitor, mock_repository):
     """Testa o tratamento de erros durante a execução do benchmark."""
-    mock_model_runner.generate.side_effect = Exception("Test error")
+    mock_model_runner.complete.side_effect = Exception("Test error")
     
     benchmark = Benchmark(
         model_id="gpt2",
@@ -137,4 +232,159 @@ def test_get_hardware_metrics(mock_repository):
     metrics = benchmark.get_hardware_metrics()
     assert len(metrics) == 1
     assert metrics[0]["cpu_usage_percent"] == 50.0
-    mock_repository.get_hardware_metrics.assert_called_once_with(benchmark.job_id) 
\ No newline at end of file
+    mock_repository.get_hardware_metrics.assert_called_once_with(benchmark.job_id) 
+def test_benchmark_streams_hardware_samples(mock_model_runner, mock_repository):
+    """Testa que as amostras do monitor são persistidas durante a execução."""
+    with patch("llm_bench_local.core.benchmark.HardwareMonitor") as monitor_cls:
+        benchmark = Benchmark(model_id="gpt2", prompt="Test prompt")
+        on_sample = monitor_cls.call_args.kwargs["on_sample"]
+    
+    sample = HardwareMetrics(
+        timestamp=1704067200.0, cpu_usage_percent=5.0, ram_usage_gb=1.0
+    )
+    on_sample(sample)
+    
+    mock_repository.save_hardware_metrics.assert_called_once_with(
+        benchmark.job_id, sample.to_dict()
+    )
+
+
+def test_benchmark_compares_engines(mock_model_runner, mock_hardware_monitor, mock_repository):
+    """Testa a execução do mesmo prompt em vários motores."""
+    fast = Mock()
+    fast.generate.return_value = {"tokens_per_second": 20.0}
+    gguf = {"gpt2-gguf": {"model_id": "gpt2.gguf"}}
+    with patch("llm_bench_local.core.benchmark.LLMRunner") as runner_cls, \
+            patch.dict(settings.models_config, gguf):
+        runner_cls.side_effect = [fast, RuntimeError("llama_cpp não instalado")]
+        benchmark = Benchmark(
+            model_id="gpt2",
+            prompt="Test prompt",
+            use_gpu=False,
+            engines=["transformers", "llama.cpp"],
+            engine_options={"llama.cpp": {"model_id": "gpt2-gguf", "n_ctx": 512}}
+        )
+        results = benchmark.execute()
+
+    _, kwargs = runner_cls.call_args_list[1]
+    assert runner_cls.call_args_list[1][0][0] == "gpt2.gguf"
+    assert kwargs == {"engine": "llama.cpp", "engine_options": {"n_ctx": 512}}
+    assert results["engines"]["transformers"]["tokens_per_second"] == 20.0
+    assert "load_s" in results["engines"]["transformers"]
+    assert results["engines"]["transformers"]["generation_offset_s"] >= 0
+    assert results["engines"]["llama.cpp"]["error"] == "llama_cpp não instalado"
+    assert results["fastest_engine"] == "transformers"
+    assert "engine.llama.cpp" in results["phases"]
+    mock_model_runner.complete.assert_not_called()
+
+def test_benchmark_rejects_unknown_engine(mock_model_runner, mock_hardware_monitor, mock_repository):
+    """Testa que motores desconhecidos são rejeitados na criação do job."""
+    with pytest.raises(ValueError, match="Motor desconhecido"):
+        Benchmark(model_id="gpt2", prompt="Test prompt", engines=["vllm"])
+
+
+@pytest.mark.parametrize("engine_options, match", [
+    ({"llama.cpp": {"model_id": "/tmp/outro.gguf"}}, "não encontrado na configuração"),
+    ({"transformers": {"trust_remote_code": True}}, "não suportadas"),
+    ({"llama.cpp": {"n_ctx": "grande"}}, "Valor inválido"),
+    ({"simulated": {"decode_tokens_per_s": 0}}, "maior que zero"),
+    ({"onnxruntime": {"export": True}}, "motores não selecionados"),
+])
+def test_benchmark_validates_engine_options(
+    mock_model_runner, mock_hardware_monitor, mock_repository, engine_options, match
+):
+    """Testa a validação das opções dos motores na criação do job."""
+    with pytest.raises(ValueError, match=match):
+        Benchmark(
+            model_id="gpt2", prompt="Test prompt",
+            engines=["transformers", "llama.cpp", "simulated"],
+            engine_options=engine_options
+        )
+
+def test_benchmark_trials_summarize_metrics(mock_model_runner, mock_hardware_monitor, mock_repository):
+    """Testa o aquecimento e as tentativas repetidas com o modelo já carregado."""
+    benchmark = Benchmark(
+        model_id="gpt2", prompt="Test prompt", use_gpu=False, warmup_runs=1, trials=3
+    )
+    results = benchmark.execute()
+
+    # O modelo é carregado uma vez; aquecimento + tentativas geram 4 vezes
+    mock_model_runner.load.assert_called_once()
+    assert mock_model_runner.complete.call_count == 4
+    trials = results["trials"]
+    assert trials["count"] == 3
+    assert trials["warmup_runs"] == 1
+    assert len(trials["raw"]["latency_s"]) == 3
+    assert results["duration"] == trials["raw"]["latency_s"][trials["representative_trial"]]
+    latency = trials["summary"]["latency_s"]
+    assert latency["n"] == 3
+    assert latency["min"] <= latency["median"] <= latency["max"]
+    assert {"p90", "p95", "p99", "stddev", "cv", "ci_low", "ci_high"} <= set(latency)
+    assert "tokens_per_second" in trials["summary"]
+    assert {"warmup", "trial"} <= set(results["phases"])
+
+def test_benchmark_memory_decode_phase(mock_model_runner, mock_hardware_monitor, mock_repository):
+    """Testa a fase de decode, iniciada no primeiro token com métricas próprias."""
+    def complete(prompt, timer=None, **kwargs):
+        timer.start()
+        timer.record()
+        timer.record()
+        timer.stop()
+        return GenerationResult(text="ab", prompt_tokens=3, completion_tokens=2)
+
+    mock_model_runner.complete.side_effect = complete
+    benchmark = Benchmark(model_id="gpt2", prompt="Test prompt", use_gpu=False, trace_memory=True)
+    with patch.object(benchmark.memory_tracker, "mark", wraps=benchmark.memory_tracker.mark) as mark, \
+            patch("llm_bench_local.hardware.memory.reset_peak_rss", return_value=False) as reset:
+        results = benchmark.execute()
+
+    mark.assert_called_once_with("decode")
+    # Um reset por fase; o do decode é feito fora da thread de geração
+    assert reset.call_count == 3
+    memory = results["memory"]
+    assert list(memory) == ["model.load", "prefill", "decode"]
+    assert "top_allocations" in memory["prefill"]
+    assert "top_allocations" in memory["decode"]
+    assert "python_since" not in memory["decode"]
+
+def test_benchmark_rejects_invalid_trials(mock_model_runner, mock_hardware_monitor, mock_repository):
+    """Testa a validação do número de tentativas."""
+    with pytest.raises(ValueError):
+        Benchmark(model_id="gpt2", prompt="Test prompt", trials=0)
+
+def test_benchmark_adaptive_trials_stop_at_precision(mock_model_runner, mock_hardware_monitor, mock_repository):
+    """Testa que as tentativas adaptativas param quando a precisão é atingida."""
+    benchmark = Benchmark(
+        model_id="gpt2", prompt="Test prompt", use_gpu=False,
+        target_precision=1e6, precision_metric="tokens_per_second", max_trials=20
+    )
+    results = benchmark.execute()
+
+    adaptive = results["trials"]["adaptive"]
+    assert adaptive["stop_reason"] == "precision"
+    assert adaptive["converged"] is True
+    assert adaptive["achieved_relative_ci_width"] <= 1e6
+    # Para no mínimo de tentativas, sem desperdiçar execuções
+    assert results["trials"]["count"] == 3
+
+def test_benchmark_adaptive_trials_respect_budgets(mock_model_runner, mock_hardware_monitor, mock_repository):
+    """Testa a parada pelo limite de tentativas e pelo orçamento de tempo."""
+    results = Benchmark(
+        model_id="gpt2", prompt="Test prompt", use_gpu=False,
+        target_precision=1e-12, max_trials=4
+    ).execute()
+    assert results["trials"]["count"] == 4
+    assert results["trials"]["adaptive"]["stop_reason"] == "max_trials"
+    assert results["trials"]["adaptive"]["converged"] is False
+
+    results = Benchmark(
+        model_id="gpt2", prompt="Test prompt", use_gpu=False,
+        target_precision=1e-12, max_trials=50, max_duration_s=1e-9
+    ).execute()
+    assert results["trials"]["adaptive"]["stop_reason"] == "time_budget"
+    assert results["trials"]["count"] == 1
+
+def test_benchmark_rejects_unknown_precision_metric(mock_model_runner, mock_hardware_monitor, mock_repository):
+    """Testa a validação da métrica do modo adaptativo."""
+    with pytest.raises(ValueError, match="Métrica inválida"):
+        Benchmark(model_id="gpt2", prompt="Test prompt", target_precision=0.05, precision_metric="foo")
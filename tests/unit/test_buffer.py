@@ -0,0 +1,59 @@
+import math
+
+import pytest
+
+from llm_bench_local.hardware.buffer import SampleBuffer, summarize
+
+def test_buffer_keeps_most_recent_samples():
+    """Testa que o buffer sobrescreve as amostras mais antigas ao encher."""
+    buffer = SampleBuffer(3, fields=("timestamp", "value"))
+    for i in range(5):
+        buffer.append(float(i), i * 10.0)
+    
+    assert len(buffer) == 3
+    assert buffer.total == 5
+    assert list(buffer.column("timestamp")) == [2.0, 3.0, 4.0]
+    assert list(buffer.column("value")) == [20.0, 30.0, 40.0]
+
+def test_buffer_stores_missing_values_as_nan():
+    """Testa que valores ausentes viram NaN na coluna e None nas linhas."""
+    buffer = SampleBuffer(4, fields=("timestamp", "value"))
+    buffer.append(0.0, None)
+    
+    assert math.isnan(buffer.column("value")[0])
+    assert buffer.rows() == [{"timestamp": 0.0, "value": None}]
+
+def test_buffer_rejects_wrong_row_width():
+    """Testa a validação do número de valores por amostra."""
+    buffer = SampleBuffer(4, fields=("timestamp", "value"))
+    with pytest.raises(ValueError):
+        buffer.append(0.0)
+
+def test_buffer_spills_full_history(tmp_path):
+    """Testa que o spill preserva amostras que saíram da janela em memória."""
+    path = tmp_path / "metrics" / "job.f64"
+    buffer = SampleBuffer(2, fields=("timestamp", "value"), spill_path=str(path))
+    for i in range(5):
+        buffer.append(float(i), float(i))
+    
+    history = buffer.history()
+    buffer.close()
+    
+    assert list(history["value"]) == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert len(buffer) == 2
+    assert path.stat().st_size == 5 * 2 * 8
+
+def test_summarize():
+    """Testa as agregações, incluindo a média ponderada no tempo."""
+    stats = summarize([10.0, 30.0, float("nan"), 20.0], [0.0, 1.0, 2.0, 4.0])
+    
+    assert stats["mean"] == pytest.approx(20.0)
+    assert stats["peak"] == 30.0
+    assert stats["p95"] == pytest.approx(29.0)
+    assert stats["stddev"] == pytest.approx(math.sqrt(200.0 / 3))
+    # 10 por 1s e 30 por 3s (a amostra NaN é ignorada)
+    assert stats["time_weighted_mean"] == pytest.approx(25.0)
+
+def test_summarize_without_valid_values():
+    """Testa que colunas sem valores válidos não geram agregados."""
+    assert summarize([float("nan")], [0.0]) == {}
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from llm_bench_local.persistence.crud import EXTERNAL_TASKS, BenchmarkRepository
+from llm_bench_local.scripts import capacity
+from llm_bench_local.scripts.capacity import SLO, evaluate_slo, find_capacity, run_capacity_search
+from llm_bench_local.scripts.loadgen import LoadGenerator, RequestResult, TraceRequest
+
+
+def fake_measure(capacity_rps):
+    """``measure_rate`` falso: passa até ``capacity_rps`` requisições por segundo."""
+    async def measure(generator, trace, rate, slo, settle_s, measure_s, seed):
+        passed = rate <= capacity_rps
+        return {"rate": rate, "passed": passed, "violations": [] if passed else ["e2e"]}
+    return measure
+
+
+def search(capacity_rps, **kwargs):
+    with patch.object(capacity, "measure_rate", fake_measure(capacity_rps)):
+        return asyncio.run(find_capacity(None, [TraceRequest("a")], SLO(e2e_s=1.0), **kwargs))
+
+
+def test_evaluate_slo():
+    """Testa os percentis do SLO e as metas violadas."""
+    results = [RequestResult(0.0, "ok", latency_s=0.1 * i, ttft_s=0.01 * i) for i in range(1, 11)]
+    slo = SLO(ttft_s=0.2, e2e_s=0.5, percentile=50)
+    summary = evaluate_slo(results, 1.0, slo)
+
+    assert summary["e2e_slo_percentile_s"] == pytest.approx(0.55)
+    assert summary["ttft_slo_percentile_s"] == pytest.approx(0.055)
+    assert summary["violations"] == ["e2e"]
+    assert not summary["passed"]
+
+    results.append(RequestResult(0.0, "failed"))
+    summary = evaluate_slo(results, 1.0, SLO(e2e_s=2.0, max_error_rate=0.05))
+    assert summary["violations"] == ["error_rate"]
+    assert evaluate_slo([], 1.0, SLO())["violations"] == ["no_completed_requests"]
+
+
+def test_find_capacity_steps_then_bisects():
+    """Testa a fase step até a falha seguida da bissecção."""
+    result = search(capacity_rps=11.0, start_rate=1.0, bisect_steps=10, tolerance=0.05)
+    phases = {}
+    for point in result["curve"]:
+        phases.setdefault(point["phase"], []).append(point["rate"])
+
+    assert phases["step"] == [1.0, 2.0, 4.0, 8.0, 16.0]
+    assert 8.0 < result["max_sustainable_rate"] <= 11.0
+    assert 11.0 - result["max_sustainable_rate"] < 16.0 * 0.05
+    assert result["saturated"]
+    assert [point["rate"] for point in result["curve"]] == sorted(p["rate"] for p in result["curve"])
+
+
+def test_find_capacity_halves_when_start_rate_fails():
+    """Testa a redução à metade a partir de ``start_rate`` seguida da bissecção."""
+    result = search(capacity_rps=3.0, start_rate=16.0, bisect_steps=10, tolerance=0.05)
+    phases = {}
+    for point in result["curve"]:
+        phases.setdefault(point["phase"], []).append(point["rate"])
+
+    assert phases["step"] == [16.0]
+    assert sorted(phases["halve"], reverse=True) == [8.0, 4.0, 2.0]
+    assert 2.0 < result["max_sustainable_rate"] <= 3.0
+    assert 3.0 - result["max_sustainable_rate"] < 4.0 * 0.05
+    assert result["saturated"]
+
+
+def test_find_capacity_limits():
+    """Testa SLO violado até ``min_rate`` e ``max_rate`` sem saturação."""
+    result = search(capacity_rps=0.1, min_rate=0.2)
+    assert result["max_sustainable_rate"] is None
+    assert [point["rate"] for point in result["curve"]] == [0.25, 0.5, 1.0]
+
+    result = search(capacity_rps=100.0, max_rate=8.0)
+    assert result["max_sustainable_rate"] == 8.0
+    assert not result["saturated"]
+    assert all(point["phase"] == "step" for point in result["curve"])
+
+
+def test_run_capacity_search_stores_curve(tmp_path):
+    """Testa o registro da curva de saturação no banco."""
+    repository = BenchmarkRepository(str(tmp_path / "capacity.db"))
+    generator = LoadGenerator(None, model_id="gpt2", engine="simulated")
+    progress = []
+    original = repository.update_benchmark_status
+
+    def spy(job_id, status, results=None):
+        progress.append((status, len((results or {}).get("curve", []))))
+        return original(job_id, status, results)
+
+    with patch.object(capacity, "measure_rate", fake_measure(3.0)), \
+            patch.object(repository, "update_benchmark_status", spy):
+        result = asyncio.run(run_capacity_search(
+            generator, [TraceRequest("a")], SLO(e2e_s=1.0), repository, bisect_steps=0
+        ))
+
+    stored = repository.get_benchmark(result["job_id"])
+    assert stored["task"] == "capacity"
+    assert stored["status"] == "COMPLETED"
+    assert stored["results"]["max_sustainable_rate"] == 2.0
+    assert [point["rate"] for point in stored["results"]["curve"]] == [1.0, 2.0, 4.0]
+    assert stored["config"]["slo"]["e2e_s"] == 1.0
+    # Curva parcial salva após cada taxa medida
+    assert progress[1:4] == [("RUNNING", 1), ("RUNNING", 2), ("RUNNING", 3)]
+
+
+def test_run_capacity_search_marks_failure(tmp_path):
+    """Testa que uma falha durante a busca marca o registro como FAILED."""
+    repository = BenchmarkRepository(str(tmp_path / "capacity.db"))
+
+    async def broken(*args):
+        raise ConnectionError("API fora do ar")
+
+    with patch.object(capacity, "measure_rate", broken):
+        with pytest.raises(ConnectionError):
+            asyncio.run(run_capacity_search(
+                LoadGenerator(None), [TraceRequest("a")], SLO(e2e_s=1.0), repository
+            ))
+
+    stored = repository.list_benchmarks()[0]
+    assert stored["status"] == "FAILED"
+    assert stored["results"]["error"] == "API fora do ar"
+
+
+def test_measure_rate_discards_settle_period():
+    """Testa que as requisições da acomodação ficam fora da medição."""
+    jobs = {}
+
+    def handler(request):
+        if request.method == "POST":
+            job_id = f"job-{len(jobs)}"
+            jobs[job_id] = time.perf_counter()
+            return httpx.Response(202, json={"job_id": job_id})
+        # Job executado e primeiro token imediatos: o TTFT é só o envio
+        results = {
+            "started_at": "2024-01-01T00:00:00",
+            "generation_offset_s": 0.0,
+            "time_to_first_token_s": 0.0,
+        }
+        return httpx.Response(200, json={
+            "status": "COMPLETED", "created_at": "2024-01-01T00:00:00", "results": results,
+        })
+
+    async def _run():
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            generator = LoadGenerator(client, poll_interval=0.001)
+            return await capacity.measure_rate(
+                generator, [TraceRequest("a")], 200.0, SLO(e2e_s=1.0, ttft_s=1.0),
+                settle_s=0.05, measure_s=0.1
+            )
+
+    point = asyncio.run(_run())
+    assert len(jobs) == 30
+    assert point["settle_requests"] > 0
+    assert point["requests"] + point["settle_requests"] == 30
+    assert point["passed"]
+    assert point["ttft_slo_percentile_s"] < point["e2e_slo_percentile_s"]
+
+
+def test_measure_rate_uses_real_window_duration():
+    """Testa que a vazão usa a duração real da janela, não ``measure_s``."""
+    class SlowGenerator:
+        async def open_loop(self, trace, rate, total, **kwargs):
+            sent_at = time.perf_counter()
+            # A API saturada termina as requisições bem depois da janela nominal
+            await asyncio.sleep(0.3)
+            return [RequestResult(sent_at=sent_at, status="ok", latency_s=0.3, ttft_s=0.1)]
+
+    point = asyncio.run(capacity.measure_rate(
+        SlowGenerator(), [TraceRequest("a")], 10.0, SLO(e2e_s=1.0),
+        settle_s=0.0, measure_s=0.01
+    ))
+    assert point["duration_s"] >= 0.3
+    assert point["achieved_qps"] <= 1 / 0.3
+
+
+def test_capacity_record_is_not_claimed_by_job_queue(tmp_path):
+    """Testa que os workers não reivindicam nem devolvem à fila o registro da busca."""
+    repository = BenchmarkRepository(str(tmp_path / "capacity.db"))
+    seen = []
+
+    async def measure(generator, trace, rate, slo, settle_s, measure_s, seed):
+        # Um worker da fila rodando durante a busca (como no modo --local)
+        seen.append((
+            repository.requeue_orphaned_benchmarks(lambda worker_id: False),
+            repository.claim_next_benchmark("w1"),
+        ))
+        return {"rate": rate, "passed": False, "violations": ["e2e"]}
+
+    with patch.object(capacity, "measure_rate", measure):
+        result = asyncio.run(run_capacity_search(
+            LoadGenerator(None), [TraceRequest("a")], SLO(e2e_s=1.0), repository
+        ))
+
+    assert capacity.CAPACITY_TASK in EXTERNAL_TASKS
+    assert seen and set(seen) == {(0, None)}
+    assert repository.get_benchmark(result["job_id"])["status"] == "COMPLETED"
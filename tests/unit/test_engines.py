@@ -0,0 +1,174 @@
+import pytest
+from unittest.mock import Mock
+
+from llm_bench_local.core.pool import ModelPool
+from llm_bench_local.core.timing import TokenTimer
+from llm_bench_local.llm import engines
+from llm_bench_local.llm.engines import (
+    Engine,
+    EngineCapabilities,
+    detect_engine,
+    get_engine,
+    list_engines,
+    register_engine,
+)
+from llm_bench_local.llm.runner import LLMRunner
+from llm_bench_local.schemas.benchmark import BenchmarkConfig, HardwareOptions
+
+
+class FakeEngine(Engine):
+    name = "fake"
+    capabilities = EngineCapabilities(streaming=True, batching=False, kv_reuse=False)
+    load_options = {"n_ctx": 512}
+    knobs = {"top_k": 10}
+
+    def __init__(self):
+        self.loads = []
+
+    def matches(self, model_id):
+        return model_id.endswith(".fake")
+
+    def load(self, model_id, hardware, options):
+        self.loads.append(options["n_ctx"])
+        return Mock(), None
+
+    def generate(self, model, tokenizer, config, hardware, options, timer):
+        for _ in range(3):
+            timer.record()
+        return f"top_k={options['top_k']}", 4, timer.token_count
+
+
+@pytest.fixture
+def fake_engine():
+    """Registra um motor falso e o remove ao final."""
+    engine = register_engine(FakeEngine())
+    yield engine
+    engines.ENGINES.pop("fake")
+    engines._DETECTION_ORDER.remove("fake")
+
+
+def test_detect_engine_by_extension():
+    """Testa a escolha do motor padrão pelo caminho do modelo."""
+    assert detect_engine("model.Q4_K_M.gguf").name == "llama.cpp"
+    assert detect_engine("model.bin").name == "ctransformers"
+    assert detect_engine("model.onnx").name == "onnxruntime"
+    assert detect_engine("gpt2").name == "transformers"
+
+
+def test_get_engine_unknown():
+    """Testa o erro para motores não registrados."""
+    with pytest.raises(ValueError, match="Motor desconhecido"):
+        get_engine("vllm")
+
+
+def test_resolve_options_rejects_unknown():
+    """Testa que opções inválidas são rejeitadas antes da carga."""
+    engine = get_engine("llama.cpp")
+    options = engine.resolve_options({"n_ctx": 4096})
+    assert options["n_ctx"] == 4096
+    assert options["top_k"] == 40
+    with pytest.raises(ValueError, match="n_ctxx"):
+        engine.resolve_options({"n_ctxx": 4096})
+
+
+def test_resolve_options_checks_types():
+    """Testa a validação do tipo de cada opção pelo valor padrão."""
+    llama = get_engine("llama.cpp")
+    assert llama.resolve_options({"n_threads": 4, "stop": ["\n"]})["n_threads"] == 4
+    assert llama.resolve_options({"n_threads": None})["n_threads"] is None
+    for bad in ({"n_threads": "4"}, {"n_ctx": True}, {"stop": "\n"}, {"use_mmap": 1}):
+        with pytest.raises(ValueError, match="Valor inválido"):
+            llama.resolve_options(bad)
+    # Inteiros são aceitos onde o padrão é float
+    assert get_engine("simulated").resolve_options({"jitter": 0})["jitter"] == 0
+    assert "trust_remote_code" not in get_engine("transformers").describe()["load_options"]
+
+
+def test_list_engines_describes_capabilities():
+    """Testa a descrição dos motores registrados."""
+    described = {engine["name"]: engine for engine in list_engines()}
+    assert {"transformers", "llama.cpp", "ctransformers", "onnxruntime", "torch.compile"} <= set(described)
+    llama = described["llama.cpp"]
+    assert llama["capabilities"]["streaming"] is True
+    assert llama["capabilities"]["batching"] is False
+    assert llama["load_options"]["n_ctx"] == 2048
+    assert "Q4_K_M" in llama["capabilities"]["quantization"]
+    assert isinstance(llama["available"], bool)
+
+
+def test_runner_uses_registered_engine(fake_engine):
+    """Testa o LLMRunner com um motor registrado e opções por execução."""
+    runner = LLMRunner("model.fake", pool=ModelPool(), engine_options={"top_k": 5})
+    assert runner.model_type == "fake"
+
+    runner.load_model()
+    result = runner.generate(BenchmarkConfig(prompt="Hi", max_new_tokens=3))
+
+    assert fake_engine.loads == [512]
+    assert result["engine"] == "fake"
+    assert result["output"] == "top_k=5"
+    assert result["prompt_tokens"] == 4
+    assert result["completion_tokens"] == 3
+
+
+def test_runner_pool_key_includes_load_options(fake_engine):
+    """Testa que opções de carga diferentes geram instâncias distintas no pool."""
+    pool = ModelPool()
+    LLMRunner("model.fake", pool=pool).load_model()
+    LLMRunner("model.fake", pool=pool, engine_options={"top_k": 1}).load_model()
+    LLMRunner("model.fake", pool=pool, engine_options={"n_ctx": 1024}).load_model()
+
+    # ``top_k`` é parâmetro de geração e reutiliza o modelo carregado
+    assert fake_engine.loads == [512, 1024]
+
+
+def test_runner_weight_format_maps_to_engine_option():
+    """Testa que ``weight_format`` vira a opção ``use_safetensors`` do transformers."""
+    runner = LLMRunner("gpt2", HardwareOptions(use_gpu=False), weight_format="bin")
+    assert runner.options["use_safetensors"] is False
+    assert runner._pool_key()[2].startswith("float32-transformers:")
+
+
+def test_simulated_engine_is_deterministic():
+    """Testa o motor simulado: taxas configuradas e jitter reproduzível."""
+    options = {"decode_tokens_per_s": 1000.0, "jitter": 0.5, "seed": 7, "memory_mb": 1}
+    results = []
+    for _ in range(2):
+        runner = LLMRunner(
+            "simulated", HardwareOptions(use_gpu=False), pool=ModelPool(), engine_options=options
+        )
+        runner.load_model()
+        results.append(runner.generate(BenchmarkConfig(prompt="one two three", max_new_tokens=5)))
+
+    assert runner.model_type == "simulated"
+    assert len(runner.model.weights) == 1024 * 1024
+    first, second = results
+    assert first["output"] == second["output"] == "tok0 tok1 tok2 tok3 tok4"
+    assert first["prompt_tokens"] == 3
+    assert first["completion_tokens"] == 5
+    assert len(first["token_timestamps_s"]) == 5
+
+
+@pytest.mark.parametrize("name, chunk, tokenize_kwarg", [
+    ("llama.cpp", lambda text: {"choices": [{"text": text}]}, "add_bos"),
+    ("ctransformers", lambda text: text, "add_bos_token"),
+])
+def test_streaming_engines_count_tokens_not_chunks(name, chunk, tokenize_kwarg):
+    """Testa que a contagem de tokens gerados vem do tokenizer, não dos chunks."""
+    engine = get_engine(name)
+    model = Mock()
+    # Um token por caractere; o stream junta três tokens no segundo chunk
+    model.tokenize.side_effect = lambda text, **kwargs: list(text)
+    model.return_value = iter([chunk("a"), chunk("bcd")])
+    timer = TokenTimer()
+
+    output, prompt_tokens, completion_tokens = engine.generate(
+        model, None, BenchmarkConfig(prompt="Hi", max_new_tokens=8),
+        HardwareOptions(use_gpu=False), engine.resolve_options({}), timer
+    )
+
+    assert output == "abcd"
+    assert prompt_tokens == 2
+    assert completion_tokens == 4
+    assert timer.token_count == 2
+    assert model.tokenize.call_args.kwargs == {tokenize_kwarg: False}
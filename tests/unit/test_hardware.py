@@ -1 +1,247 @@
- 
\ No newline at end of file
+import subprocess
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+from llm_bench_local.hardware.cgroup import CgroupReader
+from llm_bench_local.hardware.memory import MemoryTracker, read_status
+from llm_bench_local.hardware.monitor import HardwareMetrics, HardwareMonitor
+from llm_bench_local.hardware.process import ProcessTreeSampler, diff
+
+def test_sampler_collects_in_background():
+    """Testa que a thread de amostragem coleta amostras no intervalo configurado."""
+    monitor = HardwareMonitor(interval=0.02)
+    monitor.start_monitoring()
+    time.sleep(0.25)
+    result = monitor.stop_monitoring()
+    
+    assert 5 <= result["samples"] <= 20
+    assert result["sample_interval_s"] == 0.02
+    assert result["sampler_jitter_p95_ms"] is not None
+    assert "cpu_usage_mean_percent" in result
+    assert "ram_usage_time_weighted_mean_gb" in result
+    assert "cpu_usage_p95_percent" in result
+    assert "process_rss_peak_gb" in result
+    assert result["process"]["process_count"] >= 1
+    assert result["memory_limit_source"] in ("cgroup", "host")
+    assert result["memory_limit_gb"] > 0
+
+def test_sampler_stops_cleanly():
+    """Testa que stop_monitoring encerra a thread e interrompe a coleta."""
+    monitor = HardwareMonitor(interval=0.01)
+    monitor.start_monitoring()
+    time.sleep(0.05)
+    monitor.stop_monitoring()
+    
+    assert not any(t.name == "hardware-monitor" for t in threading.enumerate())
+    collected = len(monitor.metrics)
+    time.sleep(0.05)
+    assert len(monitor.metrics) == collected
+    assert monitor.stop_monitoring() == {}
+
+def test_sampler_streams_samples_to_sink():
+    """Testa que cada amostra é entregue ao on_sample."""
+    received = []
+    monitor = HardwareMonitor(interval=0.01, on_sample=received.append)
+    monitor.start_monitoring()
+    time.sleep(0.05)
+    monitor.stop_monitoring()
+    
+    assert received
+    assert received == monitor.metrics
+    assert set(received[0].to_dict()) == {
+        "timestamp", "cpu_usage_percent", "ram_usage_gb",
+        "gpu_usage_percent", "vram_usage_gb"
+    }
+
+def test_sampler_survives_sink_errors():
+    """Testa que falhas no on_sample não interrompem a amostragem."""
+    def failing_sink(sample):
+        raise RuntimeError("disk full")
+    
+    monitor = HardwareMonitor(interval=0.01, on_sample=failing_sink)
+    monitor.start_monitoring()
+    time.sleep(0.05)
+    result = monitor.stop_monitoring()
+    
+    assert result["samples"] > 1
+
+def test_metrics_to_dict():
+    """Testa a conversão da amostra para persistência."""
+    sample = HardwareMetrics(
+        timestamp=1704110400.0,
+        cpu_usage_percent=10.0,
+        ram_usage_gb=2.0
+    )
+    
+    data = sample.to_dict()
+    assert data["timestamp"] == "2024-01-01T12:00:00"
+    assert data["cpu_usage_percent"] == 10.0
+    assert data["gpu_usage_percent"] is None
+
+def test_process_tree_includes_children():
+    """Testa que a amostragem soma o processo atual e seus filhos."""
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+    try:
+        sampler = ProcessTreeSampler(children_refresh_s=0.0)
+        start = sampler.sample(detailed=True)
+        end = sampler.sample(detailed=True)
+    finally:
+        child.kill()
+        child.wait()
+    
+    assert end.process_count >= 2
+    assert end.rss_bytes > 0
+    assert end.num_threads >= 2
+    assert end.cpu_percent is not None
+    summary = diff(start, end)
+    assert summary["cpu_time_s"] >= 0
+    assert summary["ctx_switches_voluntary"] >= 0
+
+def _write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+def test_cgroup_v2(tmp_path):
+    """Testa a leitura de limites e uso no cgroup v2."""
+    root = tmp_path / "cgroup"
+    group = root / "bench.slice"
+    _write(root / "cgroup.controllers", "cpu memory")
+    _write(group / "memory.max", "4294967296")
+    _write(group / "memory.current", "1073741824")
+    _write(group / "memory.peak", "2147483648")
+    _write(group / "memory.stat", "anon 536870912\ninactive_file 268435456\n")
+    _write(group / "cpu.max", "200000 100000")
+    _write(group / "cpu.stat", "usage_usec 1500000\n")
+    proc = tmp_path / "proc_cgroup"
+    proc.write_text("0::/bench.slice\n")
+    
+    stats = CgroupReader(str(root), str(proc)).read()
+    
+    assert stats.version == 2
+    assert stats.memory_limit_bytes == 4 * 1024 ** 3
+    assert stats.memory_working_set_bytes == 1024 ** 3 - 268435456
+    assert stats.memory_peak_bytes == 2 * 1024 ** 3
+    assert stats.memory_headroom_bytes == 4 * 1024 ** 3 - stats.memory_working_set_bytes
+    assert stats.cpu_limit_cores == 2.0
+    assert stats.cpu_usage_s == 1.5
+
+def test_cgroup_v2_unlimited(tmp_path):
+    """Testa que ``max`` é interpretado como sem limite."""
+    root = tmp_path / "cgroup"
+    _write(root / "cgroup.controllers", "memory")
+    _write(root / "memory.max", "max")
+    _write(root / "memory.current", "100")
+    _write(root / "cpu.max", "max 100000")
+    
+    stats = CgroupReader(str(root), str(tmp_path / "missing")).read()
+    
+    assert stats.memory_limit_bytes is None
+    assert stats.memory_headroom_bytes is None
+    assert stats.cpu_limit_cores is None
+
+def test_cgroup_v1(tmp_path):
+    """Testa a leitura de limites e uso no cgroup v1."""
+    root = tmp_path / "cgroup"
+    _write(root / "memory" / "memory.limit_in_bytes", "2147483648")
+    _write(root / "memory" / "memory.usage_in_bytes", "1073741824")
+    _write(root / "memory" / "memory.max_usage_in_bytes", "1610612736")
+    _write(root / "memory" / "memory.stat", "total_inactive_file 73741824\n")
+    _write(root / "cpu" / "cpu.cfs_quota_us", "50000")
+    _write(root / "cpu" / "cpu.cfs_period_us", "100000")
+    _write(root / "cpuacct" / "cpuacct.usage", "2000000000")
+    
+    stats = CgroupReader(str(root), str(tmp_path / "missing")).read()
+    
+    assert stats.version == 1
+    assert stats.memory_limit_bytes == 2 * 1024 ** 3
+    assert stats.memory_working_set_bytes == 1000000000
+    assert stats.cpu_limit_cores == 0.5
+    assert stats.cpu_usage_s == 2.0
+
+def test_cgroup_unavailable(tmp_path):
+    """Testa o comportamento fora de um cgroup legível."""
+    reader = CgroupReader(str(tmp_path), str(tmp_path / "missing"))
+    assert not reader.available
+    assert reader.read() is None
+
+def test_read_status(tmp_path):
+    """Testa a leitura de VmHWM e VmRSS do status do processo."""
+    status = tmp_path / "status"
+    status.write_text("Name:\tpython\nVmHWM:\t  204800 kB\nVmRSS:\t  102400 kB\n")
+    assert read_status(str(status)) == {"VmHWM": 200 * 1024 ** 2, "VmRSS": 100 * 1024 ** 2}
+    assert read_status(str(tmp_path / "missing")) == {}
+
+def test_memory_tracker_phases(tmp_path):
+    """Testa o pico de RSS por fase (sem reset disponível, pico do processo)."""
+    status = tmp_path / "status"
+    status.write_text("VmHWM:\t2097152 kB\nVmRSS:\t1048576 kB\n")
+    tracker = MemoryTracker(
+        status_path=str(status), clear_refs_path=str(tmp_path / "missing" / "clear_refs")
+    )
+    tracker.enter("model.load")
+    tracker.enter("decode")
+    phases = tracker.finish()
+    
+    assert list(phases) == ["model.load", "decode"]
+    assert phases["decode"]["rss_peak_gb"] == 2.0
+    assert phases["decode"]["rss_start_gb"] == 1.0
+    assert phases["decode"]["rss_peak_is_phase"] is False
+    assert "python_peak_mb" not in phases["decode"]
+
+def test_memory_tracker_mark_is_lightweight(tmp_path):
+    """Testa que ``mark`` só anota o instante; reset e snapshots ficam na thread auxiliar."""
+    status = tmp_path / "status"
+    clear_refs = tmp_path / "clear_refs"
+    status.write_text("VmHWM:\t1048576 kB\nVmRSS:\t524288 kB\n")
+    tracker = MemoryTracker(
+        trace_python=True, top_n=3, status_path=str(status), clear_refs_path=str(clear_refs)
+    )
+    tracker.start()
+    tracker.enter("prefill")
+    clear_refs.unlink()
+    status.write_text("VmHWM:\t2097152 kB\nVmRSS:\t1048576 kB\n")
+    # Com o lock retido a thread auxiliar não processa a fronteira ainda
+    with tracker._lock, \
+            patch("llm_bench_local.hardware.memory.read_status") as read, \
+            patch("tracemalloc.take_snapshot") as take_snapshot:
+        tracker.mark("decode")
+    read.assert_not_called()
+    take_snapshot.assert_not_called()
+
+    # O ``VmHWM`` é zerado pela thread auxiliar, sem esperar o fim da fase
+    deadline = time.monotonic() + 5.0
+    while not clear_refs.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert clear_refs.exists()
+    status.write_text("VmHWM:\t3145728 kB\nVmRSS:\t2097152 kB\n")
+    phases = tracker.finish()
+
+    assert phases["prefill"]["rss_peak_gb"] == 2.0
+    assert phases["prefill"]["rss_end_gb"] == 1.0
+    assert phases["decode"]["rss_start_gb"] == 1.0
+    assert phases["decode"]["rss_peak_gb"] == 3.0
+    assert phases["decode"]["rss_peak_is_phase"] is True
+    assert "top_allocations" in phases["prefill"]
+    assert "top_allocations" in phases["decode"]
+    assert "python_since" not in phases["decode"]
+    assert tracker._worker is None
+
+def test_memory_tracker_python_heap():
+    """Testa o pico do heap Python e os locais de alocação por fase."""
+    tracker = MemoryTracker(trace_python=True, top_n=3)
+    tracker.start()
+    tracker.enter("small")
+    small = [bytearray(1024) for _ in range(10)]
+    tracker.enter("large")
+    large = bytearray(20 * 1024 ** 2)
+    del large
+    phases = tracker.finish()
+    
+    assert phases["large"]["python_peak_mb"] >= 20
+    assert phases["small"]["python_peak_mb"] < 20
+    assert len(phases["small"]["top_allocations"]) <= 3
+    assert phases["small"]["top_allocations"][0]["site"].startswith(__file__)
+    assert phases["large"]["rss_peak_gb"] is not None
+    assert small
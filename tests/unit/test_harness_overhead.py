@@ -0,0 +1,44 @@
+from llm_bench_local.scripts.harness_overhead import _summarize, run_suite
+
+
+def test_summarize_overhead_per_token():
+    """Testa o cálculo do custo do harness por job e por token."""
+    samples = [
+        {"wall_s": 0.12, "engine_s": 0.10},
+        {"wall_s": 0.13, "engine_s": 0.10},
+        {"wall_s": 0.11, "engine_s": 0.10},
+    ]
+    summary = _summarize(samples, tokens=10)
+    assert summary["jobs"] == 3
+    assert abs(summary["overhead_s_median"] - 0.02) < 1e-9
+    assert abs(summary["overhead_ms_per_token"] - 2.0) < 1e-6
+    assert abs(summary["overhead_percent"] - 100 * 0.02 / 0.12) < 1e-6
+
+
+def test_run_suite_without_model_weights():
+    """Testa as camadas do harness contra o motor simulado."""
+    report = run_suite(jobs=2, tokens=4, layers=["engine", "persistence", "execute"])
+
+    assert set(report) == {"engine", "persistence", "execute"}
+    for layer in report.values():
+        assert layer["jobs"] == 2
+        assert layer["wall_s_median"] > 0
+    # O benchmark completo passa por mais camadas que a geração direta
+    assert report["execute"]["overhead_s_median"] > report["engine"]["overhead_s_median"]
+
+
+def test_api_layer_uses_temporary_database():
+    """Testa que a camada ``api`` usa um banco temporário e restaura a API."""
+    from llm_bench_local.api import main
+    from llm_bench_local.config.settings import settings
+    from llm_bench_local.core import jobs
+
+    db_path, repo, queue = settings.db_path, main.repo, jobs._job_queue
+    stored = len(repo.list_benchmarks(limit=1000))
+    report = run_suite(jobs=1, tokens=4, layers=["api"])
+
+    assert report["api"]["jobs"] == 1
+    assert report["api"]["submit_s_median"] > 0
+    assert (settings.db_path, main.repo, jobs._job_queue) == (db_path, repo, queue)
+    # Nenhum job da medição foi gravado no banco configurado
+    assert len(repo.list_benchmarks(limit=1000)) == stored
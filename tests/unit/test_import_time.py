@@ -0,0 +1,67 @@
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from llm_bench_local.scripts.check_import_time import (
+    HEAVY_MODULES,
+    IMPORT_BUDGETS_MS,
+    check,
+    parse_importtime,
+)
+
+
+def test_parse_importtime():
+    """Testa a leitura da saída do ``python -X importtime``."""
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   _io\n"
+        "import time:      3000 |       3120 | llm_bench_local.api.main\n"
+        "Traceback (most recent call last):\n"
+    )
+    entries = parse_importtime(stderr)
+    assert entries == [
+        {"module": "_io", "self_us": 120, "cumulative_us": 120, "depth": 1},
+        {"module": "llm_bench_local.api.main", "self_us": 3000, "cumulative_us": 3120, "depth": 0},
+    ]
+
+
+def test_api_startup_imports_no_backends():
+    """Testa que a API inicia sem importar backends de ML."""
+    result, = check({"llm_bench_local.api.main": float("inf")}, runs=1)
+    assert "error" not in result, result.get("error")
+    assert result["heavy_modules"] == [], f"Backends importados no início: {result['heavy_modules']}"
+
+
+@pytest.mark.slow
+def test_api_startup_within_budget():
+    """Testa que a API inicia dentro do orçamento (tempo de relógio)."""
+    target = "llm_bench_local.api.main"
+    result, = check({target: IMPORT_BUDGETS_MS[target]}, runs=2)
+    assert "error" not in result, result.get("error")
+    assert result["ok"], f"Import em {result['total_ms']:.0f} ms (orçamento {result['budget_ms']:.0f} ms)"
+
+
+@pytest.mark.slow
+def test_cli_startup_within_budget():
+    """Testa que a CLI inicia dentro do orçamento e sem backends de ML."""
+    pytest.importorskip("requests")
+    target = "scripts/run_benchmark_cli.py"
+    result, = check({target: IMPORT_BUDGETS_MS[target]}, runs=2)
+    assert result["ok"], result
+
+
+def test_heavy_module_is_reported():
+    """Testa que um backend pesado importado no início reprova o alvo."""
+    stderr = (
+        "import time:       100 |        100 |   torch._C\n"
+        "import time:       900 |       1000 | torch\n"
+    )
+    proc = subprocess.CompletedProcess([], 0, stdout="", stderr=stderr)
+    with patch("llm_bench_local.scripts.check_import_time.subprocess.run", return_value=proc):
+        result, = check({"torch": 10_000.0}, runs=1)
+
+    assert "torch" in HEAVY_MODULES
+    assert result["heavy_modules"] == ["torch"]
+    assert result["total_ms"] == 1.0
+    assert not result["ok"]
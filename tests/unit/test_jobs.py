@@ -0,0 +1,154 @@
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from llm_bench_local.core.jobs import (
+    JobQueue,
+    current_worker_id,
+    worker_is_alive,
+)
+from llm_bench_local.persistence.crud import BenchmarkRepository
+
+
+@pytest.fixture
+def repository(tmp_path):
+    return BenchmarkRepository(str(tmp_path / "jobs.db"))
+
+
+def create_job(repository, job_id, model_id="gpt2"):
+    repository.create_benchmark(
+        job_id,
+        model_id,
+        "text-generation",
+        {"prompt": "Hello", "max_tokens": 5},
+        {"use_gpu": False},
+    )
+
+
+def test_claim_is_fifo_and_exclusive(repository):
+    """Testa que cada job pendente é reivindicado uma única vez, em ordem."""
+    create_job(repository, "job-1")
+    time.sleep(0.001)
+    create_job(repository, "job-2")
+
+    first = repository.claim_next_benchmark("w1")
+    second = repository.claim_next_benchmark("w2")
+
+    assert first["job_id"] == "job-1"
+    assert first["status"] == "RUNNING"
+    assert second["job_id"] == "job-2"
+    assert repository.claim_next_benchmark("w3") is None
+    assert repository.count_by_status("RUNNING") == 2
+
+
+def test_orphaned_jobs_are_requeued(repository):
+    """Testa a recuperação de jobs RUNNING de workers que não existem mais."""
+    create_job(repository, "job-1")
+    create_job(repository, "job-2")
+    repository.claim_next_benchmark("dead-worker")
+    repository.claim_next_benchmark(current_worker_id("live"))
+
+    requeued = repository.requeue_orphaned_benchmarks(worker_is_alive)
+
+    assert requeued == 1
+    assert repository.count_by_status("PENDING") == 1
+    assert repository.count_by_status("RUNNING") == 1
+
+
+def test_worker_is_alive():
+    """Testa a verificação de vida de workers pelo PID e início do processo."""
+    assert worker_is_alive(current_worker_id("thread-0"))
+    host = current_worker_id("x").split(":")[0]
+    assert not worker_is_alive(f"{host}:999999999:0:thread-0")
+    assert worker_is_alive("outro-host:1:0:thread-0")
+    assert not worker_is_alive("invalido")
+
+
+def test_queue_executes_pending_jobs(tmp_path):
+    """Testa que os workers executam os jobs enfileirados."""
+    queue = JobQueue(str(tmp_path / "jobs.db"), workers=2, mode="thread",
+                     poll_interval=0.05)
+    executed = []
+
+    def fake_execute(self):
+        executed.append(self.job_id)
+        self.repository.update_benchmark_status(self.job_id, "COMPLETED", {"ok": True})
+        return {"ok": True}
+
+    with patch("llm_bench_local.core.benchmark.Benchmark.execute", fake_execute):
+        job_ids = [queue.submit(model_id="gpt2", prompt="Hello") for _ in range(3)]
+        deadline = time.time() + 5
+        while time.time() < deadline and len(executed) < 3:
+            time.sleep(0.02)
+        queue.stop(timeout=2)
+
+    assert sorted(executed) == sorted(job_ids)
+    for job_id in job_ids:
+        assert queue.repository.get_benchmark(job_id)["status"] == "COMPLETED"
+
+
+def test_invalid_worker_mode():
+    """Testa a validação do modo de worker."""
+    with pytest.raises(ValueError):
+        JobQueue(mode="fiber")
+
+
+def test_continuous_batching_jobs_do_not_hold_the_worker(tmp_path):
+    """Testa que jobs de continuous batching rodam juntos com um único worker."""
+    queue = JobQueue(str(tmp_path / "jobs.db"), workers=1, mode="thread",
+                     poll_interval=0.05)
+    # Só passa se os dois jobs estiverem em execução ao mesmo tempo
+    together = threading.Barrier(2, timeout=5)
+
+    def fake_execute(self):
+        together.wait()
+        self.repository.update_benchmark_status(self.job_id, "COMPLETED", {"ok": True})
+        return {"ok": True}
+
+    with patch("llm_bench_local.core.benchmark.Benchmark.execute", fake_execute):
+        job_ids = [
+            queue.submit(model_id="gpt2", prompt="Hello", continuous_batching=True)
+            for _ in range(2)
+        ]
+        deadline = time.time() + 5
+        while time.time() < deadline and queue.repository.count_by_status("COMPLETED") < 2:
+            time.sleep(0.02)
+        queue.stop(timeout=2)
+
+    for job_id in job_ids:
+        assert queue.repository.get_benchmark(job_id)["status"] == "COMPLETED"
+
+
+def test_continuous_batching_rejected_in_process_mode(tmp_path):
+    """Testa que o modo process recusa jobs de continuous batching."""
+    queue = JobQueue(str(tmp_path / "jobs.db"), workers=1, mode="process")
+    with pytest.raises(ValueError, match="continuous_batching"):
+        queue.submit(model_id="gpt2", prompt="Hello", continuous_batching=True)
+    assert queue.depth() == 0
+
+
+def test_submit_does_not_import_torch(tmp_path):
+    """Testa que enfileirar um job não executa o import do torch na API."""
+    code = (
+        "import sys\n"
+        "from llm_bench_local.core.jobs import JobQueue\n"
+        f"queue = JobQueue({str(tmp_path / 'jobs.db')!r}, mode='thread')\n"
+        # Sem workers: só o envio é verificado
+        "queue.start = lambda: None\n"
+        "queue.submit(model_id='gpt2', prompt='Hello')\n"
+        # ``lazy_import`` deixa um módulo preguiçoso em sys.modules até o uso
+        "loaded = [m for m in ('torch', 'transformers')\n"
+        "          if m in sys.modules and type(sys.modules[m]).__name__ != '_LazyModule']\n"
+        "print(loaded)\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True,
+        cwd=Path(__file__).resolve().parents[2]
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip().splitlines()[-1] == "[]"
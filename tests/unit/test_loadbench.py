@@ -0,0 +1,128 @@
+import sys
+import types
+from unittest.mock import Mock, patch
+
+import pytest
+
+from llm_bench_local.core import loadbench
+from llm_bench_local.core.loadbench import (
+    detect_format,
+    evict_page_cache,
+    measure_load,
+    resident_fraction,
+    run_load_benchmark,
+    weight_files,
+)
+
+
+def test_detect_format(tmp_path):
+    """Testa a detecção do formato dos pesos pelo caminho."""
+    gguf = tmp_path / "model.gguf"
+    gguf.write_bytes(b"gguf")
+    ggml = tmp_path / "model.bin"
+    ggml.write_bytes(b"ggml")
+    st_dir = tmp_path / "st"
+    st_dir.mkdir()
+    (st_dir / "model.safetensors").write_bytes(b"st")
+    pt_dir = tmp_path / "pt"
+    pt_dir.mkdir()
+    (pt_dir / "pytorch_model.bin").write_bytes(b"pt")
+
+    assert detect_format(str(gguf)) == "gguf"
+    assert detect_format(str(ggml)) == "ggml"
+    assert detect_format(str(st_dir)) == "safetensors"
+    assert detect_format(str(pt_dir)) == "bin"
+    assert weight_files(str(pt_dir), "bin") == [str(pt_dir / "pytorch_model.bin")]
+    with pytest.raises(ValueError):
+        detect_format(str(tmp_path / "vazio"))
+
+
+def test_evict_page_cache(tmp_path):
+    """Testa a remoção dos pesos do page cache (ignorando arquivos ausentes)."""
+    weights = tmp_path / "model.gguf"
+    weights.write_bytes(b"\0" * 4096)
+    eviction = evict_page_cache([str(weights), str(tmp_path / "missing")])
+    assert eviction["advised"] == 1
+    fraction = eviction["resident_fraction"]
+    assert fraction is None or 0.0 <= fraction <= 1.0
+
+
+def test_resident_fraction_after_read(tmp_path):
+    """Testa a consulta da residência de um arquivo recém-lido."""
+    weights = tmp_path / "model.gguf"
+    weights.write_bytes(b"\1" * 64 * 1024)
+    weights.read_bytes()
+    fraction = resident_fraction([str(weights)])
+    if fraction is None:
+        pytest.skip("Residência no page cache indisponível nesta plataforma")
+    assert fraction == 1.0
+    assert resident_fraction([str(tmp_path / "missing")]) is None
+
+
+def test_eviction_not_confirmed_when_pages_stay_resident(tmp_path):
+    """Testa que ``page_cache_evicted`` vem da residência medida, não do fadvise."""
+    weights = tmp_path / "model.gguf"
+    weights.write_bytes(b"\0" * 1024)
+    fake_measure = Mock(side_effect=lambda *args, **kwargs: {"load_s": 1.0})
+
+    with patch.object(loadbench, "measure_in_subprocess", fake_measure), \
+            patch.object(loadbench, "resident_fraction", return_value=0.8):
+        result = run_load_benchmark(str(weights), runs=1)
+    assert result["page_cache_resident_fraction"] == 0.8
+    assert result["page_cache_evicted"] is False
+    assert result["cold"]["runs"][0]["page_cache_resident_fraction"] == 0.8
+
+    with patch.object(loadbench, "measure_in_subprocess", fake_measure), \
+            patch.object(loadbench, "resident_fraction", return_value=None):
+        result = run_load_benchmark(str(weights), runs=1)
+    assert result["page_cache_evicted"] is False
+
+
+def test_run_load_benchmark_cold_and_warm(tmp_path):
+    """Testa a alternância cold/warm e as medianas por modo."""
+    weights = tmp_path / "model.gguf"
+    weights.write_bytes(b"\0" * 1024)
+    calls = []
+
+    def fake_measure(model_path, weight_format, **options):
+        calls.append(weight_format)
+        return {"load_s": float(len(calls)), "rss_peak_load_gb": 1.0,
+                "rss_peak_excludes_imports": True}
+
+    with patch.object(loadbench, "measure_in_subprocess", side_effect=fake_measure), \
+            patch.object(
+                loadbench, "evict_page_cache",
+                return_value={"advised": 1, "resident_fraction": 0.0}
+            ) as evict:
+        result = run_load_benchmark(str(weights), runs=2, use_mlock=True)
+
+    assert evict.call_count == 2
+    assert calls == ["gguf"] * 4
+    assert result["format"] == "gguf"
+    assert result["use_mlock"] is True
+    assert result["page_cache_evicted"] is True
+    assert result["page_cache_resident_fraction"] == 0.0
+    # Execuções 1 e 3 são cold; 2 e 4 são warm
+    assert result["cold"]["load_s_median"] == 2.0
+    assert result["warm"]["load_s_median"] == 3.0
+    assert "rss_peak_excludes_imports_median" not in result["cold"]
+    assert len(result["warm"]["runs"]) == 2
+
+
+def test_measure_load_uses_isolated_pool():
+    """Testa a medição no processo com o backend isolado do pool global."""
+    runner = Mock()
+    runner.generate.return_value = {"time_to_first_token_s": 0.05}
+    runner_module = types.ModuleType("llm_bench_local.llm.runner")
+    runner_module.LLMRunner = Mock(return_value=runner)
+
+    with patch.dict(sys.modules, {"llm_bench_local.llm.runner": runner_module}):
+        result = measure_load("model.safetensors", "safetensors", use_mmap=False)
+
+    args, kwargs = runner_module.LLMRunner.call_args
+    assert args[1].use_mmap is False
+    assert kwargs["weight_format"] == "safetensors"
+    runner.load_model.assert_called_once()
+    assert runner.generate.call_args[0][0].max_new_tokens == 1
+    assert result["first_token_generation_s"] == 0.05
+    assert result["time_to_first_token_s"] >= result["load_s"]
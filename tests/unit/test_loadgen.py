@@ -0,0 +1,192 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from llm_bench_local.scripts.loadgen import (
+    LoadGenerator,
+    RequestResult,
+    TraceRequest,
+    load_trace,
+    run,
+    summarize_results,
+)
+
+
+class FakeApi:
+    """API falsa: jobs concluem após ``delay`` segundos (ou falham)."""
+
+    def __init__(self, delay=0.0, fail_every=0):
+        self.delay = delay
+        self.fail_every = fail_every
+        self.jobs = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.payloads = []
+
+    async def handler(self, request):
+        if request.method == "POST":
+            payload = json.loads(request.content)
+            self.payloads.append(payload)
+            job_id = f"job-{len(self.jobs)}"
+            failed = self.fail_every and len(self.jobs) % self.fail_every == self.fail_every - 1
+            self.jobs[job_id] = (time.perf_counter() + self.delay, failed)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            return httpx.Response(202, json={"job_id": job_id, "status": "PENDING"})
+        job_id = request.url.path.rsplit("/", 1)[-1]
+        done_at, failed = self.jobs[job_id]
+        if time.perf_counter() < done_at:
+            return httpx.Response(200, json={"status": "RUNNING"})
+        self.in_flight -= 1
+        self.jobs[job_id] = (float("inf"), failed)  # já reportado
+        status = "FAILED" if failed else "COMPLETED"
+        return httpx.Response(200, json={"status": status, "results": {"error": "boom"}})
+
+
+def run_load(api, trace, **kwargs):
+    async def _run():
+        transport = httpx.MockTransport(api.handler)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            generator = LoadGenerator(client, engine="simulated", poll_interval=0.001)
+            return await run(generator, trace, **kwargs)
+    return asyncio.run(_run())
+
+
+def test_load_trace_falls_back_to_body(tmp_path):
+    """Testa a leitura do trace, com ``body`` como prompt quando não há ``prompt``."""
+    path = tmp_path / "trace.jsonl"
+    path.write_text(
+        json.dumps({"prompt": "Olá", "timestamp": 1.5, "max_tokens": 8}) + "\n\n"
+        + json.dumps({"request_id": "r1", "title": "T", "body": "Corpo"}) + "\n"
+    )
+    trace = load_trace(str(path))
+    assert trace[0] == TraceRequest("Olá", timestamp=1.5, max_tokens=8)
+    assert trace[1].prompt == "Corpo"
+
+
+def test_closed_loop_limits_concurrency():
+    """Testa que o loop fechado mantém no máximo ``users`` requisições pendentes."""
+    api = FakeApi(delay=0.01)
+    summary = run_load(api, [TraceRequest("a"), TraceRequest("b")], mode="closed", total=9, users=3)
+
+    assert summary["requests"] == 9
+    assert summary["completed"] == 9
+    assert api.max_in_flight <= 3
+    assert summary["latency_s"]["p50"] >= 0.01
+    assert api.payloads[0]["engines"] == ["simulated"]
+
+
+def test_open_loop_constant_rate_and_errors():
+    """Testa chegadas a taxa constante e a contagem de erros."""
+    api = FakeApi(delay=0.05, fail_every=2)
+    summary = run_load(
+        api, [TraceRequest("a")], mode="open", total=4, rate=100.0, arrival="constant"
+    )
+
+    # Chegadas a cada 10 ms não esperam as respostas de 50 ms
+    assert api.max_in_flight > 1
+    assert summary["errors"] == {"failed": 2}
+    assert summary["error_rate"] == 0.5
+
+
+def test_replay_scales_timestamps():
+    """Testa a reprodução dos timestamps com aceleração."""
+    api = FakeApi()
+    trace = [TraceRequest("b", timestamp=10.2), TraceRequest("a", timestamp=10.0)]
+    start = time.perf_counter()
+    summary = run_load(api, trace, mode="replay", speed=4.0)
+
+    assert time.perf_counter() - start >= 0.05
+    assert [payload["prompt"] for payload in api.payloads] == ["a", "b"]
+    assert summary["completed"] == 2
+
+    with pytest.raises(ValueError, match="timestamp"):
+        run_load(api, [TraceRequest("a")], mode="replay")
+
+
+def test_summarize_results():
+    """Testa QPS, percentis e taxa de erro."""
+    results = [RequestResult(0.0, "ok", latency_s=float(i), submit_s=0.01) for i in range(1, 5)]
+    results.append(RequestResult(0.0, "dropped"))
+    summary = summarize_results(results, duration=2.0)
+
+    assert summary["offered_qps"] == 2.5
+    assert summary["achieved_qps"] == 2.0
+    assert summary["error_rate"] == 0.2
+    assert summary["errors"] == {"dropped": 1}
+    assert summary["latency_s"]["p50"] == 2.5
+    assert summary["latency_s"]["max"] == 4.0
+
+
+def test_ttft_uses_server_timestamps():
+    """Testa a espera na fila e o TTFT a partir dos instantes do servidor."""
+    def handler(request):
+        if request.method == "POST":
+            return httpx.Response(202, json={"job_id": "job-0"})
+        results = {
+            "started_at": "2024-01-01T00:00:00.300000",
+            # Trabalho após a geração não entra no TTFT
+            "duration": 5.0,
+            "engines": {
+                "simulated": {"generation_offset_s": 0.2, "time_to_first_token_s": 0.1},
+            },
+        }
+        return httpx.Response(200, json={
+            "status": "COMPLETED", "created_at": "2024-01-01T00:00:00", "results": results,
+        })
+
+    async def _run():
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await LoadGenerator(client).send(TraceRequest("a"))
+
+    result = asyncio.run(_run())
+    assert result.queue_wait_s == pytest.approx(0.3)
+    assert result.ttft_s == pytest.approx(result.submit_s + 0.6)
+    assert summarize_results([result], 1.0)["queue_wait_s"]["p50"] == pytest.approx(0.3)
+
+
+def test_ttft_is_none_without_server_timestamps():
+    """Testa que jobs sem os instantes do servidor não têm TTFT estimado."""
+    def handler(request):
+        if request.method == "POST":
+            return httpx.Response(202, json={"job_id": "job-0"})
+        results = {"duration": 0.5, "time_to_first_token_s": 0.1}
+        return httpx.Response(200, json={"status": "COMPLETED", "results": results})
+
+    async def _run():
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await LoadGenerator(client).send(TraceRequest("a"))
+
+    result = asyncio.run(_run())
+    assert result.status == "ok"
+    assert result.ttft_s is None
+    assert result.queue_wait_s is None
+
+
+def test_bad_poll_responses_are_per_request_errors():
+    """Testa que um 500 sem JSON ou um job sem ``status`` não abortam a execução."""
+    polls = {"job-0": httpx.Response(500, text="Internal Server Error"),
+             "job-1": httpx.Response(200, json={"detail": "?"}),
+             "job-2": httpx.Response(200, text="not json"),
+             "job-3": httpx.Response(200, json={"status": "COMPLETED", "results": {}})}
+    posted = []
+
+    def handler(request):
+        if request.method == "POST":
+            posted.append(f"job-{len(posted)}")
+            return httpx.Response(202, json={"job_id": posted[-1]})
+        return polls[request.url.path.rsplit("/", 1)[-1]]
+
+    async def _run():
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await run(LoadGenerator(client), [TraceRequest("a")], mode="closed", total=4)
+
+    summary = asyncio.run(_run())
+    assert summary["completed"] == 1
+    assert summary["errors"] == {"http_error": 1, "bad_response": 2}
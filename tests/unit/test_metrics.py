@@ -0,0 +1,102 @@
+import json
+import time
+from unittest.mock import Mock
+
+from llm_bench_local.core.metrics import MetricsStore, render, scrape
+
+def test_histogram_with_exemplar(tmp_path):
+    """Testa buckets cumulativos, soma, contagem e exemplares por bucket."""
+    store = MetricsStore(str(tmp_path))
+    labels = {"model_id": "gpt2", "task": "text-generation"}
+    store.observe("llm_bench_latency_seconds", 0.3, labels, {"job_id": "job-1"})
+    store.observe("llm_bench_latency_seconds", 7.0, labels, {"job_id": "job-2"})
+    
+    text = render(store.collect())
+    
+    assert 'llm_bench_latency_seconds_bucket{model_id="gpt2",task="text-generation",le="0.25"} 0' in text
+    assert 'llm_bench_latency_seconds_bucket{model_id="gpt2",task="text-generation",le="0.5"} 1 # {job_id="job-1"} 0.3' in text
+    assert 'llm_bench_latency_seconds_bucket{model_id="gpt2",task="text-generation",le="+Inf"} 2' in text
+    assert 'llm_bench_latency_seconds_count{model_id="gpt2",task="text-generation"} 2' in text
+    assert 'llm_bench_latency_seconds_sum{model_id="gpt2",task="text-generation"} 7.3' in text
+    assert text.endswith("# EOF\n")
+
+def test_collect_merges_processes(tmp_path):
+    """Testa a soma entre processos e a adoção dos arquivos de processos mortos."""
+    store = MetricsStore(str(tmp_path))
+    store.inc("llm_bench_jobs", {"status": "COMPLETED"})
+    store.set_gauge("llm_bench_models_loaded", 1)
+    store.observe("llm_bench_tokens_per_second", 40.0)
+    
+    other = {
+        "pid": 2 ** 22 + 1,  # PID que não existe
+        "histograms": {},
+        "counters": {"llm_bench_jobs": {json.dumps([["status", "COMPLETED"]]): 2.0}},
+        "gauges": {"llm_bench_models_loaded": {"[]": 3}},
+    }
+    (tmp_path / "metrics_999999.json").write_text(json.dumps(other))
+    
+    state = store.collect()
+    
+    assert state["counters"]["llm_bench_jobs"][json.dumps([["status", "COMPLETED"]])] == 3.0
+    assert state["gauges"]["llm_bench_models_loaded"]["[]"] == 1
+    assert sum(state["histograms"]["llm_bench_tokens_per_second"]["[]"]["buckets"]) == 1
+    # O arquivo do processo morto foi incorporado e removido, sem regredir os contadores
+    assert not (tmp_path / "metrics_999999.json").exists()
+    assert list(tmp_path.iterdir()) == [store.path]
+    assert store.collect()["counters"]["llm_bench_jobs"][json.dumps([["status", "COMPLETED"]])] == 3.0
+
+def test_store_resumes_from_own_file(tmp_path):
+    """Testa que o estado gravado pelo processo é recarregado."""
+    first = MetricsStore(str(tmp_path))
+    first.inc("llm_bench_jobs", {"status": "FAILED"})
+    first.flush()
+    store = MetricsStore(str(tmp_path))
+    
+    assert store.collect()["counters"]["llm_bench_jobs"][json.dumps([["status", "FAILED"]])] == 1.0
+
+def test_writes_are_batched(tmp_path):
+    """Testa que várias atualizações geram uma única gravação após o intervalo."""
+    store = MetricsStore(str(tmp_path), persist_interval_s=0.05)
+    writes = []
+    original = store._write
+    store._write = lambda: (writes.append(1), original())
+    for _ in range(100):
+        store.inc("llm_bench_jobs", {"status": "COMPLETED"})
+    # Antes da gravação o próprio processo já vê os valores na coleta
+    assert store.collect()["counters"]["llm_bench_jobs"][json.dumps([["status", "COMPLETED"]])] == 100.0
+    assert writes == []
+    time.sleep(0.3)
+    assert writes == [1]
+    assert json.loads(store.path.read_text())["counters"]["llm_bench_jobs"]
+
+def test_metrics_dir_is_isolated(isolated_metrics_dir):
+    """Testa que os testes não gravam métricas no diretório de cache do repositório."""
+    from llm_bench_local.core.metrics import get_metrics_store
+
+    assert get_metrics_store().directory == isolated_metrics_dir
+
+def test_text_format_without_exemplars(tmp_path):
+    """Testa o formato texto 0.0.4 para clientes sem suporte a OpenMetrics."""
+    store = MetricsStore(str(tmp_path))
+    store.inc("llm_bench_jobs", {"status": "COMPLETED"})
+    store.observe("llm_bench_latency_seconds", 1.0, exemplar={"job_id": "x"})
+    
+    text = render(store.collect(), openmetrics=False)
+    
+    assert "# TYPE llm_bench_jobs_total counter" in text
+    assert 'llm_bench_jobs_total{status="COMPLETED"} 1.0' in text
+    assert "job_id" not in text
+    assert "# EOF" not in text
+
+def test_scrape_adds_live_gauges(tmp_path, monkeypatch):
+    """Testa que o scrape inclui a fila (do banco) e as leituras de hardware."""
+    monkeypatch.setattr("llm_bench_local.core.metrics._store", MetricsStore(str(tmp_path)))
+    repository = Mock()
+    repository.count_by_status.side_effect = lambda status: {"PENDING": 4, "RUNNING": 1}[status]
+    
+    text = scrape(repository)
+    
+    assert "llm_bench_queue_depth 4.0" in text
+    assert "llm_bench_jobs_running 1.0" in text
+    assert "llm_bench_models_loaded" in text
+    assert "llm_bench_cpu_usage_percent" in text
@@ -1,8 +1,20 @@
+import copy
+import threading
+import time
+
 import pytest
 from unittest.mock import Mock, patch
 import torch
 
-from llm_bench_local.core.model import ModelRunner
+from llm_bench_local.core.model import ModelRunner, plan_batches
+from llm_bench_local.core.pool import model_pool
+
+@pytest.fixture(autouse=True)
+def clear_model_pool():
+    """Garante que cada teste comece com o pool de modelos vazio."""
+    model_pool.clear()
+    yield
+    model_pool.clear()
 
 @pytest.fixture
 def mock_settings():
@@ -21,8 +33,8 @@ def mock_settings():
 @pytest.fixture
 def mock_transformers():
     """Fixture para os módulos do transformers mockados."""
-    with patch("llm_bench_local.core.model.AutoModelForCausalLM") as mock_model, \
-         patch("llm_bench_local.core.model.AutoTokenizer") as mock_tokenizer:
+    with patch("llm_bench_local.core.model.transformers.AutoModelForCausalLM") as mock_model, \
+         patch("llm_bench_local.core.model.transformers.AutoTokenizer") as mock_tokenizer:
         
         # Mock para o modelo
         model_instance = Mock()
@@ -125,4 +137,154 @@ def test_model_not_found(mock_settings):
     mock_settings.get_model_config.return_value = None
     
     with pytest.raises(ValueError, match="Modelo gpt2 não encontrado na configuração"):
-        ModelRunner("gpt2") 
\ No newline at end of file
+        ModelRunner("gpt2") 
+
+def test_model_reused_from_pool(mock_settings, mock_transformers, mock_torch):
+    """Testa que runners distintos compartilham os pesos carregados."""
+    mock_model, mock_tokenizer = mock_transformers
+
+    first = ModelRunner("gpt2")
+    first._load_model()
+    second = ModelRunner("gpt2")
+    second._load_model()
+
+    mock_model.from_pretrained.assert_called_once()
+    assert second.model is first.model
+    assert second.tokenizer is first.tokenizer
+
+def test_generate_with_timer_uses_streamer(mock_settings, mock_transformers, mock_torch):
+    """Testa que a geração com timer passa um streamer ao modelo."""
+    from llm_bench_local.core.timing import TokenTimer, TokenTimingStreamer
+
+    mock_model, _ = mock_transformers
+    timer = TokenTimer()
+    runner = ModelRunner("gpt2")
+
+    runner.generate(prompt="Hello", max_tokens=5, timer=timer)
+
+    kwargs = mock_model.from_pretrained.return_value.generate.call_args.kwargs
+    assert isinstance(kwargs["streamer"], TokenTimingStreamer)
+    assert timer.start_time is not None
+    assert timer.end_time is not None
+
+def test_complete_counts_only_new_tokens(mock_settings, mock_transformers, mock_torch):
+    """Testa que apenas os tokens novos são decodificados e contados."""
+    mock_model, mock_tokenizer = mock_transformers
+    tokenizer = mock_tokenizer.from_pretrained.return_value
+    tokenizer.return_value = {"input_ids": [[10, 11]]}
+    mock_model.from_pretrained.return_value.generate.return_value = [[10, 11, 1, 2, 3]]
+
+    runner = ModelRunner("gpt2")
+    result = runner.complete(prompt="Hello", max_tokens=5)
+
+    assert result.prompt_tokens == 2
+    assert result.completion_tokens == 3
+    assert result.text == "Generated text"
+    tokenizer.decode.assert_called_once_with([1, 2, 3], skip_special_tokens=True)
+
+def test_plan_batches_respects_size_and_token_budget():
+    """Testa o agrupamento de prompts por tamanho de lote e orçamento."""
+    assert plan_batches([3, 3, 3, 3, 3], 5, max_batch_size=2) == [[0, 1], [2, 3], [4]]
+    # Custo (n * (maior + 5)): [0,1] = 2*10 = 20; adicionar o terceiro = 3*15 = 45
+    assert plan_batches([5, 5, 10], 5, max_batch_size=8, max_batch_tokens=30) == [
+        [0, 1], [2]
+    ]
+    # Prompt que sozinho excede o orçamento forma seu próprio lote
+    assert plan_batches([100, 1], 5, max_batch_size=8, max_batch_tokens=20) == [[0], [1]]
+
+
+def test_generate_batch_left_pads_and_counts_tokens(mock_settings, mock_transformers, mock_torch):
+    """Testa a geração em lote com contagem por sequência."""
+    mock_settings.MAX_BATCH_SIZE = 8
+    mock_settings.MAX_BATCH_TOKENS = 8192
+    mock_model, mock_tokenizer = mock_transformers
+    tokenizer = mock_tokenizer.from_pretrained.return_value
+    tokenizer.padding_side = "right"
+    tokenizer.pad_token = None
+    tokenizer.eos_token = "</s>"
+    tokenizer.eos_token_id = 0
+    tokenizer.pad_token_id = 0
+
+    def encode(prompts, return_tensors=None, padding=False):
+        if not padding:
+            return {"input_ids": [[1] * len(p.split()) for p in prompts]}
+        return {
+            "input_ids": [[0, 7, 8], [7, 8, 9]],
+            "attention_mask": [[0, 1, 1], [1, 1, 1]],
+        }
+
+    tokenizer.side_effect = encode
+    mock_model.from_pretrained.return_value.generate.return_value = [
+        [0, 7, 8, 4, 5, 0, 0],
+        [7, 8, 9, 4, 5, 6, 2],
+    ]
+
+    runner = ModelRunner("gpt2")
+    results = runner.generate_batch(["a b", "a b c"], max_tokens=4)
+
+    assert [r.prompt_tokens for r in results] == [2, 3]
+    assert [r.completion_tokens for r in results] == [3, 4]
+    assert all(r.duration is not None for r in results)
+    generate = mock_model.from_pretrained.return_value.generate
+    generate.assert_called_once()
+    assert generate.call_args.kwargs["pad_token_id"] == 0
+    # O tokenizer do pool é compartilhado e não pode ser alterado
+    assert tokenizer.padding_side == "right"
+    assert tokenizer.pad_token is None
+
+
+def test_padding_tokenizer_is_a_left_padded_copy(mock_settings, mock_transformers, mock_torch):
+    """Testa que o lote usa uma cópia do tokenizer com left padding."""
+    _, mock_tokenizer = mock_transformers
+    tokenizer = mock_tokenizer.from_pretrained.return_value
+    tokenizer.padding_side = "right"
+    tokenizer.pad_token = None
+    tokenizer.eos_token = "</s>"
+
+    runner = ModelRunner("gpt2")
+    runner._load_model()
+    padded = runner._padding_tokenizer()
+
+    assert padded is not runner.tokenizer
+    assert padded.padding_side == "left"
+    assert padded.pad_token == "</s>"
+    assert runner.tokenizer.padding_side == "right"
+    assert runner.tokenizer.pad_token is None
+
+
+def test_padding_tokenizer_is_copied_once_per_pooled_tokenizer(
+    mock_settings, mock_transformers, mock_torch
+):
+    """Testa que runners do mesmo modelo do pool reutilizam a cópia com left padding."""
+    first = ModelRunner("gpt2")
+    first._load_model()
+    second = ModelRunner("gpt2")
+    second._load_model()
+    assert second.tokenizer is first.tokenizer
+
+    with patch("llm_bench_local.core.model.copy.deepcopy", wraps=copy.deepcopy) as deepcopy:
+        padded = first._padding_tokenizer()
+        assert second._padding_tokenizer() is padded
+        assert first._padding_tokenizer() is padded
+    assert deepcopy.call_count == 1
+
+
+def test_concurrent_runners_load_weights_once(mock_settings, mock_transformers, mock_torch):
+    """Testa que runners simultâneos do mesmo modelo chamam ``from_pretrained`` uma vez."""
+    mock_model, _ = mock_transformers
+    sizing = threading.Event()
+
+    def slow_footprint():
+        # Janela entre a carga e a entrada no pool
+        sizing.set()
+        time.sleep(0.1)
+        return 1
+
+    mock_model.from_pretrained.return_value.get_memory_footprint.side_effect = slow_footprint
+    first = threading.Thread(target=ModelRunner("gpt2")._load_model)
+    first.start()
+    assert sizing.wait(5.0)
+    ModelRunner("gpt2")._load_model()
+    first.join()
+
+    assert mock_model.from_pretrained.call_count == 1
@@ -1,10 +1,13 @@
 import pytest
 from unittest.mock import Mock, patch
 import json
+import threading
 from datetime import datetime
 
-from llm_bench_local.persistence.crud import BenchmarkRepository
-from llm_bench_local.persistence.database import DatabaseConnection
+from sqlalchemy import text
+
+from llm_bench_local.persistence.crud import BenchmarkRepository, WriteBehindWriter
+from llm_bench_local.persistence.database import ConnectionPool, Database, DatabaseConnection, get_pool
 
 @pytest.fixture
 def mock_db():
@@ -102,21 +105,14 @@ def test_list_benchmarks(repository, mock_db):
             "created_at": datetime.now().isoformat(),
             "updated_at": datetime.now().isoformat()
         },
-        {
-            "job_id": "test-job-2",
-            "model_id": "gpt2",
-            "task": "text-generation",
-            "status": "PENDING",
-            "config": json.dumps({"max_tokens": 100}),
-            "hardware_options": json.dumps({"use_gpu": True}),
-            "results": None,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
-        }
     ]
     
     benchmarks = repository.list_benchmarks(limit=10, offset=0, status="COMPLETED")
     
+    # O filtro por status é feito na consulta
+    query, params = mock_db.execute_query.call_args[0]
+    assert "status = ?" in query
+    assert params == ["COMPLETED", 10]
     assert len(benchmarks) == 1
     assert benchmarks[0]["job_id"] == "test-job-1"
     assert benchmarks[0]["status"] == "COMPLETED"
@@ -167,4 +163,193 @@ def test_get_hardware_metrics(repository, mock_db):
     assert metrics[0]["cpu_usage_percent"] == 50.0
     assert metrics[0]["ram_usage_gb"] == 4.0
     assert metrics[0]["gpu_usage_percent"] == 80.0
-    assert metrics[0]["vram_usage_gb"] == 2.0 
\ No newline at end of file
+    assert metrics[0]["vram_usage_gb"] == 2.0 
+
+def test_pool_reuses_connection_per_thread(tmp_path):
+    """Testa que cada thread reutiliza sua conexão, configurada com WAL."""
+    pool = ConnectionPool(str(tmp_path / "pool.db"), busy_timeout_ms=2500)
+    conn = pool.connection()
+    
+    assert pool.connection() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 2500
+    
+    other = []
+    thread = threading.Thread(target=lambda: other.append(pool.connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+    pool.close_all()
+
+def test_pool_transaction_rolls_back(tmp_path):
+    """Testa que uma exceção desfaz todos os comandos da transação."""
+    db = DatabaseConnection(str(tmp_path / "tx.db"))
+    db.execute_query("CREATE TABLE items (value INTEGER)")
+    
+    with pytest.raises(RuntimeError):
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO items VALUES (1)")
+            raise RuntimeError("falha")
+    with db.transaction() as conn:
+        conn.execute("INSERT INTO items VALUES (2)")
+        with db.transaction() as inner:
+            inner.execute("INSERT INTO items VALUES (3)")
+    
+    rows = db.execute_query("SELECT value FROM items ORDER BY value")
+    assert [row["value"] for row in rows] == [2, 3]
+
+def test_concurrent_writers_do_not_lock(tmp_path):
+    """Testa que escritas concorrentes aguardam o lock em vez de falhar."""
+    db_path = str(tmp_path / "concurrent.db")
+    repository = BenchmarkRepository(db_path)
+    errors = []
+    
+    def write(worker):
+        try:
+            for i in range(25):
+                repository.create_benchmark(f"{worker}-{i}", "gpt2", "text-generation", {}, {})
+                repository.save_hardware_metrics(f"{worker}-{i}", {"cpu_usage_percent": 1.0})
+        except Exception as exc:
+            errors.append(exc)
+    
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+    assert repository.count_by_status("PENDING") == 100
+
+def test_sqlalchemy_shares_pool_configuration(tmp_path):
+    """Testa que o Database (SQLAlchemy) usa conexões do mesmo pool."""
+    db_path = str(tmp_path / "orm.db")
+    database = Database(db_path)
+    
+    with database.engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == get_pool(db_path).busy_timeout_ms
+
+
+def test_list_benchmarks_keyset_pagination(tmp_path):
+    """Testa a paginação por cursor e a listagem resumida."""
+    repository = BenchmarkRepository(str(tmp_path / "list.db"))
+    for i in range(5):
+        repository.create_benchmark(f"job-{i}", "gpt2", "text-generation", {}, {})
+        repository.update_benchmark_status(
+            f"job-{i}", "COMPLETED", {"duration": float(i), "output": "x" * 1000}
+        )
+    
+    first = repository.list_benchmarks(limit=2)
+    cursor = repository.next_cursor(first, 2)
+    second = repository.list_benchmarks(limit=2, cursor=cursor)
+    third = repository.list_benchmarks(limit=2, cursor=repository.next_cursor(second, 2))
+    
+    assert [b["job_id"] for b in first + second + third] == [f"job-{i}" for i in range(4, -1, -1)]
+    assert repository.next_cursor(third, 2) is None
+    
+    summary = repository.list_benchmarks(limit=1, summary=True)[0]
+    assert "results" not in summary and "config" not in summary
+    assert summary["metrics"]["duration"] == 4.0
+    
+    with pytest.raises(ValueError):
+        repository.list_benchmarks(cursor="not-a-cursor")
+
+def test_list_benchmarks_uses_indexes(tmp_path):
+    """Testa que as consultas de listagem usam os índices compostos."""
+    repository = BenchmarkRepository(str(tmp_path / "plan.db"))
+    
+    def plan(query, params):
+        rows = repository.db.execute_query(f"EXPLAIN QUERY PLAN {query}", params)
+        return " ".join(row["detail"] for row in rows)
+    
+    by_status = plan(
+        "SELECT * FROM benchmarks WHERE status = ? AND (created_at, job_id) < (?, ?) "
+        "ORDER BY created_at DESC, job_id DESC LIMIT 10",
+        ["COMPLETED", "2024", "x"],
+    )
+    by_parent = plan(
+        "SELECT * FROM benchmarks WHERE parent_id = ? AND (created_at, job_id) < (?, ?) "
+        "ORDER BY created_at DESC, job_id DESC LIMIT 10",
+        ["sweep", "2024", "x"],
+    )
+    by_job = plan(
+        "SELECT * FROM hardware_metrics WHERE job_id = ? ORDER BY timestamp", ["x"]
+    )
+    
+    assert "idx_benchmarks_status_created" in by_status
+    assert "TEMP B-TREE" not in by_status
+    assert "idx_benchmarks_parent" in by_parent
+    assert "TEMP B-TREE" not in by_parent
+    assert "idx_hardware_metrics_job_timestamp" in by_job
+
+
+def test_write_behind_batches_writes(tmp_path):
+    """Testa que o writer agrupa escritas em poucos commits e as grava em ordem."""
+    db = DatabaseConnection(str(tmp_path / "writer.db"))
+    db.execute_query("CREATE TABLE items (value INTEGER)")
+    db.execute_query("CREATE TABLE events (name TEXT)")
+    writer = WriteBehindWriter(db, flush_interval_ms=50, max_batch_rows=100)
+    
+    for i in range(250):
+        writer.submit("INSERT INTO items VALUES (?)", [i])
+    writer.submit("INSERT INTO events VALUES (?)", ["done"])
+    assert writer.flush(timeout=5)
+    
+    rows = db.execute_query("SELECT value FROM items ORDER BY rowid")
+    assert [row["value"] for row in rows] == list(range(250))
+    stats = writer.stats()
+    assert stats["rows_written"] == 251
+    assert stats["batches"] <= 4
+    assert stats["queue_depth"] == 0
+    assert stats["commit_latency_p95_ms"] is not None
+    writer.stop(timeout=5)
+
+def test_write_behind_survives_failed_batch(tmp_path):
+    """Testa que só a escrita inválida de um lote se perde e que o flush reporta a falha."""
+    db = DatabaseConnection(str(tmp_path / "writer_error.db"))
+    db.execute_query("CREATE TABLE items (value INTEGER)")
+    writer = WriteBehindWriter(db, flush_interval_ms=1000)
+    
+    writer.submit("INSERT INTO items VALUES (?)", [1])
+    writer.submit("INSERT INTO missing VALUES (?)", [2])
+    writer.submit("INSERT INTO items VALUES (?)", [3])
+    assert writer.flush(timeout=5) is False
+    writer.submit("INSERT INTO items VALUES (?)", [4])
+    assert writer.flush(timeout=5) is True
+    writer.stop(timeout=5)
+    
+    assert writer.errors == 1
+    assert "missing" in writer.last_error
+    rows = db.execute_query("SELECT value FROM items ORDER BY rowid")
+    assert [row["value"] for row in rows] == [1, 3, 4]
+    assert writer.stats()["rows_written"] == 3
+
+def test_write_behind_stop_timeout_keeps_thread(tmp_path):
+    """Testa que ``stop`` só esquece a thread depois que ela termina."""
+    db = DatabaseConnection(str(tmp_path / "writer_stop.db"))
+    writer = WriteBehindWriter(db)
+    release = threading.Event()
+    writer._commit = lambda batch: release.wait(5)
+    writer.submit("SELECT 1", [])
+    
+    writer.stop(timeout=0.05)
+    assert writer._thread is not None and writer._thread.is_alive()
+    release.set()
+    writer._thread.join(5)
+    writer.stop(timeout=5)
+    assert writer._thread is None
+
+def test_repository_write_behind(tmp_path):
+    """Testa que o repositório grava em segundo plano e confirma no flush."""
+    repository = BenchmarkRepository(str(tmp_path / "wb.db"), write_behind=True)
+    repository.create_benchmark("job", "gpt2", "text-generation", {}, {})
+    for _ in range(10):
+        repository.save_hardware_metrics("job", {"cpu_usage_percent": 1.0})
+    repository.update_benchmark_status("job", "COMPLETED", {"ok": True})
+    repository.flush(timeout=5)
+    
+    assert repository.get_benchmark("job")["status"] == "COMPLETED"
+    assert len(repository.get_hardware_metrics("job")) == 10
+    assert repository.writer_stats()["rows_written"] >= 12
@@ -0,0 +1,144 @@
+import threading
+import time
+
+import pytest
+
+from llm_bench_local.core.pool import ModelPool, estimate_size
+
+
+class FakeModel:
+    def __init__(self, size):
+        self.size = size
+
+    def get_memory_footprint(self):
+        return self.size
+
+
+def test_get_or_load_caches_value():
+    """Testa que o loader é chamado apenas uma vez por chave."""
+    pool = ModelPool(max_cpu_bytes=1000)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return FakeModel(10)
+
+    key = ("gpt2", "cpu", "float32")
+    first = pool.get_or_load(key, loader)
+    second = pool.get_or_load(key, loader)
+
+    assert first is second
+    assert len(calls) == 1
+    assert pool.stats()["hits"] == 1
+    assert pool.stats()["misses"] == 1
+
+
+def test_keys_are_distinct_per_device_and_dtype():
+    """Testa que device e dtype fazem parte da chave."""
+    pool = ModelPool(max_cpu_bytes=1000, max_gpu_bytes=1000)
+    cpu = pool.get_or_load(("gpt2", "cpu", "float32"), lambda: FakeModel(1))
+    gpu = pool.get_or_load(("gpt2", "cuda", "float16"), lambda: FakeModel(1))
+
+    assert cpu is not gpu
+    assert pool.stats()["models_loaded"] == 2
+
+
+def test_lru_eviction_respects_budget():
+    """Testa a remoção LRU quando o orçamento é excedido."""
+    pool = ModelPool(max_cpu_bytes=100)
+    pool.get_or_load(("a", "cpu", "float32"), lambda: FakeModel(40))
+    pool.get_or_load(("b", "cpu", "float32"), lambda: FakeModel(40))
+    # Usa "a" para que "b" seja o menos recente
+    pool.get_or_load(("a", "cpu", "float32"), lambda: FakeModel(40))
+    pool.get_or_load(("c", "cpu", "float32"), lambda: FakeModel(40))
+
+    assert pool.contains(("a", "cpu", "float32"))
+    assert not pool.contains(("b", "cpu", "float32"))
+    assert pool.contains(("c", "cpu", "float32"))
+    assert pool.stats()["evictions"] == 1
+
+
+def test_gpu_budget_does_not_evict_cpu_models():
+    """Testa que cada tipo de dispositivo tem seu próprio orçamento."""
+    pool = ModelPool(max_cpu_bytes=100, max_gpu_bytes=50)
+    pool.get_or_load(("a", "cpu", "float32"), lambda: FakeModel(90))
+    pool.get_or_load(("b", "cuda", "float16"), lambda: FakeModel(40))
+    pool.get_or_load(("c", "cuda", "float16"), lambda: FakeModel(40))
+
+    assert pool.contains(("a", "cpu", "float32"))
+    assert not pool.contains(("b", "cuda", "float16"))
+    assert pool.contains(("c", "cuda", "float16"))
+
+
+def test_concurrent_loads_share_single_load():
+    """Testa que carregamentos simultâneos da mesma chave não duplicam pesos."""
+    pool = ModelPool(max_cpu_bytes=1000)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return FakeModel(1)
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                pool.get_or_load(("gpt2", "cpu", "float32"), loader)
+            )
+        )
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+
+
+def test_load_lock_held_until_entry_is_cached():
+    """Testa que quem chega durante a estimativa de tamanho não recarrega os pesos."""
+    pool = ModelPool(max_cpu_bytes=1000)
+    key = ("gpt2", "cpu", "float32")
+    calls = []
+    sizing = threading.Event()
+
+    def loader():
+        calls.append(1)
+        return FakeModel(1)
+
+    def slow_size(value):
+        sizing.set()
+        time.sleep(0.1)
+        return value.size
+
+    first = threading.Thread(target=lambda: pool.get_or_load(key, loader, slow_size))
+    first.start()
+    assert sizing.wait(5.0)
+    second = pool.get_or_load(key, loader, slow_size)
+    first.join()
+
+    assert len(calls) == 1
+    assert second is pool.get_or_load(key, loader)
+
+
+def test_failed_load_is_not_cached():
+    """Testa que falhas de carregamento não deixam entradas no pool."""
+    pool = ModelPool(max_cpu_bytes=1000)
+
+    def failing():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        pool.get_or_load(("gpt2", "cpu", "float32"), failing)
+
+    assert not pool.contains(("gpt2", "cpu", "float32"))
+    value = pool.get_or_load(("gpt2", "cpu", "float32"), lambda: FakeModel(1))
+    assert value.size == 1
+
+
+def test_estimate_size_sums_tuple_members():
+    """Testa a estimativa de tamanho para (modelo, tokenizer)."""
+    assert estimate_size((FakeModel(30), object())) == 30
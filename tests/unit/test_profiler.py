@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from llm_bench_local.core.profiler import SamplingProfiler
+
+
+def busy_wait(seconds):
+    """Carga de CPU reconhecível nas pilhas amostradas."""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_profiler_samples_current_thread(tmp_path):
+    """Testa a amostragem da thread atual e o formato collapsed stack."""
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    busy_wait(0.1)
+    profiler.stop()
+
+    assert profiler.samples > 0
+    assert any("busy_wait (test_profiler.py:" in stack for stack in profiler.stacks)
+
+    path = tmp_path / "profiles" / "job.folded"
+    profiler.write(str(path))
+    lines = path.read_text().splitlines()
+    assert len(lines) == len(profiler.stacks)
+    total = 0
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        total += int(count)
+    assert total == profiler.samples
+
+
+def test_profiler_samples_other_thread():
+    """Testa a amostragem de uma thread que não é a que iniciou o profiler."""
+    worker = threading.Thread(target=busy_wait, args=(0.1,))
+    worker.start()
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start(thread_id=worker.ident)
+    worker.join()
+    profiler.stop()
+
+    assert any(stack.endswith(")") and "busy_wait" in stack for stack in profiler.stacks)
+    assert not any("test_profiler_samples_other_thread" in stack for stack in profiler.stacks)
+
+
+def test_profiler_samples_all_threads():
+    """Testa a amostragem de todas as threads, rotuladas pelo nome."""
+    worker = threading.Thread(target=busy_wait, args=(0.1,), name="scheduler-test")
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start(all_threads=True)
+    worker.start()
+    worker.join()
+    profiler.stop()
+
+    assert any(
+        stack.startswith("thread:scheduler-test;") and "busy_wait" in stack
+        for stack in profiler.stacks
+    )
+    assert any(stack.startswith("thread:MainThread;") for stack in profiler.stacks)
+    assert not any(stack.startswith("thread:sampling-profiler;") for stack in profiler.stacks)
+
+
+def test_profiler_reports_overhead():
+    """Testa o resumo com o custo da própria amostragem."""
+    profiler = SamplingProfiler(interval=0.002)
+    profiler.start()
+    busy_wait(0.05)
+    profiler.stop()
+
+    stats = profiler.stats()
+    assert stats["samples"] == profiler.samples
+    assert stats["interval_s"] == 0.002
+    assert stats["duration_s"] >= 0.05
+    assert stats["unique_stacks"] >= 1
+    assert stats["sampler_cpu_s"] >= 0
+    assert 0 <= stats["overhead_percent"] < 100
+    assert stats["mean_sample_us"] > 0
+    assert stats["max_sample_us"] >= stats["mean_sample_us"]
+
+
+def test_profiler_rejects_invalid_interval():
+    """Testa a validação do intervalo de amostragem."""
+    with pytest.raises(ValueError):
+        SamplingProfiler(interval=0)
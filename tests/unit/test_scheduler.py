@@ -0,0 +1,162 @@
+import threading
+from dataclasses import dataclass
+from unittest.mock import patch
+
+import pytest
+
+from llm_bench_local.core import scheduler as scheduler_module
+from llm_bench_local.core.scheduler import ContinuousBatchScheduler, get_scheduler
+
+
+@dataclass
+class FakeState:
+    prompt_tokens: int
+    next_token: int
+
+
+class FakeEngine:
+    """Motor determinístico: gera tokens 1, 2, 3... e nunca emite EOS."""
+
+    eos_token_id = 0
+
+    def __init__(self, step_gate=None):
+        self.batch_sizes = []
+        self.step_gate = step_gate
+
+    def prefill(self, prompt, temperature, top_p):
+        return FakeState(prompt_tokens=len(prompt.split()), next_token=1)
+
+    def decode_step(self, states):
+        if self.step_gate is not None:
+            self.step_gate.wait()
+        self.batch_sizes.append(len(states))
+        for state in states:
+            state.next_token += 1
+        return [state.next_token for state in states]
+
+    def decode_tokens(self, ids):
+        return " ".join(str(i) for i in ids)
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def factory(engine, **kwargs):
+        scheduler = ContinuousBatchScheduler(engine, **kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield factory
+    for scheduler in schedulers:
+        scheduler.stop(timeout=1.0)
+
+
+def test_single_request_result(make_scheduler):
+    """Testa uma requisição isolada e suas métricas."""
+    scheduler = make_scheduler(FakeEngine(), max_batch_size=4)
+
+    result = scheduler.submit("a b c", max_tokens=3).result(timeout=5)
+
+    assert result.text == "1 2 3"
+    assert result.prompt_tokens == 3
+    assert result.completion_tokens == 3
+    assert result.queue_wait_s >= 0
+    assert result.latency_s >= result.service_time_s
+    assert result.timing["time_to_first_token_s"] is not None
+
+
+def test_concurrent_requests_share_decode_steps(make_scheduler):
+    """Testa que requisições concorrentes entram no mesmo lote."""
+    gate = threading.Event()
+    engine = FakeEngine(step_gate=gate)
+    scheduler = make_scheduler(engine, max_batch_size=4)
+
+    futures = [scheduler.submit("p", max_tokens=5) for _ in range(3)]
+    gate.set()
+    results = [f.result(timeout=5) for f in futures]
+
+    assert max(engine.batch_sizes) == 3
+    assert all(r.completion_tokens == 5 for r in results)
+    assert all(r.mean_batch_size > 1 for r in results)
+
+
+def test_finished_sequences_free_slots_for_queued_requests(make_scheduler):
+    """Testa que uma vaga liberada é ocupada pela próxima requisição da fila."""
+    engine = FakeEngine()
+    scheduler = make_scheduler(engine, max_batch_size=1)
+
+    first = scheduler.submit("p", max_tokens=20)
+    second = scheduler.submit("p", max_tokens=2)
+    first_result = first.result(timeout=5)
+    second_result = second.result(timeout=5)
+
+    assert max(engine.batch_sizes) == 1
+    # A segunda requisição esperou a primeira terminar
+    assert second_result.queue_wait_s >= first_result.service_time_s * 0.5
+    assert second_result.latency_s > second_result.service_time_s
+
+
+def test_eos_finishes_sequence(make_scheduler):
+    """Testa que o EOS encerra a sequência antes de max_tokens."""
+    engine = FakeEngine()
+    engine.eos_token_id = 3
+    scheduler = make_scheduler(engine, max_batch_size=2)
+
+    result = scheduler.submit("p", max_tokens=50).result(timeout=5)
+
+    assert result.completion_tokens == 3
+
+
+def test_engine_errors_fail_active_requests(make_scheduler):
+    """Testa a propagação de erros do motor para as requisições."""
+
+    class FailingEngine(FakeEngine):
+        def decode_step(self, states):
+            raise RuntimeError("boom")
+
+    scheduler = make_scheduler(FailingEngine(), max_batch_size=2)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        scheduler.submit("p", max_tokens=5).result(timeout=5)
+
+
+def test_get_scheduler_loads_outside_global_lock():
+    """Testa que a carga de um modelo não bloqueia os demais nem carrega em dobro."""
+    gpt2_loading = threading.Event()
+    release = threading.Event()
+    loads = []
+
+    class FakeRunner:
+        def __init__(self, model_id):
+            self.model_id = model_id
+            self.model_config = {"max_tokens": 8}
+
+        def load(self, use_gpu=True):
+            loads.append(self.model_id)
+            if self.model_id == "gpt2":
+                gpt2_loading.set()
+                assert release.wait(5.0)
+
+    with patch.object(scheduler_module, "ModelRunner", FakeRunner), \
+            patch.dict(scheduler_module._schedulers, clear=True):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(get_scheduler("gpt2", False)))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        assert gpt2_loading.wait(5.0)
+
+        # Outro modelo carrega enquanto gpt2 ainda está carregando
+        other = get_scheduler("distilgpt2", False)
+        assert other.default_max_tokens == 8
+
+        release.set()
+        for thread in threads:
+            thread.join(5.0)
+
+        assert len(results) == 2 and results[0] is results[1]
+        assert loads.count("gpt2") == 1
+        assert scheduler_module._loading == {}
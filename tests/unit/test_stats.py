@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from llm_bench_local.core.stats import (
+    bootstrap_ci,
+    relative_ci_width,
+    summarize,
+    t_interval,
+    t_quantile,
+)
+
+
+def test_summarize_distribution():
+    """Testa as estatísticas de uma série de tentativas."""
+    summary = summarize([1.0, 2.0, 3.0, 4.0, 5.0])
+
+    assert summary["n"] == 5
+    assert summary["mean"] == 3.0
+    assert summary["median"] == 3.0
+    assert summary["p90"] == pytest.approx(4.6)
+    assert summary["min"] == 1.0 and summary["max"] == 5.0
+    assert summary["stddev"] == pytest.approx(1.5811, rel=1e-3)
+    assert summary["cv"] == pytest.approx(summary["stddev"] / 3.0)
+    assert summary["ci_low"] <= summary["mean"] <= summary["ci_high"]
+    assert 1.0 <= summary["ci_low"] and summary["ci_high"] <= 5.0
+
+
+def test_summarize_ignores_missing_values():
+    """Testa que métricas ausentes em uma tentativa são ignoradas."""
+    summary = summarize([None, 2.0])
+    assert summary["n"] == 1
+    assert summary["stddev"] == 0.0
+    assert summary["ci_low"] == summary["ci_high"] == 2.0
+    assert summarize([None])["mean"] is None
+
+
+def test_bootstrap_ci_is_reproducible():
+    """Testa que a mesma semente gera o mesmo intervalo."""
+    values = [0.9, 1.1, 1.0, 1.3, 0.8, 1.2]
+    assert bootstrap_ci(values, seed=1) == bootstrap_ci(values, seed=1)
+    narrow = bootstrap_ci(values, confidence=0.5)
+    wide = bootstrap_ci(values, confidence=0.99)
+    assert wide[0] <= narrow[0] and narrow[1] <= wide[1]
+
+
+def test_relative_ci_width():
+    """Testa a largura relativa do intervalo de confiança."""
+    assert relative_ci_width({"mean": 2.0, "ci_low": 1.9, "ci_high": 2.1}) == pytest.approx(0.1)
+    assert relative_ci_width(summarize([])) is None
+    assert relative_ci_width(summarize([1.0, 1.0, 1.0])) == 0.0
+
+
+def test_t_quantile_matches_table():
+    """Testa os quantis da t de Student contra valores tabelados."""
+    assert t_quantile(0.975, 1) == pytest.approx(12.706, abs=1e-3)
+    assert t_quantile(0.975, 2) == pytest.approx(4.303, abs=1e-3)
+    assert t_quantile(0.975, 14) == pytest.approx(2.145, abs=1e-3)
+    assert t_quantile(0.995, 29) == pytest.approx(2.756, abs=1e-3)
+    assert t_quantile(0.025, 2) == pytest.approx(-4.303, abs=1e-3)
+
+
+def test_summarize_uses_t_interval_for_few_samples():
+    """Testa o intervalo de Student com poucas amostras e o bootstrap com muitas."""
+    summary = summarize([1.0, 1.05, 1.1])
+    assert summary["ci_method"] == "t"
+    assert (summary["ci_low"], summary["ci_high"]) == pytest.approx(t_interval([1.0, 1.05, 1.1]))
+    assert relative_ci_width(summary) == pytest.approx(0.237, abs=1e-3)
+
+    many = summarize([1.0 + 0.01 * i for i in range(40)])
+    assert many["ci_method"] == "bootstrap"
+    assert summarize([1.0, 2.0], min_bootstrap_samples=2)["ci_method"] == "bootstrap"
+
+
+def test_precision_rule_rarely_stops_at_three_trials():
+    """Testa que, com CV real de 10% e alvo de 0.1, a parada com 3 tentativas é rara."""
+    rng = random.Random(0)
+    stops = 0
+    for _ in range(2000):
+        width = relative_ci_width(summarize([rng.gauss(1.0, 0.1) for _ in range(3)]))
+        stops += width <= 0.1
+    # Com o bootstrap por percentis, ~26% das execuções paravam aqui
+    assert stops / 2000 < 0.08
@@ -0,0 +1,156 @@
+from unittest.mock import patch
+
+import pytest
+
+from llm_bench_local.core.model import GenerationResult
+from llm_bench_local.core.sweep import Sweep, get_sweep, plan_cells
+from llm_bench_local.persistence.crud import BenchmarkRepository
+
+
+@pytest.fixture
+def repository(tmp_path):
+    return BenchmarkRepository(str(tmp_path / "sweep.db"))
+
+
+@pytest.fixture
+def model_runner():
+    """ModelRunner mockado, compartilhado entre as células."""
+    with patch("llm_bench_local.core.sweep.ModelRunner") as sweep_runner, \
+            patch("llm_bench_local.core.benchmark.ModelRunner"), \
+            patch("llm_bench_local.core.benchmark.HardwareMonitor") as monitor:
+        monitor.return_value.stop_monitoring.return_value = {"cpu_usage_percent": 10.0}
+        instance = sweep_runner.return_value
+        instance.complete.return_value = GenerationResult(
+            text="ok", prompt_tokens=3, completion_tokens=2
+        )
+        yield instance
+
+
+def make_sweep(repository, **kwargs):
+    params = {
+        "model_id": "gpt2",
+        "prompt": "Hello",
+        "space": {"temperature": [0.2, 0.8], "max_tokens": [5, 10]},
+        "use_gpu": False,
+    }
+    params.update(kwargs)
+    sweep = Sweep(**params)
+    sweep.repository = repository
+    return sweep
+
+
+def test_plan_grid_cells():
+    """Testa o produto cartesiano da grade."""
+    cells = plan_cells({"top_p": [0.5, 0.9], "max_tokens": [5, 10, 20]})
+    assert len(cells) == 6
+    assert cells[0] == {"max_tokens": 5, "top_p": 0.5}
+
+
+def test_plan_lhs_covers_every_stratum():
+    """Testa que o hipercubo latino usa cada faixa de cada parâmetro uma vez."""
+    cells = plan_cells(
+        {"max_tokens": {"min": 1, "max": 4}, "temperature": {"min": 0.0, "max": 1.0}},
+        strategy="lhs", samples=4, seed=3
+    )
+    assert sorted(cell["max_tokens"] for cell in cells) == [1, 2, 3, 4]
+    assert sorted(int(cell["temperature"] * 4) for cell in cells) == [0, 1, 2, 3]
+
+
+def test_plan_random_is_reproducible():
+    """Testa a amostragem aleatória com semente."""
+    space = {"top_p": {"min": 0.5, "max": 1.0}, "batch_size": [1, 2, 4]}
+    assert plan_cells(space, "random", 5, seed=1) == plan_cells(space, "random", 5, seed=1)
+
+
+def test_plan_rejects_invalid_space():
+    """Testa a validação de parâmetros e estratégias."""
+    with pytest.raises(ValueError, match="não suportados"):
+        plan_cells({"n_ctx": [512]})
+    with pytest.raises(ValueError, match="samples"):
+        plan_cells({"top_p": [0.5]}, strategy="lhs")
+    with pytest.raises(ValueError, match="Estratégia"):
+        plan_cells({"top_p": [0.5]}, strategy="bayes", samples=2)
+
+
+def test_sweep_runs_cells_with_single_load(repository, model_runner):
+    """Testa a execução das células como filhos do job pai, com uma carga."""
+    sweep = make_sweep(repository, space={"temperature": [0.2, 0.8], "batch_size": [1, 2]})
+    model_runner.generate_batch.return_value = [
+        GenerationResult(text="ok", prompt_tokens=3, completion_tokens=2)
+    ] * 2
+
+    summary = sweep.execute()
+
+    assert summary["total"] == 4
+    assert summary["completed"] == 4
+    # Todas as células usam o mesmo ModelRunner (carga idempotente)
+    assert model_runner.complete.call_count == 2
+    assert model_runner.generate_batch.call_count == 2
+    status = get_sweep(repository, sweep.job_id)
+    assert status["status"] == "COMPLETED"
+    assert {child["status"] for child in status["children"]} == {"COMPLETED"}
+    assert len(status["children"]) == 4
+    child = repository.get_benchmark(summary["cells"][0]["job_id"])
+    assert child["parent_id"] == sweep.job_id
+    # Células não entram na fila dos workers
+    repository.create_benchmark("orphan-cell", "gpt2", "text-generation", {}, {}, parent_id="x")
+    assert repository.claim_next_benchmark("w1") is None
+
+
+def test_sweep_resumes_after_crash(repository, model_runner):
+    """Testa a retomada a partir da primeira célula não concluída."""
+    sweep = make_sweep(repository)
+    sweep.submit()
+    done = {"index": 0, "job_id": "cell-0", "params": sweep.cells[0], "status": "COMPLETED",
+            "duration": 1.0, "time_to_first_token_s": 0.1, "tokens_per_second": 2.0}
+    repository.update_benchmark_status(sweep.job_id, "RUNNING", {"cells": [done]})
+    # Célula que estava em execução quando o processo caiu
+    repository.create_benchmark("cell-1", "gpt2", "text-generation", {}, {}, parent_id=sweep.job_id)
+    repository.update_benchmark_status("cell-1", "RUNNING")
+
+    summary = sweep.execute()
+
+    assert model_runner.complete.call_count == 3
+    assert summary["completed"] == 4
+    assert summary["cells"][0]["job_id"] == "cell-0"
+    assert repository.get_benchmark("cell-1")["status"] == "FAILED"
+
+
+def test_sweep_adopts_completed_cell_on_resume(repository, model_runner):
+    """Testa que a célula concluída antes da queda não é reexecutada."""
+    sweep = make_sweep(repository)
+    sweep.submit()
+    # O filho concluiu, mas o processo caiu antes de atualizar o resumo do pai
+    running = {"index": 1, "job_id": "cell-1", "params": sweep.cells[1], "status": "RUNNING"}
+    repository.update_benchmark_status(sweep.job_id, "RUNNING", {"cells": [running]})
+    repository.create_benchmark("cell-1", "gpt2", "text-generation", {}, {}, parent_id=sweep.job_id)
+    repository.update_benchmark_status("cell-1", "COMPLETED", {"tokens_per_second": 9.0})
+
+    summary = sweep.execute()
+
+    assert model_runner.complete.call_count == 3
+    assert summary["completed"] == 4
+    assert summary["cells"][1]["job_id"] == "cell-1"
+    assert summary["cells"][1]["tokens_per_second"] == 9.0
+    assert repository.get_benchmark("cell-1")["status"] == "COMPLETED"
+
+
+def test_get_sweep_pages_children(repository, model_runner):
+    """Testa a paginação dos filhos por cursor."""
+    sweep = make_sweep(repository)
+    sweep.execute()
+
+    first = get_sweep(repository, sweep.job_id, limit=3)
+    assert len(first["children"]) == 3
+    assert first["next_cursor"] is not None
+    rest = get_sweep(repository, sweep.job_id, limit=3, cursor=first["next_cursor"])
+    assert len(rest["children"]) == 1
+    assert rest["next_cursor"] is None
+    ids = {child["job_id"] for child in first["children"] + rest["children"]}
+    assert ids == {cell["job_id"] for cell in sweep.get_status()["results"]["cells"]}
+
+
+def test_sweep_rejects_unknown_options(repository):
+    """Testa a validação das opções comuns às células."""
+    with pytest.raises(ValueError, match="Opções"):
+        make_sweep(repository, options={"prompts": ["a"]})
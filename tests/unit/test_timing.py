@@ -0,0 +1,77 @@
+import pytest
+
+from llm_bench_local.core.timing import TokenTimer, TokenTimingStreamer, percentile
+
+
+class FakeClock:
+    def __init__(self, times):
+        self.times = list(times)
+
+    def __call__(self):
+        return self.times.pop(0)
+
+
+def test_percentile_interpolation():
+    """Testa o cálculo de percentis com interpolação linear."""
+    values = [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert percentile(values, 50) == 3.0
+    assert percentile(values, 0) == 1.0
+    assert percentile(values, 100) == 5.0
+    assert percentile(values, 95) == pytest.approx(4.8)
+    assert percentile([], 50) is None
+
+
+def test_token_timer_summary():
+    """Testa TTFT, latência entre tokens e vazão de decode."""
+    # start, 4 tokens, stop
+    timer = TokenTimer(clock=FakeClock([0.0, 0.5, 0.6, 0.7, 0.9, 1.0]))
+    timer.start()
+    for _ in range(4):
+        timer.record()
+    timer.stop()
+
+    summary = timer.summary()
+    assert summary["time_to_first_token_s"] == pytest.approx(0.5)
+    assert summary["inter_token_latency_p50_s"] == pytest.approx(0.1)
+    assert summary["inter_token_latency_p99_s"] == pytest.approx(0.2, abs=0.01)
+    # 3 intervalos de decode em 0.4s
+    assert summary["decode_tokens_per_second"] == pytest.approx(7.5)
+    assert summary["token_timestamps_s"] == pytest.approx([0.5, 0.6, 0.7, 0.9])
+
+
+def test_token_timer_first_token_callback():
+    """Testa o aviso de fim do prefill no primeiro token."""
+    calls = []
+    timer = TokenTimer(on_first_token=lambda: calls.append(timer.token_count))
+    timer.start()
+    timer.record()
+    timer.record()
+
+    assert calls == [1]
+
+
+def test_token_timer_without_tokens():
+    """Testa o resumo quando nenhum token foi emitido."""
+    timer = TokenTimer()
+    timer.start()
+    timer.stop()
+
+    summary = timer.summary()
+    assert summary["time_to_first_token_s"] is None
+    assert summary["decode_tokens_per_second"] is None
+    assert summary["token_timestamps_s"] == []
+
+
+def test_streamer_skips_prompt_tokens():
+    """Testa que o streamer ignora a primeira chamada (ids do prompt)."""
+    timer = TokenTimer()
+    timer.start()
+    streamer = TokenTimingStreamer(timer)
+
+    streamer.put([[1, 2, 3, 4]])
+    streamer.put([5])
+    streamer.put([6])
+    streamer.end()
+
+    assert timer.token_count == 2
+    assert timer.end_time is not None
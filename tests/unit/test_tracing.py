@@ -0,0 +1,71 @@
+import threading
+
+from llm_bench_local.core.tracing import current_trace, span, start_trace, traced
+
+
+def test_span_without_trace_is_noop():
+    """Testa que spans fora de um trace não registram nada."""
+    assert current_trace() is None
+    with span("generate") as current:
+        assert current is None
+
+
+def test_spans_are_nested_and_summed():
+    """Testa o aninhamento e a soma das durações por fase."""
+    with start_trace("job-1") as trace:
+        with span("run", mode="single"):
+            with span("generate", "model"):
+                pass
+            with span("generate", "model"):
+                pass
+    assert current_trace() is None
+
+    run, first, second = trace.spans
+    assert run.depth == 0 and first.depth == 1 and second.depth == 1
+    assert run.args == {"mode": "single"}
+    assert first.start >= run.start and second.end <= run.end
+
+    phases = trace.phase_durations()
+    assert set(phases) == {"run", "generate"}
+    assert phases["generate"] == first.duration + second.duration
+
+
+def test_traced_decorator():
+    """Testa o decorator que registra cada chamada como span."""
+    @traced("db.query", "db")
+    def query(value):
+        return value * 2
+
+    assert query(2) == 4
+    with start_trace("job-2") as trace:
+        assert query(3) == 6
+    assert [(s.name, s.category) for s in trace.spans] == [("db.query", "db")]
+
+
+def test_trace_is_not_shared_with_other_threads():
+    """Testa que threads sem o contexto do job não gravam no trace."""
+    with start_trace("job-3") as trace:
+        worker = threading.Thread(target=lambda: span("other").__enter__())
+        worker.start()
+        worker.join()
+    assert trace.spans == []
+
+
+def test_chrome_trace_export():
+    """Testa o formato Chrome trace-event (eventos completos em microssegundos)."""
+    with start_trace("job-4") as trace:
+        with span("model.load", "model", model_id="gpt2"):
+            pass
+
+    exported = trace.to_chrome()
+    assert exported["otherData"]["trace_id"] == "job-4"
+    complete = [e for e in exported["traceEvents"] if e["ph"] == "X"]
+    metadata = {e["name"] for e in exported["traceEvents"] if e["ph"] == "M"}
+    assert metadata == {"process_name", "thread_name"}
+    assert len(complete) == 1
+    event = complete[0]
+    assert event["name"] == "model.load"
+    assert event["cat"] == "model"
+    assert event["args"] == {"model_id": "gpt2"}
+    assert event["ts"] >= 0 and event["dur"] >= 0
+    assert event["tid"] == threading.get_ident()